@@ -49,4 +49,22 @@ root_agent = Agent(
             function_calling_config=types.FunctionCallingConfig(mode="NONE")
         ),
     ),
-)
\ No newline at end of file
+)
+
+# --- Batched requests: several candidates with shared targets in one call ---
+# Same instructions plus the batch input/output contract, so that the long prompt and the
+# targets are sent once per batch rather than once per candidate.
+with open(os.path.join(_PROMPTS_DIR, "batch_agent.prompt"), "r", encoding="utf-8") as f:
+    _BATCH_PROMPT_INSTRUCTION = _PROMPT_INSTRUCTION + "\n\n" + f.read()
+
+batch_agent = Agent(
+    model=root_agent.model,
+    name="batch_agent",
+    description="Evaluates several PP elastomer formulations against shared targets; returns one JSON object only.",
+    instruction=_BATCH_PROMPT_INSTRUCTION,
+    input_schema=None,
+    output_schema=None,
+    tools=TOOLS,
+    # One output budget for every candidate of the batch.
+    generate_content_config=root_agent.generate_content_config.model_copy(update={"max_output_tokens": 32768}),
+)
@@ -1,7 +1,7 @@
 # evaluator/matsi_property_evaluator/eval_schema.py
 from __future__ import annotations
 from pydantic import BaseModel, Field
-from typing import Literal, Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any, List
 
 class EvalInput(BaseModel):
     """Structured input for the evaluator agent."""
@@ -14,6 +14,22 @@ class EvalInput(BaseModel):
     previous_scores: Optional[Dict[str, Any]] = Field(default=None, description="Last advisory scores JSON")
     meta: Dict[str, Any] = Field(default_factory=dict, description="Any extra bookkeeping info")
 
+class EvalCandidate(BaseModel):
+    """One candidate of a batched request (an EvalInput without the shared fields)."""
+    sample_id: str = Field(description="Row/sample identifier, repeated in the candidate's scores")
+    predictions: Dict[str, Optional[float]] = Field(description="Predicted properties for this candidate")
+    process: Dict[str, Optional[float]] = Field(description="Process settings for this candidate")
+    previous_report_md: Optional[str] = Field(default=None, description="Last evaluator report as markdown")
+    previous_scores: Optional[Dict[str, Any]] = Field(default=None, description="Last advisory scores JSON")
+    meta: Dict[str, Any] = Field(default_factory=dict, description="Any extra bookkeeping info")
+
+class EvalBatchInput(BaseModel):
+    """Structured input for a batched request: several candidates evaluated against shared targets."""
+    cycle_id: str = Field(description="Cycle/run identifier")
+    targets_constraints: Dict[str, Any] = Field(description="Target values and constraints shared by all candidates")
+    candidates: List[EvalCandidate] = Field(description="The candidates, each scored on its own")
+    meta: Dict[str, Any] = Field(default_factory=dict, description="Any extra bookkeeping info")
+
 class PropertyScore(BaseModel):
     """Plausibility score for a single predicted property."""
     score: float = Field(..., description="Plausibility score for this property, from 0.0 to 1.0.", ge=0, le=1)
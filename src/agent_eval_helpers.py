@@ -1,10 +1,14 @@
 # src/agent_eval_helpers.py
 from __future__ import annotations
+import asyncio
 import os
 import json
+import random
+import re
 import shutil
 from pathlib import Path
-from typing import Dict, Any, List
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
 import logging
@@ -29,8 +33,14 @@ except (FileNotFoundError, ImportError):
 logger = logging.getLogger(__name__)
 
 # Adapter that actually runs the agent:
-from src.run_evaluator_with_adk import evaluate_context
-from evaluator.matsi_property_evaluator.eval_schema import EvalInput
+from src.run_evaluator_with_adk import EvaluatorClient, get_evaluator_client
+from src.rate_limiter import RateLimiter, shared_rate_limiter
+from evaluator.matsi_property_evaluator.agent import root_agent
+from evaluator.matsi_property_evaluator.eval_schema import EvalInput, EvalScores
+from src.evaluator.scorer import evaluate_locally, score_rows, write_score_artifacts
+
+# Evaluator backends selectable per run (see make_evaluator).
+EVALUATORS = ("agent", "local")
 
 # This map is now more critical. It bridges the generic property names from spec sheets
 # to the specific, condition-aware canonical names used by the models and optimizer.
@@ -216,33 +226,242 @@ def _pre_flight_check(row: pd.Series, targets: Dict[str, Any], idx: int):
             print(f"      - Property '{prop}' has normalized error: {norm_err:+.1%}")
 
 
-def evaluate_with_agent(
+# Runner failures worth retrying: quota/rate limits, overloaded or unreachable backends, timeouts.
+TRANSIENT_ERROR_RE = re.compile(
+    r"\b(?:429|500|502|503|504)\b|RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED|Timeout|"
+    r"rate.?limit|quota|temporar|connection (?:reset|refused|aborted)",
+    re.IGNORECASE,
+)
+_PROMPT_CHARS = len(str(getattr(root_agent, "instruction", "") or ""))
+
+
+def _is_transient(run_status: Optional[str], run_info: Any) -> bool:
+    """Whether a failed call is a runner error worth retrying (not an invalid agent answer)."""
+    return run_status == "err" and bool(TRANSIENT_ERROR_RE.search(str(run_info or "")))
+
+
+def _backoff_s(attempt: int, retry_base_s: float) -> float:
+    return min(retry_base_s * 2 ** attempt, 60.0) * random.uniform(0.5, 1.5)
+
+
+def _estimate_tokens(ctx: Dict[str, Any]) -> int:
+    """Rough input tokens of one call: the agent instructions plus the payload, ~4 characters each."""
+    return (_PROMPT_CHARS + len(json.dumps(ctx))) // 4
+
+
+async def _evaluate_row_async(client: EvaluatorClient, ctx: Dict[str, Any], row_dir: str,
+                              limiter: Optional[RateLimiter], max_retries: int, retry_base_s: float,
+                              idx: Any) -> Dict[str, Any]:
+    """
+    One row's evaluate_context result, retrying transient failures with exponential backoff.
+    Cache hits cost neither a call nor rate-limit budget.
+    """
+    cached = client.lookup(ctx, row_dir)
+    if cached is not None:
+        return cached
+    tokens = _estimate_tokens(ctx)
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        out = await client.evaluate(ctx, row_dir, lookup=False)
+        score = out.get("score") or {}
+        if attempt == max_retries or "error" not in score or not _is_transient(score.get("run_status"), score.get("run_info")):
+            return out
+        delay = _backoff_s(attempt, retry_base_s)
+        print(f"      -> Row {idx}: transient failure ({score.get('run_info')}). "
+              f"Retry {attempt + 1}/{max_retries} in {delay:.1f}s.")
+        await asyncio.sleep(delay)
+    return out
+
+
+async def _evaluate_batch_async(client: EvaluatorClient, ctxs: List[Dict[str, Any]], row_dirs: List[str],
+                                batch_dir: str, limiter: Optional[RateLimiter], max_retries: int,
+                                retry_base_s: float) -> List[Optional[Dict[str, Any]]]:
+    """
+    The evaluate_context results of several rows from one batched request (None for the rows the
+    batch could not score), retrying transient failures of the whole request like single rows.
+    Cached rows are left out of the request.
+    """
+    results = [client.lookup(ctx, row_dir, client.batch_runner) for ctx, row_dir in zip(ctxs, row_dirs)]
+    todo = [k for k, r in enumerate(results) if r is None]
+    if not todo:
+        return results
+    # The instructions and targets are sent once for the whole batch.
+    tokens = (_PROMPT_CHARS + len(json.dumps([ctxs[k] for k in todo]))) // 4
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        out = await client.evaluate_batch([ctxs[k] for k in todo], [row_dirs[k] for k in todo], batch_dir,
+                                          lookup=False)
+        if attempt == max_retries or not _is_transient(out["run_status"], out["run_info"]):
+            break
+        delay = _backoff_s(attempt, retry_base_s)
+        print(f"      -> {os.path.basename(batch_dir)}: transient failure ({out['run_info']}). "
+              f"Retry {attempt + 1}/{max_retries} in {delay:.1f}s.")
+        await asyncio.sleep(delay)
+    for k, result in zip(todo, out["results"]):
+        results[k] = result
+    return results
+
+
+def _row_from_output(idx: Any, row: pd.Series, out: Dict[str, Any], row_dir: str, failed_eval_dir: str,
+                     targets_constraints: Dict[str, Any], run_identifier: str,
+                     local_scores: Optional[EvalScores] = None) -> Dict[str, Any]:
+    """
+    The output row for one evaluation: its scores, or if it failed, local_scores (the
+    programmatic evaluator's) when given and penalized fallbacks otherwise.
+    """
+    # --- Handle evaluation result (success or failure) ---
+    score = out.get("score") or {}
+    if "error" in score:
+        error_reason = score.get('error', 'Unknown')
+        print(f"      -> Evaluation failed for row {idx}. Reason: {error_reason}. Moving artifacts.")
+        logger.warning(f"Agent evaluation failed for row {idx} (run: {run_identifier}). Reason: {error_reason}")
+        # Move the failed evaluation directory for later inspection
+        try:
+            # Use a unique name in the failed directory to avoid collisions from different runs
+            failed_row_dir_name = f"row_{idx:04d}_{run_identifier}"
+            shutil.move(row_dir, os.path.join(failed_eval_dir, failed_row_dir_name))
+        except Exception as e:
+            print(f"      -> Warning: Could not move failed evaluation directory: {e}")
+
+        if local_scores is not None:
+            print(f"      -> Row {idx} scored by the local evaluator instead.")
+            write_score_artifacts(row_dir, local_scores)
+            return {
+                **row.to_dict(),
+                **{f"{k}_score": v.score for k, v in (local_scores.property_scores or {}).items()},
+                "literature_consistency_score": local_scores.literature_consistency_score,
+                "realism_penalty": local_scores.realism_penalty,
+                "recommended_bo_weight": local_scores.recommended_bo_weight,
+                "confidence": local_scores.confidence,
+                "evaluation_status": "fallback"
+            }
+
+        # Append a row with fallback scores to keep the data point but penalize it
+        failed_row = row.to_dict()
+        failed_row.update({
+            "literature_consistency_score": 0.1,
+            "realism_penalty": 0.1,
+            "recommended_bo_weight": 0.0, # Give it a very low score for the optimizer
+            "confidence": "Error",
+            "evaluation_status": "failed"
+        })
+        # Add nulls for property scores
+        for prop in targets_constraints.keys():
+            failed_row[f"{prop}_score"] = None
+        return failed_row
+
+    # --- Process successful evaluation ---
+    flags = []
+    # --- Flatten property-level scores for easier analysis ---
+    property_scores = score.get("property_scores") or {}
+    flat_prop_scores = {}
+    for prop_name, prop_data in property_scores.items():
+        if isinstance(prop_data, dict):
+            flat_prop_scores[f"{prop_name}_score"] = prop_data.get("score")
+    # 1. Unrealistic physics check
+    if row.get('Izod_m20_kJm2', 0) > 25 and row.get('elastomer_wtpct', 0) < 5:
+        flags.append("unrealistic_izod_without_elastomer")
+
+    # 2. Deviation from baseline check
+    if BASELINE_MODEL and THRESHOLDS and baseline_predict_row:
+        base_preds = baseline_predict_row(row, BASELINE_MODEL)
+        for prop, thresh in THRESHOLDS.items():
+            if prop in row and f"{prop}_base" in base_preds:
+                pred_val = row.get(prop)
+                base_val = base_preds.get(f"{prop}_base")
+                if pred_val is not None and base_val is not None and abs(pred_val - base_val) > thresh:
+                    flags.append(f"large_delta_from_baseline_for_{prop}")
+
+    if flags:
+        if "extras" not in score: score["extras"] = {}
+        score["extras"]["flags"] = list(set(score.get("extras", {}).get("flags", []) + flags))
+        if "recommended_bo_weight" in score and score["recommended_bo_weight"] is not None:
+            score["recommended_bo_weight"] *= 0.5 # Penalize by 50%
+
+    # Pull scores and add fallbacks to prevent errors in the optimizer
+    lc_score = score.get("literature_consistency_score")
+    penalty = score.get("realism_penalty")
+    confidence = score.get("confidence")
+    rec_weight = score.get("recommended_bo_weight")
+
+    if rec_weight is None:
+        # Fallback calculation if agent fails to provide a valid weight.
+        # Use pessimistic defaults if other scores are also missing.
+        lc_score = lc_score if lc_score is not None else 0.5
+        penalty = penalty if penalty is not None else 0.5
+        confidence = confidence if confidence is not None else "Low"
+
+        # Align fallback logic with the agent's prompt instructions.
+        conf_scale = {"High": 1.0, "Medium": 0.65, "Low": 0.35}.get(confidence, 0.35)
+        rec_weight = max(0.0, min(1.0, (lc_score * penalty) * conf_scale))
+
+    return {
+        **row.to_dict(),
+        **flat_prop_scores,
+        "literature_consistency_score": lc_score,
+        "realism_penalty": penalty,
+        "recommended_bo_weight": rec_weight,
+        "confidence": confidence,
+        "evaluation_status": "success" # Add status for successful runs
+    }
+
+
+async def evaluate_with_agent_async(
     predictions_df: pd.DataFrame,
     process_vars: Dict[str, Any],
     targets_constraints: Dict[str, Any],
     out_dir: str,
     run_identifier: str,
+    concurrency: Optional[int] = None,
+    requests_per_min: Optional[float] = None,
+    tokens_per_min: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    client: Optional[EvaluatorClient] = None,
+    batch_size: Optional[int] = None,
+    local_fallback: Optional[bool] = None,
 ) -> pd.DataFrame:
     """
-    For each row in predictions_df, call the evaluator agent and attach scores as columns.
-    Returns a copy of predictions_df with added columns:
-        literature_consistency_score, realism_penalty, recommended_bo_weight, confidence
-    Also leaves per-row artifacts in out_dir/<row_idx>/{evaluation_report.md,scores.json}.
+    evaluate_with_agent, with up to `concurrency` rows evaluated at once (a semaphore; the
+    client's session pool is a second cap). Before each call the shared token-bucket limiter
+    books one request and the call's estimated input tokens against requests_per_min and
+    tokens_per_min. Runner failures that look transient (rate limits, 5xx, timeouts) are retried
+    up to max_retries times with jittered exponential backoff. Rows come back in the order of
+    predictions_df, whatever order the calls finish in.
+    batch_size > 1 packs that many consecutive rows into one request to the batch agent, so the
+    instructions and targets are sent once per batch; rows the batch leaves unscored (missing or
+    invalid items, or a failed request) are then evaluated on their own. Rows found in the
+    evaluation cache (src/evaluation_cache.py) cost neither a call nor rate-limit budget.
+    local_fallback scores the rows the agent failed on with the programmatic evaluator
+    (src/evaluator/scorer.py, evaluation_status "fallback") instead of the penalized defaults.
+    Unset arguments come from EVAL_CONCURRENCY (1), EVAL_RPM, EVAL_TPM (unlimited),
+    EVAL_MAX_RETRIES (3), EVAL_BATCH_SIZE (1) and EVAL_LOCAL_FALLBACK (0); EVAL_RETRY_BASE_S (2)
+    is the first backoff.
     """
+    concurrency = max(1, concurrency or int(os.getenv("EVAL_CONCURRENCY", "1")))
+    batch_size = max(1, batch_size or int(os.getenv("EVAL_BATCH_SIZE", "1")))
+    requests_per_min = requests_per_min or float(os.getenv("EVAL_RPM", "0")) or None
+    tokens_per_min = tokens_per_min or float(os.getenv("EVAL_TPM", "0")) or None
+    max_retries = int(os.getenv("EVAL_MAX_RETRIES", "3")) if max_retries is None else max_retries
+    retry_base_s = float(os.getenv("EVAL_RETRY_BASE_S", "2"))
+    if local_fallback is None:
+        local_fallback = os.getenv("EVAL_LOCAL_FALLBACK", "0").strip().lower() in ("1", "true", "yes", "on")
+    limiter = shared_rate_limiter(requests_per_min, tokens_per_min)
+    client = client or get_evaluator_client()
+
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     # Create a dedicated directory for failed evaluation artifacts for easier debugging
     # The directory is named with the run_identifier to keep failed runs organized.
     failed_eval_dir = os.path.join(os.path.dirname(out_dir), "failed_evaluations", run_identifier)
     os.makedirs(failed_eval_dir, exist_ok=True)
 
-    rows: List[Dict[str, Any]] = []
     total_rows = len(predictions_df)
-    print(f"\nStarting agent evaluation for {total_rows} candidates...")
+    print(f"\nStarting agent evaluation for {total_rows} candidates"
+          + (f" ({concurrency} at a time)..." if concurrency > 1 else "..."))
 
+    jobs = []
     for i, (idx, row) in enumerate(predictions_df.iterrows()):
-        row_dir = os.path.join(out_dir, f"row_{idx:04d}")
-        print(f"\n  - Evaluating row {i+1}/{total_rows} (index: {idx})...", end="", flush=True)
-
         # Add a pre-flight check to see which properties are furthest from target.
         # This helps diagnose agent failures caused by token limits from long explanations.
         _pre_flight_check(row, targets_constraints, idx)
@@ -251,100 +470,99 @@ def evaluate_with_agent(
             # Build the evaluator context payload
             ctx = _build_agent_context_dict(row, process_vars, targets_constraints, run_identifier)
         except (ValueError, TypeError) as e:
-            print(" ERROR (validation)")
+            print(f"  - Row {idx}: ERROR (validation)")
             logger.error(f"Validation error for row {idx}: {e}")
             continue
         except Exception as e:
-            print(" ERROR (payload build)")
+            print(f"  - Row {idx}: ERROR (payload build)")
             print(f"Skipping row {idx} due to payload build error: {e}")
             continue
+        jobs.append((i, idx, row, ctx, os.path.join(out_dir, f"row_{idx:04d}")))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(i: int, idx: Any, ctx: Dict[str, Any], row_dir: str) -> Dict[str, Any]:
+        async with semaphore:
+            print(f"\n  - Evaluating row {i+1}/{total_rows} (index: {idx})...", flush=True)
+            out = await _evaluate_row_async(client, ctx, row_dir, limiter, max_retries, retry_base_s, idx)
+            print(f"  - Row {idx} done" + (" (cached)." if out.get("cached") else "."))
+            return out
+
+    async def run_batch(chunk: List[tuple]) -> List[Dict[str, Any]]:
+        if len(chunk) == 1:
+            i, idx, _, ctx, row_dir = chunk[0]
+            return [await run(i, idx, ctx, row_dir)]
+        first, last = chunk[0][1], chunk[-1][1]
+        async with semaphore:
+            print(f"\n  - Evaluating rows {chunk[0][0]+1}-{chunk[-1][0]+1}/{total_rows} in one batch...", flush=True)
+            results = await _evaluate_batch_async(
+                client, [job[3] for job in chunk], [job[4] for job in chunk],
+                os.path.join(out_dir, f"batch_{first:04d}_{last:04d}"), limiter, max_retries, retry_base_s)
+        missing = [k for k, r in enumerate(results) if r is None]
+        print(f"  - Batch {first}-{last} done: {len(chunk) - len(missing)}/{len(chunk)} scored"
+              + (f"; evaluating row(s) {[chunk[k][1] for k in missing]} on their own." if missing else "."))
+        singles = await asyncio.gather(*(run(chunk[k][0], chunk[k][1], chunk[k][3], chunk[k][4]) for k in missing))
+        for k, out in zip(missing, singles):
+            results[k] = out
+        return results
+
+    if batch_size > 1:
+        chunks = [jobs[k:k + batch_size] for k in range(0, len(jobs), batch_size)]
+        outs = [out for chunk_outs in await asyncio.gather(*(run_batch(c) for c in chunks)) for out in chunk_outs]
+    else:
+        outs = await asyncio.gather(*(run(i, idx, ctx, row_dir) for i, idx, _, ctx, row_dir in jobs))
+    n_cached = sum(bool(out and out.get("cached")) for out in outs)
+    if n_cached:
+        print(f"\n{n_cached}/{len(outs)} evaluation(s) served from the evaluation cache.")
+    local_scores: Dict[Any, EvalScores] = {}
+    failed = [job[1] for job, out in zip(jobs, outs) if "error" in ((out or {}).get("score") or {})]
+    if local_fallback and failed:
+        local_scores = score_rows(predictions_df, process_vars, targets_constraints, indices=failed)
+    rows: List[Dict[str, Any]] = [
+        _row_from_output(idx, row, out, row_dir, failed_eval_dir, targets_constraints, run_identifier,
+                         local_scores.get(idx))
+        for (_, idx, row, _, row_dir), out in zip(jobs, outs)
+    ]
+    return pd.DataFrame(rows)
 
-        out = evaluate_context(ctx, row_dir)
-        print(" done.")
 
-        # --- Handle evaluation result (success or failure) ---
-        score = out.get("score") or {}
-        if "error" in score:
-            error_reason = score.get('error', 'Unknown')
-            print(f"      -> Evaluation failed for row {idx}. Reason: {error_reason}. Moving artifacts.")
-            logger.warning(f"Agent evaluation failed for row {idx} (run: {run_identifier}). Reason: {error_reason}")
-            # Move the failed evaluation directory for later inspection
-            try:
-                # Use a unique name in the failed directory to avoid collisions from different runs
-                failed_row_dir_name = f"row_{idx:04d}_{run_identifier}"
-                shutil.move(row_dir, os.path.join(failed_eval_dir, failed_row_dir_name))
-            except Exception as e:
-                print(f"      -> Warning: Could not move failed evaluation directory: {e}")
-
-            # Append a row with fallback scores to keep the data point but penalize it
-            failed_row = row.to_dict()
-            failed_row.update({
-                "literature_consistency_score": 0.1,
-                "realism_penalty": 0.1,
-                "recommended_bo_weight": 0.0, # Give it a very low score for the optimizer
-                "confidence": "Error",
-                "evaluation_status": "failed"
-            })
-            # Add nulls for property scores
-            for prop in targets_constraints.keys():
-                failed_row[f"{prop}_score"] = None
-            
-            rows.append(failed_row)
-            continue # Move to the next row
-
-        # --- Process successful evaluation ---
-        flags = []
-        # --- Flatten property-level scores for easier analysis ---
-        property_scores = score.get("property_scores") or {}
-        flat_prop_scores = {}
-        for prop_name, prop_data in property_scores.items():
-            if isinstance(prop_data, dict):
-                flat_prop_scores[f"{prop_name}_score"] = prop_data.get("score")
-        # 1. Unrealistic physics check
-        if row.get('Izod_m20_kJm2', 0) > 25 and row.get('elastomer_wtpct', 0) < 5:
-            flags.append("unrealistic_izod_without_elastomer")
-
-        # 2. Deviation from baseline check
-        if BASELINE_MODEL and THRESHOLDS and baseline_predict_row:
-            base_preds = baseline_predict_row(row, BASELINE_MODEL)
-            for prop, thresh in THRESHOLDS.items():
-                if prop in row and f"{prop}_base" in base_preds:
-                    pred_val = row.get(prop)
-                    base_val = base_preds.get(f"{prop}_base")
-                    if pred_val is not None and base_val is not None and abs(pred_val - base_val) > thresh:
-                        flags.append(f"large_delta_from_baseline_for_{prop}")
-        
-        if flags:
-            if "extras" not in score: score["extras"] = {}
-            score["extras"]["flags"] = list(set(score.get("extras", {}).get("flags", []) + flags))
-            if "recommended_bo_weight" in score and score["recommended_bo_weight"] is not None:
-                score["recommended_bo_weight"] *= 0.5 # Penalize by 50%
-
-        # Pull scores and add fallbacks to prevent errors in the optimizer
-        lc_score = score.get("literature_consistency_score")
-        penalty = score.get("realism_penalty")
-        confidence = score.get("confidence")
-        rec_weight = score.get("recommended_bo_weight")
-
-        if rec_weight is None:
-            # Fallback calculation if agent fails to provide a valid weight.
-            # Use pessimistic defaults if other scores are also missing.
-            lc_score = lc_score if lc_score is not None else 0.5
-            penalty = penalty if penalty is not None else 0.5
-            confidence = confidence if confidence is not None else "Low"
-            
-            # Align fallback logic with the agent's prompt instructions.
-            conf_scale = {"High": 1.0, "Medium": 0.65, "Low": 0.35}.get(confidence, 0.35)
-            rec_weight = max(0.0, min(1.0, (lc_score * penalty) * conf_scale))
-
-        rows.append({
-            **row.to_dict(),
-            **flat_prop_scores,
-            "literature_consistency_score": lc_score,
-            "realism_penalty": penalty,
-            "recommended_bo_weight": rec_weight,
-            "confidence": confidence,
-            "evaluation_status": "success" # Add status for successful runs
-        })
+def evaluate_with_agent(
+    predictions_df: pd.DataFrame,
+    process_vars: Dict[str, Any],
+    targets_constraints: Dict[str, Any],
+    out_dir: str,
+    run_identifier: str,
+    concurrency: Optional[int] = None,
+    requests_per_min: Optional[float] = None,
+    tokens_per_min: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    client: Optional[EvaluatorClient] = None,
+    batch_size: Optional[int] = None,
+    local_fallback: Optional[bool] = None,
+) -> pd.DataFrame:
+    """
+    For each row in predictions_df, call the evaluator agent and attach scores as columns.
+    Returns a copy of predictions_df with added columns:
+        literature_consistency_score, realism_penalty, recommended_bo_weight, confidence
+    Also leaves per-row artifacts in out_dir/<row_idx>/{evaluation_report.md,scores.json}.
+    Runs evaluate_with_agent_async to completion (see there for concurrency, rate limits,
+    retries and batched prompts); by default rows are evaluated one at a time.
+    """
+    return asyncio.run(evaluate_with_agent_async(
+        predictions_df, process_vars, targets_constraints, out_dir, run_identifier, concurrency=concurrency,
+        requests_per_min=requests_per_min, tokens_per_min=tokens_per_min, max_retries=max_retries, client=client,
+        batch_size=batch_size, local_fallback=local_fallback))
 
-    return pd.DataFrame(rows)
+
+def make_evaluator(name: str = "agent", local_fallback: bool = False) -> Callable[..., pd.DataFrame]:
+    """
+    The evaluator backend `name` (one of EVALUATORS), with evaluate_with_agent's signature:
+    "agent" calls the evaluator agent, "local" scores every row with the deterministic
+    programmatic evaluator (no LLM call). local_fallback makes the agent backend score the rows
+    it failed on locally.
+    """
+    if name == "local":
+        return evaluate_locally
+    if name != "agent":
+        raise ValueError(f"Unknown evaluator '{name}'. Expected one of {EVALUATORS}.")
+    return partial(evaluate_with_agent, local_fallback=True) if local_fallback else evaluate_with_agent
@@ -9,7 +9,8 @@ project_root = Path(__file__).resolve().parents[2]
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from src.bridge_formulations_to_properties import compute_row_properties, load_ingredient_catalog
+from src.bridge_formulations_to_properties import HybridModel, load_ingredient_catalog
+from src.prediction_cache import get_default_cache
 
 # Load catalog once at module level for efficiency
 try:
@@ -20,15 +21,16 @@ except FileNotFoundError:
     print("Warning: Ingredient library not found for baseline model. Predictions will fail.")
     CATALOG = {}
 
-def load_baseline_model(path: str | Path = "data/processed/pp_elastomer_TSE_hybrid_model_v1.json") -> dict:
-    """Loads the baseline model JSON, resolving path relative to project root."""
+def load_baseline_model(path: str | Path = "data/processed/pp_elastomer_TSE_hybrid_model_v1.json") -> HybridModel:
+    """Loads and compiles the baseline model JSON, resolving path relative to project root."""
     # Make path absolute if it's relative
     if not Path(path).is_absolute():
         path = project_root / path
-    with open(path, "r") as f:
-        return json.load(f)
+    return HybridModel.from_json(str(path))
 
-def baseline_predict_row(row: pd.Series, model: dict) -> dict:
+BASELINE_PROPS = ["MFI_g10min", "sigma_y_MPa", "E_GPa", "Izod_m20_kJm2", "HDT_C"]
+
+def baseline_predict_row(row: pd.Series, model: HybridModel | dict) -> dict:
     """
     Runs the baseline physics-based model for a given formulation row.
     This is a proxy to the main property prediction logic.
@@ -36,18 +38,21 @@ def baseline_predict_row(row: pd.Series, model: dict) -> dict:
     if not CATALOG:
         return {}
         
-    row_dict = row.to_dict()
-    preds = compute_row_properties(row_dict, model, CATALOG, row_dict)
+    # Process settings come from the row itself; repeated recipes are served from the cache.
+    preds = get_default_cache().predict(pd.DataFrame([row.to_dict()]), model, CATALOG, process=None)
     
     return {
         f"{k}_base": v
-        for k, v in preds.items()
-        if k in ["MFI_g10min", "sigma_y_MPa", "E_GPa", "Izod_m20_kJm2", "HDT_C"]
+        for k, v in preds.iloc[0].items()
+        if k in BASELINE_PROPS
     }
 
-def attach_baseline(df: pd.DataFrame, model: dict) -> pd.DataFrame:
-    """Applies baseline_predict_row to each row of a DataFrame."""
-    if df.empty:
+def attach_baseline(df: pd.DataFrame, model: HybridModel | dict) -> pd.DataFrame:
+    """
+    Adds `<prop>_base` columns for the whole DataFrame in one vectorized bridge call.
+    Process settings are read from the DataFrame's own columns, as in baseline_predict_row.
+    """
+    if df.empty or not CATALOG:
         return df
-    preds = df.apply(lambda r: baseline_predict_row(r, model), axis=1, result_type="expand")
-    return pd.concat([df, preds], axis=1)
+    preds = get_default_cache().predict(df, model, CATALOG, process=None)[BASELINE_PROPS]
+    return pd.concat([df, preds.add_suffix("_base")], axis=1)
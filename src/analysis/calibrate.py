@@ -0,0 +1,391 @@
+"""
+Calibration of the hybrid model's `priors` against measured data.
+
+Measured rows are parsed into bridge inputs once (prepare_batch_inputs). After that every residual
+vector, parameter Jacobian (complex step) and multi-start screen is a single broadcast batch_core
+call, with parameter sets along a leading axis. Residuals are weighted by the model's
+`noise_model` sigmas. Restarts run in parallel processes, and the best fit is written as a new,
+versioned model JSON with the fitted values as point estimates and the priors narrowed around them.
+
+    python -m src.analysis.calibrate --data data/formulations/evercap_synthetic.csv --params kD,alpha_MFI
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import argparse
+import copy
+import json
+import re
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares, minimize
+
+# Add project root to path to allow absolute imports
+project_root = Path(__file__).resolve().parents[2]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.bridge_formulations_to_properties import (
+    NOISE_KEY_MAP, HybridModel, as_hybrid_model, batch_core, load_ingredient_catalog, model_params,
+    prepare_batch_inputs, read_json,
+)
+
+# Model outputs a measurement can be fitted against.
+FIT_FIELDS = ["E_GPa", "MFI_g10min", "sigma_y_MPa", "Izod_23_kJm2", "Izod_m20_kJm2", "HDT_C",
+              "rho_gcc", "eps_y_pct", "Gardner_J", "Xc"]
+
+# Measured-data column -> (model output, scale to the model's units), for lab/synthetic sheets
+# that do not use the bridge's column names.
+MEASURED_ALIASES = {
+    "Melt Flow Index (g/10 min)": ("MFI_g10min", 1.0),
+    "Young's Modulus (GPa)": ("E_GPa", 1.0),
+    "Tensile Strength (MPa)": ("sigma_y_MPa", 1.0),
+    "Impact Strength (kJ/m²)": ("Izod_23_kJm2", 1.0),
+    "Density (g/cc)": ("rho_gcc", 1.0),
+    "Crystallinity (%)": ("Xc", 0.01),
+}
+
+# Narrowest calibrated prior, as a fraction of the original range: Monte Carlo sampling
+# (sample_parameters) keeps some spread even when the fit's standard error is tiny.
+MIN_PRIOR_FRACTION = 0.05
+
+# Process settings assumed when the data carries none (same as pipeline.evaluate_and_rank).
+DEFAULT_CALIBRATION_PROCESS = {"Torque_Nm": 100.0, "N_rps": 5.0, "Q_kgh": 5.0, "Tm_C": 220.0}
+
+def evercap_to_bridge(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Maps the evercap sheet layout (rHDPE/virgin %, Filler_1..3, Additive_1..3) onto the bridge's
+    formulation columns: talc goes to talc_wtpct, other fillers to filler_name/filler_wtpct and
+    additives to the stabilizer slot.
+    """
+    def num(col):
+        return pd.to_numeric(df[col], errors="coerce").fillna(0.0) if col in df.columns else pd.Series(0.0, index=df.index)
+
+    out = pd.DataFrame(index=df.index)
+    out["baseA_name"], out["baseA_wtpct"] = "rHDPE", num("rHDPE (%)")
+    out["baseB_name"], out["baseB_wtpct"] = "Virgin HDPE", num("Virgin HDPE (%)")
+    talc = pd.Series(0.0, index=df.index)
+    filler = pd.Series(0.0, index=df.index)
+    filler_name = pd.Series("", index=df.index, dtype=object)
+    for i in (1, 2, 3):
+        names = df.get(f"Filler_{i}", pd.Series("", index=df.index)).fillna("").astype(str)
+        amount = num(f"F{i}_Content (%)")
+        is_talc = names.str.contains("talc", case=False)
+        talc += amount.where(is_talc, 0.0)
+        other = ~is_talc & (names != "")
+        filler += amount.where(other, 0.0)
+        filler_name = filler_name.where(filler_name != "", names.where(other, ""))
+    out["filler_name"], out["filler_wtpct"], out["talc_wtpct"] = filler_name, filler, talc
+    additives = sum(num(f"A{i}_Content (%)") for i in (1, 2, 3))
+    out["stabilizer_name"] = df.get("Additive_1", pd.Series("", index=df.index)).fillna("")
+    out["stabilizer_wtpct"] = additives
+    out["elastomer_wtpct"] = 0.0
+    return out
+
+def load_measurements(data: Union[str, Path, pd.DataFrame]):
+    """
+    Returns (formulations, targets): bridge-layout formulation columns and the measured values of
+    FIT_FIELDS (NaN where not measured), both aligned to the input rows.
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.read_csv(data)
+    formulations = evercap_to_bridge(df) if "rHDPE (%)" in df.columns else df
+    targets = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        field, scale = MEASURED_ALIASES.get(col, (col, 1.0))
+        if field in FIT_FIELDS and field not in targets.columns:
+            targets[field] = pd.to_numeric(df[col], errors="coerce") * scale
+    return formulations, targets
+
+def noise_sigmas(model: HybridModel, overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Per-output residual scale from the model's noise_model (keys mapped to output names), plus overrides."""
+    sig = {NOISE_KEY_MAP.get(k, k): float(v) for k, v in model.spec.get("noise_model", {}).items()}
+    sig.update({k: float(v) for k, v in (overrides or {}).items()})
+    return {k: v for k, v in sig.items() if v > 0}
+
+
+class CalibrationProblem:
+    """
+    Weighted least-squares problem over a subset of the model's priors.
+
+    `residuals(theta)` is (prediction - measurement) / sigma over every measured (row, output) pair,
+    plus an optional pull towards the prior midpoints (`regularization`, in units of the prior width).
+    Bounds are the prior ranges, or the original ranges recorded by an earlier calibration.
+    params=None fits every prior that influences the measured outputs.
+    """
+
+    def __init__(self,
+                 model: Union[Dict[str, Any], HybridModel],
+                 catalog: Dict[str, Dict[str, Any]],
+                 formulations: pd.DataFrame,
+                 targets: pd.DataFrame,
+                 params: Optional[Sequence[str]] = None,
+                 process: Optional[Dict[str, Any]] = None,
+                 sigmas: Optional[Dict[str, float]] = None,
+                 regularization: float = 0.0):
+        self.model = as_hybrid_model(model)
+        spec_params = self.model.spec.get("parameters", {})
+        priors = spec_params.get("priors", {})
+        bounds = {**priors, **self.model.spec.get("calibration", {}).get("bounds", {})}
+        sig = noise_sigmas(self.model, sigmas)
+
+        self.inp = prepare_batch_inputs(formulations, catalog, process)
+        self.n = len(formulations)
+        self.fields = [f for f in FIT_FIELDS if f in targets.columns and f in sig and targets[f].notna().any()]
+        if not self.fields:
+            raise ValueError("No measured column matches a model output with a noise_model sigma "
+                             f"(measured: {list(targets.columns)}, sigmas: {sorted(sig)}).")
+        self.y = targets[self.fields].to_numpy(dtype=float).T  # (fields, rows)
+        self.mask = np.isfinite(self.y)
+        self.sigma = np.array([sig[f] for f in self.fields])[:, None]
+        self.row_sigma = np.broadcast_to(self.sigma, self.y.shape)[self.mask]
+        self.regularization = float(regularization)
+        self.base = model_params(self.model)
+
+        names = list(params) if params else [k for k in priors if k in self.base]
+        unknown = [k for k in names if k not in priors or k not in self.base]
+        if unknown:
+            raise ValueError(f"Not calibratable (no prior range): {', '.join(unknown)}")
+        self._set_params(names, bounds)
+        if not params:
+            # Drop priors the measured outputs do not depend on; they cannot be identified.
+            J = self.jacobian(self.x0)
+            keep = [name for j, name in enumerate(self.names) if np.any(J[:, j] != 0)]
+            self._set_params(keep, bounds)
+
+    def _set_params(self, names: List[str], bounds: Dict[str, Any]) -> None:
+        self.names = list(names)
+        self.lower = np.array([float(bounds[k][0]) for k in self.names])
+        self.upper = np.array([float(bounds[k][1]) for k in self.names])
+        self.x0 = np.array([self.base[k] for k in self.names])
+        self.mid = 0.5 * (self.lower + self.upper)
+        self.width = np.where(self.upper > self.lower, self.upper - self.lower, 1.0)
+
+    @property
+    def n_residuals(self) -> int:
+        return int(self.mask.sum()) + (len(self.names) if self.regularization else 0)
+
+    def predict(self, theta: np.ndarray) -> np.ndarray:
+        """Model outputs (fields, [sets,] rows) for one parameter vector (k,) or a stack of them (sets, k)."""
+        theta = np.asarray(theta)
+        p = dict(self.base)
+        for j, name in enumerate(self.names):
+            p[name] = theta[..., j, None] if theta.ndim > 1 else theta[j]
+        out = batch_core(self.inp, p, self.model.equations)
+        shape = theta.shape[:-1] + (self.n,)
+        return np.stack([np.broadcast_to(out[f], shape) for f in self.fields])
+
+    def residuals(self, theta: np.ndarray) -> np.ndarray:
+        r = ((self.predict(theta) - self.y) / self.sigma)[self.mask]
+        if self.regularization:
+            r = np.concatenate([r, self.regularization * (np.asarray(theta) - self.mid) / self.width])
+        return np.where(np.isfinite(r), r, 1e6)
+
+    def jacobian(self, theta: np.ndarray, step: float = 1e-30) -> np.ndarray:
+        """d residuals / d theta, (n_residuals, k), from one complex-step batch_core call."""
+        k = len(self.names)
+        thetas = np.asarray(theta, dtype=complex)[None, :] + 1j * step * np.eye(k)
+        d = np.imag(self.predict(thetas)) / step  # (fields, k, rows)
+        J = np.moveaxis(d, 1, -1)[self.mask] / self.row_sigma[:, None]
+        if self.regularization:
+            J = np.vstack([J, np.diag(self.regularization / self.width)])
+        return np.where(np.isfinite(J), J, 0.0)
+
+    def cost_many(self, thetas: np.ndarray, max_elements: int = 500_000) -> np.ndarray:
+        """0.5 * sum of squared residuals for every row of `thetas` (sets, k), in broadcast blocks."""
+        thetas = np.atleast_2d(thetas)
+        costs = np.empty(len(thetas))
+        block = max(1, max_elements // max(self.n * len(self.fields), 1))
+        for start in range(0, len(thetas), block):
+            part = thetas[start:start + block]
+            r = (self.predict(part) - self.y[:, None, :]) / self.sigma[:, :, None]
+            r = np.where(self.mask[:, None, :], r, 0.0)
+            c = 0.5 * np.sum(r ** 2, axis=(0, 2))
+            if self.regularization:
+                c += 0.5 * np.sum((self.regularization * (part - self.mid) / self.width) ** 2, axis=1)
+            costs[start:start + block] = np.where(np.isfinite(c), c, np.inf)
+        return costs
+
+
+def fit_from(problem: CalibrationProblem, x0: np.ndarray, method: str = "trf", max_nfev: int = 200) -> Dict[str, Any]:
+    """One local bounded fit from x0: "trf" (least_squares) or "lbfgsb" (L-BFGS-B on the cost)."""
+    eps = 1e-9 * problem.width
+    x0 = np.clip(x0, problem.lower + eps, problem.upper - eps)
+    if method == "trf":
+        res = least_squares(problem.residuals, x0, jac=problem.jacobian, bounds=(problem.lower, problem.upper),
+                            x_scale="jac", max_nfev=max_nfev)
+        x, nfev, success, message = res.x, res.nfev, bool(res.success), res.message
+    elif method == "lbfgsb":
+        def fun(x):
+            r = problem.residuals(x)
+            return 0.5 * float(r @ r), problem.jacobian(x).T @ r
+        res = minimize(fun, x0, jac=True, method="L-BFGS-B", bounds=list(zip(problem.lower, problem.upper)),
+                       options={"maxfun": max_nfev})
+        x, nfev, success, message = res.x, res.nfev, bool(res.success), str(res.message)
+    else:
+        raise ValueError(f"Unknown calibration method '{method}' (expected 'trf' or 'lbfgsb').")
+    r = problem.residuals(x)
+    return {"x": x, "cost": 0.5 * float(r @ r), "nfev": int(nfev), "success": success, "message": message}
+
+def calibrate(problem: CalibrationProblem,
+              n_starts: int = 8,
+              n_screen: int = 512,
+              method: str = "trf",
+              workers: int = 1,
+              seed: Optional[int] = None,
+              max_nfev: int = 200) -> Dict[str, Any]:
+    """
+    Multi-start fit. n_screen random points from the bounds (plus the current values) are scored in
+    one batched call, the best n_starts are refined with `method`, in `workers` processes.
+    Returns the best parameters with standard errors from the Gauss-Newton covariance.
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    k = len(problem.names)
+    pool = np.vstack([problem.x0, rng.uniform(problem.lower, problem.upper, size=(max(n_screen, n_starts), k))])
+    costs = problem.cost_many(pool)
+    order = np.argsort(costs, kind="stable")
+    starts = [pool[0]] + [pool[i] for i in order if i != 0][:max(n_starts - 1, 0)]
+
+    if workers > 1 and len(starts) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futs = [ex.submit(fit_from, problem, x0, method, max_nfev) for x0 in starts]
+            fits = [f.result() for f in futs]
+    else:
+        fits = [fit_from(problem, x0, method, max_nfev) for x0 in starts]
+    best = min(fits, key=lambda f: f["cost"])
+
+    # Standard errors: s^2 (J^T J)^-1 at the optimum, with s^2 from the residual dof.
+    J = problem.jacobian(best["x"])
+    dof = problem.n_residuals - k
+    s2 = 2 * best["cost"] / dof if dof > 0 else np.nan
+    se = np.sqrt(np.clip(np.diag(np.linalg.pinv(J.T @ J)) * s2, 0, None))
+    return {
+        "params": dict(zip(problem.names, best["x"].tolist())),
+        "se": dict(zip(problem.names, se.tolist())),
+        "cost": best["cost"],
+        "initial_cost": float(costs[0]),
+        "fields": problem.fields,
+        "n_rows": problem.n,
+        "n_residuals": problem.n_residuals,
+        "method": method,
+        "starts": [{"cost": f["cost"], "nfev": f["nfev"], "success": f["success"]} for f in fits],
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }
+
+def next_version_path(model_path: Union[str, Path]) -> Path:
+    """`..._v1.json` -> the first of `..._v2.json`, `..._v3.json`, ... that does not exist yet."""
+    path = Path(model_path)
+    m = re.match(r"^(.*)_v(\d+)$", path.stem)
+    stem, version = (m.group(1), int(m.group(2))) if m else (path.stem, 1)
+    while True:
+        version += 1
+        candidate = path.with_name(f"{stem}_v{version}{path.suffix}")
+        if not candidate.exists():
+            return candidate
+
+def calibrated_spec(model: HybridModel, result: Dict[str, Any], source: Optional[str] = None,
+                    z: float = 2.0, min_width: float = MIN_PRIOR_FRACTION) -> Dict[str, Any]:
+    """
+    New model spec with each fitted value stored under `parameters.point_estimates` (which the
+    bridge uses instead of the prior midpoint) and its prior narrowed to the fitted value +/- z
+    standard errors, clipped to the original range and at least `min_width` of it wide. A prior
+    whose standard error is not finite or is degenerate (zero, e.g. at a bound) keeps its original range.
+    Fits that sit on a bound of the original range are warned about. The original ranges are kept
+    under `calibration.bounds`, so a later calibration searches the same space.
+    """
+    spec = copy.deepcopy(model.spec)
+    priors = spec["parameters"]["priors"]
+    estimates = spec["parameters"].setdefault("point_estimates", {})
+    cal_prev = spec.get("calibration", {})
+    bounds = dict(cal_prev.get("bounds", {}))
+    on_bound = []
+    for name, v in result["params"].items():
+        lo, hi = bounds.setdefault(name, list(priors[name]))
+        width = hi - lo
+        if v <= lo + 1e-6 * width or v >= hi - 1e-6 * width:
+            on_bound.append(name)
+        estimates[name] = v
+        se = result["se"].get(name)
+        if se is None or not np.isfinite(se) or se <= 1e-12 * width:
+            priors[name] = [lo, hi]
+            continue
+        new_lo, new_hi = max(lo, v - z * se), min(hi, v + z * se)
+        floor = min_width * width
+        if new_hi - new_lo < floor:
+            new_lo = min(max(lo, v - 0.5 * floor), hi - floor)
+            new_hi = new_lo + floor
+        priors[name] = [new_lo, new_hi]
+    if on_bound:
+        warnings.warn(f"Calibrated parameters at a bound of their prior range: {', '.join(on_bound)}. "
+                      "Their priors keep a non-zero width, but the range may be too narrow for the data.",
+                      stacklevel=2)
+    m = re.match(r"^(.*)_v(\d+)$", str(spec.get("name", "")))
+    if m:
+        spec["name"] = f"{m.group(1)}_v{int(m.group(2)) + 1}"
+    spec["calibration"] = {
+        "parent": model.spec.get("name"),
+        "parent_hash": model.content_hash,
+        "data": source,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "method": result["method"],
+        "fields": result["fields"],
+        "n_rows": result["n_rows"],
+        "initial_cost": result["initial_cost"],
+        "cost": result["cost"],
+        "parameters": {k: {"value": v, "se": result["se"].get(k)} for k, v in result["params"].items()},
+        "bounds": bounds,
+    }
+    return spec
+
+def main():
+    ap = argparse.ArgumentParser(description="Fit the hybrid model's priors to measured data.")
+    ap.add_argument("--data", required=True, help="CSV with formulations and measured properties")
+    ap.add_argument("--model", default=str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    ap.add_argument("--ingredient-library", default=str(project_root / "data/processed/ingredient_library.json"))
+    ap.add_argument("--process", default=None, help="Process JSON (defaults to the data's columns, else a standard setting)")
+    ap.add_argument("--params", default=None, help="Comma-separated priors to fit (default: all that matter)")
+    ap.add_argument("--sigma", action="append", default=[], help="Residual scale override, e.g. rho_gcc=0.01")
+    ap.add_argument("--regularization", type=float, default=0.0, help="Pull towards the prior midpoints")
+    ap.add_argument("--method", choices=["trf", "lbfgsb"], default="trf")
+    ap.add_argument("--starts", type=int, default=8)
+    ap.add_argument("--screen", type=int, default=512, help="Random points scored to pick the starts")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--out", default=None, help="Output model JSON (default: next _vN next to --model)")
+    args = ap.parse_args()
+
+    model = HybridModel.from_json(args.model)
+    catalog = load_ingredient_catalog(read_json(args.ingredient_library))
+    formulations, targets = load_measurements(args.data)
+    if args.process:
+        process = read_json(args.process)
+    elif all(k in formulations.columns for k in ("Torque_Nm", "N_rps", "Q_kgh")):
+        process = None
+    else:
+        process = dict(DEFAULT_CALIBRATION_PROCESS)
+    sigmas = dict(s.split("=", 1) for s in args.sigma)
+    params = [p.strip() for p in args.params.split(",") if p.strip()] if args.params else None
+
+    problem = CalibrationProblem(model, catalog, formulations, targets, params=params, process=process,
+                                 sigmas=sigmas, regularization=args.regularization)
+    print(f"[calibrate] {problem.n} rows, outputs {problem.fields}, fitting {len(problem.names)} priors")
+    result = calibrate(problem, n_starts=args.starts, n_screen=args.screen, method=args.method,
+                       workers=args.workers, seed=args.seed)
+    print(f"[calibrate] cost {result['initial_cost']:.4g} -> {result['cost']:.4g} "
+          f"({len(result['starts'])} starts, {result['elapsed_s']} s)")
+    for name, v in result["params"].items():
+        print(f"  {name:>14} = {v:.6g} +/- {result['se'][name]:.2g}")
+
+    out = Path(args.out) if args.out else next_version_path(args.model)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(calibrated_spec(model, result, source=str(args.data)), indent=2))
+    print(f"[calibrate] Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -35,17 +35,20 @@ def _extract_iter(p: Path) -> str:
 def _extract_row_index(row_dir: Path) -> int:
     return int(row_dir.name.replace("row_", ""))
 
+def tag_predictions(df: pd.DataFrame, cycle_id: str, iter: str) -> pd.DataFrame:
+    """A prediction frame with the cycle_id/iter/row_index keys the scores are merged on."""
+    df = df.copy()
+    if "row_index" not in df.columns:
+        df["row_index"] = np.arange(len(df))
+    df["cycle_id"] = cycle_id
+    df["iter"]     = iter
+    return df
+
 def load_predictions(pred_glob: str) -> pd.DataFrame:
     rows = []
     for fp in sorted(glob.glob(pred_glob)):
         p = Path(fp)
-        df = pd.read_csv(p)
-        if "row_index" not in df.columns:
-            df = df.copy()
-            df["row_index"] = np.arange(len(df))
-        df["cycle_id"] = _extract_cycle_id(p)
-        df["iter"]     = _extract_iter(p)
-        rows.append(df)
+        rows.append(tag_predictions(pd.read_csv(p), _extract_cycle_id(p), _extract_iter(p)))
     if not rows:
         raise FileNotFoundError(f"No prediction CSVs matched: {pred_glob}")
     return pd.concat(rows, ignore_index=True)
@@ -241,13 +244,20 @@ def make_plots(df: pd.DataFrame, outdir: Path):
     print(f"Saved plots to {outdir}")
 
 def build_tidy(
-    pred_glob: str, 
+    pred_glob: Optional[str],
     scores_glob: str, 
     process_glob: Optional[str],
     targets: Optional[Dict[str,float]],
     baseline_model: Optional[str],
+    predictions: Optional[pd.DataFrame] = None,
 ) -> pd.DataFrame:
-    pred = load_predictions(pred_glob)
+    """
+    predictions (frames from tag_predictions, concatenated) replaces the CSVs of pred_glob,
+    e.g. when the prediction artifacts were not written.
+    """
+    pred = predictions if predictions is not None else load_predictions(pred_glob)
+    if pred.empty:
+        return pred
     scr  = load_scores(scores_glob)
     proc = load_process_jsons(process_glob)
 
@@ -0,0 +1,82 @@
+# src/async_bo.py
+"""
+Asynchronous (non-blocking) scheduling of the closed loop's evaluations.
+
+The synchronous loop asks a whole batch, waits for its slowest agent call and only then tells
+the optimizer, so with long-tailed agent latency (up to the evaluator's 120 s timeout) most
+workers sit idle at the end of every batch. `run_async` instead keeps `workers` candidates in
+flight at all times:
+
+- as soon as any evaluation finishes its result is told, and a replacement is asked for with the
+  points still in flight passed as `pending` (fantasized or penalized by the batch acquisition,
+  see src/batch_acquisition.py), so it does not duplicate them
+- the optimizer is only touched from the calling thread; the worker threads just evaluate
+- every candidate has a sequence number. The loop maps it onto the synchronous scheme's
+  iteration/candidate ids (and artifact names), and counts an iteration as done once as many
+  results as a batch holds have been told
+
+`AsyncState` (in-flight points and counters) is checkpointed with the run, so a resumed run
+evaluates the very points that were in flight. With more than one worker the order in which
+results arrive, and so the points asked, depends on timing: async runs are not reproducible
+the way synchronous ones are.
+"""
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class AsyncState:
+    in_flight: Dict[int, List[float]] = field(default_factory=dict)  # sequence number -> point
+    asked: int = 0  # sequence number of the next candidate
+    told: int = 0
+
+
+def run_async(state: AsyncState, budget: int, workers: int,
+              propose: Callable[[List[int], List[List[float]]], Optional[List[List[float]]]],
+              start: Callable[[int, List[float]], Callable[[], Any]],
+              on_result: Callable[[int, List[float], Any], bool],
+              on_asked: Optional[Callable[[], None]] = None) -> None:
+    """
+    Evaluates candidates `workers` at a time until `budget` of them (counted from sequence
+    number 0) have been asked and told. The in-flight points of state are evaluated first.
+
+    - propose(seqs, pending): points for the sequence numbers seqs, given the points in flight.
+      Returning fewer points than asked for is fine; None means nothing more is to be asked
+      (e.g. the evaluation budget is spent), and the candidates in flight are finished
+    - start(seq, point): the call that evaluates the point, run in a worker thread. Cheap
+      preparation can happen before it is returned
+    - on_result(seq, point, result): tells the result. Returning True stops asking, and the
+      candidates still in flight are evaluated and told
+    - on_asked(): runs after each refill, e.g. to checkpoint the new in-flight points
+    """
+    stop = False
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="candidate") as ex:
+        futures = {ex.submit(start(seq, point)): seq for seq, point in sorted(state.in_flight.items())}
+        while True:
+            need = 0 if stop else min(max(1, workers) - len(futures), budget - state.asked)
+            if need > 0:
+                seqs = list(range(state.asked, state.asked + need))
+                points = propose(seqs, list(state.in_flight.values()))
+                if points is None:
+                    stop, points = True, []
+                elif not points and not futures:
+                    print("Warning: no feasible candidate could be proposed; stopping the asynchronous loop.")
+                    break
+                points = points[:need]
+                for seq, point in zip(seqs, points):
+                    state.in_flight[seq] = point
+                    futures[ex.submit(start(seq, point))] = seq
+                state.asked += len(points)
+                if on_asked is not None:
+                    on_asked()
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for f in sorted(done, key=futures.get):
+                seq = futures.pop(f)
+                result = f.result()
+                point = state.in_flight.pop(seq)
+                state.told += 1
+                stop = bool(on_result(seq, point, result)) or stop
@@ -0,0 +1,180 @@
+# src/batch_acquisition.py
+"""
+Batch acquisition for the closed loop: propose q diverse candidates per iteration from the
+optimizer's current surrogate.
+
+skopt's `ask(n_points)` builds a batch by constant liar, refitting the surrogate (hyperparameters
+included) once per point, which is too slow for the 16-64 candidate batches that parallel
+evaluation can absorb. `propose_batch` instead scores one shared candidate pool in a single
+vectorized predict per step and picks the batch greedily with one of:
+
+- "kriging_believer":   fantasize the model mean at each pick, update the model, re-score
+- "constant_liar":      same, fantasizing the best value seen so far (pessimistic for diversity)
+- "local_penalization": no model updates at all; each pick multiplies the acquisition by a soft
+                        exclusion ball whose radius comes from a Lipschitz estimate of the mean
+                        (Gonzalez et al., 2016). Cheapest, but also the mildest: with a steep
+                        mean (large L) the balls are small and the batch stays close to the top-q
+                        acquisition values
+
+Fantasy updates keep the GP hyperparameters fixed (one Cholesky per pick rather than a
+hyperparameter search); the sparse GP extends its fit incrementally, while tree surrogates refit,
+so prefer local penalization with those. The pool mixes uniform samples with Gaussian
+perturbations of the best observed points, all in the optimizer's transformed space.
+`select_batch` makes the same greedy picks from any other pool (see src/candidate_pool.py).
+Points still being evaluated (`pending`, e.g. by the asynchronous loop in src/async_bo.py) are
+treated like earlier picks: fantasized, or penalized, before the first new pick.
+"""
+from __future__ import annotations
+from typing import List, Optional
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.base import clone
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import WhiteKernel
+from sklearn.utils import check_random_state
+
+BATCH_STRATEGIES = ("kriging_believer", "constant_liar", "local_penalization")
+
+
+def expected_improvement(mu: np.ndarray, std: np.ndarray, y_opt: float, xi: float = 0.01) -> np.ndarray:
+    """EI for minimization, vectorized over candidates (same convention as skopt's gaussian_ei)."""
+    std = np.maximum(std, 1e-12)
+    improve = y_opt - xi - mu
+    z = improve / std
+    return np.maximum(improve * norm.cdf(z) + std * norm.pdf(z), 0.0)
+
+
+def candidate_pool(space, Xi: np.ndarray, yi: np.ndarray, n_candidates: int,
+                   rng: np.random.RandomState, local_fraction: float = 0.25,
+                   local_scale: float = 0.05, n_best: int = 5) -> np.ndarray:
+    """
+    n_candidates points in the transformed space: uniform samples plus a local_fraction of
+    Gaussian perturbations (local_scale of each dimension's width) around the n_best observations.
+    """
+    bounds = np.asarray(space.transformed_bounds, dtype=float)
+    n_local = int(n_candidates * local_fraction) if len(yi) else 0
+    uniform = space.transform(space.rvs(n_samples=n_candidates - n_local, random_state=rng))
+    if not n_local:
+        return np.asarray(uniform, dtype=float)
+    best = Xi[np.argsort(yi)[:n_best]]
+    centers = best[rng.randint(len(best), size=n_local)]
+    local = centers + rng.normal(scale=local_scale * (bounds[:, 1] - bounds[:, 0]), size=centers.shape)
+    local = np.clip(local, bounds[:, 0], bounds[:, 1])
+    return np.vstack([uniform, local])
+
+
+def _fantasy_estimator(est):
+    """An unfitted copy of est that refits fast: GP hyperparameters frozen at their fitted values."""
+    if isinstance(est, GaussianProcessRegressor) and hasattr(est, "kernel_"):
+        kernel = clone(est.kernel_)
+        noise = getattr(est, "noise_", None)
+        if noise is not None:
+            # skopt zeroes the fitted white noise for prediction; put it back for refitting.
+            for name, param in kernel.get_params().items():
+                if isinstance(param, WhiteKernel):
+                    # Same class as the original: skopt only recognizes its own WhiteKernel.
+                    kernel.set_params(**{name: type(param)(noise_level=noise, noise_level_bounds="fixed")})
+        return clone(est).set_params(kernel=kernel, optimizer=None, n_restarts_optimizer=0)
+    return clone(est)
+
+
+def lipschitz_constant(model, X: np.ndarray, widths: np.ndarray, step: float = 0.01) -> float:
+    """
+    Largest finite-difference gradient norm of the model mean over the rows of X, with steps of
+    `step` times each dimension's width (coarse enough to see through tree-model plateaus).
+    """
+    mu0 = model.predict(X)
+    grads = np.empty_like(X)
+    for j in range(X.shape[1]):
+        h = step * widths[j]
+        Xh = X.copy()
+        Xh[:, j] += h
+        grads[:, j] = (model.predict(Xh) - mu0) / h
+    return max(float(np.max(np.linalg.norm(grads, axis=1))), 1e-7)
+
+
+def select_batch(model, space, pool: np.ndarray, Xi: np.ndarray, yi: np.ndarray, q: int,
+                 strategy: str = "kriging_believer", xi: float = 0.01, rng=None,
+                 pending: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Indices of q rows of pool (candidates in the transformed space) picked greedily with one of
+    BATCH_STRATEGIES, given the fitted model and the transformed observations Xi, yi. pending
+    are transformed points asked earlier and not told yet.
+    """
+    if strategy not in BATCH_STRATEGIES:
+        raise ValueError(f"Unknown batch strategy '{strategy}'. Choose from {BATCH_STRATEGIES}.")
+    rng = check_random_state(rng)
+    q = min(q, len(pool))
+    available = np.ones(len(pool), dtype=bool)
+    picks: List[int] = []
+    pending = np.empty((0, pool.shape[1])) if pending is None else np.asarray(pending, dtype=float).reshape(-1, pool.shape[1])
+    for p in pending:  # a pending point is never picked again
+        available &= np.any(pool != p, axis=1)
+
+    if strategy == "local_penalization":
+        mu, std = model.predict(pool, return_std=True)
+        std = np.maximum(std, 1e-12)
+        log_acq = np.log(expected_improvement(mu, std, yi.min(), xi) + 1e-300)
+        bounds = np.asarray(space.transformed_bounds, dtype=float)
+        sample = pool[rng.choice(len(pool), size=min(500, len(pool)), replace=False)]
+        L = lipschitz_constant(model, sample, bounds[:, 1] - bounds[:, 0])
+        y_best = yi.min()
+        if len(pending):
+            mu_p, std_p = model.predict(pending, return_std=True)
+            for p, m, s in zip(pending, mu_p, np.maximum(std_p, 1e-12)):
+                log_acq = log_acq + norm.logcdf((L * np.linalg.norm(pool - p, axis=1) - m + y_best) / s)
+        for _ in range(q):
+            idx = int(np.argmax(np.where(available, log_acq, -np.inf)))
+            picks.append(idx)
+            available[idx] = False
+            r = np.linalg.norm(pool - pool[idx], axis=1)
+            log_acq = log_acq + norm.logcdf((L * r - mu[idx] + y_best) / std[idx])
+    else:
+        fantasy = _fantasy_estimator(model)
+        X_f, y_f = Xi, yi
+        current = model
+        if len(pending):
+            lies = np.full(len(pending), yi.min()) if strategy == "constant_liar" else model.predict(pending)
+            X_f, y_f = np.vstack([Xi, pending]), np.append(yi, lies)
+            current = clone(fantasy).fit(X_f, y_f)
+        for k in range(q):
+            mu, std = current.predict(pool, return_std=True)
+            acq = expected_improvement(mu, std, y_f.min(), xi)
+            idx = int(np.argmax(np.where(available, acq, -np.inf)))
+            picks.append(idx)
+            available[idx] = False
+            if k == q - 1:
+                break
+            lie = y_f.min() if strategy == "constant_liar" else mu[idx]
+            X_f = np.vstack([X_f, pool[idx]])
+            y_f = np.append(y_f, lie)
+            current = clone(fantasy).fit(X_f, y_f)
+    return picks
+
+
+def propose_batch(optimizer, q: int, strategy: str = "kriging_believer",
+                  n_candidates: Optional[int] = None, xi: float = 0.01,
+                  random_state=None, pending: Optional[List[List[float]]] = None) -> List[List[float]]:
+    """
+    q points (in the original space) to evaluate next, chosen greedily from a shared candidate
+    pool. Before the optimizer has a fitted model, the points are random samples of the space.
+    random_state defaults to the optimizer's own RNG, so a checkpointed run proposes the same batch.
+    pending are points (in the original space) still being evaluated.
+    """
+    if strategy not in BATCH_STRATEGIES:
+        raise ValueError(f"Unknown batch strategy '{strategy}'. Choose from {BATCH_STRATEGIES}.")
+    if q <= 0:
+        return []
+    space = optimizer.space
+    rng = check_random_state(optimizer.rng if random_state is None else random_state)
+    if not optimizer.models:
+        return space.rvs(n_samples=q, random_state=rng)
+
+    Xi = np.asarray(space.transform(optimizer.Xi), dtype=float)
+    yi = np.asarray(optimizer.yi, dtype=float)
+    pool = candidate_pool(space, Xi, yi, n_candidates or optimizer.n_points, rng)
+    pending_t = np.asarray(space.transform(pending), dtype=float) if pending else None
+    picks = select_batch(optimizer.models[-1], space, pool, Xi, yi, q, strategy, xi, rng, pending_t)
+    points = space.inverse_transform(pool[picks])
+    return [list(p) for p in points]
@@ -0,0 +1,188 @@
+# src/benchmark.py
+"""
+Offline, reproducible benchmark of the closed loop.
+
+`run_benchmark` runs run_optimization_loop end to end in a scratch results directory with a
+fixed seed and `offline_evaluator` in place of the agent: no LLM is called, and the same code
+proposes the same candidates on every run. The report has the run's per-stage wall time, RSS
+and call/item counts (DOE, bridge, evaluation, ask, tell, checkpoint, plotting, tidy; see
+src/stage_profiler.py) plus the totals.
+
+`compare_to_baseline` checks a report against a stored one. A stage regresses when its wall time
+grows by more than `tolerance` (relative) and `min_seconds` (absolute); a changed call or item
+count means the loop no longer does the same work, so the timings are not comparable.
+
+    python -m src.benchmark --iterations 5 --initial-points 30 --save-baseline results/benchmarks/baseline.json
+    python -m src.benchmark --iterations 5 --initial-points 30 --baseline results/benchmarks/baseline.json
+
+The second command exits with status 1 on a regression. `--eval-latency-ms` makes the stand-in
+evaluator sleep per row, to see how the loop behaves with agent-like latency (e.g. with --workers).
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.multi_fidelity import physics_score, scorable_targets
+from src.stage_profiler import peak_rss_mb
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# Without goals the DOE generator has no ingredient pools to draw from.
+DEFAULT_GOALS_PATH = PROJECT_ROOT / "configs" / "goals" / "compostable.json"
+
+# Scored by the stand-in evaluator when the run's own targets map to no predicted property
+# (the default target_properties.json, for one).
+BENCHMARK_TARGETS: Dict[str, Dict[str, Any]] = {
+    "tensile_strength_yield_MPa": {"value": 24.0, "tol": 3.0, "weight": 1.0},
+    "flexural_modulus_GPa": {"value": 1.2, "tol": 0.3, "weight": 1.0},
+    "izod_impact_notched_23C_J_m": {"value": 150.0, "tol": 60.0, "weight": 1.0},
+}
+
+
+def offline_evaluator(latency_s: float = 0.0) -> Callable[..., pd.DataFrame]:
+    """
+    A deterministic stand-in for evaluate_with_agent (same signature and output columns): the
+    weight of a row is its physics target-distance score, and a scores.json is written per row
+    like the agent's, so the final tidy analysis has the same work to do.
+    """
+    def evaluate(predictions_df: pd.DataFrame, process_vars: Dict[str, Any], targets_constraints: Dict[str, Any],
+                 out_dir: str, run_identifier: str) -> pd.DataFrame:
+        targets = targets_constraints if scorable_targets(targets_constraints, predictions_df.columns) else BENCHMARK_TARGETS
+        weights = 0.05 + 0.9 * np.nan_to_num(physics_score(predictions_df, targets))
+        for idx, w in zip(predictions_df.index, weights):
+            if latency_s:
+                time.sleep(latency_s)
+            row_dir = Path(out_dir) / f"row_{idx:04d}"
+            row_dir.mkdir(parents=True, exist_ok=True)
+            scores = {"literature_consistency_score": 1.0, "realism_penalty": 1.0,
+                      "recommended_bo_weight": float(w), "confidence": "High",
+                      "notes": f"offline benchmark evaluator ({run_identifier})"}
+            (row_dir / "scores.json").write_text(json.dumps(scores, indent=2))
+        return predictions_df.assign(literature_consistency_score=1.0, realism_penalty=1.0,
+                                     recommended_bo_weight=weights, confidence="High",
+                                     evaluation_status="success")
+    return evaluate
+
+
+def run_benchmark(iterations: int = 5, initial_points: int = 30, seed: int = 0,
+                  goals_path: str = str(DEFAULT_GOALS_PATH), eval_latency_s: float = 0.0,
+                  out_dir: Optional[str] = None, **loop_kwargs) -> Dict[str, Any]:
+    """
+    One offline run of the closed loop; loop_kwargs go to run_optimization_loop (e.g. surrogate,
+    candidates_per_iteration, batch_strategy, candidate_workers). Artifacts are written to out_dir,
+    or to a temporary directory that is removed afterwards.
+    """
+    import src.main_orchestrator as mo
+
+    settings = {"iterations": iterations, "initial_points": initial_points, "seed": seed,
+                "goals": Path(goals_path).name, "eval_latency_s": eval_latency_s, **loop_kwargs}
+    goals = json.loads(Path(goals_path).read_text())
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as tmp:
+        results_dir = out_dir or tmp
+        previous = os.environ.get("RESULTS_DIR")
+        os.environ["RESULTS_DIR"] = results_dir
+        start = time.perf_counter()
+        try:
+            summary = mo.run_optimization_loop(
+                max_iterations=iterations, n_initial_points=initial_points, goals=goals, seed=seed,
+                use_prediction_cache=False, evaluator=offline_evaluator(eval_latency_s), **loop_kwargs,
+            )
+        finally:
+            if previous is None:
+                os.environ.pop("RESULTS_DIR", None)
+            else:
+                os.environ["RESULTS_DIR"] = previous
+        total_s = time.perf_counter() - start
+
+    return {
+        "settings": settings,
+        "total_s": round(total_s, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "best_score": summary["best_score"],
+        "agent_evaluations": summary["stopping"]["agent_evaluations"],
+        "stages": summary["stages"],
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.5,
+                        min_seconds: float = 0.25) -> List[str]:
+    """The regressions of report against baseline, one line each (empty when there are none)."""
+    problems = []
+    if report["settings"] != baseline["settings"]:
+        problems.append(f"settings differ from the baseline's: {baseline['settings']}")
+    for name, base in baseline["stages"].items():
+        now = report["stages"].get(name)
+        if now is None:
+            problems.append(f"{name}: stage did not run")
+            continue
+        if (now["calls"], now["items"]) != (base["calls"], base["items"]):
+            problems.append(f"{name}: {now['calls']} calls / {now['items']} items, "
+                            f"baseline {base['calls']} / {base['items']}")
+        grew = now["wall_s"] - base["wall_s"]
+        if grew > min_seconds and grew > tolerance * base["wall_s"]:
+            problems.append(f"{name}: {now['wall_s']:.3f}s, baseline {base['wall_s']:.3f}s "
+                            f"(+{grew / max(base['wall_s'], 1e-9):.0%})")
+    for name in report["stages"].keys() - baseline["stages"].keys():
+        problems.append(f"{name}: stage not in the baseline")
+    if report.get("peak_rss_mb") and baseline.get("peak_rss_mb"):
+        if report["peak_rss_mb"] > (1.0 + tolerance) * baseline["peak_rss_mb"]:
+            problems.append(f"peak RSS: {report['peak_rss_mb']:.0f} MB, baseline {baseline['peak_rss_mb']:.0f} MB")
+    return problems
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    rows = [{"stage": name, **stats} for name, stats in report["stages"].items()]
+    table = pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.3f}")
+    peak = report["peak_rss_mb"]
+    return (f"{table}\n\ntotal {report['total_s']:.2f}s, peak RSS "
+            f"{f'{peak:.0f} MB' if peak is not None else 'n/a'}, "
+            f"{report['agent_evaluations']} evaluations, best score {report['best_score']:.4f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Offline closed-loop benchmark with per-stage timings.")
+    ap.add_argument("--iterations", type=int, default=5)
+    ap.add_argument("--initial-points", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--goals", type=str, default=str(DEFAULT_GOALS_PATH), help="Path to a goals JSON file.")
+    ap.add_argument("--surrogate", type=str, default="gp")
+    ap.add_argument("--batch-size", type=int, default=4)
+    ap.add_argument("--batch-strategy", type=str, default="ask")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--eval-latency-ms", type=float, default=0.0, help="Simulated evaluator latency per row.")
+    ap.add_argument("--out-dir", type=str, default=None, help="Keep the run's artifacts here (default: a temp dir).")
+    ap.add_argument("--report", type=str, default=None, help="Write the report JSON here.")
+    ap.add_argument("--baseline", type=str, default=None, help="Compare against this stored report.")
+    ap.add_argument("--save-baseline", type=str, default=None, help="Store the report as the new baseline.")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="Relative slowdown tolerated per stage.")
+    ap.add_argument("--min-seconds", type=float, default=0.25, help="Absolute slowdown tolerated per stage.")
+    args = ap.parse_args()
+
+    report = run_benchmark(
+        iterations=args.iterations, initial_points=args.initial_points, seed=args.seed,
+        goals_path=args.goals,
+        eval_latency_s=args.eval_latency_ms / 1000.0, out_dir=args.out_dir,
+        surrogate=args.surrogate, candidates_per_iteration=args.batch_size,
+        batch_strategy=args.batch_strategy, candidate_workers=args.workers,
+    )
+    print(format_report(report))
+    for path in (args.report, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(json.dumps(report, indent=2))
+            print(f"Saved report to {path}")
+    if args.baseline:
+        problems = compare_to_baseline(report, json.loads(Path(args.baseline).read_text()),
+                                       tolerance=args.tolerance, min_seconds=args.min_seconds)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        if problems:
+            raise SystemExit(1)
+        print(f"No regression against {args.baseline}.")
@@ -13,10 +13,29 @@ Adds iteration-aware paths:
 - Writes a small metadata JSON next to the props CSV.
 
 You can still pass explicit --doe and/or --out to override.
+
+Large DOE files are streamed: the input is read in record batches (--chunk-size rows, shrunk to
+stay under --max-memory-mb), each batch is predicted in one vectorized call, and the output is
+appended incrementally as CSV, Parquet or Arrow IPC (--format).
+
+--mc-samples N propagates the prior ranges (and the model's noise_model) through the model and
+adds mean/std/quantile columns per property. --jacobian adds exact (complex-step) sensitivities
+d<prop>/d<input>, and --check-monotone verifies the model's monotone_signs over the whole DOE.
+
+The model JSON's `latent_states`/`equations` are compiled into vectorized kernels on load. When the
+process config gives the screw geometry (D_mm, L_over_D) and/or barrel pressure (pb_bar), residence
+time and fill factor come from those expressions instead of the fixed tau_s default.
 """
 
-import csv, json, math, argparse, os
-from typing import Dict, Any, List, Optional
+import ast, copy, json, math, argparse, os, hashlib, re, sys, time
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # ---------- Utilities ----------
 
@@ -82,23 +101,317 @@ def wt_to_phi(w_pp, w_el, w_talc, w_caco3, w_biofiber, w_biochar, w_compat, w_st
         "phi_compat": v_comp / v_sum, "phi_stab": v_stab / v_sum,
     }
 
-# ---------- Per-row ----------
+# ---------- Model parameters ----------
 
-def compute_row_properties(row: Dict[str, str],
-                           model: Dict[str, Any],
-                           catalog: Dict[str, Dict[str, Any]],
-                           process_cfg: Dict[str, Any]) -> Dict[str, Any]:
-    # --- 1. Load all model parameters (priors, known materials, etc.) ---
+# Parameters the equations index directly; a model JSON without any of them cannot be evaluated.
+REQUIRED_PARAMS = (
+    "k_gamma", "a1", "a2", "shear0", "m", "nu", "beta", "Tref_C", "kappa", "patm_bar", "kD",
+    "alpha_MFI", "kc", "klambda", "dmin_um", "d0_um", "kd", "Xc0", "alpha_n", "c50_ppm", "alpha_el",
+    "Em0_GPa", "beta_c", "br", "pRub",
+    "Ef_talc_GPa", "AR_talc", "Ef_caco3_GPa", "AR_caco3",
+    "Ef_biofiber_GPa", "AR_biofiber", "Ef_biochar_GPa", "AR_biochar",
+    "sigma_y0_MPa", "gamma_c", "ky", "delta_um", "ky2", "chi", "Imax_kJm2", "kI", "kT", "T0_C",
+    "H0_C", "h1", "h2", "h3", "eps0_pct", "k_eps_E", "k_eps_el", "G0_J", "G1_J_per_phi",
+)
+
+def model_hash(model: Dict[str, Any]) -> str:
+    """sha256 of the model JSON in canonical form (sorted keys, no whitespace)."""
+    canonical = json.dumps(model, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _merge_params(model: Dict[str, Any]) -> Dict[str, float]:
+    """Merges known materials, physical constants and prior midpoints (or point estimates) into one flat dict."""
     params = model.get("parameters", {})
     all_params = {}
-    all_params.update(params.get("known_materials", {}))
-    all_params.update(params.get("physical_constants", {}))
+    for section in ("known_materials", "physical_constants"):
+        for pname, v in params.get(section, {}).items():
+            try:
+                all_params[pname] = float(v)
+            except (TypeError, ValueError):
+                pass
     for pname, pr in params.get("priors", {}).items():
         try:
             if isinstance(pr, (list, tuple)) and len(pr) == 2:
                 all_params[pname] = 0.5 * (float(pr[0]) + float(pr[1]))
         except Exception:
             pass
+    # Fitted values written by a calibration (src/analysis/calibrate.py) replace the midpoints.
+    for pname, v in params.get("point_estimates", {}).items():
+        try:
+            all_params[pname] = float(v)
+        except (TypeError, ValueError):
+            pass
+    return all_params
+
+# ---------- Equation compiler ----------
+
+# Functions the model JSON may call in `latent_states` / `equations`, and their NumPy versions.
+# min/max are element-wise (np.minimum/np.maximum), so every expression stays vectorized.
+EQ_FUNCTIONS = {"exp": "np.exp", "ln": "np.log", "log": "np.log", "log10": "np.log10", "sqrt": "np.sqrt",
+                "abs": "np.abs", "min": "np.minimum", "max": "np.maximum"}
+_EQ_BINOPS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}
+_EQ_UNARYOPS = {ast.USub: "-", ast.UAdd: "+"}
+
+# Symbols the bridge derives from a formulation row on top of the model's declared `inputs`.
+BRIDGE_EQ_INPUTS = ("w_PP", "w_el", "w_talc", "w_caco3", "w_biofiber", "w_biochar",
+                    "Mw_in", "lnMFI_in", "sum_wi_Tz")
+
+# Compiled equation blocks by content hash, so reloading a model (or building another HybridModel
+# from the same file) reuses the parsed graph and every kernel generated for it.
+_EQUATION_CACHE: Dict[str, "CompiledEquations"] = {}
+
+def _eq_ident(name: str) -> str:
+    """State names such as `shear_rate_s-1` are not Python identifiers; symbols use this form."""
+    return re.sub(r"\W", "_", name)
+
+def _emit_expr(node: ast.AST, used: set) -> str:
+    """Translates a whitelisted expression AST into NumPy source, collecting the symbols it reads."""
+    if isinstance(node, ast.BinOp) and type(node.op) in _EQ_BINOPS:
+        return f"({_emit_expr(node.left, used)} {_EQ_BINOPS[type(node.op)]} {_emit_expr(node.right, used)})"
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _EQ_UNARYOPS:
+        return f"({_EQ_UNARYOPS[type(node.op)]}{_emit_expr(node.operand, used)})"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in EQ_FUNCTIONS:
+        fn, args = EQ_FUNCTIONS[node.func.id], [_emit_expr(a, used) for a in node.args]
+        if node.keywords or not args:
+            raise ValueError(f"{node.func.id}() takes positional arguments only")
+        if node.func.id in ("min", "max"):
+            if len(args) < 2:
+                raise ValueError(f"{node.func.id}() needs at least two arguments")
+            out = args[0]
+            for a in args[1:]:
+                out = f"{fn}({out}, {a})"
+            return out
+        if len(args) != 1:
+            raise ValueError(f"{node.func.id}() takes exactly one argument")
+        return f"{fn}({args[0]})"
+    if isinstance(node, ast.Name):
+        used.add(node.id)
+        return f"v_{node.id}"
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return repr(float(node.value))
+    raise ValueError(f"unsupported syntax: {ast.unparse(node) if hasattr(ast, 'unparse') else type(node).__name__}")
+
+class CompiledEquations:
+    """
+    The `latent_states` and `equations` blocks of a model JSON, parsed, validated and ordered once.
+
+    Each expression is checked against a whitelist (arithmetic, ** and EQ_FUNCTIONS) and against the
+    known symbols (other states, model parameters, declared `inputs` and BRIDGE_EQ_INPUTS), and the
+    states are sorted topologically. `evaluate` runs any subset of states over NumPy arrays through a
+    generated kernel, built once per (outputs, given states) combination and then reused.
+    """
+    __slots__ = ("states", "order", "code", "deps", "params", "input_defaults", "_kernels")
+
+    def __init__(self, spec: Dict[str, Any], param_names, extra_inputs=BRIDGE_EQ_INPUTS):
+        blocks = [("latent_states", spec.get("latent_states") or {}), ("equations", spec.get("equations") or {})]
+        names = [n for _, block in blocks for n in block]
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            raise ValueError(f"Model defines these states more than once: {', '.join(dupes)}")
+        # Longest names first, so `shear_rate_s-1` is rewritten before any shorter name it contains.
+        renames = sorted(((n, _eq_ident(n)) for n in names if _eq_ident(n) != n), key=lambda t: -len(t[0]))
+
+        states: Dict[str, str] = {}  # identifier -> name in the JSON
+        code: Dict[str, str] = {}
+        deps: Dict[str, frozenset] = {}
+        for kind, block in blocks:
+            for name, expr in block.items():
+                text = str(expr).replace("^", "**")
+                for old, new in renames:
+                    text = re.sub(rf"(?<![\w.]){re.escape(old)}(?![\w])", new, text)
+                ident = _eq_ident(name)
+                # `SME = (...)` defines an alias alongside the state itself.
+                alias = re.match(r"^\s*([A-Za-z_]\w*)\s*=(?!=)(.*)$", text, re.S)
+                if alias:
+                    text = alias.group(2)
+                try:
+                    used: set = set()
+                    src = _emit_expr(ast.parse(text.strip(), mode="eval").body, used)
+                except (SyntaxError, ValueError) as e:
+                    msg = e.msg if isinstance(e, SyntaxError) else str(e)
+                    raise ValueError(f"Cannot compile {kind} '{name}': {msg}") from None
+                states[ident], code[ident], deps[ident] = name, src, frozenset(used)
+                if alias and alias.group(1) != ident:
+                    a = alias.group(1)
+                    if a in states:
+                        raise ValueError(f"Alias '{a}' in {kind} '{name}' clashes with another state")
+                    states[a], code[a], deps[a] = a, src, frozenset(used)
+                    code[ident], deps[ident] = f"v_{a}", frozenset([a])
+
+        declared = spec.get("inputs") or {}
+        input_defaults: Dict[str, float] = {}
+        known_inputs = set(extra_inputs)
+        for section in declared.values():
+            for key, meta in (section or {}).items():
+                entries = meta if isinstance(meta, list) else [meta]
+                for m in entries:
+                    # A list of named entries (phi_f: talc, caco3, ...) declares phi_f_<name> per entry.
+                    sym = f"{key}_{m['name']}" if isinstance(meta, list) and isinstance(m, dict) and "name" in m else key
+                    known_inputs.add(sym)
+                    if isinstance(m, dict) and "default" in m:
+                        input_defaults[sym] = float(m["default"])
+        param_names = set(param_names)
+        unknown = {s: sorted(d - states.keys() - param_names - known_inputs) for s, d in deps.items()}
+        unknown = {states[s]: u for s, u in unknown.items() if u}
+        if unknown:
+            detail = "; ".join(f"{s}: {', '.join(u)}" for s, u in sorted(unknown.items()))
+            raise ValueError(f"Model equations use undefined symbols ({detail})")
+
+        # Kahn's algorithm; sorted for a deterministic order.
+        pending = {s: set(d) & states.keys() for s, d in deps.items()}
+        order: List[str] = []
+        ready = sorted(s for s, d in pending.items() if not d)
+        while ready:
+            s = ready.pop(0)
+            order.append(s)
+            for t in sorted(pending):
+                if s in pending[t]:
+                    pending[t].discard(s)
+                    if not pending[t] and t not in order and t not in ready:
+                        ready.append(t)
+        cyclic = sorted(states[s] for s in states if s not in order)
+        if cyclic:
+            raise ValueError(f"Model equations are cyclic: {', '.join(cyclic)}")
+
+        self.states = states
+        self.order = tuple(order)
+        self.code = code
+        self.deps = deps
+        self.params = frozenset(set().union(*deps.values()) & param_names - states.keys()) if deps else frozenset()
+        self.input_defaults = input_defaults
+        self._kernels: Dict[tuple, tuple] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return _eq_ident(name) in self.states
+
+    def _kernel(self, outputs: tuple, given: tuple):
+        """Generated function computing `outputs`, reading `given` states as inputs instead."""
+        key = (outputs, given)
+        if key in self._kernels:
+            return self._kernels[key]
+        needed, stack = set(), list(outputs)
+        while stack:
+            s = stack.pop()
+            if s in needed or s in given:
+                continue
+            needed.add(s)
+            stack.extend(d for d in self.deps[s] if d in self.states)
+        reads = sorted(set().union(*(self.deps[s] for s in needed)) - needed | (set(outputs) & set(given)))
+        inputs = tuple(r for r in reads if r not in self.params or r in given)
+        lines = ["def _kernel(inp, p):"]
+        lines += [f"    v_{r} = inp[{(self.states[r] if r in self.states else r)!r}]" for r in inputs]
+        lines += [f"    v_{r} = p[{r!r}]" for r in reads if r not in inputs]
+        lines += [f"    v_{s} = {self.code[s]}" for s in self.order if s in needed]
+        lines.append("    return {" + ", ".join(f"{self.states[s]!r}: v_{s}" for s in outputs) + "}")
+        ns: Dict[str, Any] = {"__builtins__": {}, "np": np}
+        exec(compile("\n".join(lines), "<model equations>", "exec"), ns)
+        compiled = (ns["_kernel"], tuple(self.states.get(r, r) for r in inputs))
+        self._kernels[key] = compiled
+        return compiled
+
+    def evaluate(self, values: Dict[str, Any], p: Dict[str, Any], outputs=None) -> Dict[str, Any]:
+        """
+        Evaluates `outputs` (state names as in the JSON; default all) for scalar or array `values`.
+        States present in `values` are taken as given rather than computed. Parameters come from
+        `p` (a HybridModel or any name -> value mapping, e.g. Monte Carlo draws).
+        """
+        outputs = tuple(_eq_ident(o) for o in (outputs or [self.states[s] for s in self.order]))
+        missing = [self.states.get(o, o) for o in outputs if o not in self.states]
+        if missing:
+            raise KeyError(f"Model equations do not define {', '.join(missing)}")
+        given = tuple(sorted(s for s, name in self.states.items() if name in values))
+        fn, inputs = self._kernel(outputs, given)
+        absent = [k for k in inputs if k not in values and k not in self.input_defaults]
+        if absent:
+            raise KeyError(f"Model equations need inputs that were not provided: {', '.join(absent)}")
+        if any(k not in values for k in inputs):
+            values = {**{k: self.input_defaults[k] for k in inputs if k not in values}, **values}
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return fn(values, p)
+
+    def __repr__(self) -> str:
+        return f"CompiledEquations(n_states={len(self.states)}, kernels={len(self._kernels)})"
+
+def compile_equations(spec: Dict[str, Any], param_names, extra_inputs=BRIDGE_EQ_INPUTS) -> CompiledEquations:
+    """CompiledEquations for a model spec, shared by every model with identical equation blocks."""
+    blocks = {k: spec.get(k) for k in ("inputs", "latent_states", "equations")}
+    blocks["params"], blocks["extra"] = sorted(param_names), sorted(extra_inputs)
+    key = model_hash(blocks)
+    if key not in _EQUATION_CACHE:
+        _EQUATION_CACHE[key] = CompiledEquations(spec, param_names, extra_inputs)
+    return _EQUATION_CACHE[key]
+
+class HybridModel(Mapping):
+    """
+    Compiled, read-only parameter set of a TSE hybrid model JSON.
+
+    Built once per model file: parameters are resolved into a fixed name layout (`names`) backed by a
+    read-only float64 vector (`values`), REQUIRED_PARAMS are validated up front, and `content_hash`
+    identifies exactly which model contents produced a prediction. Behaves like the flat parameter
+    dict the equations expect (`p["kD"]`, `p.get("gear_eff", 0.9)`), without per-call dict building.
+    `equations` holds the JSON's latent_states/equations blocks, compiled (see CompiledEquations).
+    `spec` is a private deep copy, so changing the caller's dict afterwards cannot change predictions
+    behind `content_hash`.
+    """
+    __slots__ = ("spec", "names", "values", "content_hash", "equations", "_index")
+
+    def __init__(self, spec: Dict[str, Any]):
+        spec = copy.deepcopy(spec)
+        merged = _merge_params(spec)
+        missing = [k for k in REQUIRED_PARAMS if k not in merged]
+        if missing:
+            raise ValueError(f"Hybrid model is missing required parameters: {', '.join(missing)}")
+        names = tuple(merged)
+        values = np.array([merged[k] for k in names], dtype=float)
+        values.flags.writeable = False
+        object.__setattr__(self, "spec", spec)
+        object.__setattr__(self, "names", names)
+        object.__setattr__(self, "values", values)
+        object.__setattr__(self, "content_hash", model_hash(spec))
+        object.__setattr__(self, "equations", compile_equations(spec, names))
+        object.__setattr__(self, "_index", {k: i for i, k in enumerate(names)})
+
+    @classmethod
+    def from_json(cls, path: str) -> "HybridModel":
+        return cls(read_json(path))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HybridModel is immutable")
+
+    def __reduce__(self):
+        # Rebuilt from the spec on unpickling (e.g. in worker processes); equations come from the cache.
+        return (HybridModel, (self.spec,))
+
+    def __getitem__(self, key: str) -> float:
+        return self.values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"HybridModel(name={self.spec.get('name')!r}, n_params={len(self.names)}, hash={self.content_hash[:12]})"
+
+def as_hybrid_model(model: Union[Dict[str, Any], HybridModel]) -> HybridModel:
+    """Returns `model` unchanged if already compiled, otherwise compiles the raw JSON dict."""
+    return model if isinstance(model, HybridModel) else HybridModel(model)
+
+def model_params(model: Union[Dict[str, Any], HybridModel]) -> Dict[str, float]:
+    """Flat {name: value} dict of the resolved parameters (known materials, constants, prior midpoints)."""
+    if isinstance(model, HybridModel):
+        return dict(zip(model.names, model.values.tolist()))
+    return _merge_params(model)
+
+# ---------- Per-row ----------
+
+def compute_row_properties(row: Dict[str, str],
+                           model: Union[Dict[str, Any], HybridModel],
+                           catalog: Dict[str, Dict[str, Any]],
+                           process_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    # --- 1. Load all model parameters (priors, known materials, etc.) ---
+    all_params = as_hybrid_model(model)
 
     # --- 2. Parse formulation from the input row ---
     w_el = safe_float(row.get("elastomer_wtpct", 0.0))
@@ -170,9 +483,11 @@ def compute_row_properties(row: Dict[str, str],
     }
     # Use process conditions passed from orchestrator
     process = process_cfg
-    # Use a default tau_s if not provided
+    # tau_s: as given, else from the model's latent state when the screw geometry is known, else a default.
+    # The fill factor likewise needs the barrel pressure pb_bar (a full screw otherwise).
+    tau_s, fill = _process_latents(process, all_params, all_params.equations)
     if 'tau_s' not in process:
-        process['tau_s'] = 45.0
+        process['tau_s'] = float(tau_s)
     # Use a default pvac_bar_abs if not provided
     if 'pvac_bar_abs' not in process:
         process['pvac_bar_abs'] = 0.1
@@ -185,7 +500,7 @@ def compute_row_properties(row: Dict[str, str],
     SEI_J_per_kg = power_W / flow_kgs if flow_kgs > 1e-9 else 0.0
     SEI = SEI_J_per_kg / 3.6e6  # Convert from J/kg to kWh/kg
 
-    shear_rate = all_params['k_gamma'] * process.get('N_rps', 5)
+    shear_rate = all_params['k_gamma'] * process.get('N_rps', 5) * float(fill)
     
     # The model's degradation dose equation was likely fitted with tau_s in minutes,
     # despite the model definition specifying seconds. We apply this conversion to match the model's implicit assumption.
@@ -280,6 +595,722 @@ def compute_row_properties(row: Dict[str, str],
     })
     return props
 
+# ---------- Batch (vectorized) ----------
+
+# Output columns produced by the model, in the order the bridge writes them.
+PROP_FIELDS = ["E_GPa", "MFI_g10min", "sigma_y_MPa", "Izod_23_kJm2", "Izod_m20_kJm2", "HDT_C", "Shrink_pct",
+               "rho_gcc", "eps_y_pct", "Gardner_J", "Xc",
+               "phi_el", "phi_f_talc", "phi_f_caco3", "phi_f_biofiber", "phi_f_biochar"]
+
+# Process variables the per-row path fills in when the process config omits them.
+DEFAULT_PROCESS = {"tau_s": 45.0, "pvac_bar_abs": 0.1}
+
+# Latent process states taken from the model's `latent_states` expressions, and the process inputs
+# each needs beyond Torque/N/Q. Rows without those inputs keep DEFAULT_PROCESS["tau_s"] and a
+# full screw (fill factor 1), as before.
+LATENT_PROCESS_STATES = {"tau_s": ("D_mm", "L_over_D"), "fill_factor_F": ("pb_bar",)}
+
+# Filler classes, in the same priority order as compute_row_properties.
+FILLER_CLASSES = ("talc", "caco3", "biofiber", "biochar")
+
+def with_process_defaults(process_cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns a copy of process_cfg with DEFAULT_PROCESS filled in for missing keys. tau_s is left
+    out when the config has the screw geometry, because the model then computes it.
+    """
+    out = dict(process_cfg or {})
+    for k, v in DEFAULT_PROCESS.items():
+        if k == "tau_s" and all(out.get(g) is not None for g in LATENT_PROCESS_STATES["tau_s"]):
+            continue
+        out.setdefault(k, v)
+    return out
+
+def _num_col(df: pd.DataFrame, col: str, default: float = 0.0) -> np.ndarray:
+    """Numeric column as float array; missing columns and unparsable cells become `default`."""
+    if col not in df.columns:
+        return np.full(len(df), float(default))
+    return pd.to_numeric(df[col], errors="coerce").fillna(default).to_numpy(dtype=float)
+
+def _name_col(df: pd.DataFrame, col: str) -> pd.Series:
+    """Ingredient-name column as strings; missing columns and NaN become ''."""
+    if col not in df.columns:
+        return pd.Series([""] * len(df), index=df.index, dtype=object)
+    return df[col].where(df[col].notna(), "").astype(str)
+
+def _map_names(names: pd.Series, fn) -> np.ndarray:
+    """Applies fn once per unique name and broadcasts the result back to the rows."""
+    lookup = {n: fn(n) for n in names.unique()}
+    return names.map(lookup).to_numpy(dtype=float)
+
+def _filler_class(name: str, catalog: Dict[str, Dict[str, Any]]) -> int:
+    """Index into FILLER_CLASSES for a filler name, or -1 if it adds to none of them."""
+    if not name:
+        return -1
+    if is_type(name, catalog, ["BioFiber", "Cellulose"]):
+        return 2
+    if is_type(name, catalog, ["Biochar"]):
+        return 3
+    if name_contains(name, ["talc"]):
+        return 0
+    if name_contains(name, ["caco3", "calcium carbonate"]):
+        return 1
+    return -1
+
+def _mfr_mid(name: str, catalog: Dict[str, Dict[str, Any]]) -> float:
+    rng = catalog.get(name, {}).get("mfr_range", [10, 40])
+    return 0.5 * (rng[0] + rng[1])
+
+def _process_col(df: pd.DataFrame, process_cfg: Optional[Dict[str, Any]], key: str,
+                 default: Optional[float] = None) -> np.ndarray:
+    """
+    Resolves one process variable for every row.
+    Precedence: process_cfg (scalar or per-row sequence) > DataFrame column > default.
+    """
+    n = len(df)
+    if process_cfg is not None and key in process_cfg and process_cfg[key] is not None:
+        v = process_cfg[key]
+        if np.ndim(v) == 0:
+            return np.full(n, safe_float(v, default if default is not None else 0.0))
+        return pd.to_numeric(pd.Series(np.asarray(v)), errors="coerce").to_numpy(dtype=float)
+    if key in df.columns:
+        return _num_col(df, key, default if default is not None else np.nan)
+    if default is None:
+        raise KeyError(f"Process variable '{key}' is required but was not found in the process config or the input columns.")
+    return np.full(n, float(default))
+
+def prepare_batch_inputs(df: pd.DataFrame,
+                         catalog: Dict[str, Dict[str, Any]],
+                         process_cfg: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """
+    Parses a formulation DataFrame into the flat arrays the vectorized model consumes.
+    Catalog lookups (filler class, base-resin MFI, densities) run once per unique name.
+    """
+    w_baseA = _num_col(df, "baseA_wtpct")
+    w_baseB = _num_col(df, "baseB_wtpct")
+    w_pp = w_baseA + w_baseB
+
+    filler_cls = _map_names(_name_col(df, "filler_name"), lambda n: _filler_class(n, catalog))
+
+    # Log-mixing rule for the MFI of the base-resin blend (see compute_row_properties).
+    mfi_A = _map_names(_name_col(df, "baseA_name"), lambda n: _mfr_mid(n, catalog))
+    mfi_B = _map_names(_name_col(df, "baseB_name"), lambda n: _mfr_mid(n, catalog))
+    has_base = w_pp > 1e-6
+    tot = np.where(has_base, w_pp, 1.0)
+    mfi_in = np.where(has_base, np.exp((w_baseA / tot) * np.log(mfi_A) + (w_baseB / tot) * np.log(mfi_B)), 25.0)
+
+    nuc_default = safe_float(process_cfg.get("nucleator_ppm", 0)) if process_cfg else 0.0
+    return {
+        "w_pp": w_pp,
+        "w_el": _num_col(df, "elastomer_wtpct"),
+        "w_filler": _num_col(df, "filler_wtpct"),
+        "w_talc_extra": _num_col(df, "talc_wtpct"),
+        "w_compat": _num_col(df, "compat_wtpct"),
+        "w_stab": _num_col(df, "stabilizer_wtpct"),
+        "nuc_ppm": _num_col(df, "nucleator_ppm") if "nucleator_ppm" in df.columns else np.full(len(df), nuc_default),
+        **{f"is_{c}": (filler_cls == i).astype(float) for i, c in enumerate(FILLER_CLASSES)},
+        "mfi_in": mfi_in,
+        "rho_compat": _map_names(_name_col(df, "compat_name"), lambda n: lookup_density(n, catalog, 0.92)),
+        "rho_stab": _map_names(_name_col(df, "stabilizer_name"), lambda n: lookup_density(n, catalog, 1.0)),
+        "Torque_Nm": _process_col(df, process_cfg, "Torque_Nm"),
+        "N_rps": _process_col(df, process_cfg, "N_rps"),
+        "Q_kgh": _process_col(df, process_cfg, "Q_kgh"),
+        "Tm_C": _process_col(df, process_cfg, "Tm_C", 220.0),
+        "K_knead": _process_col(df, process_cfg, "K_knead", 5.0),
+        "pvac_bar_abs": _process_col(df, process_cfg, "pvac_bar_abs", DEFAULT_PROCESS["pvac_bar_abs"]),
+        # NaN where not given; batch_core resolves them through _process_latents.
+        "tau_s": _process_col(df, process_cfg, "tau_s", np.nan),
+        **{k: _process_col(df, process_cfg, k, np.nan) for keys in LATENT_PROCESS_STATES.values() for k in keys},
+    }
+
+def wt_to_phi_batch(w_pp, w_el, w_talc, w_caco3, w_biofiber, w_biochar, w_compat, w_stab,
+                    rho_pp, rho_el, rho_talc, rho_caco3, rho_biofiber, rho_biochar, rho_compat, rho_stab) -> Dict[str, Any]:
+    """Array version of wt_to_phi; every argument may be a scalar or a broadcastable array."""
+    def div(a, b, eps=1e-12):
+        return a / np.where(np.abs(b) > eps, b, eps)
+    def rho(r, fallback):
+        return fallback if r is None else r
+    v_pp = div(w_pp / 100.0, rho(rho_pp, 0.905)); v_el = div(w_el / 100.0, rho(rho_el, 0.87))
+    v_ta = div(w_talc / 100.0, rho(rho_talc, 2.70)); v_ca = div(w_caco3 / 100.0, rho(rho_caco3, 2.70))
+    v_bf = div(w_biofiber / 100.0, rho(rho_biofiber, 1.45)); v_bc = div(w_biochar / 100.0, rho(rho_biochar, 1.80))
+    v_comp = div(w_compat / 100.0, rho(rho_compat, 0.92)); v_stab = div(w_stab / 100.0, rho(rho_stab, 1.0))
+
+    v_sum = np.maximum(1e-12, v_pp + v_el + v_ta + v_ca + v_bf + v_bc + v_comp + v_stab)
+    return {
+        "phi_pp": v_pp / v_sum, "phi_el": v_el / v_sum,
+        "phi_f_talc": v_ta / v_sum, "phi_f_caco3": v_ca / v_sum,
+        "phi_f_biofiber": v_bf / v_sum, "phi_f_biochar": v_bc / v_sum,
+        "phi_compat": v_comp / v_sum, "phi_stab": v_stab / v_sum,
+    }
+
+def _halpin_tsai(Ef, AR, E_matrix, phi):
+    eta = (Ef / E_matrix - 1) / (Ef / E_matrix + 2 * AR)
+    den = 1 - eta * phi
+    ok = den != 0
+    return np.where(ok, (1 + eta * phi) / np.where(ok, den, 1.0), 1.0)
+
+def _known(values: Dict[str, Any], keys) -> np.ndarray:
+    """True where every one of `keys` is present in values and not NaN."""
+    ok = np.asarray(True)
+    for k in keys:
+        v = values.get(k)
+        ok = ok & ~np.isnan(np.asarray(np.nan if v is None else v))
+    return ok
+
+def _process_latents(values: Dict[str, Any], p: Dict[str, Any], equations: Optional[CompiledEquations]):
+    """
+    Residence time and screw fill factor for the degradation dose. A given tau_s wins; otherwise the
+    model's `tau_s` and `fill_factor_F` latent states are evaluated wherever their process inputs are
+    known (LATENT_PROCESS_STATES), and the fixed defaults apply elsewhere.
+    `values` may hold scalars or arrays, with NaN or a missing key meaning "not given".
+    """
+    given_tau = np.asarray(np.nan if values.get("tau_s") is None else values["tau_s"])
+    tau_s = np.where(np.isnan(given_tau), DEFAULT_PROCESS["tau_s"], given_tau)
+    fill = 1.0
+    if equations is None:
+        return tau_s, fill
+    ok = {"tau_s": np.isnan(given_tau) & _known(values, LATENT_PROCESS_STATES["tau_s"]),
+          "fill_factor_F": _known(values, LATENT_PROCESS_STATES["fill_factor_F"])}
+    wanted = [s for s in LATENT_PROCESS_STATES if s in equations and ok[s].any()]
+    if wanted:
+        out = equations.evaluate({k: v for k, v in values.items() if k not in LATENT_PROCESS_STATES}, p, wanted)
+        if "tau_s" in out:
+            tau_s = np.where(ok["tau_s"], out["tau_s"], tau_s)
+        if "fill_factor_F" in out:
+            fill = np.where(ok["fill_factor_F"], out["fill_factor_F"], 1.0)
+    return tau_s, fill
+
+def batch_core(inp: Dict[str, Any], p: Dict[str, Any],
+               equations: Optional[CompiledEquations] = None) -> Dict[str, Any]:
+    """
+    Vectorized twin of compute_row_properties.
+    `inp` comes from prepare_batch_inputs; `p` is a HybridModel (or any name -> value mapping). Only NumPy ufuncs and
+    arithmetic are used, so parameters may themselves be arrays that broadcast against the rows, and
+    inputs may be complex (complex-step derivatives, see predict_jacobian). An optional
+    inp["latent_shift"] {name: offset} adds to the LATENT_INPUTS states where they are defined.
+    `equations` defaults to p.equations (pass the model's explicitly when p is a plain mapping).
+    """
+    shift = inp.get("latent_shift") or {}
+    if equations is None:
+        equations = getattr(p, "equations", None)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        w_talc = inp["w_filler"] * inp["is_talc"] + inp["w_talc_extra"]
+        w_caco3 = inp["w_filler"] * inp["is_caco3"]
+        w_biofiber = inp["w_filler"] * inp["is_biofiber"]
+        w_biochar = inp["w_filler"] * inp["is_biochar"]
+        rho_compat, rho_stab = inp["rho_compat"], inp["rho_stab"]
+        phis = wt_to_phi_batch(inp["w_pp"], inp["w_el"], w_talc, w_caco3, w_biofiber, w_biochar,
+                               inp["w_compat"], inp["w_stab"],
+                               p.get("rho_PP"), p.get("rho_el"), p.get("rho_talc"),
+                               p.get("rho_caco3"), p.get("rho_biofiber"), p.get("rho_biochar"),
+                               rho_compat, rho_stab)
+        phi_el = phis["phi_el"]
+        phi_comp = phis["phi_compat"]
+        lambda_visc, sigma_if, A_comp = 1.0, 5.0, 0.8  # Assumed constants (as in the per-row path)
+
+        # Specific Energy Input (SEI) in kWh/kg.
+        power_W = inp["Torque_Nm"] * 2 * np.pi * inp["N_rps"] * p.get("gear_eff", 0.9)
+        flow_kgs = inp["Q_kgh"] / 3600.0
+        has_flow = flow_kgs > 1e-9
+        SEI = np.where(has_flow, power_W / np.where(has_flow, flow_kgs, 1.0), 0.0) / 3.6e6 + shift.get("SEI", 0.0)
+
+        tau_s, fill = _process_latents(inp, p, equations)
+        shear_rate = p["k_gamma"] * inp["N_rps"] * fill
+        tau_s_in_minutes = tau_s / 60.0  # see compute_row_properties for the unit note
+        degradation_dose = SEI * \
+            (p["a1"] + p["a2"] * (shear_rate / p["shear0"]) ** p["m"]) * \
+            tau_s_in_minutes ** p["nu"] * \
+            np.exp(p["beta"] * (inp["Tm_C"] - p["Tref_C"])) * \
+            np.exp(-p["kappa"] * (p["patm_bar"] - inp["pvac_bar_abs"]))
+
+        Mw_out = 350000 / (1 + p["kD"] * degradation_dose)
+        mfi = inp["mfi_in"] * ((350000 / Mw_out) ** p["alpha_MFI"])
+        Sc = 1 - np.exp(-p["kc"] * phi_comp * A_comp) + shift.get("Sc", 0.0)
+        Psi_lambda = np.exp(-p["klambda"] * (lambda_visc - 1.0) ** 2)
+        Phi_stress = (Sc * Psi_lambda * inp["K_knead"] * shear_rate) / max(sigma_if, 1e-6)
+        dr_um = p["dmin_um"] + (p["d0_um"] - p["dmin_um"]) * np.exp(-p["kd"] * SEI * Phi_stress) + shift.get("dr_um", 0.0)
+
+        Xc = p["Xc0"] + p["alpha_n"] * np.log(1.0 + inp["nuc_ppm"] / p["c50_ppm"]) - p["alpha_el"] * phi_el
+
+        Em_GPa = p["Em0_GPa"] * (1 + p["beta_c"] * (Xc - p["Xc0"]))
+        Erubber_GPa = Em_GPa * (1 - p["br"] * phi_el) ** p["pRub"]
+
+        E_GPa = Erubber_GPa * \
+            _halpin_tsai(p["Ef_talc_GPa"], p["AR_talc"], Erubber_GPa, phis["phi_f_talc"]) * \
+            _halpin_tsai(p["Ef_caco3_GPa"], p["AR_caco3"], Erubber_GPa, phis["phi_f_caco3"]) * \
+            _halpin_tsai(p["Ef_biofiber_GPa"], p["AR_biofiber"], Erubber_GPa, phis["phi_f_biofiber"]) * \
+            _halpin_tsai(p["Ef_biochar_GPa"], p["AR_biochar"], Erubber_GPa, phis["phi_f_biochar"])
+        E_GPa = E_GPa + shift.get("E_GPa", 0.0)
+
+        sigma_y_MPa = p["sigma_y0_MPa"] * (1 + p["gamma_c"] * (Xc - p["Xc0"])) * \
+            (1 - p["ky"] * phi_el * (dr_um / (dr_um + p["delta_um"]))) * (1 + p["ky2"] * Sc)
+
+        PiD = np.exp(-p["chi"] * degradation_dose)
+        toughening = 1 - np.exp(-p["kI"] * (phi_el * Sc / np.maximum(dr_um, 1e-3)))
+        Izod23_kJm2 = PiD * 1.0 * p["Imax_kJm2"] * toughening
+        fT_m20 = 1.0 / (1 + np.exp(p["kT"] * (p["T0_C"] - (-20.0))))
+        Izodm20_kJm2 = PiD * fT_m20 * p["Imax_kJm2"] * toughening
+
+        HDT_C = p["H0_C"] + p["h1"] * np.log(np.maximum(E_GPa, 1e-6)) + p["h2"] * Xc - p["h3"] * phi_el
+
+        rho_gcc = (phis["phi_pp"] * p.get("rho_PP", 0.9) +
+                   phi_el * p.get("rho_el", 0.86) +
+                   phis["phi_f_talc"] * p.get("rho_talc", 2.7) +
+                   phis["phi_f_caco3"] * p.get("rho_caco3", 2.71) +
+                   phis["phi_f_biofiber"] * p.get("rho_biofiber", 1.45) +
+                   phis["phi_f_biochar"] * p.get("rho_biochar", 1.8) +
+                   phi_comp * rho_compat +
+                   phis["phi_stab"] * rho_stab)
+
+        eps_y_pct = np.fmax(0.1, p["eps0_pct"] - p["k_eps_E"] * E_GPa + p["k_eps_el"] * phi_el)
+        Gardner_J = p["G0_J"] + p["G1_J_per_phi"] * phi_el
+
+    return {
+        "E_GPa": E_GPa,
+        "MFI_g10min": mfi,
+        "sigma_y_MPa": sigma_y_MPa,
+        "Izod_23_kJm2": Izod23_kJm2,
+        "Izod_m20_kJm2": Izodm20_kJm2,
+        "HDT_C": HDT_C,
+        "Shrink_pct": None,  # Not implemented in this model version
+        "rho_gcc": rho_gcc,
+        "eps_y_pct": eps_y_pct,
+        "Gardner_J": Gardner_J,
+        "Xc": Xc,
+        "phi_el": phi_el,
+        "phi_f_talc": phis["phi_f_talc"],
+        "phi_f_caco3": phis["phi_f_caco3"],
+        "phi_f_biofiber": phis["phi_f_biofiber"],
+        "phi_f_biochar": phis["phi_f_biochar"],
+        # Latent states, for sensitivities and monotonicity checks
+        "SEI": SEI,
+        "Sc": Sc,
+        "dr_um": dr_um,
+    }
+
+def predict_properties_batch(df: pd.DataFrame,
+                             model: Union[Dict[str, Any], HybridModel],
+                             catalog: Dict[str, Dict[str, Any]],
+                             process: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Predicts PROP_FIELDS for every row of `df` in one vectorized pass.
+    Matches compute_row_properties row-for-row (to floating-point tolerance). Process
+    variables come from `process` when given, otherwise from the matching columns of `df`.
+    Returns a DataFrame aligned to df.index; rows the model cannot evaluate come back as NaN.
+    """
+    if len(df) == 0:
+        return pd.DataFrame(columns=PROP_FIELDS, index=df.index, dtype=float)
+    inp = prepare_batch_inputs(df, catalog, process)
+    out = batch_core(inp, as_hybrid_model(model))
+    n = len(df)
+    cols = {k: (np.full(n, np.nan) if v is None else np.broadcast_to(v, (n,))) for k, v in out.items()}
+    return pd.DataFrame(cols, index=df.index)[PROP_FIELDS]
+
+# ---------- Monte Carlo uncertainty ----------
+
+# Outputs that depend on sampled parameters (phi_* are fixed by the recipe, Shrink_pct is not modelled).
+MC_FIELDS = ["E_GPa", "MFI_g10min", "sigma_y_MPa", "Izod_23_kJm2", "Izod_m20_kJm2", "HDT_C",
+             "rho_gcc", "eps_y_pct", "Gardner_J", "Xc"]
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+# noise_model keys that differ from the output column names.
+NOISE_KEY_MAP = {"Izod23_kJm2": "Izod_23_kJm2", "Izodm20_kJm2": "Izod_m20_kJm2"}
+
+def sample_parameters(model: Union[Dict[str, Any], HybridModel],
+                      n_samples: int,
+                      rng: np.random.Generator) -> Dict[str, Any]:
+    """
+    Draws n_samples parameter sets, uniform over each `priors` range; known materials and
+    physical constants stay fixed. Sampled values have shape (1, n_samples) so they broadcast
+    against row inputs of shape (n_rows, 1) in batch_core.
+    """
+    model = as_hybrid_model(model)
+    params: Dict[str, Any] = dict(zip(model.names, model.values.tolist()))
+    for pname, pr in model.spec.get("parameters", {}).get("priors", {}).items():
+        if pname in params and isinstance(pr, (list, tuple)) and len(pr) == 2:
+            lo, hi = float(pr[0]), float(pr[1])
+            params[pname] = rng.uniform(lo, hi, size=(1, n_samples))
+    return params
+
+def _quantile_col(prop: str, q: float) -> str:
+    return f"{prop}_q{int(round(q * 100)):02d}"
+
+def mc_columns(quantiles=DEFAULT_QUANTILES) -> List[str]:
+    """The columns predict_properties_mc returns, in order."""
+    return ([f"{prop}_{stat}" for prop in MC_FIELDS for stat in ("mean", "std")]
+            + [_quantile_col(prop, q) for prop in MC_FIELDS for q in quantiles])
+
+def _row_quantiles(x: np.ndarray, quantiles) -> np.ndarray:
+    """
+    Linear-interpolated quantiles along axis 1 (same as np.quantile's default). `x` is sorted
+    in place: NumPy's vectorized sort is several times faster here than a multi-kth partition.
+    """
+    pos = np.asarray(quantiles, dtype=float) * (x.shape[1] - 1)
+    lo, hi = np.floor(pos).astype(int), np.ceil(pos).astype(int)
+    x.sort(axis=1)
+    return x[:, lo] + (pos - lo) * (x[:, hi] - x[:, lo])
+
+def predict_properties_mc(df: pd.DataFrame,
+                          model: Union[Dict[str, Any], HybridModel],
+                          catalog: Dict[str, Dict[str, Any]],
+                          process: Optional[Dict[str, Any]] = None,
+                          n_samples: int = 1000,
+                          quantiles=DEFAULT_QUANTILES,
+                          seed: Optional[int] = None,
+                          include_noise: bool = True,
+                          max_elements: int = 64_000) -> pd.DataFrame:
+    """
+    Propagates prior uncertainty (plus the model's noise_model, if include_noise) through the
+    model. All candidates x samples are evaluated as one broadcast computation, in row blocks
+    of at most max_elements values (small enough to stay cache-resident). The same parameter draws are used for every row, so
+    candidates are compared under common random numbers.
+    Returns `<prop>_mean`, `<prop>_std` and `<prop>_qNN` columns for MC_FIELDS, aligned to df.index.
+    """
+    model = as_hybrid_model(model)
+    rng = np.random.default_rng(seed)
+    params = sample_parameters(model, n_samples, rng)
+    noise = {NOISE_KEY_MAP.get(k, k): float(v) for k, v in model.spec.get("noise_model", {}).items()}
+    quantiles = tuple(quantiles)
+
+    n = len(df)
+    cols = {c: np.full(n, np.nan) for c in mc_columns(quantiles)}
+    if n == 0:
+        return pd.DataFrame(cols, index=df.index)
+
+    inp = prepare_batch_inputs(df, catalog, process)
+    block = max(1, max_elements // max(n_samples, 1))
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        # Rows as a column vector against (1, n_samples) parameters: every output is (rows, samples),
+        # contiguous along samples, so the reductions below stream through memory.
+        out = batch_core({k: v[start:stop, None] for k, v in inp.items()}, params, model.equations)
+        # One standard-normal draw per (row, sample), scaled per property. Only per-property
+        # marginals are reported, so sharing it across properties does not bias any column.
+        z = rng.standard_normal((stop - start, n_samples)) if include_noise and noise else None
+        for prop in MC_FIELDS:
+            draws = out[prop]
+            if draws.shape != (stop - start, n_samples):
+                draws = np.broadcast_to(draws, (stop - start, n_samples)).copy()
+            if z is not None and noise.get(prop):
+                draws += noise[prop] * z
+            if np.isfinite(draws).all():
+                cols[f"{prop}_mean"][start:stop] = draws.mean(axis=1)
+                cols[f"{prop}_std"][start:stop] = draws.std(axis=1)
+                qs = _row_quantiles(draws, quantiles).T if quantiles else []
+            else:
+                cols[f"{prop}_mean"][start:stop] = np.nanmean(draws, axis=1)
+                cols[f"{prop}_std"][start:stop] = np.nanstd(draws, axis=1)
+                qs = np.nanquantile(draws, quantiles, axis=1) if quantiles else []
+            for q, row in zip(quantiles, qs):
+                cols[_quantile_col(prop, q)][start:stop] = row
+    return pd.DataFrame(cols, index=df.index)
+
+# ---------- Sensitivities ----------
+
+# Differentiable inputs -> the prepare_batch_inputs array they feed.
+SENS_INPUTS = {
+    "elastomer_wtpct": "w_el", "filler_wtpct": "w_filler", "compat_wtpct": "w_compat",
+    "nucleator_ppm": "nuc_ppm",
+    "N_rps": "N_rps", "Tm_C": "Tm_C", "Q_kgh": "Q_kgh", "Torque_Nm": "Torque_Nm",
+}
+DEFAULT_WRT = ("elastomer_wtpct", "filler_wtpct", "compat_wtpct", "N_rps", "Tm_C", "Q_kgh", "Torque_Nm")
+# Latent states batch_core can be differentiated with respect to (via inp["latent_shift"]).
+LATENT_INPUTS = ("SEI", "Sc", "dr_um", "E_GPa")
+JAC_FIELDS = [f for f in PROP_FIELDS if f != "Shrink_pct"]
+# monotone_signs entries in the model JSON -> (outputs, input or latent state) they constrain.
+MONOTONE_CHECKS = {
+    "dMFI_dSEI": (("MFI_g10min",), "SEI"),
+    "ddr_dSEI": (("dr_um",), "SEI"),
+    "dXc_dc_nuc": (("Xc",), "nucleator_ppm"),
+    "dE_dphi_f": (("E_GPa",), "filler_wtpct"),
+    "dE_dphi_el": (("E_GPa",), "elastomer_wtpct"),
+    "dIzod_ddr": (("Izod_23_kJm2", "Izod_m20_kJm2"), "dr_um"),
+    "dIzod_dSc": (("Izod_23_kJm2", "Izod_m20_kJm2"), "Sc"),
+    "dHDT_dE": (("HDT_C",), "E_GPa"),
+}
+
+def jac_col(prop: str, wrt: str) -> str:
+    return f"d{prop}_d{wrt}"
+
+def jacobian_columns(wrt=DEFAULT_WRT, fields=None) -> List[str]:
+    """The columns predict_jacobian returns, in order."""
+    return [jac_col(f, w) for f in (fields or JAC_FIELDS) for w in wrt]
+
+def _jacobian(inp: Dict[str, np.ndarray],
+              model: HybridModel,
+              wrt,
+              fields,
+              rebalance: bool = False,
+              step: float = 1e-30,
+              max_elements: int = 500_000) -> Dict[str, np.ndarray]:
+    """
+    Complex-step derivatives of `fields` with respect to every name in `wrt`, for all rows.
+    Each input gets its own slice of a leading axis, so one batch_core call yields the whole
+    Jacobian; the imaginary part carries the derivative exactly (no subtractive cancellation).
+    """
+    unknown = [w for w in wrt if w not in SENS_INPUTS and w not in LATENT_INPUTS]
+    if unknown:
+        raise ValueError(f"Cannot differentiate with respect to {unknown}. "
+                         f"Expected inputs {sorted(SENS_INPUTS)} or latent states {list(LATENT_INPUTS)}.")
+    k, n = len(wrt), len(inp["w_pp"])
+    jac = {c: np.full(n, np.nan) for c in jacobian_columns(wrt, fields)}
+    block = max(1, max_elements // max(k, 1))
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        sub = {key: np.broadcast_to(v[start:stop], (k, stop - start)).astype(complex) for key, v in inp.items()}
+        shift = {}
+        for j, w in enumerate(wrt):
+            if w in SENS_INPUTS:
+                sub[SENS_INPUTS[w]][j] += 1j * step
+                if rebalance and w.endswith("_wtpct"):
+                    # Take the change out of the base resins in proportion, so the blend MFI is unchanged.
+                    sub["w_pp"][j] -= 1j * step
+            else:
+                shift.setdefault(w, np.zeros((k, 1), dtype=complex))[j] += 1j * step
+        sub["latent_shift"] = shift
+        out = batch_core(sub, model)
+        for f in fields:
+            d = np.broadcast_to(np.imag(out[f]) / step, (k, stop - start))
+            for j, w in enumerate(wrt):
+                jac[jac_col(f, w)][start:stop] = d[j]
+    return jac
+
+def predict_jacobian(df: pd.DataFrame,
+                     model: Union[Dict[str, Any], HybridModel],
+                     catalog: Dict[str, Dict[str, Any]],
+                     process: Optional[Dict[str, Any]] = None,
+                     wrt=DEFAULT_WRT,
+                     fields=None,
+                     rebalance: bool = False) -> pd.DataFrame:
+    """
+    Batch Jacobian: `d<prop>_d<input>` columns for every output in `fields` (default JAC_FIELDS)
+    and every input in `wrt` (names from SENS_INPUTS or LATENT_INPUTS), aligned to df.index.
+    Partial derivatives hold all other columns fixed; with rebalance=True a wt% change is
+    taken out of the base resins instead, as the orchestrator does when re-balancing to 100%.
+    """
+    model = as_hybrid_model(model)
+    wrt = tuple(wrt)
+    fields = list(fields or JAC_FIELDS)
+    if len(df) == 0:
+        return pd.DataFrame(columns=jacobian_columns(wrt, fields), index=df.index, dtype=float)
+    inp = prepare_batch_inputs(df, catalog, process)
+    return pd.DataFrame(_jacobian(inp, model, wrt, fields, rebalance=rebalance), index=df.index)
+
+def check_monotone_signs(df: pd.DataFrame,
+                         model: Union[Dict[str, Any], HybridModel],
+                         catalog: Dict[str, Dict[str, Any]],
+                         process: Optional[Dict[str, Any]] = None,
+                         tol: float = 1e-12) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluates the model's `monotone_signs` over every row of df in one Jacobian pass.
+    Returns {rule: {expected, outputs, wrt, n_checked, n_violations, violating_rows}}; a row
+    violates a rule when a derivative has the wrong sign by more than `tol`.
+    Rules without a known mapping are reported with n_checked = 0.
+    """
+    model = as_hybrid_model(model)
+    signs = model.spec.get("parameters", {}).get("monotone_signs", {})
+    rules = {name: MONOTONE_CHECKS[name] for name in signs if name in MONOTONE_CHECKS}
+    report: Dict[str, Dict[str, Any]] = {}
+    jac = {}
+    if rules and len(df):
+        wrt = tuple(dict.fromkeys(w for _, w in rules.values()))
+        fields = list(dict.fromkeys(f for outs, _ in rules.values() for f in outs))
+        jac = _jacobian(prepare_batch_inputs(df, catalog, process), model, wrt, fields)
+    for name, expected in signs.items():
+        if name not in rules:
+            report[name] = {"expected": expected, "outputs": [], "wrt": None,
+                            "n_checked": 0, "n_violations": 0, "violating_rows": []}
+            continue
+        outs, w = rules[name]
+        bad = np.zeros(len(df), dtype=bool)
+        for f in outs:
+            d = jac.get(jac_col(f, w), np.empty(0))
+            bad |= (d < -tol) if expected.strip().startswith(">") else (d > tol)
+        report[name] = {
+            "expected": expected, "outputs": list(outs), "wrt": w,
+            "n_checked": int(len(df)), "n_violations": int(bad.sum()),
+            "violating_rows": [int(i) for i in np.flatnonzero(bad)[:20]],
+        }
+    return report
+
+def predict_and_merge(df: pd.DataFrame,
+                      model: Union[Dict[str, Any], HybridModel],
+                      catalog: Dict[str, Dict[str, Any]],
+                      process_cfg: Optional[Dict[str, Any]] = None,
+                      cache=None,
+                      mc_samples: int = 0,
+                      mc_seed: Optional[int] = None,
+                      jacobian: bool = False) -> pd.DataFrame:
+    """
+    Returns df with the predicted properties, the process conditions used and the model's
+    content hash appended, i.e. the same column layout the bridge writes to its props CSV.
+    `cache` is anything with predict_properties_batch's signature as a `.predict` method
+    (e.g. src.prediction_cache.PredictionCache). With mc_samples > 0 the Monte Carlo
+    `<prop>_mean/_std/_qNN` columns are appended after the point predictions; with
+    jacobian=True the `d<prop>_d<input>` sensitivity columns for DEFAULT_WRT follow.
+    """
+    model = as_hybrid_model(model)
+    process_out = with_process_defaults(process_cfg)
+    predict = cache.predict if cache is not None else predict_properties_batch
+    try:
+        props_df = predict(df, model, catalog, process_out)
+    except Exception as e:
+        print(f"Warning: Could not compute properties for this batch. Error: {e}")
+        props_df = pd.DataFrame(np.nan, index=df.index, columns=PROP_FIELDS)
+
+    # Combine all fields, ensuring no duplicates and preserving order:
+    # input columns, then model outputs, then the process conditions used.
+    out_df = df.copy()
+    for f in PROP_FIELDS:
+        out_df[f] = props_df[f]
+    if mc_samples > 0:
+        try:
+            mc_df = predict_properties_mc(df, model, catalog, process_out, n_samples=mc_samples, seed=mc_seed)
+        except Exception as e:
+            print(f"Warning: Could not propagate uncertainty for this batch. Error: {e}")
+            # Keep the columns, so that the batches of a stream share one layout.
+            mc_df = pd.DataFrame(np.nan, index=df.index, columns=mc_columns())
+        out_df = pd.concat([out_df, mc_df], axis=1)
+    if jacobian:
+        try:
+            jac_df = predict_jacobian(df, model, catalog, process_out)
+        except Exception as e:
+            print(f"Warning: Could not compute sensitivities for this batch. Error: {e}")
+            jac_df = pd.DataFrame(np.nan, index=df.index, columns=jacobian_columns())
+        out_df = pd.concat([out_df, jac_df], axis=1)
+    for k, v in process_out.items():
+        out_df[k] = v
+    out_df["model_hash"] = model.content_hash
+    return out_df
+
+# ---------- Streaming ----------
+
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+# Rough peak-to-input ratio for one batch: input strings + parsed arrays + output frame.
+CHUNK_MEMORY_FACTOR = 4.0
+
+class ChunkWriter:
+    """
+    Appends DataFrame batches to a single CSV, Parquet or Arrow IPC file. The Parquet/Arrow
+    schema is fixed by the first batch's columns, with float_columns (default: every prediction,
+    Monte Carlo and sensitivity column) typed float64 whatever that batch holds, so a batch
+    whose prediction failed does not set them to null/object.
+    """
+
+    def __init__(self, path: str, fmt: str = "csv", float_columns=None):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Expected one of {sorted(OUTPUT_FORMATS)}.")
+        self.path, self.fmt = path, fmt
+        self.float_columns = set(PROP_FIELDS + mc_columns() + jacobian_columns() if float_columns is None
+                                 else float_columns)
+        self._writer = None
+        self._schema = None
+        self._first = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        else:
+            if self._schema is None:
+                inferred = pa.Schema.from_pandas(df, preserve_index=False)
+                self._schema = pa.schema([pa.field(f.name, pa.float64()) if f.name in self.float_columns else f
+                                          for f in inferred])
+                if self.fmt == "parquet":
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self._first = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self._first and self.fmt == "csv":
+            # Nothing was written (empty input); still leave a valid, empty file behind.
+            open(self.path, "w").close()
+
+def _chunk_rows_for_ceiling(sample: pd.DataFrame, requested: int, max_memory_mb: Optional[float]) -> int:
+    """Caps the batch size so one batch stays under max_memory_mb, based on a measured sample."""
+    if not max_memory_mb or len(sample) == 0:
+        return requested
+    bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample) * CHUNK_MEMORY_FACTOR
+    return max(1, min(requested, int(max_memory_mb * 1024 * 1024 / max(bytes_per_row, 1.0))))
+
+def stream_predictions(in_csv: str,
+                       out_path: str,
+                       model: Union[Dict[str, Any], HybridModel],
+                       catalog: Dict[str, Dict[str, Any]],
+                       process_cfg: Optional[Dict[str, Any]] = None,
+                       chunk_size: int = 100_000,
+                       fmt: str = "csv",
+                       max_memory_mb: Optional[float] = None,
+                       progress: bool = True,
+                       mc_samples: int = 0,
+                       mc_seed: Optional[int] = None,
+                       jacobian: bool = False,
+                       check_monotone: bool = False) -> Dict[str, Any]:
+    """
+    Predicts a DOE CSV batch by batch and appends each batch to `out_path`.
+    Only one batch is held in memory at a time. Returns throughput statistics, plus the
+    monotone_signs report accumulated over all batches when check_monotone is set.
+    """
+    model = as_hybrid_model(model)
+    writer = ChunkWriter(out_path, fmt)
+    # Keep input cells verbatim (as the DictReader path did); the model coerces what it needs.
+    reader = pd.read_csv(in_csv, dtype=str, keep_default_na=False, iterator=True)
+    rows = chunks = 0
+    monotone: Dict[str, Dict[str, Any]] = {}
+    rows_per_chunk = min(chunk_size, 1000) if max_memory_mb else chunk_size
+    t0 = time.perf_counter()
+    try:
+        while True:
+            try:
+                chunk = reader.get_chunk(rows_per_chunk)
+            except StopIteration:
+                break
+            if chunks == 0:
+                rows_per_chunk = _chunk_rows_for_ceiling(chunk, chunk_size, max_memory_mb)
+            writer.write(predict_and_merge(chunk, model, catalog, process_cfg,
+                                           mc_samples=mc_samples, mc_seed=mc_seed, jacobian=jacobian))
+            if check_monotone:
+                try:
+                    _merge_monotone_reports(monotone, check_monotone_signs(chunk, model, catalog,
+                                                                           with_process_defaults(process_cfg)), rows)
+                except Exception as e:
+                    print(f"Warning: Could not check monotone signs for this batch. Error: {e}")
+            rows += len(chunk)
+            chunks += 1
+            if progress:
+                elapsed = time.perf_counter() - t0
+                print(f"[bridge] {rows:,} rows in {chunks} batches, {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)",
+                      file=sys.stderr)
+    finally:
+        reader.close()
+        writer.close()
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "rows_written": rows,
+        "chunks": chunks,
+        "chunk_size": rows_per_chunk,
+        "format": fmt,
+        "mc_samples": mc_samples,
+        "mc_seed": mc_seed,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
+    if check_monotone:
+        stats["monotone_signs"] = monotone
+    return stats
+
+def _merge_monotone_reports(total: Dict[str, Dict[str, Any]], part: Dict[str, Dict[str, Any]], row_offset: int) -> None:
+    """Adds one batch's check_monotone_signs report into a running total (row numbers made global)."""
+    for name, r in part.items():
+        acc = total.setdefault(name, {**r, "n_checked": 0, "n_violations": 0, "violating_rows": []})
+        acc["n_checked"] += r["n_checked"]
+        acc["n_violations"] += r["n_violations"]
+        room = 20 - len(acc["violating_rows"])
+        acc["violating_rows"] += [row_offset + i for i in r["violating_rows"][:max(room, 0)]]
+
 # ---------- Path resolution ----------
 
 def resolve_paths(args):
@@ -298,7 +1329,7 @@ def resolve_paths(args):
     else:
         cycle = args.cycle or "iter_unlabeled"
         out_dir = os.path.join(args.out_dir or "../results/datasets/properties", cycle)
-        out_csv = os.path.join(out_dir, f"props_{cycle}.csv")
+        out_csv = os.path.join(out_dir, f"props_{cycle}{OUTPUT_FORMATS[args.format or 'csv']}")
 
     meta_json = os.path.join(out_dir, "bridge_run_metadata.json")
     return in_csv, out_csv, out_dir, meta_json
@@ -318,54 +1349,41 @@ def main():
     ap.add_argument("--ingredient-library", required=True, help="Path to ingredient_library.json")
     ap.add_argument("--model", required=True, help="Path to model JSON (e.g., ..._v1_gpt.json)")
     ap.add_argument("--process", default="", help="Optional JSON with process settings")
+    # streaming
+    ap.add_argument("--chunk-size", type=int, default=100_000, help="Rows per prediction batch")
+    ap.add_argument("--max-memory-mb", type=float, default=None,
+                    help="Approximate memory ceiling per batch; shrinks --chunk-size if needed")
+    ap.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="",
+                    help="Output format (default: from --out extension, else csv)")
+    ap.add_argument("--quiet", action="store_true", help="Suppress per-batch progress output")
+    # uncertainty
+    ap.add_argument("--mc-samples", type=int, default=0,
+                    help="Monte Carlo draws over the priors; adds <prop>_mean/_std/_q05/_q50/_q95 columns")
+    ap.add_argument("--mc-seed", type=int, default=None, help="Seed for the Monte Carlo draws")
+    # sensitivities
+    ap.add_argument("--jacobian", action="store_true",
+                    help="Add d<prop>_d<input> columns for wt%% and process inputs")
+    ap.add_argument("--check-monotone", action="store_true",
+                    help="Check the model's monotone_signs over every row and report violations")
     args = ap.parse_args()
+    if not args.format:
+        ext = os.path.splitext(args.out)[1].lower() if args.out else ""
+        args.format = next((f for f, e in OUTPUT_FORMATS.items() if e == ext), "csv")
 
     in_csv, out_csv, out_dir, meta_json = resolve_paths(args)
     os.makedirs(out_dir, exist_ok=True)
 
     lib = read_json(args.ingredient_library)
-    model = read_json(args.model)
+    model = HybridModel.from_json(args.model)
     process_cfg = read_json(args.process) if args.process else {}
     catalog = load_ingredient_catalog(lib)
 
-    n = 0
-    with open(in_csv, newline="", encoding="utf-8") as f_in, \
-         open(out_csv, "w", newline="", encoding="utf-8") as f_out:
-        reader = csv.DictReader(f_in)
-        
-        # Setup output fields
-        in_fields = list(reader.fieldnames or [])
-        prop_fields = ["E_GPa","MFI_g10min","sigma_y_MPa","Izod_23_kJm2","Izod_m20_kJm2","HDT_C","Shrink_pct",
-                       "rho_gcc", "eps_y_pct", "Gardner_J", "Xc", "phi_el","phi_f_talc","phi_f_caco3","phi_f_biofiber","phi_f_biochar"]
-        process_fields = list(process_cfg.keys())
-
-        # The compute function may add default process variables if they are missing.
-        # Ensure they are in the header to prevent a ValueError from the CSV writer.
-        for default_key in ["tau_s", "pvac_bar_abs"]:
-            if default_key not in process_fields:
-                process_fields.append(default_key)
-
-        # Combine all fields for the header, ensuring no duplicates and preserving order
-        out_fields = list(in_fields)
-        for f in prop_fields:
-            if f not in out_fields:
-                out_fields.append(f)
-        for f in process_fields:
-            if f not in out_fields:
-                out_fields.append(f)
-        
-        w = csv.DictWriter(f_out, fieldnames=out_fields)
-        w.writeheader()
-
-        for row in reader:
-            try:
-                props = compute_row_properties(row, model, catalog, process_cfg) # Calculate properties
-                row.update(props) # Merge new properties
-                row.update(process_cfg) # Merge process conditions
-            except Exception as e:
-                print(f"Warning: Could not compute properties for row. Error: {e}. Row: {row}")
-            w.writerow(row)
-            n += 1
+    stats = stream_predictions(in_csv, out_csv, model, catalog, process_cfg,
+                               chunk_size=max(1, args.chunk_size), fmt=args.format,
+                               max_memory_mb=args.max_memory_mb, progress=not args.quiet,
+                               mc_samples=max(0, args.mc_samples), mc_seed=args.mc_seed,
+                               jacobian=args.jacobian, check_monotone=args.check_monotone)
+    n = stats["rows_written"]
 
     # metadata
     meta = {
@@ -373,14 +1391,19 @@ def main():
         "in_csv": in_csv,
         "out_csv": out_csv,
         "model": args.model,
+        "model_hash": model.content_hash,
         "ingredient_library": args.ingredient_library,
         "process": args.process or None,
-        "rows_written": n
+        **stats,
     }
     with open(meta_json, "w", encoding="utf-8") as f:
         json.dump(meta, f, indent=2)
 
-    print(f"[bridge] Wrote {n} rows with predicted properties to {out_csv}")
+    print(f"[bridge] Wrote {n} rows with predicted properties to {out_csv} "
+          f"({stats['chunks']} batches, {stats['rows_per_s'] or 0:,.0f} rows/s)")
+    for name, r in stats.get("monotone_signs", {}).items():
+        status = "not checked" if not r["n_checked"] else f"{r['n_violations']}/{r['n_checked']} rows violate"
+        print(f"[bridge] monotone {name} ({r['expected']}): {status}")
     print(f"[bridge] Metadata: {meta_json}")
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+# src/candidate_materializer.py
+"""
+Feasibility-aware materialization of optimizer points into full formulations.
+
+The optimizer moves a few wt% levers (elastomer, filler, compatibilizer; with the full search
+space also talc, INTUNE, stabilizer and base B) and the process levers; every other column of a
+candidate comes from the run's one-row template (the first DOE row). A base resin that is a lever
+is optimized like the others, and the remaining bases take up the remainder. `CandidateMaterializer.materialize` turns a whole batch of points into formulations at once:
+
+1. project each optimized wt% onto what its template ingredient allows: 0 (left out) or its
+   library `range_wt_pct`, intersected with the search space bounds (a lever without a named
+   ingredient in the template, or without a library range, keeps just the search bounds)
+2. copy the template's ingredient names and fixed wt% columns, and let the base resins take up the
+   remainder to 100 wt% (the primary base first, then the others down to 0); if even that cannot
+   close the gap, shrink the optimized levers toward their lower bounds
+3. check the ingredients present against the compatibility rules (src/compatibility.py), once per
+   distinct set of present ingredients in the batch
+4. drop points that repeat an earlier point of the batch or an already evaluated one
+
+Projected points are returned in the optimizer's space, so the optimizer is told what was really
+evaluated. Infeasible points (blocked chemistry, or over 100 wt% with nothing left to shrink) and
+duplicates come back with their reason instead of being sent to the evaluator.
+"""
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.compatibility import evaluate_formulation
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_LIBRARY_PATH = PROJECT_ROOT / "data" / "processed" / "ingredient_library.json"
+DEFAULT_RULES_PATH = PROJECT_ROOT / "data" / "processed" / "compatibility_rules.json"
+
+# Template slots whose "<slot>_name" / "<slot>_wtpct" columns describe one ingredient.
+INGREDIENT_SLOTS = ("baseA", "baseB", "elastomer", "filler", "talc", "compat", "intune", "stabilizer")
+COMPATIBILIZER_SLOTS = ("compat", "intune")
+# Points closer than this (in every coordinate) count as the same candidate.
+DUPLICATE_DECIMALS = 6
+
+
+def _flatten_catalog(lib: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    catalog = {}
+    for arr in lib.values():
+        if isinstance(arr, list):
+            for item in arr:
+                if isinstance(item, dict) and item.get("name"):
+                    catalog[item["name"]] = item
+    return catalog
+
+
+def _ingredient_entry(meta: Dict[str, Any], is_compat: bool) -> Dict[str, Any]:
+    """The dict evaluate_formulation expects (same derivation as the DOE generator)."""
+    mfr_range = meta.get("mfr_range")
+    mfr = None
+    if isinstance(mfr_range, list) and len(mfr_range) == 2 and all(isinstance(x, (int, float)) for x in mfr_range):
+        mfr = 0.5 * (mfr_range[0] + mfr_range[1])
+    chem_family = meta.get("chem_family", "")
+    return {
+        "chem_family": chem_family, "MFR": mfr, "Tm_C": meta.get("Tm_C"),
+        "needs_drying": "polyester" in (chem_family or "").lower(), "is_compatibilizer": is_compat,
+    }
+
+
+@dataclass
+class MaterializedBatch:
+    points: List[List[float]]
+    formulations: pd.DataFrame
+    feasible: np.ndarray
+    projected: np.ndarray
+    duplicate: np.ndarray
+    reasons: List[str]
+
+    @property
+    def feasible_points(self) -> List[List[float]]:
+        return [p for p, ok in zip(self.points, self.feasible) if ok]
+
+    @property
+    def rejected(self) -> np.ndarray:
+        """Infeasible for a reason other than being a duplicate."""
+        return ~self.feasible & ~self.duplicate
+
+
+@dataclass
+class MaterializerStats:
+    points: int = 0
+    projected: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+
+
+class CandidateMaterializer:
+    """Builds feasible formulations for batches of optimizer points (see the module docstring)."""
+
+    def __init__(self, search_space, template_df: pd.DataFrame,
+                 ingredient_library: Optional[Dict[str, Any]] = None,
+                 compatibility_rules: Optional[Dict[str, Any]] = None):
+        self.dims = list(search_space)
+        self.names = [d.name for d in self.dims]
+        self.template = template_df.iloc[0]
+        lib = ingredient_library if ingredient_library is not None else json.loads(DEFAULT_LIBRARY_PATH.read_text())
+        self.catalog = _flatten_catalog(lib)
+        if compatibility_rules is None and DEFAULT_RULES_PATH.exists():
+            compatibility_rules = json.loads(DEFAULT_RULES_PATH.read_text())
+        self.rules = compatibility_rules
+        self.stats = MaterializerStats()
+        self._compat_cache: Dict[Tuple[str, ...], Tuple[bool, str]] = {}
+
+        self.wt_cols = [c for c in template_df.columns if c.endswith("_wtpct")]
+        self.base_cols = [c for c in self.wt_cols if "base" in c.lower() and c not in self.names]
+        self.name_cols = [c for c in template_df.columns if c.endswith("_name")]
+        self.fixed_cols = [c for c in self.wt_cols if c not in self.names and c not in self.base_cols]
+        # Optimized wt% levers: (column index, lower, upper, zero allowed).
+        self.levers = []
+        for j, d in enumerate(self.dims):
+            if not d.name.endswith("_wtpct"):
+                continue
+            lo, hi = self._ingredient_range(d.name[: -len("_wtpct")])
+            self.levers.append((j, max(lo, d.low), min(hi, d.high), d.low <= 0.0))
+
+    def _ingredient_name(self, slot: str) -> str:
+        name = self.template.get(f"{slot}_name")
+        return name if isinstance(name, str) else ""
+
+    def _ingredient_range(self, slot: str) -> Tuple[float, float]:
+        name = self._ingredient_name(slot)
+        lo, hi = self.catalog.get(name, {}).get("range_wt_pct") or [0.0, 100.0]
+        return float(lo), float(hi)
+
+    def _compatibility(self, present: Tuple[str, ...]) -> Tuple[bool, str]:
+        if self.rules is None:
+            return True, ""
+        if present not in self._compat_cache:
+            ingredients = [_ingredient_entry(self.catalog.get(self._ingredient_name(s), {}), s in COMPATIBILIZER_SLOTS)
+                           for s in present]
+            _, ok, reasons = evaluate_formulation(ingredients, self.rules)
+            self._compat_cache[present] = (ok, "; ".join(reasons))
+        return self._compat_cache[present]
+
+    def materialize(self, points: Sequence[Sequence[float]],
+                    existing: Iterable[Sequence[float]] = ()) -> MaterializedBatch:
+        """Projects, rebalances and checks a batch of points; `existing` are already evaluated points."""
+        batch = self._build(points, existing)
+        self.stats.points += len(batch.points)
+        self.stats.projected += int((batch.projected & batch.feasible).sum())
+        self.stats.rejected += int(batch.rejected.sum())
+        self.stats.duplicates += int(batch.duplicate.sum())
+        return batch
+
+    def formulations(self, points: Sequence[Sequence[float]]) -> pd.DataFrame:
+        """The formulation rows of already materialized points (not counted in stats)."""
+        return self._build(points).formulations
+
+    def _build(self, points: Sequence[Sequence[float]], existing: Iterable[Sequence[float]] = ()) -> MaterializedBatch:
+        X = np.array(points, dtype=float).reshape(len(points), len(self.dims))
+        X0 = X.copy()
+        n = len(X)
+        feasible = np.ones(n, dtype=bool)
+        reasons = [""] * n
+
+        # 1. Optimized levers onto {0} ∪ [lo, hi].
+        for j, lo, hi, zero_ok in self.levers:
+            if lo > hi:
+                if not zero_ok:
+                    feasible[:] = False
+                    reasons = [f"{self.names[j]} has no feasible range"] * n
+                else:
+                    X[:, j] = 0.0
+                continue
+            inside = np.clip(X[:, j], lo, hi)
+            if zero_ok:
+                X[:, j] = np.where(np.abs(X[:, j]) < np.abs(X[:, j] - inside), 0.0, inside)
+            else:
+                X[:, j] = inside
+
+        # 2. Fixed columns from the template, bases take the remainder.
+        lever_idx = [j for j, *_ in self.levers]
+        fixed = np.array([float(self.template.get(c) or 0.0) for c in self.fixed_cols])
+        base_tpl = np.array([float(self.template.get(c) or 0.0) for c in self.base_cols])
+        remainder = 100.0 - fixed.sum() - X[:, lever_idx].sum(axis=1)
+        bases = np.tile(base_tpl, (n, 1))
+        if len(self.base_cols):
+            bases[:, 0] = remainder - base_tpl[1:].sum()
+            for k in range(1, len(self.base_cols)):
+                short = np.minimum(bases[:, 0], 0.0)
+                take = np.minimum(-short, bases[:, k])
+                bases[:, k] -= take
+                bases[:, 0] += take
+            deficit = np.maximum(-bases[:, 0], 0.0)
+        else:
+            deficit = np.maximum(-remainder, 0.0)
+        if deficit.any() and lever_idx:
+            lower = np.array([lo if lo <= hi else 0.0 for _, lo, hi, _ in self.levers])
+            slack = np.maximum(X[:, lever_idx] - lower, 0.0)
+            total = slack.sum(axis=1)
+            fixable = total >= deficit
+            frac = np.divide(deficit, total, out=np.zeros(n), where=total > 0)
+            frac = np.where(fixable, frac, 0.0)
+            X[:, lever_idx] -= slack * frac[:, None]
+            if len(self.base_cols):
+                bases[:, 0] += np.where(fixable, deficit, 0.0)
+            deficit = np.where(fixable, 0.0, deficit)
+        for i in np.flatnonzero(deficit > 1e-9):
+            feasible[i] = False
+            reasons[i] = f"wt% sum exceeds 100 by {deficit[i]:.2f}"
+
+        df = pd.DataFrame(X, columns=self.names)
+        for c in self.name_cols:
+            df[c] = self.template.get(c)
+        for c, v in zip(self.fixed_cols, fixed):
+            df[c] = v
+        for k, c in enumerate(self.base_cols):
+            df[c] = bases[:, k]
+        if "nucleator_ppm" in self.template.index and "nucleator_ppm" not in self.names:
+            df["nucleator_ppm"] = self.template["nucleator_ppm"]
+        df["mode"] = "bo_suggested"
+
+        # 3. Compatibility of the ingredients actually present.
+        slots = [s for s in INGREDIENT_SLOTS if self._ingredient_name(s) and f"{s}_wtpct" in df.columns]
+        present = df[[f"{s}_wtpct" for s in slots]].to_numpy(dtype=float) > 0
+        for pattern in {tuple(row) for row in present}:
+            ok, why = self._compatibility(tuple(s for s, p in zip(slots, pattern) if p))
+            if not ok:
+                for i in np.flatnonzero((present == pattern).all(axis=1)):
+                    feasible[i] = False
+                    reasons[i] = reasons[i] or why
+
+        # 4. Duplicates of earlier batch points or of evaluated points.
+        seen = {tuple(np.round(np.asarray(p, dtype=float), DUPLICATE_DECIMALS)) for p in existing}
+        duplicate = np.zeros(n, dtype=bool)
+        for i in range(n):
+            key = tuple(np.round(X[i], DUPLICATE_DECIMALS))
+            if feasible[i] and key in seen:
+                duplicate[i] = True
+                feasible[i] = False
+                reasons[i] = "duplicate of an evaluated or batched point"
+            seen.add(key)
+
+        projected = ~np.isclose(X, X0, rtol=0.0, atol=1e-9).all(axis=1)
+        return MaterializedBatch(points=X.tolist(), formulations=df, feasible=feasible, projected=projected,
+                                 duplicate=duplicate, reasons=reasons)
@@ -0,0 +1,164 @@
+# src/candidate_pool.py
+"""
+Pool-based acquisition over feasible-by-construction DOE formulations.
+
+skopt maximizes the acquisition over the continuous box of the search space, while the feasible
+set is a constrained mixture with categorical ingredients. A `CandidatePool` is instead a large,
+fixed set of formulations from `generate_formulation_doe`. It uses the run's goal-filtered
+ingredient pools and focus, so every recipe already passed the generator's compatibility rules.
+The loop scores the whole pool in one vectorized pass per iteration and picks the batch from it.
+`build_candidate_pool` builds the rows as follows:
+
+- a lever the generator varies (elastomer, filler, ... wt%) keeps the generated value; rows
+  outside the search space bounds are dropped
+- a lever it does not vary is drawn uniformly within its bounds. That covers the process levers,
+  and a wt% the pools leave at 0 (e.g. the compatibilizer when no PP-g-MAH passes the goals). The
+  base resins are then rescaled, keeping their ratio, so every recipe still sums to 100 wt%
+- every row is predicted with the bridge model in one batched call; rows the model cannot
+  predict are dropped
+
+`CandidatePool.propose` picks the exploit rows by expected improvement under the optimizer's
+surrogate: plain top-q, or a diverse greedy batch with one of src/batch_acquisition.py's
+strategies. It picks the explore rows at random. A row that was picked or already evaluated is
+never proposed again. With a trust-region optimizer (src/trust_region.py) the exploit rows come
+from the rows inside its current region, as long as any are left. A resumed run rebuilds the pool from its seed, which yields the same rows.
+"""
+from __future__ import annotations
+import contextlib
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.utils import check_random_state
+
+from src.batch_acquisition import expected_improvement, select_batch
+from src.candidate_materializer import DUPLICATE_DECIMALS
+from src.formulation_doe_generator_V1 import generate_formulation_doe
+
+
+def _rebalance_bases(df: pd.DataFrame, levers: Sequence[str] = ()) -> np.ndarray:
+    """
+    Rescales the base resins (keeping their ratio) to close each row to 100 wt%; False where it
+    cannot. A base resin that is one of the levers keeps its value.
+    """
+    wt_cols = [c for c in df.columns if c.endswith("_wtpct")]
+    base_cols = [c for c in wt_cols if "base" in c.lower() and c not in levers]
+    remainder = 100.0 - df[[c for c in wt_cols if c not in base_cols]].to_numpy(dtype=float).sum(axis=1)
+    if not base_cols:
+        return np.isclose(remainder, 0.0)
+    bases = df[base_cols].to_numpy(dtype=float)
+    total = bases.sum(axis=1, keepdims=True)
+    share = np.divide(bases, total, out=np.full_like(bases, 1.0 / len(base_cols)), where=total > 0)
+    df[base_cols] = share * remainder[:, None]
+    return remainder >= 0.0
+
+
+@dataclass
+class CandidatePool:
+    X: np.ndarray                 # one point per row, in the optimizer's space
+    Xt: np.ndarray                # the same points in the optimizer's transformed space
+    formulations: pd.DataFrame    # full recipes: ingredient names, wt%, process levers
+    predictions: pd.DataFrame     # bridge properties of each row
+    available: np.ndarray
+    seed: int
+    _index: Optional[Dict[Tuple[float, ...], int]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def find(self, points: Iterable[Sequence[float]]) -> List[int]:
+        """The rows equal to points (to DUPLICATE_DECIMALS), in order; points not in the pool are left out."""
+        if self._index is None:
+            self._index = {tuple(r): i for i, r in enumerate(np.round(self.X, DUPLICATE_DECIMALS))}
+        keys = (tuple(np.round(np.asarray(p, dtype=float), DUPLICATE_DECIMALS)) for p in points)
+        return [self._index[k] for k in keys if k in self._index]
+
+    def exclude(self, points: Iterable[Sequence[float]]) -> int:
+        """Makes the rows of points (e.g. evaluated ones) unavailable; returns how many were available."""
+        rows = self.find(points)
+        n = int(self.available[rows].sum())
+        self.available[rows] = False
+        return n
+
+    def take(self, rows: Sequence[int]) -> Tuple[List[List[float]], pd.DataFrame]:
+        """The points and formulations of rows, which are not proposed again."""
+        rows = list(rows)
+        self.available[rows] = False
+        return self.X[rows].tolist(), self.formulations.iloc[rows].reset_index(drop=True)
+
+    def propose(self, optimizer, n_exploit: int, n_explore: int, strategy: str = "ask",
+                xi: float = 0.01, random_state=None,
+                pending: Optional[List[List[float]]] = None) -> List[int]:
+        """
+        Row indices of the next batch: n_exploit by expected improvement (top-q for strategy
+        "ask", else greedy picks with that batch strategy), the rest at random. Before the
+        optimizer has a fitted model every row is random. random_state defaults to the
+        optimizer's RNG, so a checkpointed run proposes the same rows. pending are points still
+        being evaluated; with them, "ask" picks by constant liar instead of top-q.
+        """
+        rng = check_random_state(optimizer.rng if random_state is None else random_state)
+        avail = np.flatnonzero(self.available)
+        picks: List[int] = []
+        if n_exploit > 0 and optimizer.models and len(avail):
+            model = optimizer.models[-1]
+            yi = np.asarray(optimizer.yi, dtype=float)
+            region = optimizer.region_mask(self.Xt[avail]) if hasattr(optimizer, "region_mask") else None
+            exploitable = avail[region] if region is not None and region.any() else avail
+            cand = self.Xt[exploitable]
+            if strategy == "ask" and pending:
+                strategy = "constant_liar"
+            if strategy == "ask":
+                mu, std = model.predict(cand, return_std=True)
+                acq = expected_improvement(mu, std, yi.min(), xi)
+                top = np.argsort(-acq, kind="stable")[:n_exploit]
+            else:
+                Xi = np.asarray(optimizer.space.transform(optimizer.Xi), dtype=float)
+                pending_t = np.asarray(optimizer.space.transform(pending), dtype=float) if pending else None
+                top = select_batch(model, optimizer.space, cand, Xi, yi, n_exploit, strategy, xi, rng, pending_t)
+            picks = [int(i) for i in exploitable[top]]
+        rest = np.setdiff1d(avail, picks)
+        n_random = min(n_exploit + n_explore - len(picks), len(rest))
+        if n_random > 0:
+            picks += [int(i) for i in rng.choice(rest, size=n_random, replace=False)]
+        return picks
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self), "available": int(self.available.sum()), "seed": self.seed}
+
+
+def build_candidate_pool(space, predictor, size: int, seed: int,
+                         ingredient_pools: Optional[Dict[str, List]] = None,
+                         focus: str = "none") -> CandidatePool:
+    """
+    Up to `size` feasible formulations for the optimizer's space (see the module docstring).
+    The generator makes `size` recipes per elastomer and filler family, so it oversamples before
+    the rows outside the bounds are dropped.
+    """
+    # The generator prints a line for every blocked recipe it skips.
+    with contextlib.redirect_stdout(io.StringIO()):
+        doe = generate_formulation_doe(n=size, seed=seed, ingredient_pools=ingredient_pools, focus=focus)
+    rng = np.random.RandomState(seed)
+    dims = list(space.dimensions)
+    varied = {d.name for d in dims if d.name in doe.columns and (pd.to_numeric(doe[d.name], errors="coerce") > 0).any()}
+    for d in (d for d in dims if d.name in varied):
+        values = pd.to_numeric(doe[d.name], errors="coerce")
+        doe = doe[(values >= d.low) & (values <= d.high)]
+    if len(doe) > size:
+        doe = doe.iloc[np.sort(rng.choice(len(doe), size=size, replace=False))]
+    doe = doe.reset_index(drop=True)
+    for d in dims:
+        if d.name not in varied:
+            doe[d.name] = rng.uniform(d.low, d.high, size=len(doe))
+    doe = doe[_rebalance_bases(doe, [d.name for d in dims])].reset_index(drop=True)
+
+    predictions = predictor.predict_props(doe, use_cache=False)
+    ok = predictions.notna().any(axis=1).to_numpy()
+    doe, predictions = doe[ok].reset_index(drop=True), predictions[ok].reset_index(drop=True)
+
+    X = doe[[d.name for d in dims]].to_numpy(dtype=float)
+    Xt = np.asarray(space.transform(X.tolist()), dtype=float) if len(X) else np.empty((0, len(dims)))
+    doe["mode"] = "pool_suggested"
+    return CandidatePool(X=X, Xt=Xt, formulations=doe, predictions=predictions,
+                         available=np.ones(len(X), dtype=bool), seed=seed)
@@ -9,6 +9,7 @@ from .ingest.normalize_spec import normalize_spec
 from .pipeline import run_single
 from .batch import run_batch
 from .optimize_batch import run_optimize_batch
+from .stopping import stopping_rule_from_args
 
 # --- Load environment variables from .env file at the project root ---
 # This ensures that credentials and other configurations are available to all modules.
@@ -72,6 +73,11 @@ def main():
     s_opt_batch.add_argument("--explore-ratio", type=float, default=0.25, help="Fraction of candidates for random exploration.")
     s_opt_batch.add_argument("--workers", type=int, default=2, help="Number of spec sheets to process in parallel.")
     s_opt_batch.add_argument("--log-file", help="Path to a central log file for the batch run.")
+    s_opt_batch.add_argument("--patience", type=int, default=None, help="Stop a spec's run when the best score improves by less than --min-improvement over this many iterations.")
+    s_opt_batch.add_argument("--min-improvement", type=float, default=1e-3, help="Improvement threshold for --patience.")
+    s_opt_batch.add_argument("--ei-floor", type=float, default=None, help="Stop a spec's run when the largest expected improvement falls below this score.")
+    s_opt_batch.add_argument("--max-minutes", type=float, default=None, help="Wall-clock budget per spec.")
+    s_opt_batch.add_argument("--max-evaluations", type=int, default=None, help="Agent-evaluation budget per spec (initial DOE included).")
 
     args = ap.parse_args()
 
@@ -125,7 +131,8 @@ def main():
             focus=args.focus,
             explore_ratio=args.explore_ratio,
             workers=args.workers,
-            log_file=log_path
+            log_file=log_path,
+            stopping=stopping_rule_from_args(args),
         )
         print(json.dumps(res, indent=2, sort_keys=True))
 
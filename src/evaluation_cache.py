@@ -0,0 +1,162 @@
+# src/evaluation_cache.py
+"""
+Content-addressed cache for evaluator agent scores.
+
+The same candidate under the same targets gets re-evaluated across runs, specs and retries
+(repeated initial DOEs, resumed runs, identical rows), and every evaluation is a billed LLM call
+of 10-120 s. A payload's key is the sha256 of:
+
+- its predictions and process settings, numbers rounded to `sig_figs` significant figures so
+  float noise from re-balancing does not split entries
+- its targets_constraints (and previous report/scores, if any)
+- the agent namespace: the model name and a hash of the agent's instructions (the prompt
+  file) and of the JSON schema of the stored scores (`EvalScores`), so editing the prompt,
+  switching models or changing the score format starts afresh
+
+cycle_id, sample_id and meta are bookkeeping and are left out, so the same candidate hits from
+another run or row. Only successful scores are stored. Entries expire `ttl_s` after they were
+written, and beyond `max_entries` the least recently used are evicted.
+
+EvaluatorClient consults `default_evaluation_cache()` before calling the agent: a SQLite file at
+EVAL_CACHE_PATH (default <RESULTS_DIR>/cache/evaluations.sqlite), with EVAL_CACHE_TTL_DAYS (30),
+EVAL_CACHE_MAX_ENTRIES (200000) and EVAL_CACHE_SIG_FIGS (6). EVAL_CACHE=0 turns it off.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from evaluator.matsi_property_evaluator.eval_schema import EvalScores
+from src.sqlite_store import SQLiteStore
+
+
+def _round_sig(x: Any, sig_figs: int) -> Any:
+    """Numbers to sig_figs significant figures (as strings); containers recursively; the rest as is."""
+    if isinstance(x, bool) or x is None:
+        return x
+    if isinstance(x, (int, float)):
+        v = float(x)
+        return None if math.isnan(v) else format(v, f".{sig_figs}g")
+    if isinstance(x, dict):
+        return {str(k): _round_sig(v, sig_figs) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [_round_sig(v, sig_figs) for v in x]
+    return x
+
+
+def agent_namespace(agent: Any) -> str:
+    """The model name and a hash of the agent's instructions (its prompt) and of the EvalScores schema."""
+    model = getattr(agent, "model", None) or type(agent).__name__
+    instruction = getattr(agent, "instruction", "") or ""
+    schema = json.dumps(EvalScores.model_json_schema(), sort_keys=True)
+    digest = hashlib.sha256(f"{instruction}\n{schema}".encode("utf-8")).hexdigest()[:16]
+    return f"{getattr(model, 'model', model)}:{digest}"
+
+
+def payload_key(payload: Dict[str, Any], namespace: str, sig_figs: int = 6) -> str:
+    canonical = {
+        "ns": namespace,
+        "predictions": _round_sig(payload.get("predictions") or {}, sig_figs),
+        "process": _round_sig(payload.get("process") or {}, sig_figs),
+        "targets_constraints": _round_sig(payload.get("targets_constraints") or {}, sig_figs),
+        "previous_report_md": payload.get("previous_report_md"),
+        "previous_scores": payload.get("previous_scores"),
+    }
+    text = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    SQLite cache of evaluator scores (path=None keeps it in memory), on the store shared with the
+    prediction cache (src/sqlite_store.py). Safe to share between threads; separate processes can
+    share one SQLite file.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, ttl_s: Optional[float] = 30 * 86400,
+                 max_entries: int = 200_000, sig_figs: int = 6):
+        self.path = str(path) if path else None
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.sig_figs = sig_figs
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = self.stores = 0
+        self._store = SQLiteStore(self.path, "evaluations", max_entries=max_entries, ttl_s=ttl_s)
+
+    def key(self, payload: Dict[str, Any], namespace: str) -> str:
+        return payload_key(payload, namespace, self.sig_figs)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached scores for key, or None (a miss; expired entries are dropped)."""
+        with self._lock:
+            found, expired = self._store.get_many([key])
+            self.expired += expired
+            if key not in found:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return found[key]
+
+    def put(self, key: str, scores: Dict[str, Any]) -> None:
+        with self._lock:
+            self.evictions += self._store.put_many({key: scores})
+            self.stores += 1
+
+    # ---------- Housekeeping ----------
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            n = self._store.purge_expired()
+            self.expired += n
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._store.count()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": entries,
+            "path": self.path,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._store.close()
+
+
+_CACHES: Dict[str, EvaluationCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+def default_evaluation_cache() -> Optional[EvaluationCache]:
+    """
+    The process-wide cache at EVAL_CACHE_PATH (default <RESULTS_DIR>/cache/evaluations.sqlite),
+    one per path; None when EVAL_CACHE is 0/false/off. Resolved on every call, so the settings
+    can change between runs in one process.
+    """
+    if os.getenv("EVAL_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    path = os.getenv("EVAL_CACHE_PATH") or os.path.join(os.getenv("RESULTS_DIR", "results"), "cache",
+                                                        "evaluations.sqlite")
+    with _CACHES_LOCK:
+        if path not in _CACHES:
+            _CACHES[path] = EvaluationCache(
+                path,
+                ttl_s=float(os.getenv("EVAL_CACHE_TTL_DAYS", "30")) * 86400,
+                max_entries=int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "200000")),
+                sig_figs=int(os.getenv("EVAL_CACHE_SIG_FIGS", "6")),
+            )
+        return _CACHES[path]
@@ -0,0 +1,310 @@
+# src/evaluator/scorer.py
+"""
+Programmatic evaluator: deterministic, local scoring of predicted candidates.
+
+`LocalScorer.score` turns one candidate's predictions into the same `EvalScores` the evaluator
+agent emits, without an LLM call:
+
+- literature_consistency_score: weighted mean desirability of the predictions against
+  targets_constraints. A `value` target is scored exp(-d² / 2(scale² + σ²)) scaled by
+  scale / sqrt(scale² + σ²), i.e. the expected Gaussian desirability (as in
+  src/multi_fidelity.py) when the prediction carries the model's `noise_model` σ; `min`/`max`
+  constraints score 1 when met and fall off over 10% of the bound when not.
+- realism_penalty: a multiplier (1.0 = realistic), 0.7 for every prediction outside
+  PLAUSIBLE_RANGES and 0.7 when the formulation's wt% are negative or far from 100.
+- confidence: High when every scored property's noise σ is within half its scale, Medium
+  within the scale, else Low; one level lower when the batch contradicts one of the model's
+  `monotone_signs` (see `batch_trends`) or fewer than half the targets could be scored.
+- recommended_bo_weight: consistency × realism × confidence_factor, as the agent's prompt asks.
+
+`batch_trends` regresses predicted properties on the formulation levers across a batch with
+src/evaluator/tools.py and checks each slope against the model's `monotone_signs`. The slopes
+are marginal, not partial derivatives, so a rule only counts as contradicted when its
+regression explains at least TREND_MIN_R2 of the variance over at least TREND_MIN_ROWS rows.
+
+`evaluate_locally` has the signature of evaluate_with_agent and writes the same per-row
+scores.json / evaluation_report.md, so it can stand in for the agent in run_optimization_loop
+(`--evaluator local`) or score the rows the agent failed on (`--local-fallback`).
+"""
+from __future__ import annotations
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from evaluator.matsi_property_evaluator.eval_schema import EvalScores, PropertyScore
+from src.bridge_formulations_to_properties import NOISE_KEY_MAP
+from src.evaluator.tools import range_check, simple_linear_regression, trend_sign_check, zscore_outliers
+from src.multi_fidelity import PREDICTION_ALIASES
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_MODEL_PATH = PROJECT_ROOT / "data" / "processed" / "pp_elastomer_TSE_hybrid_model_v1.json"
+
+# Physically plausible ranges for filled/toughened PP compounds, per prediction column.
+PLAUSIBLE_RANGES: Dict[str, Tuple[float, float]] = {
+    "E_GPa": (0.2, 8.0),
+    "MFI_g10min": (0.1, 200.0),
+    "sigma_y_MPa": (5.0, 80.0),
+    "Izod_23_kJm2": (0.0, 100.0),
+    "Izod_m20_kJm2": (0.0, 80.0),
+    "HDT_C": (40.0, 170.0),
+    "Shrink_pct": (0.2, 3.0),
+    "rho_gcc": (0.85, 1.6),
+    "eps_y_pct": (1.0, 40.0),
+    "Gardner_J": (0.0, 150.0),
+    "Xc": (0.1, 0.8),
+}
+# monotone_signs entries -> (predicted property, lever) whose batch trend they predict.
+TREND_CHECKS: Dict[str, Tuple[str, str]] = {
+    "dE_dphi_el": ("E_GPa", "elastomer_wtpct"),
+    "dE_dphi_f": ("E_GPa", "filler_wtpct"),
+    "dXc_dc_nuc": ("Xc", "nucleator_ppm"),
+    "dHDT_dE": ("HDT_C", "E_GPa"),
+}
+TREND_MIN_R2 = 0.3
+TREND_MIN_ROWS = 5
+CONFIDENCE_FACTORS = {"High": 1.0, "Medium": 0.65, "Low": 0.35}
+CONSTRAINT_REL_TOL = 0.10
+UNREALISTIC_FACTOR = 0.7
+# The DOE adds the compatibilizer on top of the 100 wt% blend, so sums of ~101.5 are normal.
+WTPCT_SUM_TOL = 5.0
+
+
+def _number(x: Any) -> Optional[float]:
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def _lower(confidence: str) -> str:
+    return {"High": "Medium", "Medium": "Low"}.get(confidence, "Low")
+
+
+class LocalScorer:
+    """
+    Scores candidates from the hybrid model's noise_model and monotone_signs (read from
+    model_path, or passed as spec) against targets_constraints.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, spec: Optional[Dict[str, Any]] = None,
+                 plausible_ranges: Optional[Dict[str, Tuple[float, float]]] = None):
+        if spec is None:
+            path = Path(model_path or os.getenv("EVAL_LOCAL_MODEL_PATH") or DEFAULT_MODEL_PATH)
+            spec = json.loads(path.read_text()) if path.exists() else {}
+        self.noise = {NOISE_KEY_MAP.get(k, k): float(v) for k, v in spec.get("noise_model", {}).items()}
+        self.monotone_signs: Dict[str, str] = spec.get("parameters", {}).get("monotone_signs", {})
+        self.plausible_ranges = dict(PLAUSIBLE_RANGES if plausible_ranges is None else plausible_ranges)
+
+    # ---------- Batch-level checks ----------
+
+    def batch_trends(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        {"checks": {rule: {expected, observed, slope, r2, n, ok}}, "violations": [rule, ...],
+        "r2_modulus_vs_elastomer", "r2_izod_vs_elastomer", "outlier_rows": [index, ...]}.
+        """
+        checks: Dict[str, Dict[str, Any]] = {}
+        for rule, expected in self.monotone_signs.items():
+            if rule not in TREND_CHECKS:
+                continue
+            prop, lever = TREND_CHECKS[rule]
+            if prop not in df.columns or lever not in df.columns:
+                continue
+            pairs = df[[lever, prop]].apply(pd.to_numeric, errors="coerce").dropna()
+            if len(pairs) < TREND_MIN_ROWS:
+                continue
+            fit = simple_linear_regression(pairs[lever].tolist(), pairs[prop].tolist())
+            if not (fit["slope"] == fit["slope"]) or not (fit["r2"] == fit["r2"]):
+                continue
+            sign = trend_sign_check(fit["slope"], "pos" if expected.strip().startswith(">") else "neg")
+            checks[rule] = {"expected": expected, "observed": sign["observed"], "slope": fit["slope"],
+                            "r2": fit["r2"], "n": fit["n"], "ok": sign["ok"] or fit["r2"] < TREND_MIN_R2}
+
+        def r2(prop: str) -> Optional[float]:
+            if prop not in df.columns or "elastomer_wtpct" not in df.columns:
+                return None
+            pairs = df[["elastomer_wtpct", prop]].apply(pd.to_numeric, errors="coerce").dropna()
+            value = simple_linear_regression(pairs["elastomer_wtpct"].tolist(), pairs[prop].tolist())["r2"]
+            return value if value == value else None
+
+        outlier_rows: set = set()
+        for prop in self.plausible_ranges:
+            if prop in df.columns:
+                values = pd.to_numeric(df[prop], errors="coerce").dropna()
+                found = zscore_outliers(values.tolist(), z_thresh=3.0)["outlier_idx"]
+                outlier_rows.update(values.index[i] for i in found)
+        return {
+            "checks": checks,
+            "violations": [rule for rule, c in checks.items() if not c["ok"]],
+            "r2_modulus_vs_elastomer": r2("E_GPa"),
+            "r2_izod_vs_elastomer": r2("Izod_23_kJm2"),
+            "outlier_rows": sorted(outlier_rows, key=str),
+        }
+
+    # ---------- One candidate ----------
+
+    def _property_score(self, pred: float, spec: Dict[str, Any], factor: float, sigma: float
+                        ) -> Optional[Tuple[float, str]]:
+        """(score, note) of one prediction, already in the target's unit, against its target spec."""
+        sigma *= factor
+        value = _number(spec.get("value"))
+        if value is not None:
+            tol = _number(spec.get("tol"))
+            scale = tol if tol else CONSTRAINT_REL_TOL * abs(value) or 1.0
+            spread = math.hypot(scale, sigma)
+            score = scale / spread * math.exp(-0.5 * ((pred - value) / spread) ** 2)
+            return score, f"{pred:.4g} vs target {value:.4g} ± {scale:.3g} (model σ {sigma:.3g})"
+        lo, hi = _number(spec.get("min")), _number(spec.get("max"))
+        if lo is None and hi is None:
+            return None
+        check = range_check(pred, lo if lo is not None else -math.inf, hi if hi is not None else math.inf)
+        if check["ok"]:
+            return 1.0, f"{pred:.4g} within [{lo}, {hi}]"
+        bound = lo if lo is not None and pred < lo else hi
+        scale = CONSTRAINT_REL_TOL * abs(bound) or 1.0
+        return math.exp(-0.5 * ((pred - bound) / scale) ** 2), f"{pred:.4g} outside [{lo}, {hi}]"
+
+    def score(self, predictions: Dict[str, Any], process: Dict[str, Any], targets_constraints: Dict[str, Any],
+              trends: Optional[Dict[str, Any]] = None, outlier: bool = False) -> EvalScores:
+        """EvalScores for one candidate; trends is batch_trends() of the batch it belongs to."""
+        property_scores: Dict[str, PropertyScore] = {}
+        total = weights = 0.0
+        sigma_ratios: List[float] = []
+        for key, spec in (targets_constraints or {}).items():
+            if not isinstance(spec, dict):
+                continue
+            column, factor = (key, 1.0) if key in predictions else PREDICTION_ALIASES.get(key, (None, 1.0))
+            pred = _number(predictions.get(column)) if column else None
+            if pred is None:
+                continue
+            scored = self._property_score(pred * factor, spec, factor, self.noise.get(column, 0.0))
+            if scored is None:
+                continue
+            s, note = scored
+            weight = _number(spec.get("weight"))
+            weight = 1.0 if weight is None else weight
+            property_scores[key] = PropertyScore(score=max(0.0, min(1.0, s)), notes=note)
+            total += weight * s
+            weights += weight
+            target = _number(spec.get("tol")) or CONSTRAINT_REL_TOL * abs(_number(spec.get("value")) or 0.0)
+            if target:
+                sigma_ratios.append(self.noise.get(column, 0.0) * factor / target)
+        n_targets = sum(isinstance(v, dict) for v in (targets_constraints or {}).values())
+        consistency = max(0.0, min(1.0, total / weights)) if weights > 0 else 0.5
+
+        realism = 1.0
+        notes: List[str] = []
+        for prop, (lo, hi) in self.plausible_ranges.items():
+            value = _number(predictions.get(prop))
+            if value is not None and not range_check(value, lo, hi)["ok"]:
+                realism *= UNREALISTIC_FACTOR
+                notes.append(f"{prop}={value:.4g} is outside the plausible range [{lo}, {hi}].")
+        wtpct = [_number(v) for k, v in (process or {}).items() if str(k).endswith("_wtpct")]
+        wtpct = [v for v in wtpct if v is not None]
+        if wtpct and (abs(sum(wtpct) - 100.0) > WTPCT_SUM_TOL or min(wtpct) < 0):
+            realism *= UNREALISTIC_FACTOR
+            notes.append(f"Formulation wt% add up to {sum(wtpct):.1f}, not 100.")
+
+        confidence = "High"
+        if any(r > 1.0 for r in sigma_ratios):
+            confidence = "Low"
+        elif any(r > 0.5 for r in sigma_ratios):
+            confidence = "Medium"
+        violations = (trends or {}).get("violations", [])
+        if violations:
+            confidence = _lower(confidence)
+            notes.append(f"Batch trends contradict monotone_signs {violations}.")
+        if not weights or len(property_scores) * 2 < n_targets:
+            confidence = _lower(confidence)
+            notes.append(f"Only {len(property_scores)}/{n_targets} targets could be scored.")
+        if outlier:
+            notes.append("Predictions are a z > 3 outlier within the batch.")
+        factor = CONFIDENCE_FACTORS[confidence]
+        weight = consistency * realism * factor
+        summary = (f"Programmatic score: target consistency {consistency:.3f} over {len(property_scores)} "
+                   f"propert{'y' if len(property_scores) == 1 else 'ies'}, realism {realism:.2f}, "
+                   f"confidence {confidence}.")
+        return EvalScores(
+            literature_consistency_score=consistency,
+            realism_penalty=realism,
+            recommended_bo_weight=max(0.0, min(1.0, weight)),
+            confidence=confidence,
+            confidence_factor=factor,
+            property_scores=property_scores or None,
+            r2_modulus_vs_elastomer=(trends or {}).get("r2_modulus_vs_elastomer"),
+            r2_izod_vs_elastomer=(trends or {}).get("r2_izod_vs_elastomer"),
+            outlier_fraction=(len((trends or {}).get("outlier_rows", [])) / trends["n_rows"]
+                              if trends and trends.get("n_rows") else None),
+            notes=" ".join([summary] + notes)[:1000],
+            extras={"evaluator": "local"},
+        )
+
+
+_SCORERS: Dict[str, LocalScorer] = {}
+
+def get_local_scorer(model_path: Optional[str] = None) -> LocalScorer:
+    """The process-wide scorer for model_path (default EVAL_LOCAL_MODEL_PATH or the hybrid model)."""
+    key = str(model_path or os.getenv("EVAL_LOCAL_MODEL_PATH") or DEFAULT_MODEL_PATH)
+    if key not in _SCORERS:
+        _SCORERS[key] = LocalScorer(key)
+    return _SCORERS[key]
+
+
+def _numeric(d: Dict[str, Any]) -> Dict[str, float]:
+    out = {}
+    for k, v in d.items():
+        value = _number(v) if not isinstance(v, bool) else None
+        if value is not None:
+            out[str(k)] = value
+    return out
+
+
+def score_rows(predictions_df: pd.DataFrame, process_vars: Dict[str, Any], targets_constraints: Dict[str, Any],
+               scorer: Optional[LocalScorer] = None, indices: Optional[Sequence[Any]] = None
+               ) -> Dict[Any, EvalScores]:
+    """EvalScores for the rows of predictions_df at indices (default all), with the batch's trends."""
+    scorer = scorer or get_local_scorer()
+    trends = {**scorer.batch_trends(predictions_df), "n_rows": len(predictions_df)}
+    outliers = set(trends["outlier_rows"])
+    out = {}
+    for idx in (predictions_df.index if indices is None else indices):
+        row = predictions_df.loc[idx].to_dict()
+        process = {**dict(process_vars or {}), **{k: v for k, v in row.items()
+                                                  if str(k).endswith(("_wtpct", "_ppm"))}}
+        out[idx] = scorer.score(_numeric(row), _numeric(process), targets_constraints, trends, idx in outliers)
+    return out
+
+
+def write_score_artifacts(row_dir: str, scores: EvalScores) -> None:
+    """scores.json and evaluation_report.md in row_dir, as the agent bridge writes them."""
+    Path(row_dir).mkdir(parents=True, exist_ok=True)
+    (Path(row_dir) / "scores.json").write_text(scores.model_dump_json(indent=2))
+    (Path(row_dir) / "evaluation_report.md").write_text(scores.notes or "")
+
+
+def evaluate_locally(predictions_df: pd.DataFrame, process_vars: Dict[str, Any], targets_constraints: Dict[str, Any],
+                     out_dir: str, run_identifier: str) -> pd.DataFrame:
+    """
+    evaluate_with_agent's programmatic counterpart: the same output columns (plus `<target>_score`
+    per scored property) and per-row artifacts in out_dir/row_<idx>, with evaluation_status "local".
+    """
+    print(f"\nScoring {len(predictions_df)} candidates with the local evaluator ({run_identifier})...")
+    scored = score_rows(predictions_df, process_vars, targets_constraints)
+    rows = []
+    for idx, row in predictions_df.iterrows():
+        scores = scored[idx]
+        write_score_artifacts(os.path.join(out_dir, f"row_{idx:04d}"), scores)
+        rows.append({
+            **row.to_dict(),
+            **{f"{k}_score": v.score for k, v in (scores.property_scores or {}).items()},
+            "literature_consistency_score": scores.literature_consistency_score,
+            "realism_penalty": scores.realism_penalty,
+            "recommended_bo_weight": scores.recommended_bo_weight,
+            "confidence": scores.confidence,
+            "evaluation_status": "local",
+        })
+    return pd.DataFrame(rows, index=predictions_df.index) if rows else predictions_df.copy()
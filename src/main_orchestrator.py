@@ -9,18 +9,20 @@ It connects the different stages:
 4. Evaluation (using evaluator agent tools)
 5. Optimization (feeding scores back to a Bayesian Optimizer)
 """
-import subprocess
 import sys
 import os
 import pandas as pd
 import numpy as np
 import datetime
+import time
 import logging
 import json
 import argparse
+import functools
 import matplotlib.pyplot as plt
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 from collections import Counter
 
@@ -43,13 +45,47 @@ from src.gapfill.merger import gapfill
 from src.formulation_doe_generator_V1 import generate_formulation_doe as generate_doe_candidates
 from src.prefilter import filter_pools_by_goals
 
-from skopt import Optimizer
 from skopt.space import Real
 from skopt.plots import plot_objective
 
-from src.analysis.tidy_results import build_tidy, make_plots
+from src.analysis.tidy_results import build_tidy, make_plots, tag_predictions
 from configs.processing import load_processing_levers, clamp_process_row
-from src.agent_eval_helpers import build_targets_constraints, evaluate_with_agent
+from src.agent_eval_helpers import EVALUATORS, build_targets_constraints, evaluate_with_agent, make_evaluator
+from src.property_predictor import PropertyPredictor
+from src.prediction_cache import PredictionCache
+from src.evaluation_cache import default_evaluation_cache
+from src.surrogates import SURROGATES, make_optimizer
+from src.trust_region import TrustRegionOptimizer
+from src.batch_acquisition import BATCH_STRATEGIES, propose_batch
+from src.multi_fidelity import FidelityScreen, calibration_subset, physics_score
+from src.candidate_materializer import CandidateMaterializer
+from src.candidate_pool import build_candidate_pool
+from src.stopping import StoppingRule, StoppingState, check_stopping, stopping_rule_from_args
+from src.stage_profiler import StageProfiler
+from src.async_bo import AsyncState, run_async
+from src.optimizer_checkpoint import RunCheckpoint, checkpoint_path, load_checkpoint, save_checkpoint
+
+# Optimizer weight of a candidate that cannot be made feasible (same as a failed evaluation).
+INFEASIBLE_WEIGHT = 0.0
+
+# Levers the full search space adds to the default one: every other wt% column of the template
+# (the base B resin among them, with base A taking up the remainder), the nucleator loading and
+# the hybrid model's remaining process inputs.
+FULL_SPACE_LEVERS = [
+    Real(0.0, 10.0, name='talc_wtpct'),
+    Real(0.0, 3.0, name='intune_wtpct'),
+    Real(0.0, 1.0, name='stabilizer_wtpct'),
+    Real(0.0, 95.0, name='baseB_wtpct'),
+    Real(0.0, 2000.0, name='nucleator_ppm'),
+    Real(1.0, 10.0, name='K_knead'),          # Kneading intensity index of the screw configuration
+    Real(0.02, 1.0, name='pvac_bar_abs'),     # Vent vacuum (bar absolute)
+    Real(20.0, 60.0, name='tau_s'),           # Residence time (s), from processing_levers.json
+]
+# Dimensions shown in the partial dependence plot (the default search space's).
+PDP_MAX_DIMS = 7
+# Initial DOE values of the full space's process levers: the bridge model's own defaults, so the
+# DOE predictions are the same in both spaces.
+FULL_SPACE_DEFAULT_LEVERS = {'K_knead': 5.0, 'pvac_bar_abs': 0.1, 'tau_s': 45.0}
 
 # --- Configure Logging ---
 # Set up basic logging. Increase verbosity for the ADK components to DEBUG.
@@ -59,63 +95,559 @@ logging.getLogger('google.adk').setLevel(logging.DEBUG)
 def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
-def run_property_prediction_bridge(formulations_df: pd.DataFrame, input_path: str, output_path: str, process_path: str = None):
+def run_property_prediction_bridge(
+    predictor: PropertyPredictor,
+    formulations_df: pd.DataFrame,
+    process_vars: Dict[str, Any],
+    input_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    process_path: Optional[str] = None,
+) -> pd.DataFrame:
     """
-    Runs the property prediction by calling the bridge script as a subprocess.
-    This creates a clear, traceable artifact for each prediction step.
+    Runs the property prediction in-process with the run's warm predictor.
+    Traceability artifacts are only written for the paths that are given.
     """
-    print("Running property prediction bridge script...")
-    # 1. Save the input formulations to the specified path
-    formulations_df.to_csv(input_path, index=False)
-
-    # 2. Prepare arguments for the bridge script
-    model_path = os.path.join(project_root, "data/processed/pp_elastomer_TSE_hybrid_model_v1.json")
-    library_path = os.path.join(project_root, "data/processed/ingredient_library.json")
-    
-    cmd = [
-        "python", "src/bridge_formulations_to_properties.py",
-        "--doe", input_path,
-        "--out", output_path,
-        "--model", model_path,
-        "--ingredient-library", library_path
-    ]
-
-    # Add process conditions file if provided
-    if process_path:
-        cmd.extend(["--process", process_path])
+    print("Running property prediction bridge (in-process)...")
+    predictions_df = predictor.predict(
+        formulations_df, process_vars,
+        input_path=input_path, output_path=output_path, process_path=process_path,
+    )
+    print("...property prediction bridge complete.")
+    return predictions_df
+
+@dataclass
+class CandidateContext:
+    """Everything evaluate_candidate needs that stays fixed for the whole run."""
+    search_space_names: List[str]
+    template_df: pd.DataFrame
+    predictor: PropertyPredictor
+    targets_constraints: Dict[str, Any]
+    processing_levers: Optional[Any]
+    formulations_dir: str
+    compounded_dir: str
+    run_timestamp: str
+    save_bridge_artifacts: bool = False
+    reuse_evaluated: bool = False
+    materializer: Optional[CandidateMaterializer] = None
+    # Same signature as evaluate_with_agent, which is used when None.
+    evaluator: Optional[Callable[..., pd.DataFrame]] = None
+    profiler: StageProfiler = field(default_factory=StageProfiler)
+    # This session's prediction frames (tag_predictions), for the final tidy analysis when the
+    # bridge artifacts it would otherwise read are not written.
+    predictions: List[pd.DataFrame] = field(default_factory=list)
+
+@dataclass
+class CandidateResult:
+    point: List[float]
+    iter_id: str
+    score: float
+    evaluated_df: pd.DataFrame
+    fidelity: str = "agent"
+
+def build_candidate_formulation(suggested_values: Dict[str, Any], template_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Creates a valid new formulation from the optimizer's suggestion.
+    This re-balances the other formulation components to ensure the total sums to 100 wt%.
+    """
+    formulation_vars = {k: v for k, v in suggested_values.items() if k.endswith('_wtpct')}
+    next_formulation_df = pd.DataFrame([suggested_values])
+
+    # --- Refined Re-balancing Logic ---
+    # Instead of scaling all other components, we'll primarily adjust the base resin
+    # to make up the difference to 100%. This is more realistic.
+    sum_of_new_optimized_values = sum(formulation_vars.values())
+    if sum_of_new_optimized_values > 100.0:
+        print(f"Warning: Sum of optimized formulation values ({sum_of_new_optimized_values:.2f}) > 100. This point will be invalid.")
+        # Let the invalid point proceed; the evaluator should penalize it heavily.
+
+    # Identify all wt% columns from the original DOE to create a full recipe
+    all_wtpct_cols = [col for col in template_df.columns if col.endswith('_wtpct')]
+    unoptimized_wtpct_cols = [col for col in all_wtpct_cols if col not in formulation_vars]
+
+    # Copy non-optimized values from the template, assuming they are minor additives
+    for col in unoptimized_wtpct_cols:
+        next_formulation_df[col] = template_df[col].iloc[0]
+
+    # Re-calculate the sum and adjust the primary base resin (if one exists)
+    current_sum = next_formulation_df[all_wtpct_cols].sum(axis=1).iloc[0]
+    base_resin_cols = [c for c in template_df.columns if 'base' in c.lower() and c.endswith('_wtpct')]
+    if base_resin_cols:
+        primary_base = base_resin_cols[0]
+        adjustment = 100.0 - current_sum
+        next_formulation_df[primary_base] += adjustment
+        print(f"Re-balancing: Adjusted '{primary_base}' by {adjustment:.2f} to sum to 100%.")
+
+    next_formulation_df['mode'] = 'bo_suggested'
+    return next_formulation_df
+
+def _candidate_ids(ctx: CandidateContext, iteration: int, point_idx: int):
+    iter_id = f"iter_{iteration:02d}_cand_{point_idx+1:02d}"
+    return iter_id, f"run_{ctx.run_timestamp}_{iter_id}"
+
+def _candidate_result(next_point: List[float], iter_id: str, evaluated_df: pd.DataFrame) -> CandidateResult:
+    screened = 'evaluation_status' in evaluated_df.columns and evaluated_df['evaluation_status'].iloc[0] == "screened"
+    return CandidateResult(point=next_point, iter_id=iter_id, score=evaluated_df['recommended_bo_weight'].iloc[0],
+                           evaluated_df=evaluated_df, fidelity="physics" if screened else "agent")
+
+def load_evaluated_candidate(ctx: CandidateContext, iteration: int, point_idx: int,
+                             next_point: List[float]) -> Optional[CandidateResult]:
+    """The result an interrupted attempt left on disk, when the run is resumed (else None)."""
+    iter_id, run_id = _candidate_ids(ctx, iteration, point_idx)
+    evaluated_path = os.path.join(ctx.compounded_dir, f"{run_id}_evaluated.csv")
+    if not (ctx.reuse_evaluated and os.path.exists(evaluated_path)):
+        return None
+    # A resumed run re-asks nothing, so a result on disk belongs to this very point.
+    print(f"[{iter_id}] Re-using evaluation from the interrupted attempt: {evaluated_path}")
+    return _candidate_result(next_point, iter_id, pd.read_csv(evaluated_path))
+
+def predict_candidate(ctx: CandidateContext, iteration: int, point_idx: int, next_point: List[float],
+                      formulation_df: Optional[pd.DataFrame] = None):
+    """
+    Runs the property prediction for one optimizer suggestion: (process_vars, prediction_df).
+    formulation_df is the point's materialized one-row formulation, if already built.
+    """
+    iter_id, run_id = _candidate_ids(ctx, iteration, point_idx)
+    suggested_values = dict(zip(ctx.search_space_names, next_point))
+    print(f"[{iter_id}] Optimizer suggests point: {suggested_values}")
+
+    # Separate process variables from formulation variables and clamp them
+    process_vars = {k: v for k, v in suggested_values.items() if not k.endswith('_wtpct')}
+    if ctx.processing_levers:
+        process_vars = clamp_process_row(process_vars, ctx.processing_levers)
+        print(f"[{iter_id}] Clamped process vars: {process_vars}")
+
+    if formulation_df is not None:
+        next_formulation_df = formulation_df.reset_index(drop=True)
+    elif ctx.materializer is not None:
+        next_formulation_df = ctx.materializer.formulations([next_point])
+    else:
+        next_formulation_df = build_candidate_formulation(suggested_values, ctx.template_df)
 
-    # 3. Run the subprocess
-    subprocess.run(cmd, check=True)
+    # Run simulation and evaluation for this single candidate
+    iter_formulation_path = os.path.join(ctx.formulations_dir, f"{run_id}.csv")
+    iter_prediction_path = os.path.join(ctx.compounded_dir, f"{run_id}_prediction.csv")
+    iter_process_path = os.path.join(ctx.compounded_dir, f"{run_id}_process.json")
 
-    # 4. Load and return the results
-    print("...property prediction bridge complete.")
-    return pd.read_csv(output_path)
+    with ctx.profiler.stage("bridge", items=len(next_formulation_df)):
+        prediction_df = run_property_prediction_bridge(
+            ctx.predictor, next_formulation_df, process_vars,
+            *((iter_formulation_path, iter_prediction_path, iter_process_path) if ctx.save_bridge_artifacts else ())
+        )
+    if not ctx.save_bridge_artifacts:
+        ctx.predictions.append(tag_predictions(prediction_df, ctx.run_timestamp, f"{iteration:02d}"))
+    return process_vars, prediction_df
 
-def initialize_optimizer(search_space):
+def evaluate_candidate(ctx: CandidateContext, iteration: int, point_idx: int, next_point: List[float],
+                       prediction=None, formulation_df: Optional[pd.DataFrame] = None) -> CandidateResult:
     """
-    Initializes a Bayesian Optimizer.
+    Predicts and evaluates one optimizer suggestion with the agent (prediction, if given, is
+    predict_candidate's output). Every artifact path carries the iteration/candidate id, so
+    candidates can run concurrently without clobbering each other.
     """
-    print("Initializing Bayesian Optimizer...")
-    # We use a Gaussian Process (GP) model with Expected Improvement (EI) as the acquisition function.
-    optimizer = Optimizer(
-        dimensions=search_space,
-        base_estimator="GP",
-        acq_func="EI"
+    loaded = load_evaluated_candidate(ctx, iteration, point_idx, next_point)
+    if loaded is not None:
+        return loaded
+    iter_id, run_id = _candidate_ids(ctx, iteration, point_idx)
+    process_vars, prediction_df = prediction or predict_candidate(ctx, iteration, point_idx, next_point, formulation_df)
+    evaluate = ctx.evaluator or evaluate_with_agent
+    evaluated_df = evaluate(
+        predictions_df=prediction_df,
+        process_vars=process_vars,
+        targets_constraints=ctx.targets_constraints,
+        out_dir=os.path.join(ctx.compounded_dir, f"{run_id}_agent"),
+        run_identifier=f"{ctx.run_timestamp}_{iter_id}"
     )
+    evaluated_df['physics_score'] = physics_score(evaluated_df, ctx.targets_constraints)
+    evaluated_df.to_csv(os.path.join(ctx.compounded_dir, f"{run_id}_evaluated.csv"), index=False)
+    return _candidate_result(next_point, iter_id, evaluated_df)
+
+def screened_candidate(ctx: CandidateContext, iteration: int, point_idx: int, next_point: List[float],
+                       prediction_df: pd.DataFrame, low: float, estimate: float) -> CandidateResult:
+    """A candidate the agent is not asked about: scored at the multi-fidelity estimate."""
+    iter_id, run_id = _candidate_ids(ctx, iteration, point_idx)
+    print(f"[{iter_id}] Screened out (physics score {low:.3f}); estimated weight {estimate:.4f}.")
+    evaluated_df = prediction_df.copy()
+    evaluated_df['physics_score'] = low
+    evaluated_df['recommended_bo_weight'] = estimate
+    evaluated_df['evaluation_status'] = "screened"
+    evaluated_df.to_csv(os.path.join(ctx.compounded_dir, f"{run_id}_evaluated.csv"), index=False)
+    return _candidate_result(next_point, iter_id, evaluated_df)
+
+def evaluate_candidate_batch(ctx: CandidateContext, iteration: int, next_points: List[List[float]],
+                             workers: int = 1, screen: Optional[FidelityScreen] = None,
+                             formulations: Optional[pd.DataFrame] = None) -> List[CandidateResult]:
+    """
+    Evaluates one iteration's candidates, `workers` at a time in a thread pool (prediction is
+    in-process and the agent call is I/O bound). Results come back in the order of next_points,
+    however the calls finish, so the optimizer is told the same thing either way.
+    With a FidelityScreen, every candidate is predicted first and only those the screen selects
+    from their physics scores go to the agent; the screen then learns from the new pairs.
+    formulations are the points' recipes, one row each (e.g. from a candidate pool); by default
+    they are materialized from the run's template.
+    """
+    # One vectorized materialization for the whole batch (the points are already feasible).
+    rows = [None] * len(next_points)
+    if formulations is not None:
+        rows = [formulations.iloc[[k]] for k in range(len(next_points))]
+    elif ctx.materializer is not None and next_points:
+        formulations = ctx.materializer.formulations(next_points)
+        rows = [formulations.iloc[[k]] for k in range(len(next_points))]
+    if screen is None:
+        if workers <= 1 or len(next_points) <= 1:
+            return [evaluate_candidate(ctx, iteration, idx, point, formulation_df=rows[idx])
+                    for idx, point in enumerate(next_points)]
+        with ThreadPoolExecutor(max_workers=min(workers, len(next_points)), thread_name_prefix="candidate") as ex:
+            futures = [ex.submit(evaluate_candidate, ctx, iteration, idx, point, None, rows[idx])
+                       for idx, point in enumerate(next_points)]
+            return [f.result() for f in futures]
+
+    results: List[Optional[CandidateResult]] = [
+        load_evaluated_candidate(ctx, iteration, idx, point) for idx, point in enumerate(next_points)
+    ]
+    todo = [idx for idx, r in enumerate(results) if r is None]
+    predictions = {idx: predict_candidate(ctx, iteration, idx, next_points[idx], rows[idx]) for idx in todo}
+    low = np.array([physics_score(predictions[idx][1], ctx.targets_constraints)[0] for idx in todo])
+    send = screen.select(low)
+    estimates = screen.estimate(low)
+    to_agent = [idx for idx, s in zip(todo, send) if s]
+    print(f"Multi-fidelity screen: {len(to_agent)}/{len(todo)} candidate(s) go to the agent.")
+    for k, idx in enumerate(todo):
+        if not send[k]:
+            results[idx] = screened_candidate(ctx, iteration, idx, next_points[idx], predictions[idx][1],
+                                              float(low[k]), float(estimates[k]))
+    if workers <= 1 or len(to_agent) <= 1:
+        for idx in to_agent:
+            results[idx] = evaluate_candidate(ctx, iteration, idx, next_points[idx], prediction=predictions[idx])
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(to_agent)), thread_name_prefix="candidate") as ex:
+            futures = {idx: ex.submit(evaluate_candidate, ctx, iteration, idx, next_points[idx], predictions[idx])
+                       for idx in to_agent}
+            for idx, f in futures.items():
+                results[idx] = f.result()
+
+    for r in results:
+        if r.fidelity == "agent":
+            screen.n_agent += 1
+            screen.add(r.evaluated_df['physics_score'].iloc[:1], [r.score])
+        else:
+            screen.n_screened += 1
+    return results
+
+def run_async_iterations(ctx: CandidateContext, ckpt: RunCheckpoint, checkpoint: Callable[[], None],
+                         n_exploit: int, n_explore: int, workers: int, batch_strategy: str,
+                         stopping: StoppingRule, elapsed: Callable[[], float], pool=None) -> None:
+    """
+    The optimization iterations with asynchronous evaluations (src/async_bo.py): `workers`
+    candidates are always in flight, each result is told as soon as it arrives and its replacement
+    is asked with the in-flight points pending. The run's budget, explore ratio, candidate ids and
+    stopping checks are those of the synchronous loop. An iteration is done once a batch's worth
+    of results has been told.
+    """
+    optimizer, state, screen = ckpt.optimizer, ckpt.stopping, ckpt.fidelity
+    batch = n_exploit + n_explore
+    if ckpt.async_state is None:
+        ckpt.async_state = AsyncState(asked=ckpt.iterations_done * batch, told=ckpt.iterations_done * batch)
+    aq = ckpt.async_state
+    rows: Dict[int, pd.DataFrame] = {}
+    iteration_start = [time.monotonic()]
+
+    def propose(seqs: List[int], pending: List[List[float]]) -> Optional[List[List[float]]]:
+        # The explore share of every batch-sized run of sequence numbers, as in the synchronous loop.
+        n_explore_i = sum(seq % batch >= n_exploit for seq in seqs)
+        n_exploit_i = len(seqs) - n_explore_i
+        left = state.evaluations_left(stopping)
+        if left is not None:
+            allowed = max(left - len(pending), 0)
+            if allowed == 0:
+                print("Evaluation budget spent; no new candidates are asked.")
+                return None
+            n_exploit_i = min(n_exploit_i, allowed)
+            n_explore_i = min(n_explore_i, allowed - n_exploit_i)
+        with ctx.profiler.stage("ask", items=n_exploit_i + n_explore_i):
+            if pool is not None:
+                points, formulations = pool.take(pool.propose(optimizer, n_exploit_i, n_explore_i, batch_strategy,
+                                                              pending=pending))
+                rows.update({seq: formulations.iloc[[k]] for k, seq in enumerate(seqs[:len(points)])})
+                return points
+            return ask_feasible_points(optimizer, ctx.materializer, n_exploit_i, n_explore_i, batch_strategy,
+                                       pending=pending)
+
+    def start(seq: int, point: List[float]) -> Callable[[], CandidateResult]:
+        iteration, idx = seq // batch + 1, seq % batch
+        row = rows.pop(seq, None)
+        if row is None and pool is not None:
+            found = pool.find([point])
+            row = pool.formulations.iloc[found] if found else None
+        if row is None and ctx.materializer is not None:
+            row = ctx.materializer.formulations([point])
+        iter_id, _ = _candidate_ids(ctx, iteration, idx)
+        print(f"[{iter_id}] Submitting candidate ({len(aq.in_flight)} in flight).")
+        if screen is None:
+            return functools.partial(evaluate_candidate, ctx, iteration, idx, point, None, row)
+        loaded = load_evaluated_candidate(ctx, iteration, idx, point)
+        if loaded is not None:
+            return lambda: loaded
+        prediction = predict_candidate(ctx, iteration, idx, point, row)
+        low = physics_score(prediction[1], ctx.targets_constraints)[:1]
+        if screen.select(low, min_agent=0)[0]:
+            return functools.partial(evaluate_candidate, ctx, iteration, idx, point, prediction)
+        screened = screened_candidate(ctx, iteration, idx, point, prediction[1], float(low[0]),
+                                      float(screen.estimate(low)[0]))
+        return lambda: screened
+
+    def on_result(seq: int, point: List[float], result: CandidateResult) -> bool:
+        print(f"Candidate {result.iter_id} evaluation complete. Score: {result.score:.4f}"
+              + (" (physics estimate)" if result.fidelity == "physics" else ""))
+        with ctx.profiler.stage("tell", items=1):
+            optimizer.tell(result.point, -result.score)
+        if screen is not None:
+            if result.fidelity == "agent":
+                screen.n_agent += 1
+                screen.add(result.evaluated_df['physics_score'].iloc[:1], [result.score])
+            else:
+                screen.n_screened += 1
+        state.evaluations += result.fidelity == "agent"
+        if aq.told % batch == 0:
+            ckpt.iterations_done = aq.told // batch
+            state.best_history.append(-min(optimizer.yi))
+            state.iteration_s.append(time.monotonic() - iteration_start[0])
+            iteration_start[0] = time.monotonic()
+            state.elapsed_s = elapsed()
+            print(f"\n--- Optimization Iteration {ckpt.iterations_done}/{ckpt.max_iterations} told "
+                  f"(best score {state.best_history[-1]:.4f}) ---")
+            if state.reason is None:
+                state.reason = check_stopping(stopping, state, optimizer)
+                if state.reason:
+                    print(f"\nStopping early after iteration {ckpt.iterations_done}: {state.reason}. "
+                          f"Finishing the {len(aq.in_flight)} candidate(s) in flight.")
+        checkpoint()
+        return state.reason is not None
+
+    if state.reason is None and ckpt.iterations_done < ckpt.max_iterations:
+        state.reason = check_stopping(stopping, state, optimizer)
+    if state.reason is not None and not aq.in_flight:
+        print(f"\nStopping early before iteration {ckpt.iterations_done + 1}: {state.reason}.")
+        checkpoint()
+        return
+    # A run that stopped early only finishes what it had in flight.
+    budget = ckpt.max_iterations * batch if state.reason is None else aq.asked
+    print(f"Evaluating {len(aq.in_flight)} in-flight and up to {budget - aq.asked} new candidates "
+          f"asynchronously with {max(1, workers)} worker(s)...")
+    run_async(aq, budget, workers, propose, start, on_result, on_asked=checkpoint)
+    ckpt.iterations_done = max(ckpt.iterations_done, aq.told // batch)
+    checkpoint()
+
+def evaluate_initial_multi_fidelity(predictions_df: pd.DataFrame, process_vars: Dict[str, Any],
+                                    targets_constraints: Dict[str, Any], out_dir: str, run_identifier: str,
+                                    screen: FidelityScreen, n_calibration: int, seed: int,
+                                    evaluator: Optional[Callable[..., pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    Agent-evaluates a calibration subset of the initial DOE (see calibration_subset), fits the
+    screen on it, then sends the rest of the DOE through the screen like any other batch.
+    """
+    evaluate = evaluator or evaluate_with_agent
+    low = physics_score(predictions_df, targets_constraints)
+    calib = calibration_subset(low, n_calibration, np.random.RandomState(seed))
+    is_calib = np.zeros(len(predictions_df), dtype=bool)
+    is_calib[calib] = True
+    print(f"Multi-fidelity: calibrating on {len(calib)}/{len(predictions_df)} initial candidates.")
+    agent_df = evaluate(predictions_df=predictions_df[is_calib], process_vars=process_vars,
+                        targets_constraints=targets_constraints, out_dir=out_dir,
+                        run_identifier=run_identifier)
+    agent_df['physics_score'] = physics_score(agent_df, targets_constraints)
+    screen.add(agent_df['physics_score'], agent_df['recommended_bo_weight'])
+
+    rest_df = predictions_df[~is_calib].copy()
+    rest_low = low[~is_calib]
+    send = screen.select(rest_low, min_agent=0)
+    print(f"Multi-fidelity screen: {int(send.sum())}/{len(rest_df)} remaining initial candidate(s) go to the agent.")
+    frames = [agent_df]
+    n_agent = len(agent_df)
+    if send.any():
+        more_df = evaluate(predictions_df=rest_df[send], process_vars=process_vars,
+                           targets_constraints=targets_constraints, out_dir=out_dir,
+                           run_identifier=run_identifier)
+        more_df['physics_score'] = physics_score(more_df, targets_constraints)
+        screen.add(more_df['physics_score'], more_df['recommended_bo_weight'])
+        frames.append(more_df)
+        n_agent += len(more_df)
+    screened_df = rest_df[~send]
+    if len(screened_df):
+        screened_df = screened_df.assign(physics_score=rest_low[~send],
+                                         recommended_bo_weight=screen.estimate(rest_low[~send]),
+                                         evaluation_status="screened")
+        frames.append(screened_df)
+    screen.n_agent += n_agent
+    screen.n_screened += len(screened_df)
+    return pd.concat(frames, ignore_index=True)
+
+def propose_exploit_points(optimizer, n: int, batch_strategy: str = "ask",
+                           pending: Optional[List[List[float]]] = None) -> List[List[float]]:
+    """
+    "Ask" the optimizer for the next best points to try (exploit). pending are points still
+    being evaluated; with them, "ask" becomes a constant-liar batch acquisition, which is what
+    skopt's ask() does within a batch.
+    """
+    if n <= 0:
+        return []
+    if isinstance(optimizer, TrustRegionOptimizer):
+        # Every strategy picks from the trust region's own candidates.
+        return optimizer.propose(n, strategy=batch_strategy, pending=pending)
+    if batch_strategy == "ask" and pending:
+        batch_strategy = "constant_liar"
+    if batch_strategy == "ask":
+        return optimizer.ask(n_points=n)
+    return propose_batch(optimizer, n, strategy=batch_strategy, pending=pending)
+
+def ask_feasible_points(optimizer, materializer: CandidateMaterializer, n_exploit: int, n_explore: int,
+                        batch_strategy: str = "ask", max_reasks: int = 3,
+                        pending: Optional[List[List[float]]] = None) -> List[List[float]]:
+    """
+    An iteration's batch, all of it materializable (projected onto ingredient ranges, compatible,
+    not already evaluated). Infeasible exploit points are told to the optimizer with the same
+    low weight as a failed evaluation (outside a trust region's success/failure count, as they
+    were never evaluated) and the optimizer is asked again, up to max_reasks times;
+    whatever is still missing is made up with random feasible points, like the explore points.
+    pending are points still being evaluated, which are neither repeated nor crowded.
+    """
+    pending = list(pending or [])
+    existing = list(optimizer.Xi) + pending
+    exploit: List[List[float]] = []
+    for _ in range(max_reasks + 1):
+        need = n_exploit - len(exploit)
+        if need <= 0:
+            break
+        batch = materializer.materialize(propose_exploit_points(optimizer, need, batch_strategy, pending),
+                                         existing=existing + exploit)
+        exploit += batch.feasible_points
+        rejected = np.flatnonzero(batch.rejected)
+        for i in np.flatnonzero(~batch.feasible):
+            print(f"Skipping infeasible candidate {batch.points[i]}: {batch.reasons[i]}")
+        if not len(rejected):
+            break  # only duplicates: asking again would propose them again
+        rejected_points = [batch.points[i] for i in rejected]
+        if isinstance(optimizer, TrustRegionOptimizer):
+            optimizer.tell(rejected_points, [-INFEASIBLE_WEIGHT] * len(rejected), update_region=False)
+        else:
+            optimizer.tell(rejected_points, [-INFEASIBLE_WEIGHT] * len(rejected))
+        existing += rejected_points
+
+    random_points: List[List[float]] = []
+    n_random = n_explore + max(0, n_exploit - len(exploit))
+    for _ in range(max_reasks + 1):
+        need = n_random - len(random_points)
+        if need <= 0:
+            break
+        # Oversample: rejected random points cost nothing, so draw enough to fill the batch.
+        batch = materializer.materialize(optimizer.space.rvs(n_samples=4 * need),
+                                         existing=existing + exploit + random_points)
+        random_points += batch.feasible_points[:need]
+    if len(exploit) + len(random_points) < n_exploit + n_explore:
+        print(f"Warning: only {len(exploit) + len(random_points)} feasible candidates found for this iteration.")
+    return exploit + random_points
+
+def initialize_optimizer(search_space, surrogate: str = "gp", random_state: Optional[int] = None,
+                         trust_region: bool = False):
+    """
+    Initializes a Bayesian Optimizer.
+    surrogate picks the model behind it (see src/surrogates.py); "gp" is skopt's exact GP.
+    trust_region runs it inside a TuRBO trust region (see src/trust_region.py).
+    """
+    print(f"Initializing Bayesian Optimizer (surrogate: {surrogate}{', trust region' if trust_region else ''})...")
+    # Expected Improvement (EI) as the acquisition function, whatever the surrogate.
+    optimizer = make_optimizer(search_space, surrogate=surrogate, random_state=random_state, acq_func="EI",
+                               trust_region=trust_region)
     print("...optimizer initialized.")
     return optimizer
 
+def goal_filtered_pools(goals: Optional[Dict[str, Any]], focus_mode: str) -> Dict[str, Any]:
+    """The ingredient library filtered by the run's goals (simulated from focus_mode when there are none)."""
+    print("Filtering ingredient pools based on goals...")
+    full_ingredient_lib = json.loads(Path(project_root, "data/processed/ingredient_library.json").read_text())
+
+    # Use the explicit goals file if provided, otherwise simulate from focus_mode.
+    active_goals = goals if goals else {}
+    if not active_goals and "bio" in focus_mode:
+        print(f"No goals file provided. Simulating 'compostable' goal from focus: '{focus_mode}'")
+        active_goals = {"sustainability": {"compostable": True}}
+    return filter_pools_by_goals(active_goals, full_ingredient_lib)
+
+def _profiled_evaluator(profiler: StageProfiler, evaluator: Callable[..., pd.DataFrame]) -> Callable[..., pd.DataFrame]:
+    """evaluator, timed under the profiler's "evaluation" stage (items are the rows evaluated)."""
+    def evaluate(predictions_df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        with profiler.stage("evaluation", items=len(predictions_df)):
+            return evaluator(predictions_df=predictions_df, **kwargs)
+    return evaluate
+
 def run_optimization_loop(
     max_iterations: int,
     n_initial_points: int,
     focus_mode: str = "none",
     goals: Optional[Dict[str, Any]] = None,
     explore_ratio: float = 0.25,
-    spec_file: Optional[str] = None
+    spec_file: Optional[str] = None,
+    save_bridge_artifacts: bool = False,
+    use_prediction_cache: bool = True,
+    candidate_workers: int = 1,
+    resume: Optional[str] = None,
+    extend: int = 0,
+    surrogate: str = "gp",
+    candidates_per_iteration: int = 4,
+    batch_strategy: str = "ask",
+    multi_fidelity: bool = False,
+    mf_calibration_points: int = 8,
+    mf_kappa: float = 1.0,
+    stopping: Optional[StoppingRule] = None,
+    seed: Optional[int] = None,
+    evaluator: Optional[Callable[..., pd.DataFrame]] = None,
+    pool_size: int = 0,
+    trust_region: bool = False,
+    full_search_space: bool = False,
+    async_evaluations: bool = False
 ):
     """
     Main orchestration loop.
+    With save_bridge_artifacts=True the per-candidate formulation/process/prediction files are
+    written for traceability; otherwise the final tidy analysis uses the predictions made in this
+    session, kept in memory (a resumed run's tidy results then cover its own session only).
+    Predictions are cached on disk at PREDICTION_CACHE_PATH (default <RESULTS_DIR>/cache/predictions.sqlite)
+    unless use_prediction_cache=False. candidate_workers > 1 evaluates each iteration's
+    candidates concurrently; results are still told to the optimizer in ask order.
+
+    The run is checkpointed to <RESULTS_DIR>/checkpoints/run_<run_id>.pkl after every tell.
+    resume=<run_id> continues such a run with its own focus/explore/targets settings: the
+    optimizer is restored as it was, so neither the initial DOE nor any told evaluation is
+    repeated, and an interrupted iteration re-uses its asked points and finished candidates.
+    extend adds that many iterations to the run's budget (e.g. to continue a finished run).
+    surrogate selects the optimizer's model ("gp", "rf", "et", "gbrt" or "sparse_gp"); the
+    tree and sparse-GP backends keep ask/tell fast on histories of thousands of points.
+    candidates_per_iteration sets the batch size. batch_strategy "ask" takes the exploit points
+    from skopt's constant-liar ask(); "kriging_believer", "constant_liar" or "local_penalization"
+    propose them with src/batch_acquisition.py instead, which stays fast for 16-64 candidates.
+    multi_fidelity screens candidates with the physics target-distance score (src/multi_fidelity.py):
+    mf_calibration_points initial candidates calibrate it against the agent, after which only the
+    promising or uncertain ones (optimism mf_kappa residual sigmas) cost an agent call.
+    stopping (src/stopping.py) ends the run before max_iterations on a plateau, a low expected
+    improvement, or a spent wall-clock/agent-evaluation budget; the outcome is in the summary.
+    A resumed run keeps its rule, and extend restarts the improvement window.
+    seed fixes the DOE, the optimizer and the explore draws (by default the DOE is seeded from the
+    run timestamp). evaluator replaces evaluate_with_agent (same signature), e.g. with an offline
+    stand-in or a backend from make_evaluator (the programmatic "local" scorer, or the agent with
+    local fallback). Per-stage timings (src/stage_profiler.py) are reported under "stages" in the summary,
+    which is also returned.
+    pool_size > 0 picks every batch from a pool of that many feasible DOE formulations, scored
+    in one vectorized pass, instead of asking the optimizer (src/candidate_pool.py).
+    full_search_space adds the remaining wt% columns (talc, INTUNE, stabilizer, base B), the
+    nucleator loading and three more process levers to the search space (15 dimensions).
+    trust_region optimizes inside a TuRBO trust region with a local surrogate (src/trust_region.py),
+    which keeps both sample efficiency and surrogate cost in check on that larger space.
+    async_evaluations keeps candidate_workers candidates in flight instead of evaluating in
+    synchronous batches: each result is told as soon as it arrives and a replacement is asked
+    with the in-flight points pending (src/async_bo.py).
     """
+    session_start = time.monotonic()
+    profiler = StageProfiler()
+    evaluate = _profiled_evaluator(profiler, evaluator or evaluate_with_agent)
     base_results_dir = os.environ.get("RESULTS_DIR", "results")
     # Define output directories and create them if they don't exist.
     formulations_dir = os.path.join(base_results_dir, "formulations")
@@ -127,9 +659,35 @@ def run_optimization_loop(
     os.makedirs(summaries_dir, exist_ok=True)
     os.makedirs(plots_dir, exist_ok=True)
 
-    # Use a timestamp to ensure files from this run are unique.
-    run_timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    print(f"Using run identifier: {run_timestamp}")
+    tidy_predictions: List[pd.DataFrame] = []  # see CandidateContext.predictions
+    if resume:
+        ckpt = load_checkpoint(checkpoint_path(base_results_dir, resume))
+        ckpt.max_iterations += extend
+        run_timestamp = ckpt.run_id
+        focus_mode = ckpt.config["focus_mode"]
+        explore_ratio = ckpt.config["explore_ratio"]
+        save_bridge_artifacts = ckpt.config["save_bridge_artifacts"]
+        candidates_per_iteration = ckpt.config.get("candidates_per_iteration", 4)
+        batch_strategy = ckpt.config.get("batch_strategy", "ask")
+        multi_fidelity = ckpt.fidelity is not None
+        pool_size = ckpt.config.get("pool_size", 0)
+        async_evaluations = ckpt.config.get("async_evaluations", False)
+        stopping = StoppingRule(**ckpt.config.get("stopping", {}))
+        if ckpt.stopping is not None and extend:
+            ckpt.stopping.window_start = ckpt.iterations_done
+            ckpt.stopping.reason = None
+        print(f"Resuming run {run_timestamp} after iteration {ckpt.iterations_done}/{ckpt.max_iterations} "
+              f"({len(ckpt.optimizer.yi)} evaluated points).")
+    else:
+        ckpt = None
+        # Use a timestamp to ensure files from this run are unique.
+        run_timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        print(f"Using run identifier: {run_timestamp}")
+    ckpt_path = checkpoint_path(base_results_dir, run_timestamp)
+
+    def checkpoint():
+        with profiler.stage("checkpoint"):
+            save_checkpoint(ckpt, ckpt_path)
 
     # Load configs
     try:
@@ -138,264 +696,335 @@ def run_optimization_loop(
         print("Warning: data/processed/processing_levers.json not found. Cannot clamp process variables.")
         processing_levers = None
 
-    # --- Build Target Constraints ---
-    if spec_file:
-        print(f"Building targets from spec file: {spec_file}")
-        # Ingest and enrich the spec file to build dynamic targets
-        normalized_spec = normalize_spec(Path(spec_file))
-        # --- Save the normalized spec for debugging ---
-        normalized_spec_path = Path(base_results_dir) / f"normalized_spec_{run_timestamp}.json"
-        with open(normalized_spec_path, 'w') as f:
-            json.dump(normalized_spec, f, indent=2)
-        print(f"Saved normalized spec to: {normalized_spec_path}")
-        enriched_spec = gapfill(normalized_spec)
-        targets_constraints = build_targets_constraints(enriched_spec)
-    else:
-        print("No spec file provided, using default targets.")
-        target_properties_path = os.path.join(project_root, "data", "processed", "target_properties.json")
-        targets_constraints = build_targets_constraints(target_properties_path)
-
-    # 1. Define search space for the optimizer.
-    # This includes key formulation variables and the processing levers from processing_levers.json.
-    bo_search_space = [
-        # Formulation Levers
-        # For biopolyesters, a wider range is needed for effective toughening.
-        Real(10.0, 30.0, name='elastomer_wtpct') if "bio" in focus_mode 
-            else Real(8.0, 18.0, name='elastomer_wtpct'),
-        Real(0.0, 20.0, name='filler_wtpct'),
-        Real(0.5, 3.0, name='compat_wtpct'),
-        # Processing Levers (from processing_levers.json and pp_elastomer_TSE_hybrid_model_v1.json)
-        Real(2.5, 8.33, name='N_rps'),      # Screw Speed (rps), converted from [150, 500] rpm
-        Real(200.0, 240.0, name='Tm_C'),    # Melt Temperature (°C)
-        Real(1.0, 10.0, name='Q_kgh'),      # Feed Rate (kg/h)
-        Real(50.0, 250.0, name='Torque_Nm') # Motor Torque (Nm), a proxy for specific energy
-    ]
-    optimizer = initialize_optimizer(bo_search_space)
-
-    # 2. Generate initial data (cold start)
-    # This now uses the --focus modes from the generator, replacing the old hardcoded modes.
-    # Change 'focus' to "recycled" or "bio-based" to align with P1 of the action plan.
-    initial_doe_focus = focus_mode
-
-    # --- Filter ingredient pools based on goals before generating candidates ---
-    # This prevents the DOE generator from creating chemically incompatible formulations.
-    print("Filtering ingredient pools based on goals...")
-    full_ingredient_lib = json.loads(Path(project_root, "data/processed/ingredient_library.json").read_text())
-    
-    # Use the explicit goals file if provided, otherwise simulate from focus_mode.
-    active_goals = goals if goals else {}
-    if not active_goals and "bio" in focus_mode:
-        print(f"No goals file provided. Simulating 'compostable' goal from focus: '{focus_mode}'")
-        active_goals = {"sustainability": {"compostable": True}}
-    filtered_pools = filter_pools_by_goals(active_goals, full_ingredient_lib)
-
-    n_initial_candidates = n_initial_points
-    # Create a deterministic seed from the timestamp for reproducibility
-    run_seed = int(run_timestamp.replace("_", "")) % (2**32 - 1)
-    print(f"Generating {n_initial_candidates} initial candidates with focus='{initial_doe_focus}'...")
-    formulations_df = generate_doe_candidates(
-        n=n_initial_candidates,
-        # Pass the filtered ingredient pools to the generator
-        ingredient_pools=filtered_pools,
-        seed=run_seed,
-        focus=initial_doe_focus
+    # Load the hybrid model and ingredient catalog once for the whole run.
+    prediction_cache = None
+    if use_prediction_cache:
+        cache_path = os.environ.get("PREDICTION_CACHE_PATH") or os.path.join(base_results_dir, "cache", "predictions.sqlite")
+        prediction_cache = PredictionCache(cache_path)
+    predictor = PropertyPredictor(
+        model_path=os.path.join(project_root, "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"),
+        library_path=os.path.join(project_root, "data/processed/ingredient_library.json"),
+        cache=prediction_cache,
     )
 
-    initial_candidates_path = os.path.join(formulations_dir, f"initial_doe_{run_timestamp}.csv")
-    formulations_df.to_csv(initial_candidates_path, index=False)
-
-    # Write metadata for the initial DOE run
-    meta = {
-        "run_id": run_timestamp,
-        "initial_doe_focus": initial_doe_focus,
-        "n_initial_candidates": n_initial_candidates,
-        "total": int(len(formulations_df)),
-    }
-    (Path(formulations_dir) / "doe_run_metadata.json").write_text(json.dumps(meta, indent=2))
-    print(f"Wrote {len(formulations_df)} candidates to {initial_candidates_path}")
-    print(f"Wrote metadata to {Path(formulations_dir) / 'doe_run_metadata.json'}")
-    # Since the initial DOE may not vary all levers, we assign default values.
-    # This makes the initial data compatible with the expanded search space.
-    default_optimization_levers = {
-        'compat_wtpct': 1.5, # Default compatibilizer wt%
-        'N_rps': 5.0,      # A reasonable mid-point for screw speed
-        'Tm_C': 220.0,     # Typical melt temp
-        'Q_kgh': 5.0,      # Typical lab feed rate
-        'Torque_Nm': 50.0 # Align with the lower bound of the optimizer's search space
-    }
-    for lever, value in default_optimization_levers.items():
-        formulations_df[lever] = value
-
-    # Add a 'mode' column for downstream compatibility, even though we generate from a single focus now.
-    formulations_df['mode'] = f"focus_{initial_doe_focus}"
-
-    # 3. Run first simulation and evaluation
-    # Define output paths for the bridge script to create traceable artifacts
-    initial_predictions_path = os.path.join(compounded_dir, f"initial_predictions_{run_timestamp}.csv")
-    # The bridge script needs a process file, even for defaults.
-    default_process_levers = {k: v for k, v in default_optimization_levers.items() if not k.endswith('_wtpct')}
-    default_process_path = os.path.join(compounded_dir, f"default_process_conditions_{run_timestamp}.json")
-    with open(default_process_path, 'w') as f:
-        json.dump(default_process_levers, f, indent=2)
-
-    # Call the bridge script to perform property prediction
-    predictions_df = run_property_prediction_bridge(
-        formulations_df, initial_candidates_path, initial_predictions_path, default_process_path
-    )
-    evaluated_df = evaluate_with_agent(
-        predictions_df=predictions_df,
-        process_vars=default_process_levers,
-        targets_constraints=targets_constraints,
-        out_dir=os.path.join(compounded_dir, f"initial_agent_{run_timestamp}"),
-        run_identifier=run_timestamp
-    )
+    if ckpt is None:
+        # --- Build Target Constraints ---
+        if spec_file:
+            print(f"Building targets from spec file: {spec_file}")
+            # Ingest and enrich the spec file to build dynamic targets
+            normalized_spec = normalize_spec(Path(spec_file))
+            # --- Save the normalized spec for debugging ---
+            normalized_spec_path = Path(base_results_dir) / f"normalized_spec_{run_timestamp}.json"
+            with open(normalized_spec_path, 'w') as f:
+                json.dump(normalized_spec, f, indent=2)
+            print(f"Saved normalized spec to: {normalized_spec_path}")
+            enriched_spec = gapfill(normalized_spec)
+            targets_constraints = build_targets_constraints(enriched_spec)
+        else:
+            print("No spec file provided, using default targets.")
+            target_properties_path = os.path.join(project_root, "data", "processed", "target_properties.json")
+            targets_constraints = build_targets_constraints(target_properties_path)
+
+        # 1. Define search space for the optimizer.
+        # This includes key formulation variables and the processing levers from processing_levers.json.
+        bo_search_space = [
+            # Formulation Levers
+            # For biopolyesters, a wider range is needed for effective toughening.
+            Real(10.0, 30.0, name='elastomer_wtpct') if "bio" in focus_mode 
+                else Real(8.0, 18.0, name='elastomer_wtpct'),
+            Real(0.0, 20.0, name='filler_wtpct'),
+            Real(0.5, 3.0, name='compat_wtpct'),
+            # Processing Levers (from processing_levers.json and pp_elastomer_TSE_hybrid_model_v1.json)
+            Real(2.5, 8.33, name='N_rps'),      # Screw Speed (rps), converted from [150, 500] rpm
+            Real(200.0, 240.0, name='Tm_C'),    # Melt Temperature (°C)
+            Real(1.0, 10.0, name='Q_kgh'),      # Feed Rate (kg/h)
+            Real(50.0, 250.0, name='Torque_Nm') # Motor Torque (Nm), a proxy for specific energy
+        ]
+        if full_search_space:
+            bo_search_space += FULL_SPACE_LEVERS
+        optimizer = initialize_optimizer(bo_search_space, surrogate=surrogate, random_state=seed,
+                                         trust_region=trust_region)
+        if seed is not None:
+            # Random explore points are drawn from numpy's global RNG.
+            np.random.seed(seed)
+
+        # 2. Generate initial data (cold start)
+        # This now uses the --focus modes from the generator, replacing the old hardcoded modes.
+        # Change 'focus' to "recycled" or "bio-based" to align with P1 of the action plan.
+        initial_doe_focus = focus_mode
+
+        # --- Filter ingredient pools based on goals before generating candidates ---
+        # This prevents the DOE generator from creating chemically incompatible formulations.
+        filtered_pools = goal_filtered_pools(goals, focus_mode)
+
+        n_initial_candidates = n_initial_points
+        # Create a deterministic seed from the timestamp for reproducibility
+        run_seed = seed if seed is not None else int(run_timestamp.replace("_", "")) % (2**32 - 1)
+        print(f"Generating {n_initial_candidates} initial candidates with focus='{initial_doe_focus}'...")
+        with profiler.stage("doe", items=n_initial_candidates):
+            formulations_df = generate_doe_candidates(
+                n=n_initial_candidates,
+                # Pass the filtered ingredient pools to the generator
+                ingredient_pools=filtered_pools,
+                seed=run_seed,
+                focus=initial_doe_focus
+            )
 
-    initial_evaluated_path = os.path.join(compounded_dir, f"initial_evaluated_{run_timestamp}.csv")
-    evaluated_df.to_csv(initial_evaluated_path, index=False)
+        max_evaluations = (stopping or StoppingRule()).max_evaluations
+        if max_evaluations is not None and len(formulations_df) > max_evaluations:
+            # The DOE's agent calls count against --max-evaluations like the optimizer's.
+            print(f"Evaluation budget: keeping {max_evaluations} of the {len(formulations_df)} initial candidates.")
+            formulations_df = formulations_df.sample(n=max_evaluations, random_state=run_seed).reset_index(drop=True)
+
+        initial_candidates_path = os.path.join(formulations_dir, f"initial_doe_{run_timestamp}.csv")
+        formulations_df.to_csv(initial_candidates_path, index=False)
+
+        # Write metadata for the initial DOE run
+        meta = {
+            "run_id": run_timestamp,
+            "initial_doe_focus": initial_doe_focus,
+            "n_initial_candidates": n_initial_candidates,
+            "total": int(len(formulations_df)),
+        }
+        (Path(formulations_dir) / "doe_run_metadata.json").write_text(json.dumps(meta, indent=2))
+        print(f"Wrote {len(formulations_df)} candidates to {initial_candidates_path}")
+        print(f"Wrote metadata to {Path(formulations_dir) / 'doe_run_metadata.json'}")
+        # Since the initial DOE may not vary all levers, we assign default values.
+        # This makes the initial data compatible with the expanded search space.
+        default_optimization_levers = {
+            'compat_wtpct': 1.5, # Default compatibilizer wt%
+            'N_rps': 5.0,      # A reasonable mid-point for screw speed
+            'Tm_C': 220.0,     # Typical melt temp
+            'Q_kgh': 5.0,      # Typical lab feed rate
+            'Torque_Nm': 50.0 # Align with the lower bound of the optimizer's search space
+        }
+        if full_search_space:
+            default_optimization_levers.update(FULL_SPACE_DEFAULT_LEVERS)
+        for lever, value in default_optimization_levers.items():
+            formulations_df[lever] = value
+
+        # Add a 'mode' column for downstream compatibility, even though we generate from a single focus now.
+        formulations_df['mode'] = f"focus_{initial_doe_focus}"
+
+        # 3. Run first simulation and evaluation
+        # Define output paths for the bridge script to create traceable artifacts
+        initial_predictions_path = os.path.join(compounded_dir, f"initial_predictions_{run_timestamp}.csv")
+        default_process_levers = {k: v for k, v in default_optimization_levers.items() if not k.endswith('_wtpct')}
+        default_process_path = os.path.join(compounded_dir, f"default_process_conditions_{run_timestamp}.json")
+
+        # Perform property prediction (artifacts are kept for traceability unless disabled)
+        with profiler.stage("bridge", items=len(formulations_df)):
+            predictions_df = run_property_prediction_bridge(
+                predictor, formulations_df, default_process_levers,
+                *((initial_candidates_path, initial_predictions_path, default_process_path) if save_bridge_artifacts else ())
+            )
+        if not save_bridge_artifacts:
+            tidy_predictions.append(tag_predictions(predictions_df, run_timestamp, "init"))
+        screen = None
+        if multi_fidelity:
+            if np.isnan(physics_score(predictions_df, targets_constraints)).all():
+                print("Warning: no target can be scored against the predictions; multi-fidelity screening is off.")
+            else:
+                screen = FidelityScreen(kappa=mf_kappa)
+        if screen is not None:
+            evaluated_df = evaluate_initial_multi_fidelity(
+                predictions_df, default_process_levers, targets_constraints,
+                out_dir=os.path.join(compounded_dir, f"initial_agent_{run_timestamp}"),
+                run_identifier=run_timestamp, screen=screen,
+                n_calibration=mf_calibration_points, seed=run_seed, evaluator=evaluate,
+            )
+        else:
+            evaluated_df = evaluate(
+                predictions_df=predictions_df,
+                process_vars=default_process_levers,
+                targets_constraints=targets_constraints,
+                out_dir=os.path.join(compounded_dir, f"initial_agent_{run_timestamp}"),
+                run_identifier=run_timestamp
+            )
 
-    print("\n--- Initial Evaluation Results ---")
-    display_cols = [
-        'elastomer_wtpct', 'filler_wtpct', 'compat_wtpct', 'N_rps', 'Tm_C',
-        'Q_kgh', 'sigma_y_MPa', 'MFI_g10min', 'E_GPa', 'HDT_C',
-        'Izod_m20_kJm2', 'Izod_23_kJm2', 'rho_gcc', 'eps_y_pct', 'Gardner_J',
-        'recommended_bo_weight',
-    ]
-    # Filter to only show columns that actually exist in the dataframe
-    print(evaluated_df[[c for c in display_cols if c in evaluated_df.columns]].head())
-
-    # 4. "Tell" the optimizer about the initial results.
-    # scikit-optimize minimizes, so we pass the *negative* of our score.
-    # Ensure the columns for the search space are numeric before passing to the optimizer.
-    # This prevents errors if the CSV contains non-numeric values or empty strings.
-    for dim in bo_search_space:
-        evaluated_df[dim.name] = pd.to_numeric(evaluated_df[dim.name], errors='coerce')
-    evaluated_df.dropna(subset=[dim.name for dim in bo_search_space], inplace=True)
-
-    # Filter the DataFrame to include only points that are strictly within the defined search space.
-    # This is a robust way to handle any edge cases from the generator that fall outside the optimizer's bounds.
-    initial_rows = len(evaluated_df)
-    for dim in bo_search_space:
-        evaluated_df = evaluated_df[evaluated_df[dim.name] >= dim.low]
-        evaluated_df = evaluated_df[evaluated_df[dim.name] <= dim.high]
-
-    if len(evaluated_df) < initial_rows:
-        print(f"Warning: Filtered out {initial_rows - len(evaluated_df)} initial points that were outside the optimizer's search space.")
-
-    X_initial = evaluated_df[[dim.name for dim in bo_search_space]].values.tolist()
-    y_initial = (-evaluated_df['recommended_bo_weight']).values.tolist()
-    if not X_initial:
-        raise ValueError("No valid initial points found within the defined search space. Check the DOE generator and search space definitions.")
-    optimizer.tell(X_initial, y_initial)
-    print(f"\nOptimizer updated with {len(X_initial)} initial DOE results.")
+        # Agent calls spent on the DOE (screened rows are free), before any rows are filtered out.
+        n_initial_agent = len(evaluated_df)
+        if 'evaluation_status' in evaluated_df.columns:
+            n_initial_agent -= int((evaluated_df['evaluation_status'] == "screened").sum())
+        initial_evaluated_path = os.path.join(compounded_dir, f"initial_evaluated_{run_timestamp}.csv")
+        evaluated_df.to_csv(initial_evaluated_path, index=False)
+
+        print("\n--- Initial Evaluation Results ---")
+        display_cols = [
+            'elastomer_wtpct', 'filler_wtpct', 'compat_wtpct', 'N_rps', 'Tm_C',
+            'Q_kgh', 'sigma_y_MPa', 'MFI_g10min', 'E_GPa', 'HDT_C',
+            'Izod_m20_kJm2', 'Izod_23_kJm2', 'rho_gcc', 'eps_y_pct', 'Gardner_J',
+            'recommended_bo_weight',
+        ]
+        # Filter to only show columns that actually exist in the dataframe
+        print(evaluated_df[[c for c in display_cols if c in evaluated_df.columns]].head())
+
+        # 4. "Tell" the optimizer about the initial results.
+        # scikit-optimize minimizes, so we pass the *negative* of our score.
+        # Ensure the columns for the search space are numeric before passing to the optimizer.
+        # This prevents errors if the CSV contains non-numeric values or empty strings.
+        for dim in bo_search_space:
+            evaluated_df[dim.name] = pd.to_numeric(evaluated_df[dim.name], errors='coerce')
+        evaluated_df.dropna(subset=[dim.name for dim in bo_search_space], inplace=True)
+
+        # Filter the DataFrame to include only points that are strictly within the defined search space.
+        # This is a robust way to handle any edge cases from the generator that fall outside the optimizer's bounds.
+        initial_rows = len(evaluated_df)
+        for dim in bo_search_space:
+            evaluated_df = evaluated_df[evaluated_df[dim.name] >= dim.low]
+            evaluated_df = evaluated_df[evaluated_df[dim.name] <= dim.high]
+
+        if len(evaluated_df) < initial_rows:
+            print(f"Warning: Filtered out {initial_rows - len(evaluated_df)} initial points that were outside the optimizer's search space.")
+
+        X_initial = evaluated_df[[dim.name for dim in bo_search_space]].values.tolist()
+        y_initial = (-evaluated_df['recommended_bo_weight']).values.tolist()
+        if not X_initial:
+            raise ValueError("No valid initial points found within the defined search space. Check the DOE generator and search space definitions.")
+        with profiler.stage("tell", items=len(X_initial)):
+            optimizer.tell(X_initial, y_initial)
+        print(f"\nOptimizer updated with {len(X_initial)} initial DOE results.")
+
+        ckpt = RunCheckpoint(
+            run_id=run_timestamp,
+            optimizer=optimizer,
+            config={"focus_mode": focus_mode, "goals": goals, "explore_ratio": explore_ratio, "spec_file": spec_file,
+                    "n_initial_points": n_initial_points, "save_bridge_artifacts": save_bridge_artifacts,
+                    "surrogate": surrogate, "candidates_per_iteration": candidates_per_iteration,
+                    "batch_strategy": batch_strategy, "multi_fidelity": multi_fidelity,
+                    "stopping": asdict(stopping or StoppingRule()), "seed": seed,
+                    "pool_size": pool_size, "pool_seed": run_seed, "trust_region": trust_region,
+                    "full_search_space": full_search_space, "async_evaluations": async_evaluations},
+            targets_constraints=targets_constraints,
+            template_df=formulations_df.head(1),
+            n_initial=len(X_initial),
+            max_iterations=max_iterations + extend,
+            fidelity=screen,
+            stopping=StoppingState(
+                best_history=[-min(optimizer.yi)],
+                evaluations=n_initial_agent,
+            ),
+        )
+        checkpoint()
+        print(f"Saved run checkpoint to {ckpt_path}")
+
+    optimizer = ckpt.optimizer
+    targets_constraints = ckpt.targets_constraints
+    bo_search_space = optimizer.space.dimensions
+    max_iterations = ckpt.max_iterations
+    stopping = stopping or StoppingRule()
+    if ckpt.stopping is None:
+        # Checkpoints written before stopping rules existed.
+        ckpt.stopping = StoppingState(best_history=[-min(optimizer.yi)])
+    state = ckpt.stopping
+    elapsed_before = state.elapsed_s
 
     # 5. Main optimization loop
     # --- P2: Implement Optimizer Explore/Exploit Strategy ---
     # For each iteration, we generate a batch of candidates based on the 25% explore / 75% exploit ratio.
-    n_candidates_per_iteration = 4  # As per plan, e.g., 4 candidates per batch
+    n_candidates_per_iteration = candidates_per_iteration  # As per plan, e.g., 4 candidates per batch
     explore_fraction = clamp(explore_ratio, 0.0, 1.0) # Use the new parameter, clamped for safety
     n_explore = int(n_candidates_per_iteration * explore_fraction)
     n_exploit = n_candidates_per_iteration - n_explore
 
-    for i in range(max_iterations):
-        print(f"\n--- Optimization Iteration {i+1}/{max_iterations} ---")
-        print(f"Generating {n_candidates_per_iteration} candidates ({n_exploit} exploit, {n_explore} explore)...")
-
-        # "Ask" optimizer for the next best points to try (exploit)
-        exploit_points = optimizer.ask(n_points=n_exploit)
-
-        # Generate random points for exploration
-        explore_points = optimizer.space.rvs(n_samples=n_explore)
-
-        # Combine points for this iteration's batch
-        next_points = exploit_points + explore_points
-        X_batch, y_batch = [], [] # Store results for this batch
-
-        # Process each point in the batch sequentially
-        for point_idx, next_point in enumerate(next_points):
-            print(f"\n-- Processing candidate {point_idx + 1}/{n_candidates_per_iteration} for iteration {i+1} --")
-            search_space_names = [dim.name for dim in bo_search_space]
-            suggested_values = dict(zip(search_space_names, next_point))
-            print(f"Optimizer suggests point: {suggested_values}")
-
-            # Separate formulation variables from process variables
-            formulation_vars = {k: v for k, v in suggested_values.items() if k.endswith('_wtpct')}
-            process_vars = {k: v for k, v in suggested_values.items() if not k.endswith('_wtpct')}
-
-            # Clamp process variables
-            if processing_levers:
-                process_vars = clamp_process_row(process_vars, processing_levers)
-                print(f"Clamped process vars: {process_vars}")
-
-            # Create a valid new formulation from the optimizer's suggestion.
-            # This re-balances the other formulation components to ensure the total sums to 100 wt%.
-            template_df = formulations_df.head(1)
-            next_formulation_df = pd.DataFrame([suggested_values])
-
-            # --- Refined Re-balancing Logic ---
-            # Instead of scaling all other components, we'll primarily adjust the base resin
-            # to make up the difference to 100%. This is more realistic.
-            sum_of_new_optimized_values = sum(formulation_vars.values())
-            if sum_of_new_optimized_values > 100.0:
-                print(f"Warning: Sum of optimized formulation values ({sum_of_new_optimized_values:.2f}) > 100. This point will be invalid.")
-                # Let the invalid point proceed; the evaluator should penalize it heavily.
-
-            # Identify all wt% columns from the original DOE to create a full recipe
-            all_wtpct_cols = [col for col in formulations_df.columns if col.endswith('_wtpct')]
-            unoptimized_wtpct_cols = [col for col in all_wtpct_cols if col not in formulation_vars]
-
-            # Copy non-optimized values from the template, assuming they are minor additives
-            for col in unoptimized_wtpct_cols:
-                next_formulation_df[col] = template_df[col].iloc[0]
-
-            # Re-calculate the sum and adjust the primary base resin (if one exists)
-            current_sum = next_formulation_df[all_wtpct_cols].sum(axis=1).iloc[0]
-            base_resin_cols = [c for c in formulations_df.columns if 'base' in c.lower() and c.endswith('_wtpct')]
-            if base_resin_cols:
-                primary_base = base_resin_cols[0]
-                adjustment = 100.0 - current_sum
-                next_formulation_df[primary_base] += adjustment
-                print(f"Re-balancing: Adjusted '{primary_base}' by {adjustment:.2f} to sum to 100%.")
-
-            next_formulation_df['mode'] = 'bo_suggested'
-
-            # Run simulation and evaluation for this single candidate
-            iter_id = f"iter_{i+1:02d}_cand_{point_idx+1:02d}"
-            iter_formulation_path = os.path.join(formulations_dir, f"run_{run_timestamp}_{iter_id}.csv")
-            iter_prediction_path = os.path.join(compounded_dir, f"run_{run_timestamp}_{iter_id}_prediction.csv")
-            iter_process_path = os.path.join(compounded_dir, f"run_{run_timestamp}_{iter_id}_process.json")
-            with open(iter_process_path, 'w') as f:
-                json.dump(process_vars, f, indent=2)
-
-            prediction_df = run_property_prediction_bridge(
-                next_formulation_df, iter_formulation_path, iter_prediction_path, iter_process_path
-            )
-            evaluated_df = evaluate_with_agent(
-                predictions_df=prediction_df,
-                process_vars=process_vars,
-                targets_constraints=targets_constraints,
-                out_dir=os.path.join(compounded_dir, f"run_{run_timestamp}_{iter_id}_agent"),
-                run_identifier=f"{run_timestamp}_{iter_id}"
-            )
-
-            iteration_path = os.path.join(compounded_dir, f"run_{run_timestamp}_{iter_id}_evaluated.csv")
-            evaluated_df.to_csv(iteration_path, index=False)
-
-            # Get the result and append to the batch lists
-            result_score = evaluated_df['recommended_bo_weight'].iloc[0]
-            X_batch.append(next_point)
-            y_batch.append(-result_score) # skopt minimizes, so we pass the negative score
+    search_space_names = [dim.name for dim in bo_search_space]
+    materializer = CandidateMaterializer(bo_search_space, ckpt.template_df)
+    candidate_ctx = CandidateContext(
+        search_space_names=search_space_names,
+        template_df=ckpt.template_df,
+        predictor=predictor,
+        targets_constraints=targets_constraints,
+        processing_levers=processing_levers,
+        formulations_dir=formulations_dir,
+        compounded_dir=compounded_dir,
+        run_timestamp=run_timestamp,
+        save_bridge_artifacts=save_bridge_artifacts,
+        reuse_evaluated=bool(resume),
+        materializer=materializer,
+        evaluator=evaluate,
+        profiler=profiler,
+        predictions=tidy_predictions,
+    )
 
-            print(f"Candidate {point_idx+1} evaluation complete. Score: {result_score:.4f}")
+    pool = None
+    if pool_size:
+        with profiler.stage("pool", items=pool_size):
+            pool = build_candidate_pool(optimizer.space, predictor, pool_size, ckpt.config["pool_seed"],
+                                        goal_filtered_pools(ckpt.config["goals"], focus_mode), focus=focus_mode)
+        pool.exclude(optimizer.Xi)
+        print(f"Candidate pool: {len(pool)} feasible formulations, {int(pool.available.sum())} not evaluated yet.")
+
+    if async_evaluations:
+        run_async_iterations(candidate_ctx, ckpt, checkpoint, n_exploit, n_explore, candidate_workers, batch_strategy,
+                             stopping, lambda: elapsed_before + time.monotonic() - session_start, pool=pool)
+    else:
+        for i in range(ckpt.iterations_done, max_iterations):
+            state.elapsed_s = elapsed_before + time.monotonic() - session_start
+            iteration_start = time.monotonic()
+            if ckpt.pending is None:
+                state.reason = check_stopping(stopping, state, optimizer)
+                if state.reason:
+                    print(f"\nStopping early before iteration {i+1}: {state.reason}.")
+                    checkpoint()
+                    break
+            print(f"\n--- Optimization Iteration {i+1}/{max_iterations} ---")
+            formulations = None
+            if ckpt.pending is not None:
+                # The run stopped between ask and tell; evaluate the very same points again.
+                next_points = ckpt.pending
+                print(f"Re-using the {len(next_points)} candidates asked before the interruption...")
+                rows = pool.find(next_points) if pool is not None else []
+                if pool is not None and len(rows) == len(next_points):
+                    next_points, formulations = pool.take(rows)
+            else:
+                n_exploit_i, n_explore_i = n_exploit, n_explore
+                left = state.evaluations_left(stopping)
+                if left is not None and left < n_exploit + n_explore:
+                    # Trim the last batch to what the evaluation budget still allows.
+                    n_exploit_i = min(n_exploit, left)
+                    n_explore_i = left - n_exploit_i
+                print(f"Generating {n_exploit_i + n_explore_i} candidates "
+                      f"({n_exploit_i} exploit, {n_explore_i} explore)...")
+                # Exploit points from the optimizer plus random points for exploration, all feasible.
+                with profiler.stage("ask", items=n_exploit_i + n_explore_i):
+                    if pool is not None:
+                        # Feasible by construction: scored and picked from the pool.
+                        next_points, formulations = pool.take(pool.propose(optimizer, n_exploit_i, n_explore_i,
+                                                                           batch_strategy))
+                    else:
+                        next_points = ask_feasible_points(optimizer, materializer, n_exploit_i, n_explore_i,
+                                                          batch_strategy)
+                ckpt.pending = next_points
+                checkpoint()
+            print(f"Evaluating {len(next_points)} candidates with {max(1, candidate_workers)} worker(s)...")
+            results = evaluate_candidate_batch(candidate_ctx, i + 1, next_points, workers=candidate_workers,
+                                               screen=ckpt.fidelity, formulations=formulations)
+
+            X_batch, y_batch = [], [] # Store results for this batch
             log_cols = [
                 'elastomer_wtpct', 'filler_wtpct', 'N_rps', 'Tm_C', 'sigma_y_MPa',
                 'MFI_g10min', 'E_GPa', 'HDT_C', 'Izod_m20_kJm2', 'Izod_23_kJm2',
                 'rho_gcc', 'eps_y_pct', 'Gardner_J', 'recommended_bo_weight'
             ]
-            print(evaluated_df[[c for c in log_cols if c in evaluated_df.columns]].to_string())
-
-        # After processing all points in the batch, "tell" the optimizer all results at once
-        optimizer.tell(X_batch, y_batch)
-        print(f"\nOptimizer updated with {len(X_batch)} new results from iteration {i+1}.")
+            for point_idx, result in enumerate(results):
+                X_batch.append(result.point)
+                y_batch.append(-result.score) # skopt minimizes, so we pass the negative score
+                print(f"Candidate {point_idx+1} ({result.iter_id}) evaluation complete. Score: {result.score:.4f}"
+                      + (" (physics estimate)" if result.fidelity == "physics" else ""))
+                print(result.evaluated_df[[c for c in log_cols if c in result.evaluated_df.columns]].to_string())
+
+            # After processing all points in the batch, "tell" the optimizer all results at once
+            if X_batch:
+                with profiler.stage("tell", items=len(X_batch)):
+                    optimizer.tell(X_batch, y_batch)
+            print(f"\nOptimizer updated with {len(X_batch)} new results from iteration {i+1}.")
+            ckpt.iterations_done = i + 1
+            ckpt.pending = None
+            state.best_history.append(-min(optimizer.yi))
+            state.evaluations += sum(r.fidelity == "agent" for r in results)
+            state.iteration_s.append(time.monotonic() - iteration_start)
+            state.elapsed_s = elapsed_before + time.monotonic() - session_start
+            checkpoint()
 
     # Find the best result from the optimization history
     best_score_index = np.argmin(optimizer.yi)
@@ -404,79 +1033,114 @@ def run_optimization_loop(
     best_params_dict = dict(zip([d.name for d in bo_search_space], best_params))
 
     # --- Generate and save plots ---
-    print("\nGenerating optimization plots...")
-
-    # 1. Convergence Plot: Shows the best score found over time.
-    # The first N points are from the initial DOE, the rest are from active optimization.
-    n_initial = len(X_initial)
-    initial_best_score = np.min(optimizer.yi[:n_initial])
-    optimization_scores = optimizer.yi[n_initial:]
+    with profiler.stage("plotting"):
+        print("\nGenerating optimization plots...")
+
+        # 1. Convergence Plot: Shows the best score found over time.
+        # The first N points are from the initial DOE, the rest are from active optimization.
+        n_initial = ckpt.n_initial
+        initial_best_score = np.min(optimizer.yi[:n_initial])
+        optimization_scores = optimizer.yi[n_initial:]
     
-    # We plot the negative of the internal score (since skopt minimizes), so higher is better.
-    # Start the plot with the best score from the initial DOE points.
-    convergence_data = -np.minimum.accumulate(np.insert(optimization_scores, 0, initial_best_score))
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(range(0, len(convergence_data)), convergence_data, marker='o', linestyle='-')
-    plt.title(f"Convergence Plot - Run {run_timestamp}")
-    plt.xlabel("Active Optimization Iteration (0 = Best of Initial DOE)")
-    plt.ylabel("Best Score Found So Far")
-    plt.grid(True)
-    convergence_plot_path = os.path.join(plots_dir, f"convergence_{run_timestamp}.png")
-    plt.savefig(convergence_plot_path)
-    plt.close()
-    print(f"Saved convergence plot to {convergence_plot_path}")
-
-    # 2. Partial Dependence Plots (shows objective function and uncertainty)
-    _ = plot_objective(optimizer.get_result(), dimensions=search_space_names)
-    pdp_plot_path = os.path.join(plots_dir, f"partial_dependence_{run_timestamp}.png")
-    plt.savefig(pdp_plot_path)
-    plt.close()
-    print(f"Saved partial dependence plot to {pdp_plot_path}")
+        # We plot the negative of the internal score (since skopt minimizes), so higher is better.
+        # Start the plot with the best score from the initial DOE points.
+        convergence_data = -np.minimum.accumulate(np.insert(optimization_scores, 0, initial_best_score))
+
+        plt.figure(figsize=(10, 6))
+        plt.plot(range(0, len(convergence_data)), convergence_data, marker='o', linestyle='-')
+        plt.title(f"Convergence Plot - Run {run_timestamp}")
+        plt.xlabel("Active Optimization Iteration (0 = Best of Initial DOE)")
+        plt.ylabel("Best Score Found So Far")
+        plt.grid(True)
+        convergence_plot_path = os.path.join(plots_dir, f"convergence_{run_timestamp}.png")
+        plt.savefig(convergence_plot_path)
+        plt.close()
+        print(f"Saved convergence plot to {convergence_plot_path}")
+
+        # 2. Partial Dependence Plots (shows objective function and uncertainty)
+        # A run stopped early may end before the optimizer has fitted its first surrogate.
+        if optimizer.models:
+            # Partial dependence costs grow with the number of pairs; the full space plots the default levers.
+            plot_names = search_space_names[:PDP_MAX_DIMS]
+            _ = plot_objective(optimizer.get_result(), dimensions=plot_names, plot_dims=plot_names)
+            pdp_plot_path = os.path.join(plots_dir, f"partial_dependence_{run_timestamp}.png")
+            plt.savefig(pdp_plot_path)
+            plt.close()
+            print(f"Saved partial dependence plot to {pdp_plot_path}")
+        else:
+            print("No surrogate fitted yet; skipping the partial dependence plot.")
 
     print("\nOptimization loop finished.")
     print(f"Best score found: {-best_score:.4f}")
     print(f"Best formulation parameters: {best_params_dict}")
 
     # Save a summary of the optimization run
+    evaluation_cache = default_evaluation_cache()
     summary = {
         "best_score": -best_score,
         "best_parameters": best_params_dict,
         "search_space": [str(d) for d in bo_search_space],
-        "max_iterations": max_iterations
+        "max_iterations": max_iterations,
+        "checkpoint": str(ckpt_path),
+        "surrogate": ckpt.config.get("surrogate", "gp"),
+        "multi_fidelity": ckpt.fidelity.stats() if ckpt.fidelity is not None else None,
+        "feasibility": asdict(materializer.stats),
+        "pool": pool.stats() if pool is not None else None,
+        "trust_region": optimizer.stats() if isinstance(optimizer, TrustRegionOptimizer) else None,
+        "async": ({"asked": ckpt.async_state.asked, "told": ckpt.async_state.told}
+                  if ckpt.async_state is not None else None),
+        "stopping": {
+            "rule": asdict(stopping),
+            "stopped_early": state.reason,
+            "iterations_run": ckpt.iterations_done,
+            "elapsed_s": round(state.elapsed_s, 2),
+            "agent_evaluations": state.evaluations,
+            "last_max_ei": state.last_max_ei,
+            "best_history": state.best_history,
+        },
+        "model_hash": predictor.model.content_hash,
+        "prediction_cache": prediction_cache.stats() if prediction_cache else None,
+        "evaluation_cache": evaluation_cache.stats() if evaluation_cache else None,
     }
-    summary_path = os.path.join(summaries_dir, f"summary_{run_timestamp}.json")
-    with open(summary_path, 'w') as f:
-        json.dump(summary, f, indent=2)
-    print(f"Saved optimization summary to {summary_path}")
 
     # --- Run final analysis and plotting ---
     print("\n--- Running Final Analysis ---")
-    try:
-        # Construct glob patterns for all artifacts from this run
-        pred_glob = os.path.join(compounded_dir, f"*{run_timestamp}*prediction.csv")
-        scores_glob = os.path.join(compounded_dir, f"*{run_timestamp}*_agent/row_*/scores.json")
-        process_glob = os.path.join(compounded_dir, f"*{run_timestamp}*process*.json")
-
-        # The analysis script expects a flat dictionary of targets
-        targets_flat = {k: v.get('value') for k, v in targets_constraints.items() if isinstance(v, dict)}
-
-        tidy_df = build_tidy(
-            pred_glob=pred_glob,
-            scores_glob=scores_glob,
-            process_glob=process_glob,
-            targets=targets_flat,
-            baseline_model=None # Not using baseline model in this automated run
-        )
+    with profiler.stage("tidy"):
+        try:
+            # Construct glob patterns for all artifacts from this run
+            pred_glob = os.path.join(compounded_dir, f"*{run_timestamp}*prediction.csv")
+            scores_glob = os.path.join(compounded_dir, f"*{run_timestamp}*_agent/row_*/scores.json")
+            process_glob = os.path.join(compounded_dir, f"*{run_timestamp}*process*.json")
+
+            # The analysis script expects a flat dictionary of targets
+            targets_flat = {k: v.get('value') for k, v in targets_constraints.items() if isinstance(v, dict)}
+
+            tidy_df = build_tidy(
+                pred_glob=pred_glob,
+                scores_glob=scores_glob,
+                process_glob=process_glob,
+                targets=targets_flat,
+                baseline_model=None, # Not using baseline model in this automated run
+                predictions=None if save_bridge_artifacts else pd.concat([pd.DataFrame()] + tidy_predictions,
+                                                                          ignore_index=True),
+            )
 
-        if not tidy_df.empty:
-            tidy_out_path = os.path.join(summaries_dir, f"tidy_results_{run_timestamp}.csv")
-            tidy_df.to_csv(tidy_out_path, index=False)
-            print(f"Saved tidy results to {tidy_out_path}")
-            make_plots(tidy_df, Path(plots_dir))
-            print(f"Saved analysis plots to {plots_dir}")
-    except Exception as e:
-        print(f"An error occurred during final analysis: {e}")
+            if not tidy_df.empty:
+                tidy_out_path = os.path.join(summaries_dir, f"tidy_results_{run_timestamp}.csv")
+                tidy_df.to_csv(tidy_out_path, index=False)
+                print(f"Saved tidy results to {tidy_out_path}")
+                make_plots(tidy_df, Path(plots_dir))
+                print(f"Saved analysis plots to {plots_dir}")
+        except Exception as e:
+            print(f"An error occurred during final analysis: {e}")
+
+    # The summary goes last so that it has the timings of every stage.
+    summary["stages"] = profiler.report()
+    summary_path = os.path.join(summaries_dir, f"summary_{run_timestamp}.json")
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Saved optimization summary to {summary_path}")
+    return summary
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run the main optimization loop.")
@@ -487,8 +1151,59 @@ if __name__ == '__main__':
     parser.add_argument("--goals", type=str, default=None, help="Path to a goals JSON file (e.g., for compostable constraints). Overrides --focus.")
     parser.add_argument("--explore-ratio", type=float, default=0.25, help="Fraction of candidates to generate via random exploration (0.0 to 1.0).")
     parser.add_argument("--spec-file", type=str, default=None, help="Path to a single spec sheet to define the optimization target.")
+    parser.add_argument("--bridge-artifacts", action="store_true", help="Write per-candidate bridge input/process/prediction files for traceability.")
+    parser.add_argument("--no-prediction-cache", action="store_true", help="Disable the on-disk property prediction cache.")
+    parser.add_argument("--workers", type=int, default=1, help="Candidates evaluated concurrently within each iteration.")
+    parser.add_argument("--async", dest="async_evaluations", action="store_true",
+                        help="Keep --workers candidates in flight: tell each result as it arrives and ask a replacement.")
+    parser.add_argument("--surrogate", type=str, default="gp", choices=SURROGATES,
+                        help="Optimizer surrogate model: exact GP, random forest, extra trees, quantile GBRT or sparse GP.")
+    parser.add_argument("--batch-size", type=int, default=4, help="Candidates proposed per iteration.")
+    parser.add_argument("--batch-strategy", type=str, default="ask", choices=("ask",) + BATCH_STRATEGIES,
+                        help="How exploit candidates are chosen: skopt's ask() or a vectorized batch acquisition.")
+    parser.add_argument("--multi-fidelity", action="store_true",
+                        help="Screen candidates with the physics target-distance score; only promising or uncertain ones go to the agent.")
+    parser.add_argument("--mf-calibration", type=int, default=8,
+                        help="With --multi-fidelity, initial DOE candidates always sent to the agent to calibrate the screen.")
+    parser.add_argument("--mf-kappa", type=float, default=1.0,
+                        help="With --multi-fidelity, optimism (in residual sigmas) of the screen; larger sends more to the agent.")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="Stop when the best score improves by less than --min-improvement over this many iterations.")
+    parser.add_argument("--min-improvement", type=float, default=1e-3, help="Improvement threshold for --patience.")
+    parser.add_argument("--ei-floor", type=float, default=None,
+                        help="Stop when the surrogate's largest expected improvement falls below this score.")
+    parser.add_argument("--max-minutes", type=float, default=None, help="Wall-clock budget for the run.")
+    parser.add_argument("--max-evaluations", type=int, default=None,
+                        help="Budget of agent evaluations for the run (initial DOE included).")
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="Pick each batch from a pool of this many feasible DOE formulations (e.g. 100000) instead of asking the optimizer.")
+    parser.add_argument("--full-space", action="store_true",
+                        help="Also optimize talc, INTUNE, stabilizer and base B wt%%, the nucleator and more process levers (15 dimensions).")
+    parser.add_argument("--trust-region", action="store_true",
+                        help="Optimize inside a TuRBO trust region with a local surrogate; recommended with --full-space.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the DOE, the optimizer and the explore draws (default: derived from the run timestamp).")
+    parser.add_argument("--resume", type=str, default=None, metavar="RUN_ID",
+                        help="Continue the checkpointed run RUN_ID (e.g. 20250101_120000) with its original settings.")
+    parser.add_argument("--extend", type=int, default=0, help="With --resume, add this many iterations to the run's budget.")
+    parser.add_argument("--evaluator", type=str, default="agent", choices=EVALUATORS,
+                        help="Candidate scoring backend: the evaluator agent, or the deterministic local scorer (no LLM calls).")
+    parser.add_argument("--local-fallback", action="store_true",
+                        help="Score candidates the agent fails on with the local scorer instead of a zero weight.")
     args = parser.parse_args()
+    if args.extend and not args.resume:
+        parser.error("--extend requires --resume")
     
     goals_dict = json.loads(Path(args.goals).read_text()) if args.goals else None
     
-    run_optimization_loop(max_iterations=args.iterations, n_initial_points=args.initial_points, focus_mode=args.focus, goals=goals_dict, explore_ratio=args.explore_ratio, spec_file=args.spec_file)
\ No newline at end of file
+    run_optimization_loop(max_iterations=args.iterations, n_initial_points=args.initial_points, focus_mode=args.focus, goals=goals_dict, explore_ratio=args.explore_ratio, spec_file=args.spec_file,
+                          save_bridge_artifacts=args.bridge_artifacts, use_prediction_cache=not args.no_prediction_cache,
+                          candidate_workers=args.workers, resume=args.resume, extend=args.extend,
+                          surrogate=args.surrogate, candidates_per_iteration=args.batch_size,
+                          batch_strategy=args.batch_strategy, multi_fidelity=args.multi_fidelity,
+                          mf_calibration_points=args.mf_calibration, mf_kappa=args.mf_kappa,
+                          stopping=stopping_rule_from_args(args), seed=args.seed,
+                          pool_size=args.pool_size, trust_region=args.trust_region,
+                          full_search_space=args.full_space, async_evaluations=args.async_evaluations,
+                          evaluator=(make_evaluator(args.evaluator, local_fallback=args.local_fallback)
+                                     if args.evaluator != "agent" or args.local_fallback else None))
\ No newline at end of file
@@ -0,0 +1,173 @@
+# src/multi_fidelity.py
+"""
+Multi-fidelity screening for the closed loop.
+
+Two fidelities score a candidate:
+
+- low:  `physics_score`, a deterministic target-distance score of the hybrid model's predictions
+        against `targets_constraints` (free once the candidate has been predicted)
+- high: the evaluator agent's `recommended_bo_weight` (one LLM call per candidate)
+
+`FidelityScreen` links the two with the autoregressive model high ≈ a + rho * low + delta, fitted
+by least squares on every candidate that has both scores (the residual spread sigma stands in for
+delta). Once the link is calibrated, only candidates that are *promising* (a + rho * low plus
+kappa * sigma can still reach the best agent score) or *uncertain* (low score outside the range the
+link was fitted on) go to the agent. The rest are told to the optimizer at their estimate
+a + rho * low, which is below the incumbent by construction, so the best reported score is always
+an agent score.
+
+Spec targets use the canonical ontology keys (configs/property_ontology.json) while the hybrid
+model predicts its own columns; `PREDICTION_ALIASES` bridges the two.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Canonical target key -> (prediction column, factor taking the prediction into the target's unit).
+# Notched Izod: kJ/m² × 3.2 mm (ASTM D256 specimen) ≈ J/m; the model's -20 °C stands in for -18 °C.
+PREDICTION_ALIASES: Dict[str, Tuple[str, float]] = {
+    "MFI_g_10min_230C_2p16kg": ("MFI_g10min", 1.0),
+    "melt_flow_rate_MFR_g_10min": ("MFI_g10min", 1.0),
+    "tensile_strength_yield_MPa": ("sigma_y_MPa", 1.0),
+    "flexural_modulus_GPa": ("E_GPa", 1.0),
+    "HDT_C_66psi": ("HDT_C", 1.0),
+    "density_g_cc": ("rho_gcc", 1.0),
+    "elongation_yield_pct": ("eps_y_pct", 1.0),
+    "gardner_impact_minus29C_J": ("Gardner_J", 1.0),
+    "izod_impact_notched_23C_J_m": ("Izod_23_kJm2", 3.2),
+    "izod_impact_notched_minus18C_J_m": ("Izod_m20_kJm2", 3.2),
+}
+
+# Targets without a tolerance are scored against a ±10% band.
+DEFAULT_RELATIVE_TOL = 0.10
+
+
+def scorable_targets(targets_constraints: Dict[str, Any], columns: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """
+    The targets the predictions can be scored against: {key: {column, factor, value, scale, weight}}.
+    A target key that is itself a prediction column is used as is.
+    """
+    columns = set(columns)
+    out: Dict[str, Dict[str, float]] = {}
+    for key, spec in (targets_constraints or {}).items():
+        if not isinstance(spec, dict) or spec.get("value") is None:
+            continue
+        column, factor = (key, 1.0) if key in columns else PREDICTION_ALIASES.get(key, (None, 1.0))
+        if column not in columns:
+            continue
+        value = float(spec["value"])
+        tol = spec.get("tol")
+        scale = float(tol) if tol else DEFAULT_RELATIVE_TOL * abs(value) or 1.0
+        weight = spec.get("weight")
+        out[key] = {"column": column, "factor": factor, "value": value, "scale": scale,
+                    "weight": 1.0 if weight is None else float(weight)}
+    return out
+
+
+def physics_score(predictions_df: pd.DataFrame, targets_constraints: Dict[str, Any]) -> np.ndarray:
+    """
+    Weighted mean Gaussian desirability exp(-((pred - target) / scale)² / 2) per row, in [0, 1]
+    like the agent's weight. Missing predictions count as 0. All rows score NaN when no target can
+    be scored against the prediction columns.
+    """
+    targets = scorable_targets(targets_constraints, predictions_df.columns)
+    if not targets:
+        return np.full(len(predictions_df), np.nan)
+    total = np.zeros(len(predictions_df))
+    weights = 0.0
+    for t in targets.values():
+        pred = pd.to_numeric(predictions_df[t["column"]], errors="coerce").to_numpy(dtype=float) * t["factor"]
+        desirability = np.exp(-0.5 * ((pred - t["value"]) / t["scale"]) ** 2)
+        total += t["weight"] * np.nan_to_num(desirability, nan=0.0)
+        weights += t["weight"]
+    return total / weights if weights > 0 else np.full(len(predictions_df), np.nan)
+
+
+@dataclass
+class FidelityScreen:
+    """
+    Decides which candidates the agent sees, from paired (physics score, agent score) observations.
+    Until min_pairs pairs exist, or while the two scores correlate below min_correlation, every
+    candidate goes to the agent.
+    """
+    kappa: float = 1.0
+    min_pairs: int = 6
+    min_correlation: float = 0.3
+    extrapolation: float = 0.1
+    low: List[float] = field(default_factory=list)
+    high: List[float] = field(default_factory=list)
+    n_agent: int = 0
+    n_screened: int = 0
+
+    def add(self, low: Sequence[float], high: Sequence[float]) -> None:
+        for lo, hi in zip(low, high):
+            if np.isfinite(lo) and np.isfinite(hi):
+                self.low.append(float(lo))
+                self.high.append(float(hi))
+
+    def fit(self) -> Optional[Tuple[float, float, float]]:
+        """(a, rho, sigma) of high ≈ a + rho * low, or None while the link is not trusted."""
+        if len(self.low) < self.min_pairs:
+            return None
+        low, high = np.asarray(self.low), np.asarray(self.high)
+        if np.std(low) < 1e-9 or np.std(high) < 1e-9:
+            return None
+        if np.corrcoef(low, high)[0, 1] < self.min_correlation:
+            return None
+        rho, a = np.polyfit(low, high, 1)
+        resid = high - (a + rho * low)
+        sigma = float(np.sqrt(np.sum(resid ** 2) / max(len(low) - 2, 1)))
+        return float(a), float(rho), sigma
+
+    def estimate(self, low: Sequence[float]) -> np.ndarray:
+        """Agent-score estimates for low-fidelity scores (only meaningful once fit() is not None)."""
+        fitted = self.fit()
+        if fitted is None:
+            a, rho = (float(np.mean(self.high)) if self.high else 0.0), 0.0
+        else:
+            a, rho, _ = fitted
+        return np.clip(a + rho * np.asarray(low, dtype=float), 0.0, 1.0)
+
+    def select(self, low: Sequence[float], min_agent: int = 1) -> np.ndarray:
+        """Boolean mask of the candidates to send to the agent (at least min_agent of them)."""
+        low = np.asarray(low, dtype=float)
+        fitted = self.fit()
+        if fitted is None:
+            return np.ones(len(low), dtype=bool)
+        a, rho, sigma = fitted
+        est = a + rho * low
+        promising = est + self.kappa * sigma >= max(self.high)
+        lo, hi = min(self.low), max(self.low)
+        margin = self.extrapolation * (hi - lo)
+        uncertain = ~np.isfinite(low) | (low < lo - margin) | (low > hi + margin)
+        mask = promising | uncertain
+        if mask.sum() < min(min_agent, len(low)):
+            mask[np.argsort(-np.nan_to_num(est, nan=-np.inf))[:min_agent]] = True
+        return mask
+
+    def stats(self) -> Dict[str, Any]:
+        fitted = self.fit()
+        total = self.n_agent + self.n_screened
+        return {
+            "agent_calls": self.n_agent,
+            "screened": self.n_screened,
+            "agent_fraction": self.n_agent / total if total else None,
+            "pairs": len(self.low),
+            "link": dict(zip(("a", "rho", "sigma"), fitted)) if fitted else None,
+        }
+
+
+def calibration_subset(low: np.ndarray, n: int, rng: np.random.RandomState) -> np.ndarray:
+    """
+    Indices of n initial-DOE rows for the agent: the best half by physics score plus a random
+    spread of the rest, so the link is fitted over the whole range of low-fidelity scores.
+    """
+    order = np.argsort(-np.nan_to_num(low, nan=-np.inf))
+    n = min(n, len(low))
+    top = order[: (n + 1) // 2]
+    rest = order[(n + 1) // 2:]
+    spread = rng.choice(rest, size=n - len(top), replace=False) if n > len(top) else np.array([], dtype=int)
+    return np.sort(np.concatenate([top, spread]).astype(int))
@@ -2,12 +2,13 @@
 from __future__ import annotations
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import os
 import shutil
 
 from src.main_orchestrator import run_optimization_loop
+from src.stopping import StoppingRule
 from src.utils.io import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -19,7 +20,8 @@ def _run_single_optimization_wrapper(
     initial_points: int,
     goals: Dict[str, Any],
     focus: str,
-    explore_ratio: float
+    explore_ratio: float,
+    stopping: Optional[StoppingRule] = None
 ):
     """
     A wrapper to call the main optimization loop and redirect its output
@@ -33,7 +35,8 @@ def _run_single_optimization_wrapper(
         focus_mode=focus,
         goals=goals,
         explore_ratio=explore_ratio,
-        spec_file=str(spec_file)
+        spec_file=str(spec_file),
+        stopping=stopping
     )
 
 def run_optimize_batch(
@@ -45,13 +48,18 @@ def run_optimize_batch(
     focus: str,
     explore_ratio: float,
     workers: int,
-    log_file: Path | None = None
+    log_file: Path | None = None,
+    stopping: Optional[StoppingRule] = None
 ) -> Dict[str, int]:
     """
     Drives the batch optimization process for a directory of spec sheets.
+    stopping applies to every spec's run separately (each has its own window and budgets).
     """
     spec_dir, out_dir = Path(spec_dir), Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
+    # One prediction cache for the whole batch: specs share an ingredient space, so most
+    # recipes/process settings recur across workers.
+    os.environ.setdefault("PREDICTION_CACHE_PATH", str(out_dir / "prediction_cache.sqlite"))
 
     if log_file:
         setup_logging(str(log_file), name=__name__)
@@ -67,7 +75,7 @@ def run_optimize_batch(
     results = {"processed": 0, "failed": 0}
     with ProcessPoolExecutor(max_workers=workers) as executor:
         futs = {
-            executor.submit(_run_single_optimization_wrapper, spec_file, spec_out_dir, iterations, initial_points, goals, focus, explore_ratio): spec_file
+            executor.submit(_run_single_optimization_wrapper, spec_file, spec_out_dir, iterations, initial_points, goals, focus, explore_ratio, stopping): spec_file
             for spec_file, spec_out_dir in tasks
         }
 
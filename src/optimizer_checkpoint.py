@@ -0,0 +1,79 @@
+# src/optimizer_checkpoint.py
+"""
+Checkpoints for the closed-loop optimization run.
+
+After every `tell` the orchestrator saves a `RunCheckpoint`: the skopt Optimizer itself (Xi, yi,
+the fitted surrogate and its RNG), numpy's global RNG state (used for the explore draws), the
+targets, the one-row formulation template and the iteration counters. A checkpoint also records
+the points of an iteration that was asked but not yet told, so a resumed run re-uses exactly those
+points (and any candidate evaluations already on disk) instead of asking again. Multi-fidelity
+runs also keep their FidelityScreen (the physics/agent score pairs) in `fidelity`, and every run
+its StoppingState (best-score history and budgets spent) in `stopping`. Asynchronous runs keep
+their in-flight points and counters (src/async_bo.py's AsyncState) in `async_state`.
+
+Checkpoints live at <RESULTS_DIR>/checkpoints/run_<run_id>.pkl and are written atomically.
+"""
+from __future__ import annotations
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class RunCheckpoint:
+    run_id: str
+    optimizer: Any
+    config: Dict[str, Any]
+    targets_constraints: Dict[str, Any]
+    template_df: pd.DataFrame
+    n_initial: int
+    max_iterations: int
+    iterations_done: int = 0
+    pending: Optional[List[List[float]]] = None
+    np_random_state: Optional[tuple] = None
+    fidelity: Optional[Any] = None
+    stopping: Optional[Any] = None
+    async_state: Optional[Any] = None
+    version: int = CHECKPOINT_VERSION
+
+    @property
+    def finished(self) -> bool:
+        in_flight = self.async_state is not None and bool(self.async_state.in_flight)
+        return self.pending is None and not in_flight and self.iterations_done >= self.max_iterations
+
+
+def checkpoint_path(results_dir: Union[str, Path], run_id: str) -> Path:
+    return Path(results_dir) / "checkpoints" / f"run_{run_id}.pkl"
+
+
+def save_checkpoint(ckpt: RunCheckpoint, path: Union[str, Path]) -> Path:
+    """Captures numpy's RNG state and writes the checkpoint via a temp file + rename."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ckpt.np_random_state = np.random.get_state()
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(ckpt, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_checkpoint(path: Union[str, Path], restore_rng: bool = True) -> RunCheckpoint:
+    """Loads a checkpoint and, unless restore_rng=False, puts numpy's global RNG back where it was."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No checkpoint at {path}")
+    with open(path, "rb") as f:
+        ckpt = pickle.load(f)
+    if not isinstance(ckpt, RunCheckpoint) or ckpt.version != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} run checkpoint")
+    if restore_rng and ckpt.np_random_state is not None:
+        np.random.set_state(ckpt.np_random_state)
+    return ckpt
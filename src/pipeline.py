@@ -15,7 +15,8 @@ from .prefilter import prefilter
 
 # --- Import the core physics model from the bridge script ---
 # This allows us to predict properties for in-memory candidates without calling a subprocess.
-from .bridge_formulations_to_properties import compute_row_properties, load_ingredient_catalog
+from .bridge_formulations_to_properties import with_process_defaults
+from .property_predictor import get_default_predictor
 from .formulation_doe_generator_V1 import generate_formulation_doe
 from .agent_eval_helpers import evaluate_with_agent, build_targets_constraints
 
@@ -84,15 +85,12 @@ def evaluate_and_rank(candidates: List[Dict[str, Any]],
     formulations_df = pd.DataFrame([c.get("formulation", {}) for c in candidates])
     
     try:
-        model_path = Path(__file__).parent.parent / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"
-        tse_model = read_json(model_path)
-        lib_path = Path(__file__).parent.parent / "data/processed/ingredient_library.json"
-        ing_lib = read_json(lib_path)
-        catalog = load_ingredient_catalog(ing_lib)
-        process_cfg = {"Torque_Nm": 100.0, "N_rps": 5.0, "Q_kgh": 5.0, "Tm_C": 220.0}
-
-        predicted_props_list = [compute_row_properties(row, tse_model, catalog, process_cfg) for _, row in formulations_df.iterrows()]
-        predictions_df = pd.concat([formulations_df, pd.DataFrame(predicted_props_list)], axis=1)
+        # The model and catalog are loaded once per process; repeated recipes hit the prediction cache.
+        predictor = get_default_predictor()
+        process_cfg = with_process_defaults({"Torque_Nm": 100.0, "N_rps": 5.0, "Q_kgh": 5.0, "Tm_C": 220.0})
+
+        predicted_props_df = predictor.predict_props(formulations_df, process_cfg)
+        predictions_df = pd.concat([formulations_df, predicted_props_df], axis=1)
 
     except FileNotFoundError:
         return {"summary": {"error": "Required model or library files not found."}, "topk": []}
@@ -0,0 +1,228 @@
+# src/prediction_cache.py
+"""
+Content-addressed cache for bridge property predictions.
+
+A row's key is the sha256 of its canonicalized recipe (`*_wtpct`, `*_name`, `nucleator_ppm`),
+the effective process values the model reads for that row, the HybridModel content hash and a
+hash of the ingredient catalog. Lookups go through an in-memory LRU first and an optional
+SQLite store second; only the misses are sent to the vectorized model, in one batch.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.bridge_formulations_to_properties import (
+    HybridModel, PROP_FIELDS, as_hybrid_model, predict_properties_batch, _process_col, safe_float,
+)
+from src.sqlite_store import SQLiteStore
+
+# Process variables the model reads, with the defaults prepare_batch_inputs falls back to
+# (None = required, no default; NaN = optional, resolved by the model).
+PROCESS_KEYS = {"Torque_Nm": None, "N_rps": None, "Q_kgh": None, "Tm_C": 220.0,
+                "K_knead": 5.0, "pvac_bar_abs": 0.1,
+                "tau_s": float("nan"), "D_mm": float("nan"), "L_over_D": float("nan"), "pb_bar": float("nan")}
+
+def _canon_num(x: Any) -> Optional[str]:
+    """12 significant digits, so float noise from re-balancing does not split cache entries."""
+    v = safe_float(x, float("nan"))
+    return None if math.isnan(v) else format(v, ".12g")
+
+def catalog_hash(catalog: Dict[str, Dict[str, Any]]) -> str:
+    canonical = json.dumps(catalog, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def row_keys(df: pd.DataFrame, namespace: str, process: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    One cache key per row. Empty names and zero/blank amounts are dropped, because the model
+    treats them the same as a missing column. Raises KeyError like the model does when a
+    required process variable is missing.
+    """
+    recipe_cols = sorted(c for c in df.columns if c.endswith(("_wtpct", "_name")) or c == "nucleator_ppm")
+    proc = {k: _process_col(df, process, k, d) for k, d in PROCESS_KEYS.items()}
+    nuc_default = _canon_num(process.get("nucleator_ppm", 0)) if process else "0"
+
+    keys = []
+    records = df[recipe_cols].to_dict(orient="records") if recipe_cols else [{}] * len(df)
+    for i, rec in enumerate(records):
+        recipe = {}
+        for c, v in rec.items():
+            if c.endswith("_name"):
+                name = "" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v)
+                if name:
+                    recipe[c] = name
+            else:
+                num = _canon_num(v)
+                if num not in (None, "0"):
+                    recipe[c] = num
+        if "nucleator_ppm" not in df.columns and nuc_default not in (None, "0"):
+            recipe["nucleator_ppm"] = nuc_default
+        payload = {
+            "ns": namespace,
+            "recipe": recipe,
+            "process": {k: _canon_num(v[i]) for k, v in proc.items()},
+        }
+        keys.append(hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest())
+    return keys
+
+
+class PredictionCache:
+    """
+    Two-level (memory LRU + SQLite) cache of per-row property predictions.
+
+    path=None keeps the cache in memory only. The SQLite store (src/sqlite_store.py) is bounded by
+    max_disk_entries and by max_disk_bytes of used database pages (None: no byte ceiling); the
+    least recently used entries are evicted first. Safe to share between threads; separate processes
+    can share one SQLite file.
+    """
+
+    def __init__(self,
+                 path: Optional[Union[str, Path]] = None,
+                 max_memory_items: int = 50_000,
+                 max_disk_entries: int = 2_000_000,
+                 max_disk_bytes: Optional[int] = 1 << 30):
+        self.path = str(path) if path else None
+        self.max_memory_items = max_memory_items
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._mem: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store: Optional[SQLiteStore] = None
+        self._catalog_hashes: Dict[int, tuple] = {}  # id -> (catalog, hash); holding the ref keeps the id valid
+        self.hits_memory = self.hits_disk = self.misses = self.evictions = 0
+        if self.path:
+            self._store = SQLiteStore(self.path, "predictions", max_entries=max_disk_entries,
+                                      max_bytes=max_disk_bytes)
+
+    # ---------- Lookup / store ----------
+
+    def _mem_get(self, key: str) -> Optional[Dict[str, float]]:
+        props = self._mem.get(key)
+        if props is not None:
+            self._mem.move_to_end(key)
+        return props
+
+    def _mem_put(self, key: str, props: Dict[str, float]) -> None:
+        self._mem[key] = props
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory_items:
+            self._mem.popitem(last=False)
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, Dict[str, float]]:
+        if self._store is None or not keys:
+            return {}
+        return self._store.get_many(keys)[0]
+
+    def _disk_put_many(self, items: Dict[str, Dict[str, float]]) -> None:
+        if self._store is not None:
+            self.evictions += self._store.put_many(items)
+
+    # ---------- Prediction ----------
+
+    def namespace(self, model: HybridModel, catalog: Dict[str, Dict[str, Any]]) -> str:
+        cid = id(catalog)
+        if cid not in self._catalog_hashes:
+            self._catalog_hashes[cid] = (catalog, catalog_hash(catalog))
+        return f"{model.content_hash}:{self._catalog_hashes[cid][1]}"
+
+    def predict(self,
+                df: pd.DataFrame,
+                model: Union[Dict[str, Any], HybridModel],
+                catalog: Dict[str, Dict[str, Any]],
+                process: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Drop-in replacement for predict_properties_batch that serves repeated rows from the cache."""
+        model = as_hybrid_model(model)
+        if len(df) == 0:
+            return predict_properties_batch(df, model, catalog, process)
+        keys = row_keys(df, self.namespace(model, catalog), process)
+
+        with self._lock:
+            results: Dict[str, Dict[str, float]] = {}
+            for k in set(keys):
+                props = self._mem_get(k)
+                if props is not None:
+                    results[k] = props
+            disk = self._disk_get_many([k for k in set(keys) if k not in results])
+            for k, props in disk.items():
+                self._mem_put(k, props)
+            results.update(disk)
+
+            n_mem = sum(1 for k in keys if k in results and k not in disk)
+            n_disk = sum(1 for k in keys if k in disk)
+            self.hits_memory += n_mem
+            self.hits_disk += n_disk
+            self.misses += len(keys) - n_mem - n_disk
+
+        miss_pos = [i for i, k in enumerate(keys) if k not in results]
+        if miss_pos:
+            # Duplicate rows within the batch are predicted once.
+            first_pos: Dict[str, int] = {}
+            for i in miss_pos:
+                first_pos.setdefault(keys[i], i)
+            pos = list(first_pos.values())
+            sub = df.iloc[pos]
+            sub_process = process
+            if process is not None:
+                # Per-row process sequences have to follow the row subset.
+                sub_process = {k: (np.asarray(v)[pos] if np.ndim(v) else v) for k, v in process.items()}
+            fresh = predict_properties_batch(sub, model, catalog, sub_process)
+            new_items = {
+                k: {f: (None if pd.isna(v) else float(v)) for f, v in rec.items()}
+                for k, rec in zip(first_pos, fresh.to_dict(orient="records"))
+            }
+            with self._lock:
+                for k, props in new_items.items():
+                    self._mem_put(k, props)
+                self._disk_put_many(new_items)
+            results.update(new_items)
+
+        out = pd.DataFrame([results[k] for k in keys], index=df.index, columns=PROP_FIELDS)
+        return out.astype(float)
+
+    # ---------- Housekeeping ----------
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        disk_entries = disk_bytes = None
+        if self._store is not None:
+            with self._lock:
+                disk_entries, disk_bytes = self._store.count(), self._store.used_bytes()
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else None,
+            "memory_entries": len(self._mem),
+            "disk_entries": disk_entries,
+            "disk_bytes": disk_bytes,
+            "evictions": self.evictions,
+            "path": self.path,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._store is not None:
+                self._store.clear()
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+@lru_cache(maxsize=None)
+def get_default_cache() -> PredictionCache:
+    """
+    Process-wide cache. Persists to PREDICTION_CACHE_PATH when that is set, otherwise memory only.
+    """
+    return PredictionCache(os.environ.get("PREDICTION_CACHE_PATH") or None)
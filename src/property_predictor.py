@@ -0,0 +1,133 @@
+# src/property_predictor.py
+"""
+In-process, warm property prediction.
+
+`PropertyPredictor` loads the TSE hybrid model and the ingredient catalog once and then
+predicts properties for DataFrames or record batches directly, without starting a new
+interpreter or round-tripping through CSV/JSON. Traceability artifacts (the input CSV,
+the process JSON and the props CSV + bridge metadata) are only written when paths are given.
+An optional PredictionCache serves recipes/process settings that were already predicted.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+import pandas as pd
+
+from src.bridge_formulations_to_properties import (
+    DEFAULT_WRT, HybridModel, load_ingredient_catalog, predict_and_merge, predict_jacobian,
+    predict_properties_batch, read_json,
+)
+from src.prediction_cache import PredictionCache, get_default_cache
+
+project_root = Path(__file__).resolve().parents[1]
+DEFAULT_MODEL_PATH = project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"
+DEFAULT_LIBRARY_PATH = project_root / "data/processed/ingredient_library.json"
+
+Formulations = Union[pd.DataFrame, Iterable[Mapping[str, Any]]]
+
+
+class PropertyPredictor:
+    """Holds the model and catalog in memory for the lifetime of a run."""
+
+    def __init__(self,
+                 model_path: Union[str, Path] = DEFAULT_MODEL_PATH,
+                 library_path: Union[str, Path] = DEFAULT_LIBRARY_PATH,
+                 cache: Optional[PredictionCache] = None):
+        self.model_path = str(model_path)
+        self.library_path = str(library_path)
+        self.model = HybridModel.from_json(self.model_path)
+        self.catalog = load_ingredient_catalog(read_json(self.library_path))
+        self.cache = cache
+        self.n_calls = 0
+        self.n_rows = 0
+
+    def predict(self,
+                formulations: Formulations,
+                process: Optional[Dict[str, Any]] = None,
+                input_path: Optional[Union[str, Path]] = None,
+                output_path: Optional[Union[str, Path]] = None,
+                process_path: Optional[Union[str, Path]] = None,
+                mc_samples: int = 0,
+                mc_seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        Predicts properties for a DataFrame or an iterable of record dicts.
+        Returns the formulations with property and process columns appended (the bridge CSV layout).
+        Any of input_path / output_path / process_path that is given gets written as an artifact.
+        mc_samples > 0 adds Monte Carlo `<prop>_mean/_std/_qNN` uncertainty columns.
+        """
+        df = formulations if isinstance(formulations, pd.DataFrame) else pd.DataFrame(list(formulations))
+        process = dict(process or {})
+
+        if input_path:
+            df.to_csv(input_path, index=False)
+        if process_path:
+            with open(process_path, "w") as f:
+                json.dump(process, f, indent=2)
+
+        out_df = predict_and_merge(df, self.model, self.catalog, process, cache=self.cache,
+                                   mc_samples=mc_samples, mc_seed=mc_seed)
+        self.n_calls += 1
+        self.n_rows += len(out_df)
+
+        if output_path:
+            out_df.to_csv(output_path, index=False)
+            self._write_metadata(input_path, output_path, process_path, len(out_df))
+        return out_df
+
+    def predict_props(self, formulations: Formulations,
+                      process: Optional[Dict[str, Any]] = None,
+                      use_cache: bool = True) -> pd.DataFrame:
+        """
+        Only the PROP_FIELDS columns, aligned to the input rows (no process/hash columns).
+        use_cache=False keeps one-off bulk predictions (e.g. a candidate pool) out of the cache.
+        """
+        df = formulations if isinstance(formulations, pd.DataFrame) else pd.DataFrame(list(formulations))
+        self.n_calls += 1
+        self.n_rows += len(df)
+        if self.cache is not None and use_cache:
+            return self.cache.predict(df, self.model, self.catalog, process)
+        return predict_properties_batch(df, self.model, self.catalog, process)
+
+    def jacobian(self, formulations: Formulations,
+                 process: Optional[Dict[str, Any]] = None,
+                 wrt=DEFAULT_WRT,
+                 rebalance: bool = False) -> pd.DataFrame:
+        """`d<prop>_d<input>` sensitivities for every row, from one batched pass."""
+        df = formulations if isinstance(formulations, pd.DataFrame) else pd.DataFrame(list(formulations))
+        return predict_jacobian(df, self.model, self.catalog, process, wrt=wrt, rebalance=rebalance)
+
+    def predict_records(self, records: Iterable[Mapping[str, Any]],
+                        process: Optional[Dict[str, Any]] = None) -> list:
+        """Record-batch convenience wrapper: list of dicts in, list of dicts out."""
+        return self.predict(records, process).to_dict(orient="records")
+
+    def _write_metadata(self, input_path, output_path, process_path, n_rows: int) -> None:
+        """Mirrors the bridge script's bridge_run_metadata.json next to the props CSV."""
+        meta = {
+            "cycle": "in_process",
+            "in_csv": str(input_path) if input_path else None,
+            "out_csv": str(output_path),
+            "model": self.model_path,
+            "model_hash": self.model.content_hash,
+            "ingredient_library": self.library_path,
+            "process": str(process_path) if process_path else None,
+            "rows_written": n_rows,
+        }
+        meta_json = os.path.join(os.path.dirname(str(output_path)) or ".", "bridge_run_metadata.json")
+        # Concurrent candidates share this file; write-then-rename so readers never see a partial one.
+        tmp_path = f"{meta_json}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, meta_json)
+
+
+@lru_cache(maxsize=None)
+def get_default_predictor() -> PropertyPredictor:
+    """Process-wide predictor for the default model and ingredient library, backed by the default cache."""
+    return PropertyPredictor(cache=get_default_cache())
+
@@ -0,0 +1,81 @@
+# src/rate_limiter.py
+"""
+Token-bucket rate limiting for the evaluator's LLM calls.
+
+Provider quotas are per minute, on requests and on tokens. `RateLimiter` keeps one bucket for
+each (either can be None, i.e. unlimited). Each bucket holds up to a minute's allowance and refills
+continuously. `reserve(tokens)` books one request of about `tokens` tokens and returns how long
+the caller must wait before sending it; the buckets may go negative, so callers queue up behind
+each other in the order they reserved. A request larger than the whole per-minute token
+allowance waits for a full bucket rather than forever.
+
+The limiter is thread-safe and not tied to an event loop: `acquire` sleeps with asyncio, `wait`
+with time.sleep. Concurrent evaluate_with_agent calls (e.g. one per candidate worker thread, each
+with its own loop) share the process-wide limiter from `shared_rate_limiter`, so together they
+stay within one quota.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class RateLimiter:
+    def __init__(self, requests_per_min: Optional[float] = None, tokens_per_min: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests_per_min = requests_per_min
+        self.tokens_per_min = tokens_per_min
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._updated = clock()
+        self._requests = float(requests_per_min or 0.0)  # current bucket levels
+        self._tokens = float(tokens_per_min or 0.0)
+
+    def _refill(self, now: float) -> None:
+        minutes = (now - self._updated) / 60.0
+        self._updated = now
+        if self.requests_per_min:
+            self._requests = min(self.requests_per_min, self._requests + minutes * self.requests_per_min)
+        if self.tokens_per_min:
+            self._tokens = min(self.tokens_per_min, self._tokens + minutes * self.tokens_per_min)
+
+    def reserve(self, tokens: float = 0.0) -> float:
+        """Books one request of `tokens` tokens; returns the seconds to wait before sending it."""
+        with self._lock:
+            self._refill(self._clock())
+            delay = 0.0
+            if self.requests_per_min:
+                self._requests -= 1.0
+                delay = max(delay, -self._requests / self.requests_per_min * 60.0)
+            if self.tokens_per_min:
+                self._tokens -= min(float(tokens), self.tokens_per_min)
+                delay = max(delay, -self._tokens / self.tokens_per_min * 60.0)
+            return delay
+
+    async def acquire(self, tokens: float = 0.0) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def wait(self, tokens: float = 0.0) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_SHARED: Dict[Tuple[Optional[float], Optional[float]], RateLimiter] = {}
+_SHARED_LOCK = threading.Lock()
+
+def shared_rate_limiter(requests_per_min: Optional[float] = None,
+                        tokens_per_min: Optional[float] = None) -> Optional[RateLimiter]:
+    """The process-wide limiter for these limits (None when both are unlimited)."""
+    if not requests_per_min and not tokens_per_min:
+        return None
+    key = (requests_per_min or None, tokens_per_min or None)
+    with _SHARED_LOCK:
+        if key not in _SHARED:
+            _SHARED[key] = RateLimiter(*key)
+        return _SHARED[key]
@@ -1,8 +1,8 @@
 # src/run_evaluator_with_adk.py
 from __future__ import annotations
-import asyncio, json, logging, os, queue, re, threading
+import asyncio, atexit, json, logging, os, re, threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 from uuid import uuid4
 from pydantic import ValidationError
 
@@ -17,8 +17,9 @@ except ModuleNotFoundError:
     from google.genai.types import Content, Part
     _GENAI_FLAVOR = "google.genai"
 
-from evaluator.matsi_property_evaluator.agent import root_agent
-from evaluator.matsi_property_evaluator.eval_schema import EvalInput, EvalScores
+from evaluator.matsi_property_evaluator.agent import batch_agent as default_batch_agent, root_agent
+from src.evaluation_cache import EvaluationCache, agent_namespace, default_evaluation_cache
+from evaluator.matsi_property_evaluator.eval_schema import EvalBatchInput, EvalCandidate, EvalInput, EvalScores
 
 logger = logging.getLogger(__name__)
 logger.debug("Using GenAI flavor: %s", _GENAI_FLAVOR)
@@ -169,14 +170,7 @@ def _dump_event(out: Path, ev: Any) -> None:
     except Exception:
         pass
 
-def _drain_runner(
-    runner: Runner,
-    user_id: str,
-    session_id: str,
-    user_message: Content,
-    out_events: Optional[Path],
-    q: queue.Queue,
-) -> None:
+async def _drain_events(events: AsyncIterator[Any], out_events: Optional[Path]) -> Tuple[str, Any]:
     """
     Collect the **last usable** object from the event stream:
       - event.data.response
@@ -184,12 +178,13 @@ def _drain_runner(
       - event.message
       - the event itself (if it looks like a response)
     As a final fallback, collect any concatenated text we see and return that as a string.
+    Returns (run_status, info), run_status being "ok" or "err".
     """
     try:
         final: Union[Any, str, None] = None
         text_fallback: Optional[str] = None
 
-        for ev in runner.run(user_id=user_id, session_id=session_id, new_message=user_message):
+        async for ev in events:
             if out_events and DUMP_EVENTS: _dump_event(out_events, ev) # type: ignore
 
             # 1) Deep paths first
@@ -229,114 +224,389 @@ def _drain_runner(
 
         # Return priority: real response object > string fallback
         if final is not None:
-            q.put(("ok", final))
-        elif text_fallback:
-            q.put(("ok", text_fallback))  # deliberately a string
-        else:
-            q.put(("err", "No usable response object or text found in event stream."))
+            return "ok", final
+        if text_fallback:
+            return "ok", text_fallback  # deliberately a string
+        return "err", "No usable response object or text found in event stream."
     except Exception as e:
-        q.put(("err", f"{e.__class__.__name__}: {e}"))
+        return "err", f"{e.__class__.__name__}: {e}"
 
-def evaluate_context(
-    payload_dict: Dict[str, Any],
-    out_dir: Union[str, Path],
-    timeout_s: int = 120,
-    app_name: str = "matsi_evaluator",
-    user_id: str = "default_user",
-) -> Dict[str, Any]:
-    """Runs the ADK agent for a given context payload and writes artifacts."""
-    out_path = Path(out_dir); out_path.mkdir(parents=True, exist_ok=True)
-
-    # Validate input early
-    EvalInput.model_validate(payload_dict)
-
-    # Build Content for ADK
-    user_message = Content(role="user", parts=[Part(text=json.dumps(payload_dict))])
-
-    # Session + Runner
-    session_id = f"eval-{uuid4().hex}"
-    session_service = InMemorySessionService()
-    asyncio.run(session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id))
-    runner = Runner(agent=root_agent, app_name=app_name, session_service=session_service)
-
-    events_dump = out_path / "debug_events.ndjson" if DUMP_EVENTS else None
-
-    # Threaded run with timeout
-    q: queue.Queue = queue.Queue()
-    # Set daemon=False. This prevents the thread from becoming a "zombie" that
-    # continues to run after the main process is interrupted with Ctrl+C. The
-    # main process will now wait for this thread to complete, making shutdown
-    # cleaner.
-    t = threading.Thread(target=_drain_runner, args=(runner, user_id, session_id, user_message, events_dump, q), daemon=False) # type: ignore
-    t.start()
-    try:
-        status, info = q.get(timeout=timeout_s)
-    except queue.Empty:
-        status, info = ("err", f"Timeout after {timeout_s}s")
-    finally:
-        t.join(timeout=1)
 
-    # Try to fetch session (for debugging only; do not rely on it)
-    try:
-        updated_session = asyncio.run(session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id))
-    except Exception:
-        updated_session = None
+class EvaluatorClient:
+    """
+    Long-lived evaluator client: one event loop (in a daemon thread), one Runner and one session
+    service for every evaluation, and a pool of sessions that are recycled between rows.
+
+    Building a Runner and session service per row and driving them with `asyncio.run` and a
+    fresh thread costs setup time on every call and leaves a thread behind for every timeout.
+    Here each evaluation is a task on the client's loop: it takes an idle session from the pool
+    (at most `pool_size` run at once, the others wait for one), runs the agent under a timeout
+    that cancels the task, and returns the session with its history cleared so rows stay
+    independent.
+
+    `await client.evaluate(payload, out_dir)` can be awaited from any event loop (the ADK work
+    still runs on the client's); `client.evaluate_sync(...)` blocks the calling thread instead
+    and is safe to call from many threads. Both return what `evaluate_context` returns.
+    `await client.evaluate_batch(...)` sends several payloads with shared targets to the batch
+    agent (default: the agent given, else `batch_agent`) in one request.
+
+    Every evaluation first looks its payload up in `cache` (default: `default_evaluation_cache()`,
+    see src/evaluation_cache.py); a hit writes the cached scores as the row's artifacts instead of
+    calling the agent, and successful calls are stored.
+    """
 
-    # --- Centralized JSON Parsing and Validation ---
-    def _validate_scores(raw_payload: str) -> Dict[str, Any]:
-        """Parses, validates, and returns a score dictionary."""
-        payload_to_parse = raw_payload
+    def __init__(self, agent: Any = None, app_name: str = "matsi_evaluator", user_id: str = "default_user",
+                 pool_size: int = 8, timeout_s: float = 120, batch_agent: Any = None,
+                 cache: Optional[EvaluationCache] = None):
+        self.app_name, self.user_id = app_name, user_id
+        self.pool_size = max(1, int(pool_size))
+        self.timeout_s = timeout_s
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(agent=agent if agent is not None else root_agent, app_name=app_name,
+                             session_service=self.session_service)
+        if batch_agent is None:
+            batch_agent = agent if agent is not None else default_batch_agent
+        self.batch_runner = Runner(agent=batch_agent, app_name=app_name, session_service=self.session_service)
+        self.cache = cache
+        self._namespaces = {id(self.runner): agent_namespace(self.runner.agent),
+                            id(self.batch_runner): agent_namespace(batch_agent)}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=f"{app_name}-loop", daemon=True)
+        self._thread.start()
+        self._idle: Optional[asyncio.Queue] = None  # created on the client's loop
+        self._n_sessions = 0
+        self._closed = False
+        self.stats = {"evaluations": 0, "timeouts": 0, "sessions_created": 0}
+
+    # --- session pool (client loop only) ---
+    async def _new_session(self, session_id: str) -> None:
+        await self.session_service.create_session(app_name=self.app_name, user_id=self.user_id, session_id=session_id)
+        self.stats["sessions_created"] += 1
+
+    async def _acquire(self) -> str:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._idle.empty() and self._n_sessions < self.pool_size:
+            self._n_sessions += 1
+            session_id = f"eval-{uuid4().hex}"
+            await self._new_session(session_id)
+            return session_id
+        return await self._idle.get()
+
+    async def _release(self, session_id: str) -> None:
+        # Recycle the id with an empty history; the agent must not see earlier rows.
+        try:
+            await self.session_service.delete_session(app_name=self.app_name, user_id=self.user_id,
+                                                      session_id=session_id)
+            await self._new_session(session_id)
+        except Exception as e:
+            logger.warning("Could not recycle evaluator session %s: %s", session_id, e)
+            self._n_sessions -= 1
+            return
+        self._idle.put_nowait(session_id)
+
+    async def _run(self, payload: Dict[str, Any], timeout_s: float, events_dump: Optional[Path],
+                   runner: Runner) -> Tuple[str, Any, Any]:
+        """(run_status, info, session) for one payload, on the client's loop."""
+        user_message = Content(role="user", parts=[Part(text=json.dumps(payload))])
+        session_id = await self._acquire()
         try:
-            # First attempt: parse directly
-            data = json.loads(payload_to_parse)
-        except json.JSONDecodeError:
-            # Second attempt: salvage and parse
-            print("      -> Direct JSON parse failed. Attempting to salvage...")
-            salvaged_json = _salvage_json(raw_payload)
-            if not salvaged_json:
-                raise ValueError("Could not salvage a valid JSON object from the response.")
-            data = json.loads(salvaged_json)
-
-        return EvalScores.model_validate(data).model_dump()
+            events = runner.run_async(user_id=self.user_id, session_id=session_id, new_message=user_message)
+            try:
+                status, info = await asyncio.wait_for(_drain_events(events, events_dump), timeout=timeout_s)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                status, info = ("err", f"Timeout after {timeout_s}s")
+            finally:
+                try:
+                    await events.aclose()
+                except Exception:
+                    pass
+            # For debugging only; do not rely on it
+            try:
+                session = await self.session_service.get_session(app_name=self.app_name, user_id=self.user_id,
+                                                                 session_id=session_id)
+            except Exception:
+                session = None
+        finally:
+            await self._release(session_id)
+        self.stats["evaluations"] += 1
+        return status, info, session
+
+    def _submit(self, payload: Dict[str, Any], out_path: Path, timeout_s: Optional[float],
+                runner: Optional[Runner] = None):
+        if self._closed:
+            raise RuntimeError("EvaluatorClient is closed.")
+        events_dump = out_path / "debug_events.ndjson" if DUMP_EVENTS else None
+        return asyncio.run_coroutine_threadsafe(
+            self._run(payload, self.timeout_s if timeout_s is None else timeout_s, events_dump,
+                      runner or self.runner), self._loop)
+
+    # --- evaluation cache ---
+    def _cache_key(self, payload: Dict[str, Any],
+                   runner: Optional[Runner] = None) -> Tuple[Optional[EvaluationCache], str]:
+        cache = self.cache or default_evaluation_cache()
+        if cache is None:
+            return None, ""
+        return cache, cache.key(payload, self._namespaces[id(runner or self.runner)])
+
+    def lookup(self, payload: Dict[str, Any], out_dir: Union[str, Path],
+               runner: Optional[Runner] = None) -> Optional[Dict[str, Any]]:
+        """The cached result for payload (artifacts written to out_dir), or None on a miss."""
+        cache, key = self._cache_key(payload, runner)
+        scores = cache.get(key) if cache is not None else None
+        if scores is None:
+            return None
+        out_path = Path(out_dir); out_path.mkdir(parents=True, exist_ok=True)
+        report = scores.get("notes") or "No qualitative notes provided in the evaluation."
+        return {**_write_artifacts(out_path, scores, report), "cached": True}
+
+    def _store(self, payload: Dict[str, Any], result: Optional[Dict[str, Any]],
+               runner: Optional[Runner] = None) -> None:
+        score = (result or {}).get("score") or {}
+        cache, key = self._cache_key(payload, runner)
+        if cache is not None and score and "error" not in score:
+            cache.put(key, score)
+
+    async def evaluate(self, payload: Dict[str, Any], out_dir: Union[str, Path],
+                       timeout_s: Optional[float] = None, lookup: bool = True) -> Dict[str, Any]:
+        """
+        Evaluates one EvalInput payload and writes its artifacts to out_dir. lookup=False skips
+        the cache lookup (e.g. when the caller has just looked it up).
+        """
+        EvalInput.model_validate(payload)  # validate input early
+        cached = self.lookup(payload, out_dir) if lookup else None
+        if cached is not None:
+            return cached
+        out_path = Path(out_dir); out_path.mkdir(parents=True, exist_ok=True)
+        status, info, session = await asyncio.wrap_future(self._submit(payload, out_path, timeout_s))
+        result = _score_response(status, info, session, out_path)
+        self._store(payload, result)
+        return result
+
+    async def evaluate_batch(self, payloads: Sequence[Dict[str, Any]], out_dirs: Sequence[Union[str, Path]],
+                             batch_dir: Union[str, Path], timeout_s: Optional[float] = None,
+                             lookup: bool = True) -> Dict[str, Any]:
+        """
+        Evaluates EvalInput payloads that share cycle_id and targets_constraints in one request.
+        Returns {"results", "run_status", "run_info"}: results[i] is what evaluate() returns for
+        payloads[i] (artifacts written to out_dirs[i]), or None where the batch's answer for it is
+        missing or invalid, so that the caller can evaluate it on its own. The request and raw
+        response are kept in batch_dir. The timeout defaults to the client's per payload.
+        Cached payloads are answered from the cache and left out of the request (unless
+        lookup=False).
+        """
+        batch = _batch_payload(payloads)
+        sample_ids = [c["sample_id"] for c in batch["candidates"]]
+        results: List[Optional[Dict[str, Any]]] = [
+            self.lookup(p, d, self.batch_runner) if lookup else None for p, d in zip(payloads, out_dirs)]
+        todo = [k for k, r in enumerate(results) if r is None]
+        if not todo:
+            return {"results": results, "run_status": "ok", "run_info": None}
+        if len(todo) < len(payloads):
+            batch = _batch_payload([payloads[k] for k in todo])
+        batch_path = Path(batch_dir); batch_path.mkdir(parents=True, exist_ok=True)
+        (batch_path / "batch_request.json").write_text(json.dumps(batch, indent=2), encoding="utf-8")
+        timeout_s = self.timeout_s * len(todo) if timeout_s is None else timeout_s
+        status, info, _ = await asyncio.wrap_future(self._submit(batch, batch_path, timeout_s, self.batch_runner))
+        scores, errors, raw = _split_batch_scores(status, info, [sample_ids[k] for k in todo])
+        if raw is not None:
+            (batch_path / "batch_response.txt").write_text(raw, encoding="utf-8")
+        if errors:
+            (batch_path / "item_errors.json").write_text(json.dumps(errors, indent=2), encoding="utf-8")
+        for k in todo:
+            if sample_ids[k] not in scores:
+                continue
+            out_path = Path(out_dirs[k]); out_path.mkdir(parents=True, exist_ok=True)
+            item = scores[sample_ids[k]]
+            report = item.get("notes") or "No qualitative notes provided in the evaluation."
+            results[k] = _write_artifacts(out_path, item, report)
+            self._store(payloads[k], results[k], self.batch_runner)
+        return {"results": results, "run_status": status, "run_info": None if status == "ok" else str(info)}
+
+    def evaluate_sync(self, payload: Dict[str, Any], out_dir: Union[str, Path],
+                      timeout_s: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking evaluate(); must not be called from the client's own loop."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("evaluate_sync() called from the evaluator loop; await evaluate() instead.")
+        EvalInput.model_validate(payload)  # validate input early
+        cached = self.lookup(payload, out_dir)
+        if cached is not None:
+            return cached
+        out_path = Path(out_dir); out_path.mkdir(parents=True, exist_ok=True)
+        status, info, session = self._submit(payload, out_path, timeout_s).result()
+        result = _score_response(status, info, session, out_path)
+        self._store(payload, result)
+        return result
+
+    def close(self) -> None:
+        """Closes the runner and stops the loop. Evaluations still running are cancelled."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self.runner.close(), self._loop).result(timeout=10)
+        except Exception as e:
+            logger.debug("Runner close failed: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        if not self._loop.is_running():
+            self._loop.close()
+
+    def __enter__(self) -> "EvaluatorClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_CLIENTS: Dict[Tuple[str, str], EvaluatorClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_evaluator_client(app_name: str = "matsi_evaluator", user_id: str = "default_user") -> EvaluatorClient:
+    """The process-wide client for (app_name, user_id), created on first use and closed at exit."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get((app_name, user_id))
+        if client is None or client._closed:
+            pool_size = int(os.getenv("EVAL_SESSION_POOL", "8"))
+            client = _CLIENTS[(app_name, user_id)] = EvaluatorClient(app_name=app_name, user_id=user_id,
+                                                                     pool_size=pool_size)
+        return client
+
+@atexit.register
+def _close_clients() -> None:
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+# --- Centralized JSON Parsing and Validation ---
+def _load_json(raw_payload: str) -> Any:
+    """Parses the response JSON, salvaging it if the direct parse fails."""
+    try:
+        # First attempt: parse directly
+        return json.loads(raw_payload)
+    except json.JSONDecodeError:
+        # Second attempt: salvage and parse
+        print("      -> Direct JSON parse failed. Attempting to salvage...")
+        salvaged_json = _salvage_json(raw_payload)
+        if not salvaged_json:
+            raise ValueError("Could not salvage a valid JSON object from the response.")
+        return json.loads(salvaged_json)
+
+def _validate_scores(data: Any) -> Dict[str, Any]:
+    """Validates a score object; fills in recommended_bo_weight if the agent left it out."""
+    scores = EvalScores.model_validate(data).model_dump()
+    if scores.get("recommended_bo_weight") is None:
+        conf = scores.get("confidence", "Medium")
+        cf = {"High": 1.0, "Medium": 0.65, "Low": 0.35}.get(conf, 0.65)
+        lc = scores.get("literature_consistency_score") or 0.0
+        rp = scores.get("realism_penalty") or 0.0
+        scores["recommended_bo_weight"] = lc * rp * cf
+    return scores
+
+def _response_text(status: str, info: Any) -> Tuple[str, str]:
+    """(payload, source_tag): the JSON text of a runner result; ValueError if there is none."""
+    if status != "ok" or info is None:
+        raise ValueError(f"Agent runner failed to produce a response. run_status={status}, info={info}")
+
+    # If _drain_events gave us a string (fallback), use it directly.
+    if isinstance(info, str):
+        raw_text = info
+        extracted_source = "string_fallback"
+    else:
+        raw_text, extracted_source = _extract_payload(info)
+
+    if not raw_text:
+        raise ValueError("Agent did not produce any text output.")
+
+    extracted_payload = raw_text.strip()
+    # Strip code fences if present
+    if extracted_payload.startswith("```"):
+        extracted_payload = _strip_fences(extracted_payload)
+
+    # If we still don't see a JSON object, try regex as a fallback
+    if not extracted_payload.startswith("{"):
+        m = JSON_FENCE_RE.search(raw_text)
+        if m:
+            extracted_payload = m.group(1)
+    return extracted_payload, extracted_source
+
+def _batch_payload(payloads: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """One EvalBatchInput from EvalInput payloads with the same cycle_id and targets_constraints."""
+    inputs = [EvalInput.model_validate(p) for p in payloads]
+    if not inputs:
+        raise ValueError("A batch needs at least one payload.")
+    first = inputs[0]
+    if any(x.cycle_id != first.cycle_id or x.targets_constraints != first.targets_constraints for x in inputs):
+        raise ValueError("The payloads of a batch must share cycle_id and targets_constraints.")
+    sample_ids = [x.sample_id if x.sample_id is not None else str(k) for k, x in enumerate(inputs)]
+    if len(set(sample_ids)) != len(sample_ids):
+        raise ValueError(f"The sample_ids of a batch must be unique: {sample_ids}")
+    return EvalBatchInput(
+        cycle_id=first.cycle_id,
+        targets_constraints=first.targets_constraints,
+        candidates=[EvalCandidate(sample_id=sid, predictions=x.predictions, process=x.process,
+                                  previous_report_md=x.previous_report_md, previous_scores=x.previous_scores,
+                                  meta=x.meta) for sid, x in zip(sample_ids, inputs)],
+        meta={"batch_size": len(inputs)},
+    ).model_dump(mode="json")
+
+def _split_batch_scores(status: str, info: Any,
+                        sample_ids: Sequence[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str], Optional[str]]:
+    """
+    (scores, errors, raw) of a batched response: validated scores by sample_id, why the other
+    sample_ids have none, and the response text. Items are validated one by one, so one bad item
+    does not cost the others. "results" may be a list of objects with a sample_id, or an object
+    keyed by sample_id.
+    """
+    scores: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    raw = None
+    try:
+        raw, _ = _response_text(status, info)
+        data = _load_json(raw)
+        items = data.get("results") if isinstance(data, dict) else data
+        if isinstance(items, dict):
+            items = [{**v, "sample_id": k} for k, v in items.items() if isinstance(v, dict)]
+        if not isinstance(items, list):
+            raise ValueError("The batched response has no 'results' list.")
+    except (ValueError, AttributeError) as e:
+        return scores, {sid: f"Agent returned invalid batch output. Error: {e}" for sid in sample_ids}, raw
+    wanted = set(sample_ids)
+    for item in items:
+        sample_id = str(item.get("sample_id")) if isinstance(item, dict) else None
+        if sample_id not in wanted or sample_id in scores:
+            continue
+        try:
+            scores[sample_id] = _validate_scores(item)
+            errors.pop(sample_id, None)
+        except ValidationError as e:
+            errors[sample_id] = f"Invalid scores: {e}"
+    for sample_id in sample_ids:
+        if sample_id not in scores:
+            errors.setdefault(sample_id, "No scores for this sample_id in the batched response.")
+    return scores, errors, raw
+
+def _write_artifacts(out_path: Path, scores: Dict[str, Any], report: str) -> Dict[str, Any]:
+    (out_path / "evaluation_report.md").write_text(report, encoding="utf-8")
+    (out_path / "scores.json").write_text(json.dumps(scores, indent=2), encoding="utf-8")
+    return {
+        "score": scores,
+        "report_path": str(out_path / "evaluation_report.md"),
+        "scores_path": str(out_path / "scores.json"),
+    }
 
+def _score_response(status: str, info: Any, updated_session: Any, out_path: Path) -> Dict[str, Any]:
+    """Turns a runner result into scores and writes the artifacts (debug dumps on failure)."""
     scores: Dict[str, Any] = {}
     report = "Agent returned invalid or empty output."
     extracted_source = "N/A"
     extracted_payload = None
 
     try:
-        if status != "ok" or info is None:
-            raise ValueError(f"Agent runner failed to produce a response. run_status={status}, info={info}")
-
-        # If _drain_runner gave us a string (fallback), use it directly.
-        if isinstance(info, str):
-            raw_text = info
-            extracted_source = "string_fallback"
-        else:
-            raw_text, extracted_source = _extract_payload(info)
-
-        if not raw_text:
-            raise ValueError("Agent did not produce any text output.")
-
-        extracted_payload = raw_text.strip()
-        # Strip code fences if present
-        if extracted_payload.startswith("```"):
-            extracted_payload = _strip_fences(extracted_payload)
-
-        # If we still don't see a JSON object, try regex as a fallback
-        if not extracted_payload.startswith("{"):
-            m = JSON_FENCE_RE.search(raw_text)
-            if m:
-                extracted_payload = m.group(1)
-
-        scores = _validate_scores(extracted_payload)
-
-        if scores.get("recommended_bo_weight") is None:
-            conf = scores.get("confidence", "Medium")
-            cf = {"High": 1.0, "Medium": 0.65, "Low": 0.35}.get(conf, 0.65)
-            lc = scores.get("literature_consistency_score") or 0.0
-            rp = scores.get("realism_penalty") or 0.0
-            scores["recommended_bo_weight"] = lc * rp * cf
+        extracted_payload, extracted_source = _response_text(status, info)
+        scores = _validate_scores(_load_json(extracted_payload))
 
         report = scores.get("notes") or "No qualitative notes provided in the evaluation."
 
@@ -374,14 +644,22 @@ def evaluate_context(
             pass
 
     # Write artifacts
-    (out_path / "evaluation_report.md").write_text(report, encoding="utf-8")
-    (out_path / "scores.json").write_text(json.dumps(scores, indent=2), encoding="utf-8")
+    return _write_artifacts(out_path, scores, report)
 
-    return {
-        "score": scores,
-        "report_path": str(out_path / "evaluation_report.md"),
-        "scores_path": str(out_path / "scores.json"),
-    }
+def evaluate_context(
+    payload_dict: Dict[str, Any],
+    out_dir: Union[str, Path],
+    timeout_s: int = 120,
+    app_name: str = "matsi_evaluator",
+    user_id: str = "default_user",
+    client: Optional[EvaluatorClient] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the ADK agent for a given context payload and writes artifacts. Uses the shared
+    EvaluatorClient for (app_name, user_id) unless a client is given.
+    """
+    client = client or get_evaluator_client(app_name, user_id)
+    return client.evaluate_sync(payload_dict, out_dir, timeout_s=timeout_s)
 
 def main():
     """Main function to run the script from the command line."""
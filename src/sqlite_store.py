@@ -0,0 +1,131 @@
+# src/sqlite_store.py
+"""
+The SQLite layer shared by the prediction and evaluation caches: one table of key -> JSON value
+with its write and last-use times, least-recently-used eviction and optional expiry.
+
+The entry count is read once when the store opens and then kept up to date by the store's own
+writes, so a put costs no table scan. Rows written by another process sharing the file are not
+counted until the store is reopened; the bound is per writer. The optional byte ceiling is
+checked on the pages in use (PRAGMA page_count less freelist_count), which SQLite keeps in the
+file header, so it sees every writer.
+"""
+from __future__ import annotations
+import json
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+
+class SQLiteStore:
+    """
+    A key -> JSON table (path=None keeps it in memory). Entries older than ttl_s are dropped when
+    read or purged; beyond max_entries, or once the file's used pages exceed max_bytes, the least
+    recently used are evicted. Not locked: callers serialize access (check_same_thread is off so
+    one store can serve several threads).
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]], table: str, max_entries: int,
+                 ttl_s: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.path = str(path) if path else None
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path or ":memory:", timeout=30, check_same_thread=False)
+        if self.path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)")
+        self._conn.commit()
+        self.entries = self.count()
+
+    def get_many(self, keys: Iterable[str]) -> Tuple[Dict[str, Any], int]:
+        """(values found, number of expired entries dropped); the found ones are marked as used."""
+        keys = list(keys)
+        found: Dict[str, Any] = {}
+        stale = []
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            marks = ",".join("?" * len(part))
+            for key, value, created in self._conn.execute(
+                    f"SELECT key, value, created FROM {self.table} WHERE key IN ({marks})", part):
+                if self.ttl_s is not None and now - created > self.ttl_s:
+                    stale.append(key)
+                else:
+                    found[key] = json.loads(value)
+        if stale:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in stale])
+            self.entries -= len(stale)
+        if found:
+            self._conn.executemany(f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                                   [(now, k) for k in found])
+        if stale or found:
+            self._conn.commit()
+        return found, len(stale)
+
+    def put_many(self, items: Dict[str, Any]) -> int:
+        """Stores items (JSON-serializable values); returns the number of entries evicted."""
+        if not items:
+            return 0
+        now = time.time()
+        rows = [(k, json.dumps(v), now, now) for k, v in items.items()]
+        added = self._conn.executemany(
+            f"INSERT OR IGNORE INTO {self.table} (key, value, created, last_used) VALUES (?, ?, ?, ?)", rows).rowcount
+        if added < len(rows):
+            self._conn.executemany(
+                f"UPDATE {self.table} SET value = ?, created = ?, last_used = ? WHERE key = ?",
+                [(v, c, u, k) for k, v, c, u in rows])
+        self.entries += added
+        evicted = self._evict()
+        self._conn.commit()
+        return evicted
+
+    def used_bytes(self) -> int:
+        """Bytes in the database pages that hold data (freed pages are reused before the file grows)."""
+        (pages,) = self._conn.execute("PRAGMA page_count").fetchone()
+        (free,) = self._conn.execute("PRAGMA freelist_count").fetchone()
+        (size,) = self._conn.execute("PRAGMA page_size").fetchone()
+        return (pages - free) * size
+
+    def _evict(self) -> int:
+        excess = self.entries - self.max_entries
+        if self.max_bytes is not None and self.entries:
+            used = self.used_bytes()
+            if used > self.max_bytes:
+                # Entries are about the same size, so drop the share of them that is over the ceiling.
+                excess = max(excess, math.ceil(self.entries * (1 - self.max_bytes / used)))
+        if excess <= 0:
+            return 0
+        n = self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)", (excess,)).rowcount
+        self.entries -= n
+        return n
+
+    def purge_expired(self) -> int:
+        if self.ttl_s is None:
+            return 0
+        n = self._conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl_s,)).rowcount
+        self._conn.commit()
+        self.entries -= n
+        return n
+
+    def count(self) -> int:
+        """Entries in the table, including those written by other processes (a full count)."""
+        (n,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return n
+
+    def clear(self) -> None:
+        self._conn.execute(f"DELETE FROM {self.table}")
+        self._conn.commit()
+        self.entries = 0
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,93 @@
+# src/stage_profiler.py
+"""
+Per-stage wall time, memory and call counts for the closed loop.
+
+run_optimization_loop wraps each of its stages (DOE, bridge, evaluation, ask, tell, checkpoint,
+plotting, tidy) in `StageProfiler.stage(name, items)` and writes `report()` to the run summary
+under "stages". For every stage it keeps:
+
+- calls / items: how often the stage ran and how many rows or points it handled
+- wall_s / max_s: total and longest call, summed over calls (concurrent candidate calls overlap,
+  so their sum can exceed the run's elapsed time)
+- rss_mb: resident set size after the stage's last call
+- peak_rss_growth_mb: how much the process's peak RSS grew while the stage ran
+
+RSS comes from /proc (Linux) and the peak from `resource`; where neither exists they are None.
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (None where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    items: int = 0
+    wall_s: float = 0.0
+    max_s: float = 0.0
+    rss_mb: Optional[float] = None
+    peak_rss_growth_mb: Optional[float] = None
+
+
+class StageProfiler:
+    """Thread-safe accumulator of StageStats, in the order the stages first ran."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, items: int = 1) -> Iterator[None]:
+        peak_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - start
+            rss, peak_after = current_rss_mb(), peak_rss_mb()
+            with self._lock:
+                s = self.stages.setdefault(name, StageStats())
+                s.calls += 1
+                s.items += items
+                s.wall_s += dt
+                s.max_s = max(s.max_s, dt)
+                s.rss_mb = rss
+                if peak_before is not None and peak_after is not None:
+                    s.peak_rss_growth_mb = (s.peak_rss_growth_mb or 0.0) + peak_after - peak_before
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Stage name -> its stats, rounded for the summary JSON."""
+        with self._lock:
+            return {
+                name: {k: (round(v, 4) if isinstance(v, float) else v) for k, v in asdict(s).items()}
+                for name, s in self.stages.items()
+            }
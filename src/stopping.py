@@ -0,0 +1,101 @@
+# src/stopping.py
+"""
+Convergence-based termination and budgets for the closed loop.
+
+`StoppingRule` holds the user's limits; every one of them is off (None) by default:
+
+- patience / min_improvement: stop once the best score has improved by less than min_improvement
+  over the last `patience` iterations
+- ei_floor: stop once the surrogate's largest expected improvement over a candidate pool (in score
+  units) falls below ei_floor
+- max_seconds: wall-clock budget for the run (resumed sessions count too); the loop stops before
+  an iteration that would, at the average pace so far, end past the budget
+- max_evaluations: budget of agent evaluations (billed calls, failed ones included; candidates
+  screened out by the multi-fidelity mode are free), the initial DOE's included: a larger DOE is
+  subsampled to the budget, and the optimizer's last batch is trimmed to what is left
+
+`StoppingState` is the run's side of it (best-score history, time and evaluations spent, why the
+run stopped). It is checkpointed with the run and written to the summary JSON.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+from sklearn.utils import check_random_state
+
+from src.batch_acquisition import candidate_pool, expected_improvement
+
+
+@dataclass
+class StoppingRule:
+    patience: Optional[int] = None
+    min_improvement: float = 1e-3
+    ei_floor: Optional[float] = None
+    max_seconds: Optional[float] = None
+    max_evaluations: Optional[int] = None
+
+
+@dataclass
+class StoppingState:
+    best_history: List[float] = field(default_factory=list)
+    elapsed_s: float = 0.0
+    evaluations: int = 0
+    iteration_s: List[float] = field(default_factory=list)
+    window_start: int = 0
+    reason: Optional[str] = None
+    last_max_ei: Optional[float] = None
+
+    def evaluations_left(self, rule: StoppingRule) -> Optional[int]:
+        if rule.max_evaluations is None:
+            return None
+        return max(rule.max_evaluations - self.evaluations, 0)
+
+
+def stopping_rule_from_args(args) -> StoppingRule:
+    """The rule of the --patience/--min-improvement/--ei-floor/--max-minutes/--max-evaluations options."""
+    return StoppingRule(
+        patience=args.patience,
+        min_improvement=args.min_improvement,
+        ei_floor=args.ei_floor,
+        max_seconds=args.max_minutes * 60.0 if args.max_minutes is not None else None,
+        max_evaluations=args.max_evaluations,
+    )
+
+
+def max_expected_improvement(optimizer, n_candidates: int = 2000, random_state=0) -> Optional[float]:
+    """Largest EI (score units, xi=0) of the optimizer's latest surrogate over a candidate pool."""
+    if not optimizer.models:
+        return None
+    space = optimizer.space
+    Xi = np.asarray(space.transform(optimizer.Xi), dtype=float)
+    yi = np.asarray(optimizer.yi, dtype=float)
+    pool = candidate_pool(space, Xi, yi, n_candidates, check_random_state(random_state))
+    mu, std = optimizer.models[-1].predict(pool, return_std=True)
+    return float(np.max(expected_improvement(mu, std, yi.min(), xi=0.0)))
+
+
+def check_stopping(rule: StoppingRule, state: StoppingState, optimizer=None) -> Optional[str]:
+    """Why the loop should stop before its next iteration, or None to carry on."""
+    left = state.evaluations_left(rule)
+    if left is not None and left <= 0:
+        return f"evaluation budget spent ({state.evaluations}/{rule.max_evaluations} agent evaluations)"
+
+    if rule.max_seconds is not None:
+        pace = float(np.mean(state.iteration_s)) if state.iteration_s else 0.0
+        if state.elapsed_s + pace > rule.max_seconds:
+            return (f"wall-clock budget: {state.elapsed_s:.0f}s elapsed, the next iteration would end "
+                    f"past {rule.max_seconds:.0f}s")
+
+    history = state.best_history[state.window_start:]
+    if rule.patience and len(history) > rule.patience:
+        gain = history[-1] - history[-1 - rule.patience]
+        if gain < rule.min_improvement:
+            return (f"best score improved by {gain:.4g} (< {rule.min_improvement:g}) "
+                    f"over the last {rule.patience} iterations")
+
+    if rule.ei_floor is not None and optimizer is not None:
+        state.last_max_ei = max_expected_improvement(optimizer)
+        if state.last_max_ei is not None and state.last_max_ei < rule.ei_floor:
+            return f"max expected improvement {state.last_max_ei:.3g} below the floor {rule.ei_floor:g}"
+    return None
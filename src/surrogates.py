@@ -0,0 +1,330 @@
+# src/surrogates.py
+"""
+Surrogate backends for the closed-loop Bayesian optimizer.
+
+skopt's exact GP refits in O(n^3) on every tell (and once more per constant-liar point on a
+batched ask), which stops being interactive once pooled histories reach thousands of points.
+`make_optimizer` builds the skopt Optimizer around one of:
+
+- "gp":        skopt's exact GP (the original behaviour, gradient-based acquisition search)
+- "rf" / "et": random forest / extra trees, std from the spread of the trees
+- "gbrt":      histogram gradient boosting with quantile (16/50/84 %) uncertainty
+- "sparse_gp": `SparseGPRegressor`, an inducing-point GP that costs O(n m^2) to fit and is
+               updated incrementally as points are appended
+
+skopt clones the estimator before every fit, so fitted state cannot live on the estimator
+instance. Instead the non-GP backends keep their recent fits in a small process-wide registry
+keyed by parameters and data: refitting on data that was already fitted (the optimizer copy made
+by ask(n_points)) is a lookup, and the sparse GP extends a fit whose data is a prefix of the new
+data (every tell, every constant-liar point) with a rank-k update instead of starting over.
+
+`python -m src.surrogates --sizes 100 1000 10000` times ask/tell per backend as history grows.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+from skopt import Optimizer
+from skopt.space import Real
+from skopt.utils import cook_estimator, normalize_dimensions
+
+from src.trust_region import TrustRegionOptimizer
+
+SURROGATES = ("gp", "rf", "et", "gbrt", "sparse_gp")
+
+_STATE_LOCK = threading.Lock()
+_STATES: "OrderedDict[tuple, Any]" = OrderedDict()
+_MAX_STATES = 8
+
+
+def _digest(a: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(a, dtype=float).tobytes(), digest_size=16).hexdigest()
+
+
+def _params_key(est: BaseEstimator) -> str:
+    return f"{type(est).__name__}:{est.get_params(deep=False)!r}"
+
+
+def _remember(key: tuple, state: Any) -> None:
+    with _STATE_LOCK:
+        _STATES[key] = state
+        _STATES.move_to_end(key)
+        while len(_STATES) > _MAX_STATES:
+            _STATES.popitem(last=False)
+
+
+def _recent_states(params_key: str) -> List[Any]:
+    with _STATE_LOCK:
+        return [s for k, s in reversed(_STATES.items()) if k[0] == params_key]
+
+
+def clear_surrogate_states() -> None:
+    """Drops every remembered fit (benchmarks, tests)."""
+    with _STATE_LOCK:
+        _STATES.clear()
+
+
+class LazyRefit(RegressorMixin, BaseEstimator):
+    """
+    Wraps a regressor so that fitting it again on exactly the data of a recent fit re-uses that
+    fit. The wrapped estimator must support predict(X, return_std=True).
+    """
+
+    def __init__(self, estimator=None):
+        self.estimator = estimator
+
+    def fit(self, X, y):
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+        key = (_params_key(self), len(y), _digest(X), _digest(y))
+        with _STATE_LOCK:
+            fitted = _STATES.get(key)
+        if fitted is None:
+            fitted = clone(self.estimator).fit(X, y)
+            _remember(key, fitted)
+        self.estimator_ = fitted
+        return self
+
+    def predict(self, X, return_std=False):
+        return self.estimator_.predict(X, return_std=return_std)
+
+
+class QuantileGBRTRegressor(RegressorMixin, BaseEstimator):
+    """
+    One histogram gradient-boosting model per quantile; the median is the prediction and half
+    the 16-84 % spread the std. (skopt's own GBRT surrogate relies on np.in1d, gone in numpy 2.)
+    """
+
+    def __init__(self, quantiles: Sequence[float] = (0.16, 0.5, 0.84), max_iter: int = 100,
+                 min_samples_leaf: int = 5, random_state: Optional[int] = None):
+        self.quantiles = quantiles
+        self.max_iter = max_iter
+        self.min_samples_leaf = min_samples_leaf
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        self.regressors_ = [
+            HistGradientBoostingRegressor(loss="quantile", quantile=q, max_iter=self.max_iter,
+                                          min_samples_leaf=self.min_samples_leaf,
+                                          random_state=self.random_state).fit(X, y)
+            for q in self.quantiles
+        ]
+        return self
+
+    def predict(self, X, return_std=False):
+        lo, mid, hi = (r.predict(X) for r in self.regressors_)
+        if not return_std:
+            return mid
+        return mid, np.clip((hi - lo) / 2.0, 1e-12, None)
+
+
+@dataclass
+class _SparseGPState:
+    n: int
+    x_digest: str
+    y_digest: str
+    n_hyper: int            # rows the hyperparameters/inducing points were chosen from
+    kernel: Any             # fitted signal kernel (no noise term)
+    noise: float
+    y_mean: float
+    y_std: float
+    Z: np.ndarray           # inducing points, m x d
+    Kmm_chol: np.ndarray    # lower Cholesky L of Kmm (+ jitter)
+    A: np.ndarray           # sum over data of v v^T, v = L^-1 k_m(x) (whitened features)
+    b: np.ndarray           # sum over data of v * y_normalized
+
+
+class SparseGPRegressor(RegressorMixin, BaseEstimator):
+    """
+    Inducing-point GP (deterministic training conditional) with a Matern-5/2 ARD kernel.
+
+    Kernel hyperparameters and the m inducing points are chosen by an exact GP on a random
+    subset of at most n_inducing rows, and only re-chosen once the data has grown by
+    refit_growth since; in between, new rows only update the m x m statistics. With
+    n <= n_inducing the inducing points are the data and predictions equal the exact GP's.
+    """
+
+    def __init__(self, n_inducing: int = 256, refit_growth: float = 2.0,
+                 n_restarts_optimizer: int = 1, random_state: Optional[int] = None):
+        self.n_inducing = n_inducing
+        self.refit_growth = refit_growth
+        self.n_restarts_optimizer = n_restarts_optimizer
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+        n = len(y)
+        pkey = _params_key(self)
+        state = self._extend_recent(pkey, X, y)
+        if state is None:
+            state = self._fit_full(X, y)
+        _remember((pkey, n, state.x_digest, state.y_digest), state)
+        self.state_ = state
+        self._factorize()
+        return self
+
+    def _extend_recent(self, pkey: str, X: np.ndarray, y: np.ndarray) -> Optional[_SparseGPState]:
+        """A recent fit on a prefix of (X, y) extended by the remaining rows, if one applies."""
+        n = len(y)
+        x_digest, y_digest = _digest(X), _digest(y)
+        for prev in _recent_states(pkey):
+            if prev.n > n or n >= self.refit_growth * prev.n_hyper:
+                continue
+            if _digest(X[:prev.n]) != prev.x_digest or _digest(y[:prev.n]) != prev.y_digest:
+                continue
+            if prev.n == n:
+                return prev
+            Vk = solve_triangular(prev.Kmm_chol, prev.kernel(prev.Z, X[prev.n:]), lower=True)
+            yk = (y[prev.n:] - prev.y_mean) / prev.y_std
+            return _SparseGPState(
+                n=n, x_digest=x_digest, y_digest=y_digest, n_hyper=prev.n_hyper, kernel=prev.kernel,
+                noise=prev.noise, y_mean=prev.y_mean, y_std=prev.y_std, Z=prev.Z, Kmm_chol=prev.Kmm_chol,
+                A=prev.A + Vk @ Vk.T, b=prev.b + Vk @ yk,
+            )
+        return None
+
+    def _fit_full(self, X: np.ndarray, y: np.ndarray) -> _SparseGPState:
+        n, d = X.shape
+        rng = np.random.RandomState(self.random_state)
+        idx = np.sort(rng.choice(n, size=min(n, self.n_inducing), replace=False))
+        Z = X[idx]
+
+        kernel = (ConstantKernel(1.0, (0.01, 1000.0))
+                  * Matern(length_scale=np.ones(d), length_scale_bounds=[(0.01, 100)] * d, nu=2.5)
+                  + WhiteKernel(1e-2, (1e-6, 1.0)))
+        gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True,
+                                      n_restarts_optimizer=self.n_restarts_optimizer, random_state=rng)
+        gp.fit(Z, y[idx])
+        signal, white = gp.kernel_.k1, gp.kernel_.k2
+        y_mean, y_std = float(np.mean(y)), float(np.std(y)) or 1.0
+
+        Kmm = signal(Z)
+        L = np.linalg.cholesky(Kmm + 1e-8 * np.mean(np.diag(Kmm)) * np.eye(len(Z)))
+        V = solve_triangular(L, signal(Z, X), lower=True)
+        return _SparseGPState(
+            n=n, x_digest=_digest(X), y_digest=_digest(y), n_hyper=n, kernel=signal,
+            noise=max(float(white.noise_level), 1e-6), y_mean=y_mean, y_std=y_std, Z=Z,
+            Kmm_chol=L, A=V @ V.T, b=V @ ((y - y_mean) / y_std),
+        )
+
+    def _factorize(self) -> None:
+        # Whitened form: Sigma = noise I + V V^T has eigenvalues >= noise, so it factorizes
+        # even when points (or constant-liar copies of them) nearly coincide.
+        s = self.state_
+        self._Sigma_cho = cho_factor(s.noise * np.eye(len(s.b)) + s.A, lower=True)
+        self._alpha = cho_solve(self._Sigma_cho, s.b)
+
+    def predict(self, X, return_std=False):
+        s = self.state_
+        X = np.asarray(X, dtype=float)
+        V = solve_triangular(s.Kmm_chol, s.kernel(s.Z, X), lower=True)
+        mean = s.y_mean + s.y_std * (V.T @ self._alpha)
+        if not return_std:
+            return mean
+        # DTC variance: prior - Nystrom part + noise * v^T Sigma^-1 v
+        W = cho_solve(self._Sigma_cho, V)
+        var = s.kernel.diag(X) - np.sum(V * V, axis=0) + s.noise * np.sum(V * W, axis=0)
+        return mean, s.y_std * np.sqrt(np.clip(var, 1e-12, None))
+
+
+def make_surrogate(surrogate: str, search_space, random_state: Optional[int] = None, n_jobs: int = 1):
+    """The base_estimator for `surrogate` (one of SURROGATES), as passed to skopt's Optimizer."""
+    if surrogate not in SURROGATES:
+        raise ValueError(f"Unknown surrogate '{surrogate}'. Choose from {SURROGATES}.")
+    if surrogate == "gp":
+        return "GP"
+    if surrogate == "sparse_gp":
+        return SparseGPRegressor(random_state=random_state)
+    if surrogate == "gbrt":
+        return LazyRefit(QuantileGBRTRegressor(random_state=random_state))
+    est = cook_estimator(surrogate.upper(), space=search_space, random_state=random_state, n_jobs=n_jobs)
+    return LazyRefit(est)
+
+
+def make_optimizer(search_space, surrogate: str = "gp", random_state: Optional[int] = None,
+                   acq_func: str = "EI", n_jobs: int = 1, trust_region: bool = False,
+                   **optimizer_kwargs) -> Optimizer:
+    """
+    skopt Optimizer over search_space with the chosen surrogate. Non-GP surrogates have no
+    predictive gradients, so their acquisition is minimized by sampling; the sparse GP sees the
+    space normalized to [0, 1] like skopt's own GP. trust_region=True returns a
+    TrustRegionOptimizer (src/trust_region.py), whose surrogate only sees the points near its region.
+    """
+    base_estimator = make_surrogate(surrogate, search_space, random_state=random_state, n_jobs=n_jobs)
+    dimensions = list(search_space)
+    if surrogate != "gp":
+        optimizer_kwargs.setdefault("acq_optimizer", "sampling")
+    if surrogate == "sparse_gp":
+        dimensions = normalize_dimensions(dimensions)
+    optimizer_class = TrustRegionOptimizer if trust_region else Optimizer
+    return optimizer_class(dimensions=dimensions, base_estimator=base_estimator, acq_func=acq_func,
+                           random_state=random_state, n_jobs=n_jobs, **optimizer_kwargs)
+
+
+def _benchmark_objective(X: np.ndarray) -> np.ndarray:
+    """Smooth, mildly multimodal test function on the unit cube (minimized)."""
+    return np.sum((X - 0.3) ** 2, axis=1) + 0.1 * np.sin(6.0 * X[:, 0]) * np.cos(4.0 * X[:, 1])
+
+
+def benchmark_surrogates(sizes: Sequence[int] = (100, 1000, 10000),
+                         surrogates: Sequence[str] = SURROGATES,
+                         n_dims: int = 7,
+                         batch: int = 4,
+                         exact_gp_max: int = 2000,
+                         seed: int = 0) -> pd.DataFrame:
+    """
+    For each surrogate and history size n: tell n random points (cold_fit_s), then time one
+    loop iteration at that size — ask(batch) (ask_s) followed by telling the batch (tell_s).
+    The exact GP is skipped above exact_gp_max points.
+    """
+    rows: List[Dict[str, Any]] = []
+    space = [Real(0.0, 1.0, name=f"x{j}") for j in range(n_dims)]
+    rng = np.random.RandomState(seed)
+    for n in sizes:
+        X = rng.uniform(size=(n, n_dims))
+        y = _benchmark_objective(X)
+        for surrogate in surrogates:
+            row: Dict[str, Any] = {"surrogate": surrogate, "n_history": n}
+            if surrogate == "gp" and n > exact_gp_max:
+                rows.append({**row, "skipped": f"exact GP above {exact_gp_max} points"})
+                continue
+            clear_surrogate_states()
+            opt = make_optimizer(space, surrogate=surrogate, random_state=seed, n_initial_points=1)
+            t0 = time.perf_counter()
+            opt.tell(X.tolist(), y.tolist())
+            t1 = time.perf_counter()
+            asked = opt.ask(n_points=batch)
+            t2 = time.perf_counter()
+            opt.tell(asked, _benchmark_objective(np.asarray(asked)).tolist())
+            t3 = time.perf_counter()
+            rows.append({**row, "cold_fit_s": t1 - t0, "ask_s": t2 - t1, "tell_s": t3 - t2,
+                         "best_y": float(np.min(opt.yi))})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Time BO ask/tell per surrogate as the history grows.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--surrogates", nargs="+", default=list(SURROGATES), choices=SURROGATES)
+    ap.add_argument("--dims", type=int, default=7)
+    ap.add_argument("--batch", type=int, default=4, help="Points asked per iteration.")
+    ap.add_argument("--exact-gp-max", type=int, default=2000, help="Skip the exact GP above this history size.")
+    ap.add_argument("--out", default=None, help="Optional CSV path for the timings.")
+    args = ap.parse_args()
+
+    res = benchmark_surrogates(args.sizes, args.surrogates, n_dims=args.dims, batch=args.batch,
+                               exact_gp_max=args.exact_gp_max)
+    print(res.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.out:
+        res.to_csv(args.out, index=False)
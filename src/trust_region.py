@@ -0,0 +1,226 @@
+# src/trust_region.py
+"""
+Trust-region Bayesian optimization (TuRBO-1, Eriksson et al., 2019) for the larger search spaces.
+
+With every wt% column and the extra process levers the space has 15 dimensions. A global GP
+then needs many more points before its EI means anything, and its O(n^3) fit grows with the
+whole history. `TrustRegionOptimizer` is a drop-in skopt Optimizer that works inside one
+box-shaped region at a time instead:
+
+- the region is centred on the best point found in it. Its side is `length` in the unit cube,
+  stretched per dimension by the local GP's ARD length scales (keeping the box's volume)
+- after each told batch, a batch that improves on the region's best is a success and any other
+  batch a failure. `success_tolerance` successes in a row double the length (up to
+  `length_max`); `failure_tolerance` failures in a row halve it. The default failure tolerance
+  is ceil(max(4, d) / batch size), as in the paper
+- points told with update_region=False (candidates the materializer rejected) are recorded and
+  fitted but are not a batch: they leave the counters, the length and the region's best alone
+- once the length falls below `length_min` the region restarts at `length_init` around a random
+  point. The history is kept and the local GP of the new region uses it
+- the surrogate is fitted to the `max_local_points` observations nearest the centre only. A GP
+  starts from the previous fit's hyperparameters, without random restarts
+- batches are picked from `n_candidates` perturbations of the centre inside the box, with one of
+  src/batch_acquisition.py's strategies. Each candidate perturbs every dimension with
+  probability min(1, 20 / d)
+
+So a tell or an ask costs at most one fit on `max_local_points` points and one batch
+selection over `n_candidates`, however long the history grows. The region state is an attribute
+of the optimizer, so a checkpointed run resumes with it.
+"""
+from __future__ import annotations
+import math
+import warnings
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.utils import check_random_state
+from skopt import Optimizer
+
+from src.batch_acquisition import BATCH_STRATEGIES, select_batch
+
+
+@dataclass
+class TrustRegionState:
+    length: float
+    successes: int = 0
+    failures: int = 0
+    restarts: int = 0
+    best: float = math.inf            # best objective value observed in the current region
+    start: int = 0                    # index in Xi of the first point of the current region
+    center: Optional[List[float]] = None  # unit-cube centre of a restarted region, until it has data
+
+
+def _length_scales(model, n_dims: int) -> np.ndarray:
+    """The fitted ARD length scales of a GP surrogate; ones for other models or isotropic kernels."""
+    kernel = getattr(model, "kernel_", None)
+    if kernel is not None:
+        for name, value in kernel.get_params().items():
+            if name.endswith("length_scale") and np.ndim(value) == 1 and len(value) == n_dims:
+                return np.asarray(value, dtype=float)
+    return np.ones(n_dims)
+
+
+def _warm_started(est, previous):
+    """
+    est with its kernel hyperparameters started from those fitted by previous, and no optimizer
+    restarts. Only GP surrogates are touched.
+    """
+    fitted_kernel = getattr(previous, "kernel_", None)
+    params = est.get_params(deep=False)
+    if fitted_kernel is None or params.get("kernel") is None or "n_restarts_optimizer" not in params:
+        return est
+    fitted = {}
+    for name, value in fitted_kernel.get_params().items():
+        fitted.setdefault(name.rsplit("__", 1)[-1], value)
+    updates = {"n_restarts_optimizer": 0}
+    for name, value in est.kernel.get_params().items():
+        leaf = name.rsplit("__", 1)[-1]
+        if leaf in ("constant_value", "length_scale") and np.shape(fitted.get(leaf)) == np.shape(value):
+            updates[f"kernel__{name}"] = fitted[leaf]
+    return est.set_params(**updates)
+
+
+class TrustRegionOptimizer(Optimizer):
+    """skopt Optimizer with a TuRBO trust region (see the module docstring)."""
+
+    def __init__(self, dimensions, base_estimator="GP", n_initial_points: int = 10, random_state=None,
+                 length_init: float = 0.8, length_min: float = 0.5 ** 7, length_max: float = 1.6,
+                 success_tolerance: int = 3, failure_tolerance: Optional[int] = None,
+                 max_local_points: int = 200, n_candidates: int = 2000,
+                 batch_strategy: str = "kriging_believer", xi: float = 0.01, **optimizer_kwargs):
+        if batch_strategy not in BATCH_STRATEGIES:
+            raise ValueError(f"Unknown batch strategy '{batch_strategy}'. Choose from {BATCH_STRATEGIES}.")
+        optimizer_kwargs.setdefault("acq_optimizer", "sampling")
+        optimizer_kwargs.setdefault("model_queue_size", 1)
+        super().__init__(dimensions, base_estimator=base_estimator, n_initial_points=n_initial_points,
+                         random_state=random_state, **optimizer_kwargs)
+        self.length_init, self.length_min, self.length_max = length_init, length_min, length_max
+        self.success_tolerance = success_tolerance
+        self.failure_tolerance = failure_tolerance
+        self.max_local_points = max_local_points
+        self.n_candidates = n_candidates
+        self.batch_strategy = batch_strategy
+        self.xi = xi
+        self.state = TrustRegionState(length=length_init)
+        self._update_region_on_tell = True
+        self._local = np.arange(0)
+        self._box = None
+
+    # --- unit cube <-> the surrogate's transformed space ---
+    def _unit(self, Xt: np.ndarray) -> np.ndarray:
+        bounds = np.asarray(self.space.transformed_bounds, dtype=float)
+        return (Xt - bounds[:, 0]) / (bounds[:, 1] - bounds[:, 0])
+
+    def _from_unit(self, U: np.ndarray) -> np.ndarray:
+        bounds = np.asarray(self.space.transformed_bounds, dtype=float)
+        return bounds[:, 0] + U * (bounds[:, 1] - bounds[:, 0])
+
+    def _center(self, U: np.ndarray, y: np.ndarray) -> np.ndarray:
+        own = np.arange(self.state.start, len(y))
+        if len(own):
+            return U[own[np.argmin(y[own])]]
+        return np.asarray(self.state.center, dtype=float)
+
+    def _update_region(self, new_y: np.ndarray) -> None:
+        s = self.state
+        if np.isfinite(s.best) and len(new_y):
+            if new_y.min() < s.best - 1e-3 * abs(s.best):
+                s.successes, s.failures = s.successes + 1, 0
+            else:
+                s.successes, s.failures = 0, s.failures + 1
+            tolerance = self.failure_tolerance or math.ceil(max(4, self.space.n_dims) / len(new_y))
+            if s.successes >= self.success_tolerance:
+                s.length, s.successes = min(2.0 * s.length, self.length_max), 0
+            elif s.failures >= tolerance:
+                s.length, s.failures = s.length / 2.0, 0
+        if len(new_y):
+            s.best = min(s.best, float(new_y.min()))
+        if s.length < self.length_min:
+            self.state = TrustRegionState(length=self.length_init, restarts=s.restarts + 1, start=len(self.yi),
+                                          center=self.rng.uniform(size=self.space.n_dims).tolist())
+
+    def tell(self, x, y, fit=True, update_region: bool = True):
+        """skopt's tell(); update_region=False keeps the points out of the region's success/failure count."""
+        self._update_region_on_tell = update_region
+        try:
+            return super().tell(x, y, fit=fit)
+        finally:
+            self._update_region_on_tell = True
+
+    def _tell(self, x, y, fit=True):
+        n_before = len(self.yi)
+        super()._tell(x, y, fit=False)
+        if getattr(self, "_update_region_on_tell", True):  # checkpoints from before the flag lack it
+            self._update_region(np.asarray(self.yi[n_before:], dtype=float))
+        if fit and self._n_initial_points <= 0 and self.base_estimator_ is not None:
+            Xt = np.asarray(self.space.transform(self.Xi), dtype=float)
+            yi = np.asarray(self.yi, dtype=float)
+            U = self._unit(Xt)
+            center = self._center(U, yi)
+            local = np.argsort(np.linalg.norm(U - center, axis=1), kind="stable")[: self.max_local_points]
+            est = clone(self.base_estimator_)
+            if self.models:
+                est = _warm_started(est, self.models[-1])
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                est.fit(Xt[local], yi[local])
+            self.models.append(est)
+            if self.max_model_queue_size is not None:
+                del self.models[: -self.max_model_queue_size]
+            weights = _length_scales(est, self.space.n_dims)
+            weights = weights / weights.mean()
+            weights = weights / np.prod(weights) ** (1.0 / len(weights))
+            half = weights * self.state.length / 2.0
+            self._local = local
+            self._box = (np.clip(center - half, 0.0, 1.0), np.clip(center + half, 0.0, 1.0), center)
+        return self.get_result()
+
+    def region_mask(self, Xt: np.ndarray) -> Optional[np.ndarray]:
+        """Which rows of Xt (transformed points) lie in the current region; None before the first fit."""
+        if self._box is None:
+            return None
+        lo, hi, _ = self._box
+        U = self._unit(np.asarray(Xt, dtype=float))
+        return ((U >= lo - 1e-12) & (U <= hi + 1e-12)).all(axis=1)
+
+    def _candidates(self, rng: np.random.RandomState) -> np.ndarray:
+        lo, hi, center = self._box
+        d = len(center)
+        perturb = rng.uniform(size=(self.n_candidates, d)) <= min(1.0, 20.0 / d)
+        none = ~perturb.any(axis=1)
+        perturb[none, rng.randint(d, size=int(none.sum()))] = True
+        U = np.where(perturb, lo + (hi - lo) * rng.uniform(size=(self.n_candidates, d)), center)
+        return self._from_unit(U)
+
+    def propose(self, n: int, strategy: Optional[str] = None, random_state=None,
+                pending: Optional[List[List[float]]] = None) -> List[List[float]]:
+        """
+        n points from the current region, picked with strategy (default: batch_strategy; "ask"
+        also means batch_strategy). Random points of the whole space until a model is fitted.
+        pending are points still being evaluated (see select_batch).
+        """
+        if n <= 0:
+            return []
+        rng = check_random_state(self.rng if random_state is None else random_state)
+        if not self.models or self._box is None:
+            return self.space.rvs(n_samples=n, random_state=rng)
+        strategy = self.batch_strategy if strategy in (None, "ask") else strategy
+        Xt = np.asarray(self.space.transform(self.Xi), dtype=float)[self._local]
+        yi = np.asarray(self.yi, dtype=float)[self._local]
+        pool = self._candidates(rng)
+        pending_t = np.asarray(self.space.transform(pending), dtype=float) if pending else None
+        picks = select_batch(self.models[-1], self.space, pool, Xt, yi, n, strategy, self.xi, rng, pending_t)
+        return [list(p) for p in self.space.inverse_transform(pool[picks])]
+
+    def ask(self, n_points=None, strategy="cl_min"):
+        """skopt's ask(), answered from the trust region (`strategy` is ignored: see propose)."""
+        if n_points is None:
+            return self.propose(1)[0]
+        return self.propose(n_points)
+
+    def stats(self) -> Dict[str, Any]:
+        s = asdict(self.state)
+        s.pop("center")
+        return {**s, "best": None if not np.isfinite(s["best"]) else s["best"], "local_points": len(self._local)}
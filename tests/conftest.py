@@ -0,0 +1,70 @@
+# tests/conftest.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import json
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+@pytest.fixture(autouse=True)
+def no_evaluation_cache(monkeypatch):
+    """
+    Tests run without the evaluation cache (src/evaluation_cache.py), which is on by default and would
+    write results/cache/evaluations.sqlite into the working tree. Tests of the cache turn it back on.
+    """
+    monkeypatch.setenv("EVAL_CACHE", "0")
+
+class ClosedLoop:
+    """
+    main_orchestrator with the agent replaced by an offline stand-in scoring rows with weight_fn
+    and results written to tmp_path. `calls` records (run_identifier, rows) per agent call.
+    """
+
+    def __init__(self, mo, results_dir: Path, goals: dict):
+        self.mo = mo
+        self.results_dir = results_dir
+        self.goals = goals
+        self.calls = []
+
+    def set_weights(self, weight_fn) -> None:
+        """weight_fn(predictions_df, run_identifier) -> recommended_bo_weight (may also sleep or raise)."""
+        def fake_agent(predictions_df, process_vars, targets_constraints, out_dir, run_identifier):
+            weights = weight_fn(predictions_df, run_identifier)
+            self.calls.append((run_identifier, len(predictions_df)))
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+            return predictions_df.assign(recommended_bo_weight=weights)
+        self.mo.evaluate_with_agent = fake_agent
+
+    def run(self, **kwargs):
+        """run_optimization_loop on the compostable goals, without the prediction cache; a resumed run keeps its own settings."""
+        if "resume" not in kwargs:
+            kwargs.setdefault("goals", self.goals)
+        kwargs.setdefault("use_prediction_cache", False)
+        return self.mo.run_optimization_loop(**kwargs)
+
+    def summaries(self):
+        """The run summaries written so far, oldest first."""
+        paths = sorted((self.results_dir / "summaries").glob("summary_*.json"), key=lambda p: p.stat().st_mtime)
+        return [json.loads(p.read_text()) for p in paths]
+
+
+@pytest.fixture
+def closed_loop(tmp_path: Path, monkeypatch):
+    """
+    Factory for an offline closed loop: closed_loop(weight_fn) patches the agent call, seeds the
+    initial DOE with 0 (it is seeded from the run timestamp otherwise) and sets RESULTS_DIR to tmp_path.
+    """
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import src.main_orchestrator as mo
+    doe = mo.generate_doe_candidates
+    monkeypatch.setattr(mo, "evaluate_with_agent", mo.evaluate_with_agent)  # restored after the test
+    monkeypatch.setattr(mo, "generate_doe_candidates", lambda **kw: doe(**{**kw, "seed": 0}))
+    monkeypatch.setenv("RESULTS_DIR", str(tmp_path))
+    goals = json.loads((PROJECT_ROOT / "configs/goals/compostable.json").read_text())
+
+    def make(weight_fn) -> ClosedLoop:
+        loop = ClosedLoop(mo, tmp_path, goals)
+        loop.set_weights(weight_fn)
+        return loop
+    return make
@@ -0,0 +1,115 @@
+# tests/test_async_bo.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+import threading
+import time
+
+import numpy as np
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def test_run_async_keeps_workers_busy_and_tells_in_completion_order(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.async_bo import AsyncState, run_async
+    latency = {0: 0.30, 1: 0.05, 2: 0.10}  # then 0.02 s each
+    lock = threading.Lock()
+    running, peak, asked_with, told = [0], [0], [], []
+
+    def propose(seqs, pending):
+        asked_with.append((list(seqs), len(pending)))
+        return [[float(s)] for s in seqs]
+
+    def start(seq, point):
+        def call():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(latency.get(seq, 0.02))
+            with lock:
+                running[0] -= 1
+            return point[0] * 10
+        return call
+
+    def on_result(seq, point, result):
+        told.append(seq)
+        assert result == point[0] * 10
+        return False
+
+    state = AsyncState()
+    run_async(state, budget=8, workers=3, propose=propose, start=start, on_result=on_result)
+    assert state.asked == state.told == 8 and not state.in_flight
+    assert peak[0] == 3
+    assert asked_with[0] == ([0, 1, 2], 0)
+    # The slow first candidate does not hold the others up: replacements go out with 2 pending.
+    assert all(n == 2 for _, n in asked_with[1:]) and told.index(0) > told.index(3)
+    assert sorted(told) == list(range(8))
+
+def test_run_async_stops_asking_but_drains_in_flight(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.async_bo import AsyncState, run_async
+    state = AsyncState(in_flight={5: [5.0]}, asked=6, told=5)  # e.g. restored from a checkpoint
+    told = []
+    run_async(state, budget=20, workers=2,
+              propose=lambda seqs, pending: [[float(s)] for s in seqs],
+              start=lambda seq, point: (lambda: seq),
+              on_result=lambda seq, point, result: told.append(result) or len(told) >= 2)
+    assert told[0] in (5, 6) and len(told) == 3  # 5 and 6 in flight when the stop came, then one more
+    assert state.told == 8 and state.asked == 8 and not state.in_flight
+
+def test_spent_budget_is_not_reported_as_infeasible(project_root: Path, capsys):
+    sys.path.insert(0, str(project_root))
+    from src.async_bo import AsyncState, run_async
+    state, told = AsyncState(), []
+    run_async(state, budget=20, workers=2,
+              propose=lambda seqs, pending: [[float(s)] for s in seqs] if seqs[0] < 3 else None,
+              start=lambda seq, point: (lambda: seq),
+              on_result=lambda seq, point, result: told.append(result))
+    assert sorted(told) == [0, 1, 2] and state.asked == 3 and not state.in_flight
+    assert "no feasible candidate" not in capsys.readouterr().out
+
+def test_pending_points_are_fantasized(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt import Optimizer
+    from skopt.space import Real
+    from src.batch_acquisition import propose_batch
+    space = [Real(0.0, 1.0, name=f"x{j}") for j in range(3)]
+    opt = Optimizer(space, random_state=0, n_initial_points=5)
+    rng = np.random.RandomState(0)
+    X = rng.uniform(size=(12, 3)).tolist()
+    opt.tell(X, [float(np.sum((np.asarray(x) - 0.4) ** 2)) for x in X])
+    for strategy in ("kriging_believer", "constant_liar", "local_penalization"):
+        (first,) = propose_batch(opt, 1, strategy, random_state=0)
+        (again,) = propose_batch(opt, 1, strategy, random_state=0, pending=[first])
+        assert np.linalg.norm(np.subtract(first, again)) > 1e-3, strategy
+
+def test_async_run_resumes_its_in_flight_candidates(tmp_path: Path, closed_loop):
+    from src.optimizer_checkpoint import checkpoint_path, load_checkpoint
+
+    def flaky_weights(predictions_df, run_identifier):
+        if run_identifier.endswith("iter_02_cand_02"):
+            raise RuntimeError("agent process killed")
+        if "iter_01_cand_01" in run_identifier:
+            time.sleep(0.2)  # the slowest of the first batch
+        return np.clip(predictions_df["sigma_y_MPa"] / 40.0, 0, 1)
+
+    loop = closed_loop(flaky_weights)
+    with pytest.raises(RuntimeError, match="killed"):
+        loop.run(max_iterations=3, n_initial_points=20, seed=0, candidate_workers=2, async_evaluations=True)
+    (ckpt_file,) = (tmp_path / "checkpoints").glob("run_*.pkl")
+    run_id = ckpt_file.stem[len("run_"):]
+    ckpt = load_checkpoint(checkpoint_path(tmp_path, run_id))
+    assert ckpt.async_state.in_flight and not ckpt.finished
+    n_doe = len(ckpt.optimizer.yi) - ckpt.async_state.told
+
+    loop.set_weights(lambda predictions_df, run_identifier: flaky_weights(predictions_df, run_identifier + "_retry"))
+    summary = loop.run(max_iterations=3, n_initial_points=20, resume=run_id, candidate_workers=2)
+    ckpt = load_checkpoint(checkpoint_path(tmp_path, run_id))
+    assert ckpt.finished and summary["async"] == {"asked": 12, "told": 12}
+    assert len(ckpt.optimizer.yi) == n_doe + 12 and ckpt.iterations_done == 3
+    evaluated = list((tmp_path / "compounded").glob("run_*_iter_*_evaluated.csv"))
+    assert len(evaluated) == 12
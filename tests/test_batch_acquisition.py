@@ -0,0 +1,85 @@
+# tests/test_batch_acquisition.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _objective(X: np.ndarray) -> np.ndarray:
+    return (X[:, 0] - 6.0) ** 2 / 40.0 + (X[:, 1] - 215.0) ** 2 / 400.0 + np.sin(X[:, 2])
+
+@pytest.fixture
+def fitted_optimizer(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    from src.surrogates import make_optimizer
+
+    def build(surrogate: str = "gp"):
+        space = [Real(0.0, 20.0, name="filler_wtpct"), Real(200.0, 240.0, name="Tm_C"), Real(2.5, 8.33, name="N_rps")]
+        opt = make_optimizer(space, surrogate=surrogate, random_state=3, n_initial_points=5)
+        rng = np.random.RandomState(4)
+        X = np.column_stack([rng.uniform(d.low, d.high, size=20) for d in space])
+        opt.tell(X.tolist(), _objective(X).tolist())
+        return opt
+    return build
+
+def _mean_pairwise_distance(points, space) -> float:
+    X = np.asarray(space.transform(points), dtype=float)
+    d = np.linalg.norm(X[:, None, :] - X[None, :, :], axis=-1)
+    return float(d[np.triu_indices(len(X), 1)].mean())
+
+@pytest.mark.parametrize("strategy", ["kriging_believer", "constant_liar", "local_penalization"])
+def test_batch_is_diverse_in_bounds_and_side_effect_free(fitted_optimizer, strategy: str):
+    """
+    A 16-point batch is in bounds, distinct and (with fantasy updates) more spread out than simply
+    taking the 16 best pool points by EI, and proposing it does not touch the optimizer's data.
+    """
+    from src.batch_acquisition import candidate_pool, expected_improvement, propose_batch
+    opt = fitted_optimizer()
+    Xi, yi = list(opt.Xi), list(opt.yi)
+
+    batch = propose_batch(opt, 16, strategy=strategy, n_candidates=2000, random_state=0)
+    assert len(batch) == 16
+    assert len({tuple(np.round(p, 9)) for p in batch}) == 16
+    for point in batch:
+        assert all(d.low <= v <= d.high for d, v in zip(opt.space.dimensions, point))
+    assert opt.Xi == Xi and opt.yi == yi
+    assert propose_batch(opt, 16, strategy=strategy, n_candidates=2000, random_state=0) == batch
+
+    # Naive top-16 by EI from an identical pool clusters around a single optimum.
+    pool = candidate_pool(opt.space, np.asarray(opt.space.transform(Xi)), np.asarray(yi), 2000,
+                          np.random.RandomState(0))
+    mu, std = opt.models[-1].predict(pool, return_std=True)
+    top = pool[np.argsort(-expected_improvement(mu, std, min(yi)))[:16]]
+    naive = opt.space.inverse_transform(top)
+    spread, naive_spread = _mean_pairwise_distance(batch, opt.space), _mean_pairwise_distance(naive, opt.space)
+    if strategy == "local_penalization":
+        assert spread >= naive_spread
+    else:
+        assert spread > naive_spread
+
+def test_fantasy_updates_keep_gp_hyperparameters(fitted_optimizer):
+    from src.batch_acquisition import _fantasy_estimator
+    opt = fitted_optimizer()
+    gp = opt.models[-1]
+    X = np.asarray(opt.space.transform(opt.Xi))
+    y = np.asarray(opt.yi)
+    fant = _fantasy_estimator(gp).fit(np.vstack([X, X[:1] * 0.5]), np.append(y, y.min()))
+    np.testing.assert_allclose(fant.kernel_.theta, gp.kernel_.theta)
+    # Refitting the frozen copy on the same data reproduces the original predictions.
+    same = _fantasy_estimator(gp).fit(X, y)
+    np.testing.assert_allclose(same.predict(X[:5]), gp.predict(X[:5]), rtol=1e-8)
+
+@pytest.mark.parametrize("surrogate", ["rf", "sparse_gp"])
+def test_batch_works_with_other_surrogates(fitted_optimizer, surrogate: str):
+    from src.batch_acquisition import propose_batch
+    opt = fitted_optimizer(surrogate)
+    batch = propose_batch(opt, 8, strategy="local_penalization" if surrogate == "rf" else "kriging_believer",
+                          n_candidates=1000, random_state=1)
+    assert len(batch) == 8 and len({tuple(p) for p in batch}) == 8
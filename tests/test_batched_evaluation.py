@@ -0,0 +1,73 @@
+# tests/test_batched_evaluation.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import json
+import sys
+
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _scores(sample_id, weight=0.5, **overrides):
+    return {"sample_id": sample_id, "literature_consistency_score": 0.9, "realism_penalty": 0.8,
+            "recommended_bo_weight": weight, "confidence": "High", "confidence_factor": 1.0, **overrides}
+
+def test_batched_response_items_are_validated_one_by_one(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.run_evaluator_with_adk import _split_batch_scores
+    text = json.dumps({"results": [_scores("1"), _scores("2", realism_penalty=2.0), _scores("9"), _scores("4", 0.7)]})
+    scores, errors, raw = _split_batch_scores("ok", f"```json\n{text}\n```", ["1", "2", "3", "4"])
+    assert set(scores) == {"1", "4"} and raw == text
+    assert scores["4"]["recommended_bo_weight"] == 0.7
+    assert "realism_penalty" in errors["2"] and "No scores" in errors["3"] and "9" not in errors
+    keyed = json.dumps({"results": {"3": {k: v for k, v in _scores("x").items() if k != "sample_id"}}})
+    assert set(_split_batch_scores("ok", keyed, ["3"])[0]) == {"3"}
+    scores, errors, _ = _split_batch_scores("err", "Timeout after 10s", ["1", "2"])
+    assert not scores and set(errors) == {"1", "2"}
+
+def test_rows_are_packed_into_batches_with_single_call_fallback(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    from google.adk.agents import BaseAgent
+    from google.adk.events import Event
+    from google.genai.types import Content, Part
+    import src.agent_eval_helpers as helpers
+    from src.run_evaluator_with_adk import EvaluatorClient
+    requests = []
+
+    class Agent(BaseAgent):
+        async def _run_async_impl(self, ctx):
+            payload = json.loads(ctx.user_content.parts[0].text)
+            if "candidates" in payload:
+                ids = [c["sample_id"] for c in payload["candidates"]]
+                requests.append(ids)
+                # Drops row 1 and scores row 4 out of range; the others are fine.
+                body = {"results": [_scores(s, 0.1 * int(s), realism_penalty=1.5 if s == "4" else 0.8)
+                                    for s in ids if s != "1"]}
+            else:
+                requests.append(payload["sample_id"])
+                body = _scores(payload["sample_id"], 0.1 * int(payload["sample_id"]))
+            yield Event(author=self.name, invocation_id=ctx.invocation_id,
+                        content=Content(role="model", parts=[Part(text=json.dumps(body))]))
+
+    monkeypatch.setattr(helpers, "BASELINE_MODEL", None)
+    monkeypatch.setenv("EVAL_CACHE", "0")
+    df = pd.DataFrame({"E_GPa": [1.0 + k for k in range(7)], "elastomer_wtpct": 10.0})
+    out_dir = tmp_path / "run_agent"
+    with EvaluatorClient(agent=Agent(name="scripted")) as client:
+        evaluated = helpers.evaluate_with_agent(df, {"Tm_C": 220.0}, {"E_GPa": {"min": 1.5}}, str(out_dir), "run",
+                                                batch_size=3, concurrency=2, client=client)
+    batches = [r for r in requests if isinstance(r, list)]
+    singles = sorted(r for r in requests if isinstance(r, str))
+    assert batches == [["0", "1", "2"], ["3", "4", "5"]] or batches == [["3", "4", "5"], ["0", "1", "2"]]
+    assert singles == ["1", "4", "6"]  # the two fallbacks and the lone last row
+    assert list(evaluated["evaluation_status"]) == ["success"] * 7
+    assert list(evaluated["recommended_bo_weight"]) == pytest.approx([0.1 * k for k in range(7)])
+    assert all((out_dir / f"row_{k:04d}" / "scores.json").exists() for k in range(7))
+    batch_dir = out_dir / "batch_0000_0002"
+    request = json.loads((batch_dir / "batch_request.json").read_text())
+    assert request["targets_constraints"] == {"E_GPa": {"min": 1.5}} and len(request["candidates"]) == 3
+    assert set(json.loads((out_dir / "batch_0003_0005" / "item_errors.json").read_text())) == {"4"}
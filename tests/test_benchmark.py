@@ -0,0 +1,69 @@
+# tests/test_benchmark.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def test_stage_profiler_accumulates_across_threads(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.stage_profiler import StageProfiler
+    prof = StageProfiler()
+
+    def work(n):
+        with prof.stage("evaluation", items=n):
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        list(ex.map(work, [1, 2, 3, 4]))
+    with pytest.raises(RuntimeError):
+        with prof.stage("tell"):
+            raise RuntimeError("boom")
+
+    report = prof.report()
+    assert list(report) == ["evaluation", "tell"]
+    assert report["evaluation"]["calls"] == 4 and report["evaluation"]["items"] == 10
+    assert report["evaluation"]["wall_s"] >= 0.04 and report["evaluation"]["max_s"] >= 0.01
+    assert report["tell"]["calls"] == 1  # a failing stage is still timed
+
+def test_compare_to_baseline_flags_slowdowns_and_changed_work(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.benchmark import compare_to_baseline
+
+    def report(ask_s, tell_items=20, peak=300.0):
+        return {"settings": {"seed": 0}, "peak_rss_mb": peak, "stages": {
+            "ask": {"calls": 3, "items": 12, "wall_s": ask_s},
+            "tell": {"calls": 4, "items": tell_items, "wall_s": 0.01},
+        }}
+
+    base = report(1.0)
+    assert compare_to_baseline(report(1.3), base) == []      # within 50%
+    assert compare_to_baseline(report(0.1), report(0.01)) == []  # below the absolute floor
+    (problem,) = compare_to_baseline(report(2.0), base)
+    assert problem.startswith("ask: 2.000s") and "+100%" in problem
+    (problem,) = compare_to_baseline(report(1.0, tell_items=24), base)
+    assert "tell: 4 calls / 24 items" in problem
+    assert "peak RSS" in compare_to_baseline(report(1.0, peak=600.0), base)[0]
+
+def test_offline_benchmark_is_reproducible(project_root: Path, tmp_path: Path):
+    """Same seed, same candidates and scores; every stage of the loop is reported."""
+    sys.path.insert(0, str(project_root))
+    from src.benchmark import run_benchmark
+    first = run_benchmark(iterations=1, initial_points=8, seed=3, out_dir=str(tmp_path / "a"))
+    second = run_benchmark(iterations=1, initial_points=8, seed=3, out_dir=str(tmp_path / "b"))
+
+    stages = first["stages"]
+    assert {"doe", "bridge", "evaluation", "ask", "tell", "checkpoint", "plotting", "tidy"} <= set(stages)
+    assert stages["evaluation"]["items"] == first["agent_evaluations"]
+    assert stages["ask"]["items"] == 4 and stages["tell"]["calls"] == 2
+    assert second["best_score"] == pytest.approx(first["best_score"])
+    assert {k: (v["calls"], v["items"]) for k, v in second["stages"].items()} == \
+           {k: (v["calls"], v["items"]) for k, v in stages.items()}
+    # The stand-in evaluator leaves scores.json per row, like the agent.
+    assert list((tmp_path / "a" / "compounded").glob("*_agent/row_*/scores.json"))
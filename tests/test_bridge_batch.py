@@ -0,0 +1,350 @@
+# tests/test_bridge_batch.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def doe_df(project_root: Path) -> pd.DataFrame:
+    """A small mixed DOE covering mineral, fiber and bio-based fillers."""
+    sys.path.insert(0, str(project_root))
+    from src.formulation_doe_generator_V1 import generate_formulation_doe
+    lib = str(project_root / "data/processed/ingredient_library.json")
+    frames = [generate_formulation_doe(n=10, seed=seed, ingredient_library=lib, focus=focus)
+              for seed, focus in [(1, "none"), (2, "bio-based"), (3, "biopolyester")]]
+    return pd.concat(frames, ignore_index=True)
+
+def test_batch_matches_per_row(project_root: Path, doe_df: pd.DataFrame):
+    """
+    Verifies that predict_properties_batch reproduces compute_row_properties for every row.
+    """
+    from src.bridge_formulations_to_properties import (
+        PROP_FIELDS, compute_row_properties, load_ingredient_catalog, predict_properties_batch, read_json,
+    )
+    model = read_json(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json")
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+
+    scalar = pd.DataFrame([compute_row_properties(r, model, catalog, dict(process)) for _, r in doe_df.iterrows()])
+    batch = predict_properties_batch(doe_df, model, catalog, process)
+
+    assert list(batch.columns) == PROP_FIELDS
+    for col in PROP_FIELDS:
+        if col == "Shrink_pct":
+            assert batch[col].isna().all()
+            continue
+        np.testing.assert_allclose(batch[col].to_numpy(), scalar[col].astype(float).to_numpy(), rtol=1e-12, err_msg=col)
+
+def test_bridge_cli_writes_predictions(tmp_path: Path, project_root: Path, doe_df: pd.DataFrame):
+    """
+    Runs the bridge script end to end and checks the output columns and row count.
+    """
+    doe_csv = tmp_path / "doe.csv"
+    out_csv = tmp_path / "props.csv"
+    process_json = tmp_path / "process.json"
+    doe_df.to_csv(doe_csv, index=False)
+    process_json.write_text(json.dumps({"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}))
+
+    cmd = [
+        sys.executable, "src/bridge_formulations_to_properties.py",
+        "--doe", str(doe_csv),
+        "--out", str(out_csv),
+        "--model", "data/processed/pp_elastomer_TSE_hybrid_model_v1.json",
+        "--ingredient-library", "data/processed/ingredient_library.json",
+        "--process", str(process_json),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=project_root)
+    assert result.returncode == 0, f"Bridge failed with error:\n{result.stderr}"
+
+    out = pd.read_csv(out_csv)
+    assert len(out) == len(doe_df)
+    for col in ["E_GPa", "MFI_g10min", "HDT_C", "tau_s", "pvac_bar_abs"]:
+        assert col in out.columns, f"Expected column '{col}' is missing."
+    assert out["E_GPa"].notna().all()
+
+def test_in_process_predictor_matches_bridge_cli(tmp_path: Path, project_root: Path, doe_df: pd.DataFrame):
+    """
+    Verifies that the warm in-process predictor writes the same props CSV as the bridge script.
+    """
+    from src.property_predictor import PropertyPredictor
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+    doe_csv = tmp_path / "doe.csv"
+    cli_csv = tmp_path / "props_cli.csv"
+    process_json = tmp_path / "process.json"
+    doe_df.to_csv(doe_csv, index=False)
+    process_json.write_text(json.dumps(process))
+    subprocess.run([
+        sys.executable, "src/bridge_formulations_to_properties.py",
+        "--doe", str(doe_csv), "--out", str(cli_csv), "--process", str(process_json),
+        "--model", "data/processed/pp_elastomer_TSE_hybrid_model_v1.json",
+        "--ingredient-library", "data/processed/ingredient_library.json",
+    ], check=True, capture_output=True, cwd=project_root)
+
+    predictor = PropertyPredictor()
+    inproc_csv = tmp_path / "props_inproc.csv"
+    out = predictor.predict(doe_df, process, output_path=inproc_csv)
+
+    assert predictor.n_calls == 1 and predictor.n_rows == len(doe_df)
+    assert (tmp_path / "bridge_run_metadata.json").exists()
+    pd.testing.assert_frame_equal(pd.read_csv(inproc_csv), pd.read_csv(cli_csv))
+    assert list(out.columns) == list(pd.read_csv(cli_csv).columns)
+
+def test_hybrid_model_layout_and_hash(project_root: Path):
+    """
+    Checks the compiled parameter set against the dict merge, and that the hash tracks content.
+    """
+    import copy
+    from src.bridge_formulations_to_properties import HybridModel, model_params, read_json
+    spec = read_json(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json")
+    hm = HybridModel(spec)
+
+    assert model_params(hm) == model_params(spec)
+    assert hm["kD"] == pytest.approx(0.425)
+    assert not hm.values.flags.writeable
+    with pytest.raises(AttributeError):
+        hm.values = np.zeros(3)
+
+    assert HybridModel(copy.deepcopy(spec)).content_hash == hm.content_hash
+    tweaked = copy.deepcopy(spec)
+    tweaked["parameters"]["priors"]["kD"] = [0.05, 0.9]
+    assert HybridModel(tweaked).content_hash != hm.content_hash
+
+    # The model keeps its own copy: editing the caller's dict changes neither its priors nor its hash.
+    spec["parameters"]["priors"]["kD"] = [0.05, 0.9]
+    assert hm.spec["parameters"]["priors"]["kD"] != [0.05, 0.9] and hm.content_hash == HybridModel(hm.spec).content_hash
+
+    del tweaked["parameters"]["priors"]["kD"]
+    with pytest.raises(ValueError, match="kD"):
+        HybridModel(tweaked)
+
+def test_streaming_chunks_match_single_batch(tmp_path: Path, project_root: Path, doe_df: pd.DataFrame):
+    """
+    Streams the DOE in small batches (and under a tiny memory ceiling) and checks the output
+    is identical to predicting it in one batch.
+    """
+    from src.bridge_formulations_to_properties import (
+        HybridModel, load_ingredient_catalog, read_json, stream_predictions,
+    )
+    model = HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    doe_csv = tmp_path / "doe.csv"
+    doe_df.to_csv(doe_csv, index=False)
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+
+    whole = stream_predictions(str(doe_csv), str(tmp_path / "whole.csv"), model, catalog, process, progress=False)
+    chunked = stream_predictions(str(doe_csv), str(tmp_path / "chunked.csv"), model, catalog, process,
+                                 chunk_size=7, progress=False)
+    capped = stream_predictions(str(doe_csv), str(tmp_path / "capped.csv"), model, catalog, process,
+                                max_memory_mb=0.001, progress=False)
+
+    assert whole["chunks"] == 1 and chunked["chunks"] == -(-len(doe_df) // 7)
+    assert capped["chunk_size"] < len(doe_df)
+    expected = (tmp_path / "whole.csv").read_text()
+    assert (tmp_path / "chunked.csv").read_text() == expected
+    assert (tmp_path / "capped.csv").read_text() == expected
+
+    stream_predictions(str(doe_csv), str(tmp_path / "out.parquet"), model, catalog, process,
+                       chunk_size=7, fmt="parquet", progress=False)
+    parquet = pd.read_parquet(tmp_path / "out.parquet")
+    csv = pd.read_csv(tmp_path / "whole.csv")
+    assert list(parquet.columns) == list(csv.columns) and len(parquet) == len(csv)
+    assert csv["E_GPa"].notna().all()
+    np.testing.assert_allclose(parquet["E_GPa"].to_numpy(), csv["E_GPa"].to_numpy())
+
+def test_arrow_schema_survives_a_failed_first_batch(tmp_path: Path, project_root: Path, doe_df: pd.DataFrame,
+                                                    monkeypatch):
+    """A first batch predicted as all-NaN must not fix the prediction columns to a null type."""
+    import pyarrow as pa
+    import src.bridge_formulations_to_properties as bridge
+    model = bridge.HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = bridge.load_ingredient_catalog(bridge.read_json(project_root / "data/processed/ingredient_library.json"))
+    doe_csv = tmp_path / "doe.csv"
+    doe_df.to_csv(doe_csv, index=False)
+    batch, calls = bridge.predict_properties_batch, []
+    def fails_first(df, *args, **kw):
+        calls.append(len(df))
+        if len(calls) == 1:
+            raise RuntimeError("batch failed")
+        return batch(df, *args, **kw)
+    monkeypatch.setattr(bridge, "predict_properties_batch", fails_first)
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+    bridge.stream_predictions(str(doe_csv), str(tmp_path / "out.arrow"), model, catalog, process,
+                              chunk_size=7, fmt="arrow", progress=False, mc_samples=8, mc_seed=0)
+    with pa.memory_map(str(tmp_path / "out.arrow")) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert table.num_rows == len(doe_df)
+    assert all(table.schema.field(c).type == pa.float64() for c in bridge.PROP_FIELDS + bridge.mc_columns())
+    out = table.to_pandas()
+    assert out.loc[:6, bridge.PROP_FIELDS].isna().all().all() and out.loc[7:, "E_GPa"].notna().all()
+
+def test_streaming_keeps_the_layout_when_a_batch_fails(tmp_path: Path, project_root: Path, doe_df: pd.DataFrame,
+                                                      monkeypatch):
+    """
+    A batch whose uncertainty propagation or sensitivities fail still writes every column (as
+    NaN), so the rows appended after the first batch's CSV header stay under the right columns.
+    """
+    import src.bridge_formulations_to_properties as bridge
+    model = bridge.HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = bridge.load_ingredient_catalog(bridge.read_json(project_root / "data/processed/ingredient_library.json"))
+    doe_csv = tmp_path / "doe.csv"
+    doe_df.to_csv(doe_csv, index=False)
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+    kwargs = dict(process_cfg=process, chunk_size=7, progress=False, mc_samples=16, mc_seed=0, jacobian=True)
+    bridge.stream_predictions(str(doe_csv), str(tmp_path / "ok.csv"), model, catalog, **kwargs)
+
+    def fails_on_call(fn, k):
+        calls = []
+        def flaky(df, *args, **kw):
+            calls.append(len(df))
+            if len(calls) == k:
+                raise RuntimeError("batch failed")
+            return fn(df, *args, **kw)
+        return flaky
+    monkeypatch.setattr(bridge, "predict_properties_mc", fails_on_call(bridge.predict_properties_mc, 2))
+    monkeypatch.setattr(bridge, "predict_jacobian", fails_on_call(bridge.predict_jacobian, 3))
+    bridge.stream_predictions(str(doe_csv), str(tmp_path / "flaky.csv"), model, catalog, **kwargs)
+
+    ok, flaky = pd.read_csv(tmp_path / "ok.csv"), pd.read_csv(tmp_path / "flaky.csv")
+    assert ok[bridge.mc_columns() + bridge.jacobian_columns()].notna().all().all()
+    assert list(flaky.columns) == list(ok.columns) and len(flaky) == len(doe_df)
+    mc_failed, jac_failed = flaky.index[7:14], flaky.index[14:21]
+    assert flaky.loc[mc_failed, bridge.mc_columns()].isna().all().all()
+    assert flaky.loc[jac_failed, bridge.jacobian_columns()].isna().all().all()
+    rest = flaky.columns.difference(bridge.mc_columns() + bridge.jacobian_columns())
+    pd.testing.assert_frame_equal(flaky[rest], ok[rest])
+    pd.testing.assert_frame_equal(flaky.drop(mc_failed.union(jac_failed)), ok.drop(mc_failed.union(jac_failed)))
+
+def test_monte_carlo_uncertainty(project_root: Path, doe_df: pd.DataFrame):
+    """
+    Collapsed priors reproduce the point prediction with zero spread; real priors give
+    seeded, ordered quantiles around it.
+    """
+    import copy
+    from src.bridge_formulations_to_properties import (
+        MC_FIELDS, HybridModel, load_ingredient_catalog, predict_properties_batch, predict_properties_mc, read_json,
+    )
+    model = HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+    point = predict_properties_batch(doe_df, model, catalog, process)
+
+    spec = copy.deepcopy(model.spec)
+    spec["parameters"]["priors"] = {k: [0.5 * (v[0] + v[1])] * 2 for k, v in spec["parameters"]["priors"].items()}
+    flat = predict_properties_mc(doe_df, spec, catalog, process, n_samples=8, include_noise=False)
+    for f in MC_FIELDS:
+        np.testing.assert_allclose(flat[f"{f}_mean"], point[f], rtol=1e-12, err_msg=f)
+        np.testing.assert_allclose(flat[f"{f}_std"], 0.0, atol=1e-12, err_msg=f)
+
+    mc = predict_properties_mc(doe_df, model, catalog, process, n_samples=200, seed=3, max_elements=1000)
+    again = predict_properties_mc(doe_df, model, catalog, process, n_samples=200, seed=3, max_elements=1000)
+    pd.testing.assert_frame_equal(mc, again)
+    assert mc.notna().all().all()
+    assert (mc["E_GPa_std"] > 0).all() and (mc["Izod_23_kJm2_std"] > 0).all()
+    assert ((mc["HDT_C_q05"] <= mc["HDT_C_q50"]) & (mc["HDT_C_q50"] <= mc["HDT_C_q95"])).all()
+
+def test_jacobian_matches_finite_differences(project_root: Path, doe_df: pd.DataFrame):
+    """
+    Complex-step sensitivities agree with central differences, and the model's
+    monotone_signs hold over the mixed DOE.
+    """
+    from src.bridge_formulations_to_properties import (
+        HybridModel, check_monotone_signs, jac_col, load_ingredient_catalog, predict_jacobian,
+        predict_properties_batch, read_json,
+    )
+    model = HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+    jac = predict_jacobian(doe_df, model, catalog, process, wrt=("elastomer_wtpct", "Tm_C"))
+    assert len(jac) == len(doe_df) and jac.notna().all().all()
+
+    h = 1e-4
+    df_hi, df_lo = doe_df.copy(), doe_df.copy()
+    df_hi["elastomer_wtpct"] += h
+    df_lo["elastomer_wtpct"] -= h
+    hi = predict_properties_batch(df_hi, model, catalog, process)
+    lo = predict_properties_batch(df_lo, model, catalog, process)
+    for prop in ("E_GPa", "Izod_23_kJm2", "HDT_C"):
+        fd = (hi[prop] - lo[prop]).to_numpy() / (2 * h)
+        np.testing.assert_allclose(jac[jac_col(prop, "elastomer_wtpct")].to_numpy(), fd, rtol=1e-4, atol=1e-8, err_msg=prop)
+
+    hot = predict_properties_batch(doe_df, model, catalog, {**process, "Tm_C": 215.0 + h})
+    cold = predict_properties_batch(doe_df, model, catalog, {**process, "Tm_C": 215.0 - h})
+    fd = (hot["MFI_g10min"] - cold["MFI_g10min"]).to_numpy() / (2 * h)
+    np.testing.assert_allclose(jac[jac_col("MFI_g10min", "Tm_C")].to_numpy(), fd, rtol=1e-4, atol=1e-8)
+
+    with pytest.raises(ValueError):
+        predict_jacobian(doe_df, model, catalog, process, wrt=("not_an_input",))
+
+    report = check_monotone_signs(doe_df, model, catalog, process)
+    assert set(report) == set(model.spec["parameters"]["monotone_signs"])
+    assert all(r["n_checked"] == len(doe_df) and r["n_violations"] == 0 for r in report.values())
+
+def test_equation_compiler(project_root: Path, doe_df: pd.DataFrame):
+    """
+    The model's latent_states compile once per equation block, match the expressions by hand,
+    reject unsafe or undefined expressions, and feed tau_s / fill factor into the batch model.
+    """
+    import copy
+    from src.bridge_formulations_to_properties import (
+        HybridModel, compute_row_properties, load_ingredient_catalog, predict_properties_batch, read_json,
+    )
+    path = str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json")
+    model = HybridModel.from_json(path)
+    assert HybridModel.from_json(path).equations is model.equations
+
+    geometry = {"D_mm": 16.0, "L_over_D": 40.0, "pb_bar": 20.0}
+    n_rps = np.array([3.0, 6.0])
+    out = model.equations.evaluate({**geometry, "N_rps": n_rps, "Q_kgh": 4.0}, model,
+                                   ["tau_s", "fill_factor_F", "shear_rate_s-1"])
+    tau = model["alpha_tau"] * (40.0 * 16.0 / 1000) / (model["kv"] * n_rps) / 4.0
+    fill = min(1.0, model["F0"] + model["beta_p"] * 20.0)
+    np.testing.assert_allclose(out["tau_s"], tau, rtol=1e-12)
+    np.testing.assert_allclose(out["shear_rate_s-1"], model["k_gamma"] * n_rps * fill, rtol=1e-12)
+    with pytest.raises(KeyError):
+        model.equations.evaluate({"N_rps": 6.0}, model, ["tau_s"])
+
+    for name, expr in [("bad", "__import__('os').getcwd()"), ("bad", "undefined_symbol * 2"),
+                       ("a_x", "b_x + 1"), ("b_x", "a_x * 2")]:
+        spec = copy.deepcopy(model.spec)
+        spec["equations"][name] = expr
+        if name == "b_x":
+            spec["equations"]["a_x"] = "b_x + 1"
+        with pytest.raises(ValueError):
+            HybridModel(spec)
+
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    process = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0, **geometry}
+    batch = predict_properties_batch(doe_df, model, catalog, process)
+    scalar = pd.DataFrame([compute_row_properties(r, model, catalog, dict(process)) for _, r in doe_df.iterrows()])
+    np.testing.assert_allclose(batch["MFI_g10min"].to_numpy(), scalar["MFI_g10min"].astype(float).to_numpy(), rtol=1e-12)
+    # An explicit tau_s still wins over the screw geometry.
+    pinned = predict_properties_batch(doe_df, model, catalog, {**process, "tau_s": 45.0, "pb_bar": None})
+    legacy = predict_properties_batch(doe_df, model, catalog, {k: process[k] for k in ("Torque_Nm", "N_rps", "Q_kgh", "Tm_C")})
+    pd.testing.assert_frame_equal(pinned, legacy)
+    assert not np.allclose(batch["MFI_g10min"], legacy["MFI_g10min"])
+
+def test_loop_writes_bridge_artifacts_only_when_asked(tmp_path: Path, closed_loop):
+    """Without save_bridge_artifacts the tidy analysis is built from the predictions kept in memory."""
+    loop = closed_loop(lambda predictions_df, _: 0.5)
+    loop.run(max_iterations=1, n_initial_points=4, seed=0)
+    assert not list((tmp_path / "compounded").glob("*prediction*.csv"))
+    assert not list((tmp_path / "compounded").glob("*process*.json"))
+    (tidy_file,) = (tmp_path / "summaries").glob("tidy_results_*.csv")
+    tidy = pd.read_csv(tidy_file)
+    (initial_file,) = (tmp_path / "compounded").glob("initial_evaluated_*.csv")
+    assert len(tidy) == len(pd.read_csv(initial_file)) + 4
+    assert set(tidy["iter"].astype(str)) == {"init", "01"} and tidy["E_GPa"].notna().all()
+
+    loop.run(max_iterations=1, n_initial_points=4, seed=0, save_bridge_artifacts=True)
+    assert len(list((tmp_path / "compounded").glob("run_*_prediction.csv"))) == 4
+    assert len(list((tmp_path / "compounded").glob("initial_predictions_*.csv"))) == 1
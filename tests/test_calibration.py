@@ -0,0 +1,122 @@
+# tests/test_calibration.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import copy
+import pickle
+import sys
+
+import numpy as np
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def model_and_catalog(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.bridge_formulations_to_properties import HybridModel, load_ingredient_catalog, read_json
+    model = HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    return model, catalog
+
+PROCESS = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+TRUE = {"beta_c": 0.8, "alpha_MFI": 1.3, "Em0_GPa": 1.2, "sigma_y0_MPa": 17.5}
+
+def test_calibration_recovers_known_parameters(tmp_path: Path, project_root: Path, model_and_catalog):
+    """
+    Data generated by the model with known prior values is fitted back to those values from
+    the prior midpoints, and the written model predicts with them.
+    """
+    from src.analysis.calibrate import CalibrationProblem, calibrate, calibrated_spec, next_version_path
+    from src.bridge_formulations_to_properties import HybridModel, predict_properties_batch
+    from src.formulation_doe_generator_V1 import generate_formulation_doe
+    model, catalog = model_and_catalog
+    doe = generate_formulation_doe(n=25, seed=11, ingredient_library=str(project_root / "data/processed/ingredient_library.json"),
+                                   focus="none")
+    spec = copy.deepcopy(model.spec)
+    for k, v in TRUE.items():
+        spec["parameters"]["priors"][k] = [v, v]
+    targets = predict_properties_batch(doe, HybridModel(spec), catalog, PROCESS)
+
+    problem = CalibrationProblem(model, catalog, doe, targets, params=list(TRUE), process=PROCESS)
+    assert set(problem.fields) >= {"E_GPa", "MFI_g10min", "sigma_y_MPa"}
+
+    # The complex-step Jacobian matches central differences of the residuals.
+    h = 1e-6 * problem.width
+    fd = np.column_stack([(problem.residuals(problem.x0 + np.eye(4)[j] * h[j]) -
+                           problem.residuals(problem.x0 - np.eye(4)[j] * h[j])) / (2 * h[j]) for j in range(4)])
+    np.testing.assert_allclose(problem.jacobian(problem.x0), fd, rtol=1e-5, atol=1e-6)
+    # Batched costs equal the one-at-a-time ones.
+    thetas = np.vstack([problem.x0, problem.lower, problem.upper])
+    np.testing.assert_allclose(problem.cost_many(thetas), [0.5 * np.sum(problem.residuals(t) ** 2) for t in thetas])
+
+    result = calibrate(problem, n_starts=3, n_screen=64, seed=0)
+    assert result["cost"] < 1e-12 < result["initial_cost"]
+    for k, v in TRUE.items():
+        assert result["params"][k] == pytest.approx(v, rel=1e-6), k
+
+    fitted = HybridModel(calibrated_spec(model, result, source="synthetic"))
+    assert fitted.spec["name"].endswith("_v2") and fitted.spec["calibration"]["parent_hash"] == model.content_hash
+    for k, v in TRUE.items():
+        assert fitted[k] == pytest.approx(v, rel=1e-9)
+        assert fitted.spec["calibration"]["bounds"][k] == model.spec["parameters"]["priors"][k]
+    np.testing.assert_allclose(predict_properties_batch(doe, fitted, catalog, PROCESS)["E_GPa"], targets["E_GPa"], rtol=1e-9)
+
+    src_model = tmp_path / "model_v1.json"
+    src_model.write_text("{}")
+    (tmp_path / "model_v2.json").write_text("{}")
+    assert next_version_path(src_model).name == "model_v3.json"
+
+def test_calibration_parallel_starts_and_evercap_layout(project_root: Path, model_and_catalog):
+    """
+    Restarts in worker processes give the same result as in-process ones, and the evercap
+    sheet maps onto the bridge's columns and measured outputs.
+    """
+    from src.analysis.calibrate import (
+        DEFAULT_CALIBRATION_PROCESS, CalibrationProblem, calibrate, load_measurements,
+    )
+    model, catalog = model_and_catalog
+    assert pickle.loads(pickle.dumps(model)).content_hash == model.content_hash
+
+    formulations, targets = load_measurements(project_root / "data/formulations/evercap_synthetic.csv")
+    assert {"baseA_wtpct", "filler_wtpct", "talc_wtpct"} <= set(formulations.columns)
+    assert {"MFI_g10min", "E_GPa", "Xc"} <= set(targets.columns)
+    assert targets["Xc"].between(0, 1).all()
+
+    problem = CalibrationProblem(model, catalog, formulations, targets, params=["alpha_MFI", "Em0_GPa"],
+                                 process=DEFAULT_CALIBRATION_PROCESS)
+    serial = calibrate(problem, n_starts=2, n_screen=16, seed=1)
+    parallel = calibrate(problem, n_starts=2, n_screen=16, seed=1, workers=2)
+    assert serial["cost"] <= serial["initial_cost"]
+    assert parallel["params"] == pytest.approx(serial["params"])
+
+    with pytest.raises(ValueError):
+        CalibrationProblem(model, catalog, formulations, targets, params=["not_a_prior"], process=DEFAULT_CALIBRATION_PROCESS)
+
+def test_calibrated_priors_keep_a_positive_width(project_root: Path, model_and_catalog):
+    """
+    On the evercap sheet every fitted prior lands on a bound, some with zero standard error: the
+    written priors still contain the fitted values with a positive width, and the bounds are warned about.
+    """
+    from src.analysis.calibrate import (
+        DEFAULT_CALIBRATION_PROCESS, MIN_PRIOR_FRACTION, CalibrationProblem, calibrate, calibrated_spec,
+        load_measurements,
+    )
+    from src.bridge_formulations_to_properties import HybridModel
+    model, catalog = model_and_catalog
+    formulations, targets = load_measurements(project_root / "data/formulations/evercap_synthetic.csv")
+    problem = CalibrationProblem(model, catalog, formulations, targets, process=DEFAULT_CALIBRATION_PROCESS)
+    result = calibrate(problem, n_starts=2, n_screen=32, seed=0)
+    assert any(se == 0 for se in result["se"].values())
+
+    with pytest.warns(UserWarning, match="at a bound"):
+        spec = calibrated_spec(model, result)
+    fitted = HybridModel(spec)
+    for name, v in result["params"].items():
+        lo, hi = spec["parameters"]["priors"][name]
+        orig_lo, orig_hi = model.spec["parameters"]["priors"][name]
+        assert hi - lo >= MIN_PRIOR_FRACTION * (orig_hi - orig_lo) * (1 - 1e-9) > 0, name
+        assert orig_lo <= lo <= v <= hi <= orig_hi, name
+        assert fitted[name] == pytest.approx(v), name
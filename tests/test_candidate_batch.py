@@ -0,0 +1,73 @@
+# tests/test_candidate_batch.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import threading
+import time
+
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+@pytest.fixture
+def orchestrator(closed_loop):
+    """main_orchestrator with the agent call replaced by a slow, deterministic stand-in."""
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def weights(predictions_df, run_identifier):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        # Later candidates answer first, so completion order differs from ask order.
+        time.sleep(0.2 - 0.04 * int(run_identifier[-2:]))
+        with lock:
+            active["now"] -= 1
+        return predictions_df["elastomer_wtpct"] / 100.0
+
+    return closed_loop(weights).mo, active
+
+def test_concurrent_batch_keeps_ask_order_and_unique_artifacts(tmp_path: Path, project_root: Path, orchestrator):
+    """
+    Running an iteration's candidates in a thread pool returns the same results, in the same
+    order, as running them one by one, and every candidate writes its own artifacts.
+    """
+    from src.formulation_doe_generator_V1 import generate_formulation_doe
+    from src.property_predictor import PropertyPredictor
+    mo, active = orchestrator
+    template = generate_formulation_doe(n=1, seed=5, ingredient_library=str(project_root / "data/processed/ingredient_library.json"),
+                                        focus="none")
+    names = ["elastomer_wtpct", "filler_wtpct", "compat_wtpct", "N_rps", "Tm_C", "Q_kgh", "Torque_Nm"]
+    points = [[8.0 + k, 5.0, 1.0, 5.0, 220.0, 5.0, 100.0] for k in range(4)]
+
+    def run(workers: int, tag: str):
+        (tmp_path / tag / "formulations").mkdir(parents=True)
+        (tmp_path / tag / "compounded").mkdir()
+        ctx = mo.CandidateContext(
+            search_space_names=names, template_df=template.head(1), predictor=PropertyPredictor(),
+            targets_constraints={}, processing_levers=None,
+            formulations_dir=str(tmp_path / tag / "formulations"), compounded_dir=str(tmp_path / tag / "compounded"),
+            run_timestamp="20250101_000000", save_bridge_artifacts=True,
+        )
+        t0 = time.perf_counter()
+        results = mo.evaluate_candidate_batch(ctx, 1, points, workers=workers)
+        return results, time.perf_counter() - t0
+
+    serial, t_serial = run(1, "serial")
+    assert active["peak"] == 1
+    parallel, t_parallel = run(4, "parallel")
+    assert active["peak"] == 4 and t_parallel < t_serial
+
+    assert [r.iter_id for r in parallel] == [f"iter_01_cand_{k:02d}" for k in range(1, 5)]
+    assert [r.point for r in parallel] == points
+    assert [r.score for r in parallel] == [r.score for r in serial] == [p[0] / 100.0 for p in points]
+    for a, b in zip(serial, parallel):
+        pd.testing.assert_frame_equal(a.evaluated_df, b.evaluated_df)
+
+    compounded = tmp_path / "parallel" / "compounded"
+    assert len(list(compounded.glob("*_prediction.csv"))) == 4
+    assert len(list(compounded.glob("*_evaluated.csv"))) == 4
+    assert not list(compounded.glob("*.tmp"))
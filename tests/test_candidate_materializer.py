@@ -0,0 +1,109 @@
+# tests/test_candidate_materializer.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _template(**overrides) -> pd.DataFrame:
+    row = {
+        "elastomer_name": "ENGAGE POE (e.g., 8180)", "elastomer_wtpct": 12.0,
+        "filler_name": "Talc (e.g., Mistron)", "filler_wtpct": 10.0,
+        "talc_name": "", "talc_wtpct": 0.0,
+        "compat_name": "Fusabond P (PP-g-MAH)", "compat_wtpct": 1.0,
+        "stabilizer_name": "Generic AO/UV Package", "stabilizer_wtpct": 0.4,
+        "nucleator_name": "Hyperform HPN-715", "nucleator_ppm": 800,
+        "baseA_name": "PP ICP Virgin", "baseA_wtpct": 50.0,
+        "baseB_name": "rPP ICP (injection grade)", "baseB_wtpct": 26.6,
+    }
+    row.update(overrides)
+    return pd.DataFrame([row])
+
+@pytest.fixture
+def space(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    return [Real(8.0, 18.0, name="elastomer_wtpct"), Real(0.0, 20.0, name="filler_wtpct"),
+            Real(0.5, 3.0, name="compat_wtpct"), Real(2.5, 8.33, name="N_rps")]
+
+def test_batch_is_projected_rebalanced_and_deduplicated(space):
+    from src.candidate_materializer import CandidateMaterializer
+    mat = CandidateMaterializer(space, _template())
+    batch = mat.materialize(
+        [[10.0, 2.0, 2.5, 5.0],    # filler 2 -> left out (0 is nearer than Talc's 5), compat -> 2.0 max
+         [10.0, 4.0, 1.0, 5.0],    # filler 4 -> 5
+         [10.0, 1.0, 2.9, 5.0],    # projects onto the first point
+         [12.0, 10.0, 1.0, 6.0]],  # already evaluated
+        existing=[[12.0, 10.0, 1.0, 6.0]],
+    )
+    assert batch.points[0] == [10.0, 0.0, 2.0, 5.0] and batch.points[1] == [10.0, 5.0, 1.0, 5.0]
+    assert list(batch.feasible) == [True, True, False, False]
+    assert list(batch.duplicate) == [False, False, True, True]
+    assert list(batch.projected) == [True, True, True, False]
+
+    f = batch.formulations
+    wt_cols = [c for c in f.columns if c.endswith("_wtpct")]
+    np.testing.assert_allclose(f[wt_cols].sum(axis=1), 100.0)
+    # The primary base takes the remainder; names and fixed columns come from the template.
+    assert f.loc[0, "baseA_wtpct"] == pytest.approx(100.0 - 10.0 - 0.0 - 2.0 - 0.4 - 26.6)
+    assert (f["baseB_wtpct"] == 26.6).all() and (f["filler_name"] == "Talc (e.g., Mistron)").all()
+    assert (f["nucleator_ppm"] == 800).all() and (f["mode"] == "bo_suggested").all()
+    assert mat.stats.points == 4 and mat.stats.duplicates == 2 and mat.stats.projected == 2
+
+def test_overfull_points_shrink_or_are_rejected(space):
+    from src.candidate_materializer import CandidateMaterializer
+    # 80 wt% of fixed talc: the bases are used up first, then the optimized levers shrink.
+    f = CandidateMaterializer(space, _template(talc_wtpct=80.0)).materialize([[18.0, 20.0, 2.0, 5.0]]).formulations
+    assert f.loc[0, ["baseA_wtpct", "baseB_wtpct"]].tolist() == pytest.approx([0.0, 0.0])
+    assert f[[c for c in f.columns if c.endswith("_wtpct")]].sum(axis=1).iloc[0] == pytest.approx(100.0)
+    assert 8.0 <= f.loc[0, "elastomer_wtpct"] < 18.0 and 5.0 <= f.loc[0, "filler_wtpct"] < 20.0
+
+    batch = CandidateMaterializer(space, _template(talc_wtpct=95.0)).materialize([[18.0, 20.0, 2.0, 5.0]])
+    assert not batch.feasible[0] and batch.rejected[0] and "exceeds 100" in batch.reasons[0]
+
+def test_blocked_chemistry_is_rejected_per_present_ingredients(space):
+    from src.candidate_materializer import CandidateMaterializer
+    rules = {
+        "pair_matrix": {"polyolefin/PP::filler/unspecified": {"score": 0.0, "block": True, "note": "test block"}},
+        "thresholds": {"doe_hard_block_threshold": 0.2, "needs_compat_threshold": 0.7},
+        "processing_rules": {"mfr_ratio_max": 100, "melt_T_overlap_good": 100, "melt_T_overlap_min": 100,
+                             "drying_mismatch_penalty": 0.0},
+    }
+    mat = CandidateMaterializer(space, _template(), compatibility_rules=rules)
+    batch = mat.materialize([[10.0, 12.0, 1.0, 5.0], [10.0, 1.0, 1.0, 5.0]])
+    assert list(batch.feasible) == [False, True]
+    assert "test block" in batch.reasons[0] and batch.rejected[0]
+
+def test_ask_feasible_points_reasks_after_telling_infeasible_points(space):
+    """Infeasible exploit points are told as failures and the batch is refilled with feasible ones."""
+    from skopt import Optimizer
+    from src.candidate_materializer import CandidateMaterializer
+    from src.main_orchestrator import INFEASIBLE_WEIGHT, ask_feasible_points
+
+    rules = {
+        "pair_matrix": {"polyolefin/PP::filler/unspecified": {"score": 0.0, "block": True}},
+        "thresholds": {"doe_hard_block_threshold": 0.2, "needs_compat_threshold": 0.7},
+        "processing_rules": {"mfr_ratio_max": 100, "melt_T_overlap_good": 100, "melt_T_overlap_min": 100,
+                             "drying_mismatch_penalty": 0.0},
+    }
+    mat = CandidateMaterializer(space, _template(), compatibility_rules=rules)
+    opt = Optimizer(space, random_state=0, n_initial_points=4)
+    rng = np.random.RandomState(1)
+    X = [[rng.uniform(8, 18), 0.0, rng.uniform(0.5, 2.0), rng.uniform(2.5, 8.33)] for _ in range(6)]
+    opt.tell(X, [-(x[0] / 18.0) for x in X])
+    np.random.seed(2)
+
+    points = ask_feasible_points(opt, mat, n_exploit=3, n_explore=1, batch_strategy="ask")
+    assert len(points) == 4
+    assert all(p[1] == 0.0 for p in points)  # every formulation with filler is blocked
+    assert len({tuple(p) for p in points}) == 4 and not {tuple(p) for p in points} & {tuple(x) for x in X}
+    told = opt.yi[len(X):]
+    assert told and all(y == -INFEASIBLE_WEIGHT for y in told)
+    assert mat.stats.rejected >= len(told)
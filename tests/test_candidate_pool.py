@@ -0,0 +1,76 @@
+# tests/test_candidate_pool.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def pool_and_space(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real, Space
+    from src.candidate_pool import build_candidate_pool
+    from src.main_orchestrator import goal_filtered_pools
+    from src.property_predictor import PropertyPredictor
+    space = Space([Real(8.0, 18.0, name="elastomer_wtpct"), Real(0.0, 20.0, name="filler_wtpct"),
+                   Real(0.5, 3.0, name="compat_wtpct"), Real(2.5, 8.33, name="N_rps"),
+                   Real(200.0, 240.0, name="Tm_C"), Real(1.0, 10.0, name="Q_kgh"), Real(50.0, 250.0, name="Torque_Nm")])
+    goals = json.loads((project_root / "configs/goals/compostable.json").read_text())
+    pool = build_candidate_pool(space, PropertyPredictor(), size=3000, seed=0,
+                                ingredient_pools=goal_filtered_pools(goals, "none"))
+    return pool, space
+
+def test_pool_rows_are_in_bounds_closed_and_predicted(pool_and_space):
+    pool, space = pool_and_space
+    f = pool.formulations
+    assert 0 < len(pool) <= 3000 and len(f) == len(pool.predictions) == len(pool.X)
+    bounds = np.array([[d.low, d.high] for d in space.dimensions])
+    assert ((pool.X >= bounds[:, 0]) & (pool.X <= bounds[:, 1])).all()
+    np.testing.assert_allclose(f[[c for c in f.columns if c.endswith("_wtpct")]].sum(axis=1), 100.0)
+    # Generated levers keep the generator's ingredients; the others are spread over their bounds.
+    assert f["filler_name"].nunique() > 1 and (f["elastomer_name"] != "").all()
+    assert f["Tm_C"].std() > 5.0 and f["compat_wtpct"].min() >= 0.5
+    assert pool.predictions["E_GPa"].notna().all()
+    np.testing.assert_allclose(pool.Xt, space.transform(pool.X.tolist()))
+
+def test_propose_scores_the_pool_and_never_repeats_a_row(pool_and_space):
+    from skopt import Optimizer
+    from src.batch_acquisition import expected_improvement
+    from src.candidate_pool import CandidatePool
+    pool, space = pool_and_space
+    pool = CandidatePool(X=pool.X, Xt=pool.Xt, formulations=pool.formulations, predictions=pool.predictions,
+                         available=np.ones(len(pool), dtype=bool), seed=pool.seed)
+    opt = Optimizer(space.dimensions, random_state=0, n_initial_points=5)
+    seen = list(range(0, 60, 5))
+    opt.tell(pool.X[seen].tolist(), [float((x[0] - 15.0) ** 2 / 50.0 - x[1] / 20.0) for x in pool.X[seen]])
+    assert pool.exclude(opt.Xi) == len(seen) and not pool.available[seen].any()
+
+    picks = pool.propose(opt, n_exploit=3, n_explore=1, random_state=0)
+    assert len(set(picks)) == 4 and not set(picks) & set(seen)
+    mu, std = opt.models[-1].predict(pool.Xt, return_std=True)
+    acq = np.where(pool.available, expected_improvement(mu, std, min(opt.yi)), -np.inf)
+    assert sorted(picks[:3]) == sorted(np.argsort(-acq)[:3].tolist())
+
+    points, formulations = pool.take(picks)
+    assert points == pool.X[picks].tolist() and len(formulations) == 4
+    diverse = pool.propose(opt, n_exploit=3, n_explore=0, strategy="local_penalization", random_state=0)
+    assert len(set(diverse)) == 3 and not set(diverse) & set(picks + seen)
+
+def test_pool_run_evaluates_pool_recipes(tmp_path: Path, closed_loop):
+    loop = closed_loop(lambda predictions_df, _: np.clip(predictions_df["sigma_y_MPa"] / 40.0, 0, 1))
+    summary = loop.run(max_iterations=2, n_initial_points=8, seed=0, pool_size=2000)
+    assert summary["pool"]["size"] > 0 and summary["pool"]["available"] == summary["pool"]["size"] - 8
+    assert summary["stages"]["pool"]["calls"] == 1
+
+    evaluated = pd.concat([pd.read_csv(p) for p in (tmp_path / "compounded").glob("run_*_evaluated.csv")],
+                          ignore_index=True)
+    assert len(evaluated) == 8 and (evaluated["mode"] == "pool_suggested").all()
+    assert "compat_score" in evaluated.columns  # the generator's own compatibility columns came along
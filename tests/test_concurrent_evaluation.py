@@ -0,0 +1,71 @@
+# tests/test_concurrent_evaluation.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import asyncio
+import json
+import sys
+import time
+
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def test_token_buckets_space_out_requests_and_tokens(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.rate_limiter import RateLimiter
+    now = [0.0]
+    limiter = RateLimiter(requests_per_min=60, tokens_per_min=6000, clock=lambda: now[0])
+    assert [limiter.reserve(10) for _ in range(60)] == [0.0] * 60  # a full minute's burst
+    assert limiter.reserve(10) == pytest.approx(1.0)  # then one request per second, queued in order
+    assert limiter.reserve(10) == pytest.approx(2.0)
+    now[0] = 62.0  # refilled, but only up to one minute's allowance
+    assert limiter.reserve(3000) == 0.0
+    assert limiter.reserve(6000) == pytest.approx(30.0)  # the token bucket is the binding limit now
+    assert RateLimiter().reserve(10**9) == 0.0
+
+def test_concurrent_rows_are_rate_limited_retried_and_kept_in_order(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    from google.adk.agents import BaseAgent
+    from google.adk.events import Event
+    from google.genai.types import Content, Part
+    import src.agent_eval_helpers as helpers
+    from src.run_evaluator_with_adk import EvaluatorClient
+    calls, running, peak = {}, [0], [0]
+
+    class FlakyAgent(BaseAgent):
+        async def _run_async_impl(self, ctx):
+            sample = json.loads(ctx.user_content.parts[0].text)["sample_id"]
+            calls[sample] = calls.get(sample, 0) + 1
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.3 - 0.03 * int(sample))  # later rows finish first
+            running[0] -= 1
+            if sample == "2" and calls[sample] <= 2:
+                raise RuntimeError("503 UNAVAILABLE: model overloaded")
+            text = "not json" if sample == "5" else json.dumps({
+                "literature_consistency_score": 0.9, "realism_penalty": 0.5, "recommended_bo_weight": 0.1 * int(sample),
+                "confidence": "High", "confidence_factor": 1.0})
+            yield Event(author=self.name, invocation_id=ctx.invocation_id,
+                        content=Content(role="model", parts=[Part(text=text)]))
+
+    monkeypatch.setenv("EVAL_RETRY_BASE_S", "0.01")
+    monkeypatch.setenv("EVAL_CACHE", "0")
+    monkeypatch.setattr(helpers, "BASELINE_MODEL", None)  # its deviation check needs full process columns
+    df = pd.DataFrame({"E_GPa": [1.0 + k for k in range(8)], "elastomer_wtpct": 10.0})
+    out_dir = tmp_path / "run_agent"
+    with EvaluatorClient(agent=FlakyAgent(name="flaky"), pool_size=8) as client:
+        start = time.monotonic()
+        evaluated = helpers.evaluate_with_agent(df, {"Tm_C": 220.0}, {"E_GPa": {"min": 1.5}}, str(out_dir), "run",
+                                                concurrency=4, requests_per_min=600, client=client)
+        elapsed = time.monotonic() - start
+    assert peak[0] == 4 and elapsed < 1.5  # about 2.4 s one at a time
+    assert list(evaluated["E_GPa"]) == list(df["E_GPa"])  # input order, not completion order
+    assert calls["2"] == 3 and evaluated.loc[2, "evaluation_status"] == "success"
+    assert calls["5"] == 1 and evaluated.loc[5, "evaluation_status"] == "failed"  # invalid output: no retry
+    assert evaluated.loc[7, "recommended_bo_weight"] == pytest.approx(0.7)
+    assert all((out_dir / f"row_{k:04d}" / "scores.json").exists() for k in range(8) if k != 5)
+    assert (tmp_path / "failed_evaluations" / "run" / "row_0005_run" / "debug_raw_response.json").exists()
@@ -0,0 +1,121 @@
+# tests/test_evaluation_cache.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import json
+import sys
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _payload(sample_id="0", e_gpa=1.2, **overrides):
+    return {"cycle_id": "run_a", "sample_id": sample_id, "predictions": {"E_GPa": e_gpa, "MFI_g10min": 8},
+            "process": {"Tm_C": 220.0, "elastomer_wtpct": 12.5}, "targets_constraints": {"E_GPa": {"min": 1.5}},
+            "meta": {"row_index": int(sample_id)}, **overrides}
+
+def test_key_covers_inputs_model_and_prompt_but_not_bookkeeping(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.evaluation_cache import payload_key
+    key = payload_key(_payload(), "gemini-2.5-pro:abc")
+    # Another run/row, float noise below 6 significant figures, int vs float: same key.
+    assert payload_key(_payload("7", 1.2 + 1e-12, cycle_id="run_b"), "gemini-2.5-pro:abc") == key
+    assert payload_key({**_payload(), "predictions": {"E_GPa": 1.2, "MFI_g10min": 8.0}}, "gemini-2.5-pro:abc") == key
+    assert payload_key(_payload(e_gpa=1.21), "gemini-2.5-pro:abc") != key
+    assert payload_key(_payload(targets_constraints={"E_GPa": {"min": 1.6}}), "gemini-2.5-pro:abc") != key
+    assert payload_key(_payload(), "gemini-2.5-flash:abc") != key
+    assert payload_key(_payload(), "gemini-2.5-pro:def") != key
+    assert payload_key(_payload(e_gpa=1.21), "gemini-2.5-pro:abc", sig_figs=2) == payload_key(_payload(), "gemini-2.5-pro:abc", sig_figs=2)
+
+def test_namespace_covers_the_prompt_and_score_schema(project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    from google.adk.agents import LlmAgent
+    import src.evaluation_cache as ec
+    agent = LlmAgent(name="evaluator", model="gemini-2.5-pro", instruction="Score the candidate.")
+    namespace = ec.agent_namespace(agent)
+    assert namespace.startswith("gemini-2.5-pro:")
+    edited = LlmAgent(name="evaluator", model="gemini-2.5-pro", instruction="Score the candidate strictly.")
+    assert ec.agent_namespace(edited) != namespace
+
+    class ExtendedScores(ec.EvalScores):  # a new field in the stored scores
+        processability_score: float = 1.0
+    monkeypatch.setattr(ec, "EvalScores", ExtendedScores)
+    assert ec.agent_namespace(agent) != namespace
+    assert ec.payload_key(_payload(), ec.agent_namespace(agent)) != ec.payload_key(_payload(), namespace)
+
+def test_entries_expire_and_least_recently_used_are_evicted(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    import src.evaluation_cache as ec
+    import src.sqlite_store as sqlite_store
+    now = [1000.0]
+    monkeypatch.setattr(sqlite_store.time, "time", lambda: now[0])
+    cache = ec.EvaluationCache(tmp_path / "evals.sqlite", ttl_s=100, max_entries=2)
+    cache.put("a", {"w": 1})
+    now[0] += 10
+    cache.put("b", {"w": 2})
+    now[0] += 10
+    assert cache.get("a") == {"w": 1}  # a is now more recently used than b
+    cache.put("c", {"w": 3})
+    assert cache.get("b") is None and cache.stats()["evictions"] == 1
+    now[0] += 95  # a was written 115 s ago, c 95 s ago
+    assert cache.get("a") is None and cache.get("c") == {"w": 3}
+    cache.close()
+    reopened = ec.EvaluationCache(tmp_path / "evals.sqlite", ttl_s=100)
+    assert reopened.get("c") == {"w": 3}
+    stats = reopened.stats()
+    assert stats["hits"] == 1 and stats["entries"] == 1
+
+def test_store_tracks_its_entry_count(tmp_path: Path, project_root: Path):
+    """Re-storing a key replaces it without counting it twice; the tracked count matches the table."""
+    sys.path.insert(0, str(project_root))
+    from src.sqlite_store import SQLiteStore
+    store = SQLiteStore(tmp_path / "store.sqlite", "entries", max_entries=2)
+    assert store.put_many({"a": 1}) == 0 and store.put_many({"a": 2, "b": 3}) == 0
+    assert store.entries == store.count() == 2 and store.get_many(["a"]) == ({"a": 2}, 0)
+    assert store.put_many({"c": 4}) == 1 and store.get_many(["a", "b", "c"])[0] == {"a": 2, "c": 4}
+    store.close()
+    assert SQLiteStore(tmp_path / "store.sqlite", "entries", max_entries=2).entries == 2
+
+def test_evaluate_context_serves_repeats_from_the_cache(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    from google.adk.agents import BaseAgent
+    from google.adk.events import Event
+    from google.genai.types import Content, Part
+    from src.evaluation_cache import default_evaluation_cache
+    from src.run_evaluator_with_adk import EvaluatorClient, evaluate_context
+    calls = []
+
+    class Agent(BaseAgent):
+        async def _run_async_impl(self, ctx):
+            payload = json.loads(ctx.user_content.parts[0].text)
+            calls.append(payload["sample_id"])
+            body = "no json here" if payload["predictions"]["E_GPa"] > 5 else json.dumps({
+                "literature_consistency_score": 0.9, "realism_penalty": 0.8, "recommended_bo_weight": 0.72,
+                "confidence": "High", "confidence_factor": 1.0, "notes": "Plausible."})
+            yield Event(author=self.name, invocation_id=ctx.invocation_id,
+                        content=Content(role="model", parts=[Part(text=body)]))
+
+    monkeypatch.setenv("EVAL_CACHE", "1")
+    monkeypatch.setenv("RESULTS_DIR", str(tmp_path))
+    with EvaluatorClient(agent=Agent(name="scripted")) as client:
+        first = evaluate_context(_payload("0"), tmp_path / "run_a" / "row_0000", client=client)
+        again = evaluate_context(_payload("3", cycle_id="run_b"), tmp_path / "run_b" / "row_0003", client=client)
+        for _ in range(2):  # failures are not cached
+            evaluate_context(_payload("4", e_gpa=9.0), tmp_path / "row_0004", client=client)
+    assert calls == ["0", "4", "4"]
+    assert again["cached"] and again["score"] == first["score"]
+    assert (tmp_path / "run_b" / "row_0003" / "evaluation_report.md").read_text() == "Plausible."
+    cache = default_evaluation_cache()
+    assert cache.path == str(tmp_path / "cache" / "evaluations.sqlite")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (1, 3, 1, 1)
+
+def test_run_summary_reports_the_evaluation_cache(tmp_path: Path, closed_loop, monkeypatch):
+    loop = closed_loop(lambda predictions_df, _: 0.5)
+    loop.run(max_iterations=1, n_initial_points=2)
+    assert loop.summaries()[-1]["evaluation_cache"] is None  # EVAL_CACHE=0
+    monkeypatch.setenv("EVAL_CACHE", "1")
+    loop.run(max_iterations=1, n_initial_points=2)
+    stats = loop.summaries()[-1]["evaluation_cache"]
+    assert stats["path"] == str(tmp_path / "cache" / "evaluations.sqlite") and stats["entries"] == 0
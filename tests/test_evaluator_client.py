@@ -0,0 +1,85 @@
+# tests/test_evaluator_client.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import asyncio
+import json
+import sys
+import threading
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _payload(k: int) -> dict:
+    return {"cycle_id": "test", "sample_id": str(k), "predictions": {"E_GPa": 1.0 + k},
+            "process": {"Tm_C": 220.0}, "targets_constraints": {"E_GPa": {"min": 1.5}}}
+
+def _scripted_agent(delays=None):
+    """A BaseAgent that answers with EvalScores JSON instead of calling a model."""
+    from google.adk.agents import BaseAgent
+    from google.adk.events import Event
+    from google.genai.types import Content, Part
+
+    class ScriptedAgent(BaseAgent):
+        async def _run_async_impl(self, ctx):
+            payload = json.loads(ctx.user_content.parts[0].text)
+            seen = sum(1 for ev in ctx.session.events if ev.author == "user")
+            await asyncio.sleep((delays or {}).get(payload["sample_id"], 0.05))
+            scores = {"literature_consistency_score": 0.8, "realism_penalty": 0.5, "recommended_bo_weight": 0.4,
+                      "confidence": "High", "confidence_factor": 1.0,
+                      "notes": f"sample {payload['sample_id']} on {threading.current_thread().name}, history {seen}"}
+            yield Event(author=self.name, invocation_id=ctx.invocation_id,
+                        content=Content(role="model", parts=[Part(text=json.dumps(scores))]))
+
+    return ScriptedAgent(name="scripted")
+
+def test_client_reuses_one_runner_loop_and_session_pool(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    monkeypatch.setenv("EVAL_CACHE", "0")  # every call reaches the agent
+    from concurrent.futures import ThreadPoolExecutor
+    from src.run_evaluator_with_adk import EvaluatorClient, evaluate_context
+    n_threads = threading.active_count()
+    with EvaluatorClient(agent=_scripted_agent(), pool_size=3) as client:
+        runner = client.runner
+        with ThreadPoolExecutor(max_workers=6) as ex:
+            outs = list(ex.map(lambda k: evaluate_context(_payload(k), tmp_path / f"row_{k:04d}", client=client),
+                               range(12)))
+        assert client.runner is runner and threading.active_count() == n_threads + 1  # just the loop thread
+        # At most pool_size sessions, each recycled with an empty history.
+        assert client._n_sessions == 3 and client.stats["evaluations"] == 12
+        for k, out in enumerate(outs):
+            assert out["score"]["recommended_bo_weight"] == 0.4
+            notes = json.loads(Path(out["scores_path"]).read_text())["notes"]
+            assert notes.startswith(f"sample {k} on matsi_evaluator-loop") and notes.endswith("history 1")
+            assert (tmp_path / f"row_{k:04d}" / "evaluation_report.md").exists()
+
+        async def gather():  # awaited from another event loop
+            return await asyncio.gather(*(client.evaluate(_payload(k), tmp_path / f"async_{k}") for k in range(4)))
+        assert [o["score"]["confidence"] for o in asyncio.run(gather())] == ["High"] * 4
+    assert not client._thread.is_alive()
+
+def test_client_timeout_cancels_and_frees_the_session(tmp_path: Path, project_root: Path, monkeypatch):
+    sys.path.insert(0, str(project_root))
+    monkeypatch.setenv("EVAL_CACHE", "0")  # every call reaches the agent
+    from src.run_evaluator_with_adk import EvaluatorClient
+    with EvaluatorClient(agent=_scripted_agent({"0": 5.0}), pool_size=1) as client:
+        slow = client.evaluate_sync(_payload(0), tmp_path / "slow", timeout_s=0.2)
+        assert "Timeout after 0.2s" in slow["score"]["error"]
+        assert (tmp_path / "slow" / "scores.json").exists()
+        fast = client.evaluate_sync(_payload(1), tmp_path / "fast")  # the only session is back in the pool
+        assert fast["score"]["recommended_bo_weight"] == 0.4
+        assert client.stats["timeouts"] == 1
+
+def test_invalid_payload_is_rejected_before_the_agent_is_called(tmp_path: Path, project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from pydantic import ValidationError
+    from src.run_evaluator_with_adk import EvaluatorClient
+    bad = {k: v for k, v in _payload(0).items() if k != "predictions"}
+    with EvaluatorClient(agent=_scripted_agent(), pool_size=1) as client:
+        with pytest.raises(ValidationError):
+            client.evaluate_sync(bad, tmp_path / "bad")
+        with pytest.raises(ValidationError):
+            asyncio.run(client.evaluate(bad, tmp_path / "bad"))
+        assert not (tmp_path / "bad").exists() and client.stats["evaluations"] == 0
@@ -0,0 +1,86 @@
+# tests/test_multi_fidelity.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+TARGETS = {
+    "flexural_modulus_GPa": {"value": 1.2, "tol": 0.3, "weight": 1.0},
+    "tensile_strength_yield_MPa": {"value": 22.0, "tol": None, "weight": 2.0},
+    "izod_impact_notched_23C_J_m": {"value": 60.0, "tol": 20.0, "weight": 1.0},
+    "crystallinity_pct": {"value": 40.0, "tol": 5.0, "weight": 1.0},  # not predicted: ignored
+}
+
+def test_physics_score_maps_spec_keys_to_prediction_columns(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.multi_fidelity import physics_score, scorable_targets
+    df = pd.DataFrame({"E_GPa": [1.2, 1.5], "sigma_y_MPa": [22.0, 22.0], "Izod_23_kJm2": [60.0 / 3.2, np.nan]})
+    targets = scorable_targets(TARGETS, df.columns)
+    assert set(targets) == {"flexural_modulus_GPa", "tensile_strength_yield_MPa", "izod_impact_notched_23C_J_m"}
+    assert targets["tensile_strength_yield_MPa"]["scale"] == pytest.approx(2.2)
+
+    score = physics_score(df, TARGETS)
+    assert score[0] == pytest.approx(1.0)
+    # Second row: modulus one tolerance off, Izod missing (counts as 0).
+    assert score[1] == pytest.approx((np.exp(-0.5) + 2.0 + 0.0) / 4.0)
+    assert np.isnan(physics_score(df, {"crystallinity_pct": {"value": 40.0}})).all()
+
+def test_screen_sends_promising_and_uncertain_candidates(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.multi_fidelity import FidelityScreen
+    screen = FidelityScreen(min_pairs=6)
+    assert screen.select([0.1, 0.2]).all()  # not calibrated yet
+
+    rng = np.random.RandomState(0)
+    low = rng.uniform(0.2, 0.8, size=20)
+    screen.add(low, 0.1 + 0.8 * low + 0.01 * rng.normal(size=20))
+    a, rho, sigma = screen.fit()
+    assert rho == pytest.approx(0.8, abs=0.05) and sigma < 0.02
+
+    mask = screen.select([0.25, 0.5, low.max() + 0.04, 0.95, np.nan])
+    assert list(mask) == [False, False, True, True, True]
+    assert screen.estimate([0.25])[0] == pytest.approx(0.3, abs=0.02)
+    # min_agent keeps at least the best estimate even when nothing is promising.
+    assert list(screen.select([0.3, 0.4], min_agent=1)) == [False, True]
+
+    # Scores that do not track each other are never screened.
+    unrelated = FidelityScreen(min_pairs=6)
+    unrelated.add(low, rng.uniform(size=20))
+    assert unrelated.fit() is None and unrelated.select([0.25, 0.5]).all()
+
+def test_multi_fidelity_run_cuts_agent_calls(tmp_path: Path, closed_loop, monkeypatch):
+    """
+    With an agent whose score tracks the physics score, a multi-fidelity run asks the agent about
+    a fraction of the candidates, tells the optimizer about all of them and reports an agent score.
+    """
+    from src.multi_fidelity import physics_score
+    from src.optimizer_checkpoint import load_checkpoint
+
+    loop = closed_loop(lambda predictions_df, _: 0.05 + 0.9 * physics_score(predictions_df, TARGETS))
+    monkeypatch.setattr(loop.mo, "build_targets_constraints", lambda _: TARGETS)
+
+    loop.run(max_iterations=4, n_initial_points=20, multi_fidelity=True, mf_calibration_points=8)
+    (ckpt_file,) = (tmp_path / "checkpoints").glob("run_*.pkl")
+    ckpt = load_checkpoint(ckpt_file)
+    stats = ckpt.fidelity.stats()
+    assert len(ckpt.optimizer.yi) == ckpt.n_initial + 4 * 4
+    (initial_file,) = (tmp_path / "compounded").glob("initial_evaluated_*.csv")
+    n_candidates = len(pd.read_csv(initial_file)) + 4 * 4
+    assert stats["agent_calls"] == sum(rows for _, rows in loop.calls) and stats["agent_calls"] + stats["screened"] == n_candidates
+    assert stats["agent_calls"] <= n_candidates // 2
+    assert stats["link"]["rho"] == pytest.approx(0.9, abs=1e-6)
+
+    (summary,) = loop.summaries()
+    assert summary["multi_fidelity"]["agent_calls"] == stats["agent_calls"]
+    assert -min(ckpt.optimizer.yi) == pytest.approx(summary["best_score"])
+    evaluated = pd.concat([pd.read_csv(p) for p in (tmp_path / "compounded").glob("*evaluated*.csv")], ignore_index=True)
+    best = evaluated.loc[evaluated["recommended_bo_weight"].idxmax()]
+    assert best.get("evaluation_status") != "screened"
@@ -0,0 +1,52 @@
+# tests/test_optimizer_checkpoint.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+
+import numpy as np
+
+def test_interrupted_run_resumes_without_repeating_evaluations(tmp_path: Path, closed_loop):
+    """
+    A run that dies mid-iteration is resumed from its checkpoint: the initial DOE and every
+    finished candidate are not evaluated again, and --extend adds iterations to a finished run.
+    """
+    from src.optimizer_checkpoint import checkpoint_path, load_checkpoint
+    crash_on = {"id": "iter_02_cand_03"}
+
+    def weights(predictions_df, run_identifier):
+        if crash_on["id"] and run_identifier.endswith(crash_on["id"]):
+            raise RuntimeError("agent went away")
+        return predictions_df["E_GPa"] - 0.01 * predictions_df["Tm_C"]
+
+    loop = closed_loop(weights)
+    calls = loop.calls
+
+    with pytest.raises(RuntimeError):
+        loop.run(max_iterations=2, n_initial_points=12)
+    (ckpt_file,) = (tmp_path / "checkpoints").glob("run_*.pkl")
+    run_id = ckpt_file.stem[len("run_"):]
+    assert ckpt_file == checkpoint_path(tmp_path, run_id)
+    assert [r.split("_", 2)[-1] for r, _ in calls[1:]] == ["iter_01_cand_01", "iter_01_cand_02", "iter_01_cand_03", "iter_01_cand_04",
+                         "iter_02_cand_01", "iter_02_cand_02"]
+    crashed = load_checkpoint(ckpt_file)
+    assert crashed.iterations_done == 1 and len(crashed.pending) == 4 and not crashed.finished
+    n_told = len(crashed.optimizer.yi)
+    assert n_told == crashed.n_initial + 4
+
+    # Resume: only the two candidates that never finished are evaluated.
+    calls.clear()
+    crash_on["id"] = None
+    loop.run(max_iterations=99, n_initial_points=99, resume=run_id)
+    assert [r.split("_", 2)[-1] for r, _ in calls] == ["iter_02_cand_03", "iter_02_cand_04"]
+    done = load_checkpoint(ckpt_file)
+    assert done.finished and done.max_iterations == 2 and done.pending is None
+    assert len(done.optimizer.yi) == n_told + 4
+    np.testing.assert_allclose(done.optimizer.Xi[:n_told], crashed.optimizer.Xi)
+    np.testing.assert_allclose(done.optimizer.Xi[n_told:], crashed.pending)
+
+    # Extending the finished run adds one fresh iteration and nothing else.
+    calls.clear()
+    loop.run(max_iterations=99, n_initial_points=99, resume=run_id, extend=1)
+    assert [r.split("_", 2)[-1] for r, _ in calls] == [f"iter_03_cand_{k:02d}" for k in range(1, 5)]
+    extended = load_checkpoint(ckpt_file)
+    assert extended.finished and extended.max_iterations == 3 and len(extended.optimizer.yi) == n_told + 8
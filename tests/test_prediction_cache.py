@@ -0,0 +1,99 @@
+# tests/test_prediction_cache.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+@pytest.fixture(scope="module")
+def model_and_catalog(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.bridge_formulations_to_properties import HybridModel, load_ingredient_catalog, read_json
+    model = HybridModel.from_json(str(project_root / "data/processed/pp_elastomer_TSE_hybrid_model_v1.json"))
+    catalog = load_ingredient_catalog(read_json(project_root / "data/processed/ingredient_library.json"))
+    return model, catalog
+
+@pytest.fixture(scope="module")
+def doe_df(project_root: Path) -> pd.DataFrame:
+    from src.formulation_doe_generator_V1 import generate_formulation_doe
+    lib = str(project_root / "data/processed/ingredient_library.json")
+    return generate_formulation_doe(n=12, seed=7, ingredient_library=lib, focus="none")
+
+PROCESS = {"Torque_Nm": 80.0, "N_rps": 6.0, "Q_kgh": 4.0, "Tm_C": 215.0}
+
+def test_cache_matches_model_and_counts_hits(tmp_path: Path, model_and_catalog, doe_df: pd.DataFrame):
+    """
+    Cached predictions equal the uncached batch, repeats are hits, and the SQLite store
+    serves a fresh cache instance (e.g. the next run).
+    """
+    from src.bridge_formulations_to_properties import predict_properties_batch
+    from src.prediction_cache import PredictionCache
+    model, catalog = model_and_catalog
+    expected = predict_properties_batch(doe_df, model, catalog, PROCESS)
+
+    cache = PredictionCache(tmp_path / "cache.sqlite")
+    first = cache.predict(doe_df, model, catalog, PROCESS)
+    pd.testing.assert_frame_equal(first, expected)
+    assert cache.stats()["misses"] == len(doe_df)
+
+    # Same recipes in reverse order are all hits; a changed process setting is a miss.
+    again = cache.predict(doe_df.iloc[::-1], model, catalog, PROCESS)
+    pd.testing.assert_frame_equal(again, expected.iloc[::-1])
+    cache.predict(doe_df.head(3), model, catalog, {**PROCESS, "Tm_C": 230.0})
+    stats = cache.stats()
+    assert stats["hits_memory"] == len(doe_df) and stats["misses"] == len(doe_df) + 3
+    cache.close()
+
+    reopened = PredictionCache(tmp_path / "cache.sqlite")
+    pd.testing.assert_frame_equal(reopened.predict(doe_df, model, catalog, PROCESS), expected)
+    assert reopened.stats()["hits_disk"] == len(doe_df) and reopened.stats()["misses"] == 0
+
+def test_disk_store_is_bounded_by_size(tmp_path: Path, project_root: Path):
+    """With a byte ceiling the least recently used entries go once the used pages outgrow it."""
+    sys.path.insert(0, str(project_root))
+    from src.sqlite_store import SQLiteStore
+    store = SQLiteStore(tmp_path / "cache.sqlite", "predictions", max_entries=10**6, max_bytes=64 * 1024)
+    evicted = sum(store.put_many({f"{b}-{i}": "x" * 1000 for i in range(10)}) for b in range(20))
+    assert evicted > 100 and store.entries == store.count() == 200 - evicted
+    assert store.used_bytes() < 1.25 * 64 * 1024  # about the ceiling: it is checked after each batch
+    assert store.get_many(["19-0", "0-0"])[0].keys() == {"19-0"}
+
+def test_cache_key_tracks_inputs_and_evicts(tmp_path: Path, model_and_catalog, doe_df: pd.DataFrame):
+    """
+    Keys change with the recipe, process and model; the disk store is bounded by entry count.
+    """
+    import copy
+    from src.bridge_formulations_to_properties import HybridModel
+    from src.prediction_cache import PredictionCache, row_keys
+    model, catalog = model_and_catalog
+    cache = PredictionCache(tmp_path / "cache.sqlite", max_memory_items=4, max_disk_entries=5)
+    ns = cache.namespace(model, catalog)
+
+    base = row_keys(doe_df.head(1), ns, PROCESS)
+    bumped = doe_df.head(1).copy()
+    bumped["elastomer_wtpct"] = bumped["elastomer_wtpct"] + 0.5
+    assert row_keys(bumped, ns, PROCESS) != base
+    assert row_keys(doe_df.head(1), ns, {**PROCESS, "N_rps": 6.5}) != base
+    # An all-empty extra column does not change what the model sees, so it does not change the key.
+    padded = doe_df.head(1).assign(extra_name="", extra_wtpct=0.0)
+    assert row_keys(padded, ns, PROCESS) == base
+
+    spec = copy.deepcopy(model.spec)
+    spec["parameters"]["priors"]["kD"] = [0.05, 0.9]
+    assert cache.namespace(HybridModel(spec), catalog) != ns
+
+    cache.predict(doe_df, model, catalog, PROCESS)
+    stats = cache.stats()
+    assert stats["disk_entries"] == 5 and stats["memory_entries"] == 4
+    assert stats["evictions"] == len(doe_df) - 5
+    # Evicted rows are simply recomputed.
+    from src.bridge_formulations_to_properties import predict_properties_batch
+    np.testing.assert_allclose(cache.predict(doe_df, model, catalog, PROCESS)["E_GPa"].to_numpy(),
+                               predict_properties_batch(doe_df, model, catalog, PROCESS)["E_GPa"].to_numpy())
@@ -0,0 +1,78 @@
+# tests/test_stopping.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def test_check_stopping_rules(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt import Optimizer
+    from skopt.space import Real
+    from src.stopping import StoppingRule, StoppingState, check_stopping
+
+    assert check_stopping(StoppingRule(), StoppingState(best_history=[0.5] * 10)) is None
+
+    # Plateau: 0.004 gained over the last 3 iterations, counted from the window start.
+    state = StoppingState(best_history=[0.1, 0.5, 0.501, 0.503, 0.504])
+    assert "over the last 3 iterations" in check_stopping(StoppingRule(patience=3, min_improvement=0.01), state)
+    assert check_stopping(StoppingRule(patience=3, min_improvement=0.001), state) is None
+    state.window_start = 2
+    assert check_stopping(StoppingRule(patience=3, min_improvement=0.01), state) is None
+
+    # Budgets: evaluations spent, and an iteration that would overrun the clock at the current pace.
+    assert "evaluation budget" in check_stopping(StoppingRule(max_evaluations=20), StoppingState(evaluations=20))
+    assert StoppingState(evaluations=17).evaluations_left(StoppingRule(max_evaluations=20)) == 3
+    clock = StoppingState(elapsed_s=50.0, iteration_s=[8.0, 12.0])
+    assert check_stopping(StoppingRule(max_seconds=61.0), clock) is None
+    assert "wall-clock" in check_stopping(StoppingRule(max_seconds=59.0), clock)
+
+    # EI floor on a fitted surrogate of a flat objective.
+    opt = Optimizer([Real(0.0, 1.0), Real(0.0, 1.0)], random_state=0, n_initial_points=3)
+    rng = np.random.RandomState(0)
+    X = rng.uniform(size=(12, 2)).tolist()
+    opt.tell(X, [-0.5 + 1e-4 * x[0] for x in X])
+    state = StoppingState()
+    assert "expected improvement" in check_stopping(StoppingRule(ei_floor=0.05), state, opt)
+    assert state.last_max_ei is not None and state.last_max_ei < 0.05
+
+@pytest.fixture
+def flat_agent_run(closed_loop):
+    loop = closed_loop(lambda predictions_df, _: 0.5)
+
+    def run(**kwargs):
+        loop.calls.clear()
+        loop.run(max_iterations=10, n_initial_points=8, **kwargs)
+        return loop.summaries()[-1], [rows for _, rows in loop.calls]
+    return run
+
+def test_plateaued_run_stops_early_and_records_why(flat_agent_run):
+    from src.stopping import StoppingRule
+    summary, calls = flat_agent_run(stopping=StoppingRule(patience=2, min_improvement=1e-3))
+    stop = summary["stopping"]
+    assert stop["iterations_run"] == 2 and "over the last 2 iterations" in stop["stopped_early"]
+    assert stop["best_history"] == [0.5, 0.5, 0.5] and stop["rule"]["patience"] == 2
+    assert stop["agent_evaluations"] == sum(calls)
+
+def test_evaluation_budget_trims_the_last_batch(flat_agent_run):
+    from src.stopping import StoppingRule
+    summary, calls = flat_agent_run(stopping=StoppingRule(patience=1))
+    n_doe = calls[0]
+    summary, calls = flat_agent_run(stopping=StoppingRule(max_evaluations=n_doe + 6))
+    stop = summary["stopping"]
+    assert calls == [n_doe, 1, 1, 1, 1, 1, 1]  # 4 candidates, then a batch trimmed to 2
+    assert stop["iterations_run"] == 2 and stop["agent_evaluations"] == n_doe + 6
+    assert "evaluation budget" in stop["stopped_early"]
+
+def test_evaluation_budget_caps_the_initial_doe(flat_agent_run):
+    from src.stopping import StoppingRule
+    summary, calls = flat_agent_run(stopping=StoppingRule(max_evaluations=5))
+    stop = summary["stopping"]
+    assert calls == [5] and stop["agent_evaluations"] == 5 and stop["iterations_run"] == 0
+    assert "evaluation budget" in stop["stopped_early"]
@@ -0,0 +1,86 @@
+# tests/test_surrogates.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _objective(X: np.ndarray) -> np.ndarray:
+    return np.sin(3.0 * X[:, 0]) + (X[:, 1] - 0.5) ** 2 + 0.1 * X[:, 2:].sum(axis=1)
+
+def test_sparse_gp_matches_exact_gp_and_updates_incrementally(project_root: Path):
+    """
+    Below n_inducing points the sparse GP is the exact GP; appended rows update the fit
+    without re-choosing hyperparameters, to the same statistics a full pass would give.
+    """
+    sys.path.insert(0, str(project_root))
+    from src.surrogates import SparseGPRegressor, clear_surrogate_states
+    clear_surrogate_states()
+    rng = np.random.RandomState(0)
+    X = rng.uniform(size=(60, 4))
+    y = _objective(X) + 0.05 * rng.normal(size=60)
+    Xt = rng.uniform(size=(7, 4))
+
+    sgp = SparseGPRegressor(n_inducing=128, random_state=0).fit(X, y)
+    s = sgp.state_
+    # Exact GP posterior with the same kernel, noise and y scaling (up to the Kmm jitter).
+    K = s.kernel(X) + s.noise * np.eye(len(X))
+    Ks = s.kernel(Xt, X)
+    yn = (y - s.y_mean) / s.y_std
+    mean = s.y_mean + s.y_std * Ks @ np.linalg.solve(K, yn)
+    var = s.kernel.diag(Xt) - np.sum(Ks * np.linalg.solve(K, Ks.T).T, axis=1)
+    mu, std = sgp.predict(Xt, return_std=True)
+    np.testing.assert_allclose(mu, mean, rtol=1e-4)
+    np.testing.assert_allclose(std, s.y_std * np.sqrt(var), rtol=1e-3)
+
+    # A fresh (cloned) estimator on the same data plus 10 rows extends the remembered fit.
+    X2 = np.vstack([X, rng.uniform(size=(10, 4))])
+    y2 = np.concatenate([y, _objective(X2[60:])])
+    s2 = SparseGPRegressor(n_inducing=128, random_state=0).fit(X2, y2).state_
+    assert s2.n == 70 and s2.n_hyper == 60 and s2.kernel is s.kernel and s2.Z is s.Z
+    V = np.linalg.solve(s.Kmm_chol, s.kernel(s.Z, X2))
+    np.testing.assert_allclose(s2.A, V @ V.T, rtol=1e-8, atol=1e-8)
+    np.testing.assert_allclose(s2.b, V @ ((y2 - s.y_mean) / s.y_std), rtol=1e-8, atol=1e-8)
+
+    # Doubling the data re-chooses the hyperparameters and inducing points.
+    X3 = np.vstack([X2, rng.uniform(size=(60, 4))])
+    assert SparseGPRegressor(n_inducing=128, random_state=0).fit(X3, _objective(X3)).state_.n_hyper == 130
+
+@pytest.mark.parametrize("surrogate", ["gp", "rf", "et", "gbrt", "sparse_gp"])
+def test_every_surrogate_drives_ask_tell(project_root: Path, surrogate: str):
+    """Each backend plugs into skopt's Optimizer and proposes in-bounds batches."""
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    from src.surrogates import LazyRefit, make_optimizer, clear_surrogate_states
+    clear_surrogate_states()
+    space = [Real(0.0, 20.0, name="filler_wtpct"), Real(200.0, 240.0, name="Tm_C"), Real(2.5, 8.33, name="N_rps")]
+    opt = make_optimizer(space, surrogate=surrogate, random_state=1, n_initial_points=5)
+    rng = np.random.RandomState(2)
+    X = np.column_stack([rng.uniform(d.low, d.high, size=25) for d in space])
+    opt.tell(X.tolist(), _objective((X - [d.low for d in space]) / [d.high - d.low for d in space]).tolist())
+    batch = opt.ask(n_points=3)
+    assert len(batch) == 3
+    for point in batch:
+        assert all(d.low <= v <= d.high for d, v in zip(space, point))
+    assert [d.name for d in opt.space.dimensions] == [d.name for d in space]
+
+    if surrogate in ("rf", "et", "gbrt"):
+        # Refitting on already-fitted data (as the ask copy does) re-uses the fit.
+        model = opt.models[-1]
+        assert isinstance(model, LazyRefit)
+        Xt = opt.space.transform(opt.Xi)
+        assert LazyRefit(model.estimator).fit(Xt, opt.yi).estimator_ is model.estimator_
+
+def test_benchmark_reports_ask_tell_timings(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from src.surrogates import benchmark_surrogates
+    res = benchmark_surrogates(sizes=(40,), surrogates=("gp", "sparse_gp"), n_dims=3, batch=2, exact_gp_max=20)
+    assert list(res["surrogate"]) == ["gp", "sparse_gp"]
+    assert res.loc[0, "skipped"].startswith("exact GP")
+    assert (res.loc[1, ["cold_fit_s", "ask_s", "tell_s"]] > 0).all()
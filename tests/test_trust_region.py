@@ -0,0 +1,109 @@
+# tests/test_trust_region.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+@pytest.fixture(scope="module")
+def project_root() -> Path:
+    """Fixture to get the project root directory."""
+    return Path(__file__).parent.parent
+
+def _sphere(X):
+    return np.sum((np.asarray(X, dtype=float) - 0.3) ** 2, axis=1).tolist()
+
+def test_region_grows_shrinks_and_restarts(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    from src.trust_region import TrustRegionOptimizer
+    space = [Real(0.0, 1.0, name=f"x{j}") for j in range(16)]
+    opt = TrustRegionOptimizer(space, random_state=0, n_initial_points=5, success_tolerance=2,
+                               length_min=0.1, max_local_points=30, n_candidates=500)
+    rng = np.random.RandomState(0)
+    X0 = rng.uniform(size=(40, 16)).tolist()
+    opt.tell(X0, _sphere(X0))
+    assert opt.state.length == 0.8 and opt.state.best == min(opt.yi)
+    assert len(opt.models) == 1 and opt.stats()["local_points"] == 30  # the fit only sees the nearest points
+
+    best = min(opt.yi)
+    for _ in range(2):  # two improving batches in a row double the length
+        best -= 0.1
+        opt.tell(opt.ask(n_points=4)[:1], [best])
+    assert opt.state.length == 1.6 and opt.state.successes == 0
+
+    # A failing batch of 4 in 16 dimensions: the length halves after ceil(16 / 4) = 4 of them.
+    lengths = []
+    for _ in range(12):
+        opt.tell(opt.ask(n_points=4), [best + 1.0] * 4)
+        lengths.append(opt.state.length)
+    assert lengths[3] == 0.8 and lengths[7] == 0.4 and lengths[11] == 0.2
+    for _ in range(8):
+        opt.tell(opt.ask(n_points=4), [best + 1.0] * 4)
+    # Below length_min: a new region around a random point, with the whole history kept.
+    assert opt.state.restarts == 1 and opt.state.length == 0.8 and opt.state.start == len(opt.yi)
+    assert len(opt.yi) == 40 + 2 + 80
+
+def test_batches_stay_inside_the_region(project_root: Path):
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    from src.trust_region import TrustRegionOptimizer
+    space = [Real(0.0, 10.0, name=f"x{j}") for j in range(15)]
+    opt = TrustRegionOptimizer(space, random_state=1, length_init=0.2, n_candidates=500)
+    rng = np.random.RandomState(1)
+    X0 = (10 * rng.uniform(size=(30, 15))).tolist()
+    opt.tell(X0, _sphere(np.asarray(X0) / 10))
+    for strategy in ("ask", "local_penalization"):
+        batch = opt.propose(6, strategy=strategy)
+        assert len(batch) == 6 and len({tuple(p) for p in batch}) == 6
+        assert opt.region_mask(opt.space.transform(batch)).all()
+    # The box holds the best point and has the volume of a cube of side length_init (less where clipped).
+    lo, hi, center = opt._box
+    np.testing.assert_allclose(center, np.asarray(X0[int(np.argmin(opt.yi))]) / 10)
+    assert (lo <= center).all() and (center <= hi).all()
+    assert np.exp(np.mean(np.log(hi - lo))) <= 0.2 + 1e-9
+
+def test_rejected_candidates_leave_the_region_alone(project_root: Path):
+    """Points the materializer rejects are told to the optimizer but are not a failed batch of the region."""
+    sys.path.insert(0, str(project_root))
+    from skopt.space import Real
+    from src.candidate_materializer import MaterializedBatch
+    from src.main_orchestrator import INFEASIBLE_WEIGHT, ask_feasible_points
+    from src.trust_region import TrustRegionOptimizer
+
+    class RejectAll:
+        def materialize(self, points, existing=None):
+            n = len(points)
+            return MaterializedBatch(points=list(points), formulations=pd.DataFrame(index=range(n)),
+                                     feasible=np.zeros(n, dtype=bool), projected=np.zeros(n, dtype=bool),
+                                     duplicate=np.zeros(n, dtype=bool), reasons=["blocked"] * n)
+
+    space = [Real(0.0, 1.0, name=f"x{j}") for j in range(4)]
+    opt = TrustRegionOptimizer(space, random_state=0, n_initial_points=5, failure_tolerance=1, n_candidates=200)
+    rng = np.random.RandomState(0)
+    X0 = rng.uniform(size=(12, 4)).tolist()
+    opt.tell(X0, [-(0.2 + 0.5 * x[0]) for x in X0])  # minus the agent's weights, as in a run
+    before = (opt.state.length, opt.state.successes, opt.state.failures, opt.state.best)
+
+    assert ask_feasible_points(opt, RejectAll(), n_exploit=4, n_explore=0, max_reasks=3) == []
+    assert len(opt.yi) == 12 + 4 * 4 and opt.yi[12:] == [-INFEASIBLE_WEIGHT] * 16
+    assert (opt.state.length, opt.state.successes, opt.state.failures, opt.state.best) == before
+    opt.tell(opt.ask(n_points=2), [-0.1, -0.1])  # an evaluated batch still counts
+    assert opt.state.length == before[0] / 2
+
+def test_full_space_trust_region_run(tmp_path: Path, closed_loop):
+    loop = closed_loop(lambda predictions_df, _: np.clip(predictions_df["sigma_y_MPa"] / 40.0, 0, 1))
+    summary = loop.run(max_iterations=2, n_initial_points=20, seed=0, trust_region=True, full_search_space=True)
+    assert len(summary["search_space"]) == 15
+    assert summary["trust_region"]["restarts"] == 0 and summary["trust_region"]["local_points"] > 0
+
+    evaluated = pd.concat([pd.read_csv(p) for p in (tmp_path / "compounded").glob("run_*_evaluated.csv")],
+                          ignore_index=True)
+    assert len(evaluated) == 8
+    # The new levers reach the formulations: base B and the nucleator are the optimizer's, base A closes to 100.
+    wt = evaluated[[c for c in evaluated.columns if c.endswith("_wtpct")]]
+    np.testing.assert_allclose(wt.sum(axis=1), 100.0)
+    assert evaluated["nucleator_ppm"].nunique() > 1 and evaluated["baseB_wtpct"].nunique() > 1
+    assert evaluated["K_knead"].between(1.0, 10.0).all()